@@ -0,0 +1,268 @@
+#include <vector>
+#include <string>
+#include <algorithm>
+#include <cmath>
+
+#include "TuningTools/neuralnetwork/Adam.h"
+
+namespace TuningTool
+{
+
+//==============================================================================
+Adam::Adam()
+  : IMsgService("Adam"),
+    Backpropagation(),
+    nUpdates(0),
+    m_w(nullptr),
+    v_w(nullptr),
+    m_b(nullptr),
+    v_b(nullptr),
+    firstMoments(nullptr),
+    secondMoments(nullptr){;}
+
+//==============================================================================
+Adam::Adam(const NetConfHolder &net,
+           const MSG::Level msglevel,
+           const std::string &name )
+  : IMsgService("Adam"),
+    Backpropagation(net, msglevel, name),
+    beta1(net.getBeta1()),
+    beta2(net.getBeta2()),
+    epsilon(net.getEpsilon()),
+    nUpdates(0),
+    m_w(nullptr),
+    v_w(nullptr),
+    m_b(nullptr),
+    v_b(nullptr),
+    firstMoments(nullptr),
+    secondMoments(nullptr)
+{
+  // Allocate space for this object (the moments are allocated zeroed):
+  allocateSpace();
+}
+
+//==============================================================================
+Adam::Adam(const Adam &net)
+  : IMsgService("Adam"),
+    Backpropagation(),
+    nUpdates(0),
+    m_w(nullptr),
+    v_w(nullptr),
+    m_b(nullptr),
+    v_b(nullptr),
+    firstMoments(nullptr),
+    secondMoments(nullptr)
+{
+  this->operator=(net);
+}
+
+//==============================================================================
+void Adam::copyMoments(const Adam &net)
+{
+  nUpdates = net.nUpdates;
+  memcpy(firstMoments, net.firstMoments, paramSize*sizeof(REAL));
+  memcpy(secondMoments, net.secondMoments, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+Adam& Adam::operator=(const Adam &net)
+{
+  if ( this == &net) {
+    return *this;
+  }
+
+  Backpropagation::operator=(net);
+
+  beta1 = net.beta1;
+  beta2 = net.beta2;
+  epsilon = net.epsilon;
+
+  if (!isAllocated()){
+    allocateSpace();
+  }
+
+  this->copyMoments(net);
+
+  return *this;
+}
+
+//==============================================================================
+bool Adam::isAllocated() const
+{
+  if ( m_w != nullptr && v_w != nullptr &&
+       m_b != nullptr && v_b != nullptr )
+  {
+    return true;
+  } else if ( m_w == nullptr && v_w == nullptr &&
+              m_b == nullptr && v_b == nullptr )
+  {
+    return false;
+  } else {
+    MSG_FATAL("Adam pointers point both to memory regions and to "
+        "nullptr.")
+  }
+}
+
+//==============================================================================
+void Adam::allocateSpace()
+{
+  // Call parent space allocation:
+  if ( !Backpropagation::isAllocated() ) {
+    Backpropagation::allocateSpace();
+  }
+
+  if ( isAllocated() ) {
+    MSG_ERROR("Attempted to reallocate " << getLogName()
+        << "(" << m_name << ")");
+    return;
+  }
+
+  MSG_DEBUG("Allocating Adam space for " << m_name << "...");
+
+  try {
+    firstMoments = allocateParameters(m_w, m_b);
+    secondMoments = allocateParameters(v_w, v_b);
+  } catch (const std::bad_alloc &xa) {
+    MSG_FATAL("Abort! Reason: " << xa.what() );
+  }
+}
+
+//==============================================================================
+Adam::~Adam()
+{
+  releaseParameters(firstMoments, m_w, m_b);
+  releaseParameters(secondMoments, v_w, v_b);
+}
+
+//==============================================================================
+void Adam::updateRow(REAL *w, REAL *d, REAL *m, REAL *v,
+    const unsigned n,
+    const REAL val,
+    const REAL c1,
+    const REAL c2)
+{
+  const REAL b1 = beta1, b2 = beta2, eps = epsilon;
+  const REAL rate = learningRate * c1;
+  for (unsigned k=0; k<n; k++)
+  {
+    const REAL g = d[k] * val;
+    m[k] = b1 * m[k] + (1 - b1) * g;
+    v[k] = b2 * v[k] + (1 - b2) * g * g;
+    w[k] += rate * m[k] / ( std::sqrt( v[k] * c2 ) + eps );
+    d[k] = 0;
+  }
+}
+
+//==============================================================================
+void Adam::updateWeights(const unsigned numEvents)
+{
+  const REAL val = 1. / static_cast<REAL>(numEvents);
+
+  // Bias corrections of the moments, which are initialized with zeros:
+  ++nUpdates;
+  const REAL c1 = 1. / ( 1. - std::pow( static_cast<double>(beta1), nUpdates ) );
+  const REAL c2 = 1. / ( 1. - std::pow( static_cast<double>(beta2), nUpdates ) );
+
+  for (unsigned i=0; i<(nNodes.size()-1); i++)
+  {
+    for (unsigned j=0; j<nNodes[(i+1)]; j++)
+    {
+      //If the node is frozen, we just reset the accumulators,
+      //otherwise, we actually train the weights connected to it.
+      if (frozenNode[i][j])
+      {
+        MSG_DEBUG("Skipping updating node " << j
+            << " from hidden layer " << i
+            << ", since it is frozen!");
+        std::fill_n( dw[i][j], nNodes[i], 0. );
+        if (usingBias[i]) {
+          db[i][j] = 0;
+        } else {
+          bias[i][j] = 0;
+        }
+      } else {
+        updateRow(weights[i][j], dw[i][j], m_w[i][j], v_w[i][j], nNodes[i],
+            val, c1, c2);
+        if (usingBias[i]) {
+          updateRow(&bias[i][j], &db[i][j], &m_b[i][j], &v_b[i][j], 1,
+              val, c1, c2);
+        } else {
+          bias[i][j] = 0;
+        }
+      }
+    }
+  }
+}
+
+//===============================================================================
+void Adam::copyNeededTrainingInfo(const Backpropagation &net)
+{
+  if ( this == &net) {
+    return;
+  }
+
+  Backpropagation::copyNeededTrainingInfo(net);
+
+  const Adam *adam_net(nullptr);
+
+  if ( (adam_net = dynamic_cast<const Adam*>(&net)) != nullptr )
+  {
+    this->copyMoments(*adam_net);
+  } else {
+    MSG_FATAL("Attempted to copy needed information to a Adam training "
+        "algorithm from an trainining algorithm which isn't an instance "
+        "from it!");
+  }
+}
+
+//===============================================================================
+void Adam::copyNeededTrainingInfoFast(const Backpropagation &net)
+{
+  Backpropagation::copyNeededTrainingInfoFast(net);
+  this->copyMoments(static_cast<const Adam&>(net));
+}
+
+//==============================================================================
+void Adam::resetNeededTrainingInfo()
+{
+  Backpropagation::resetNeededTrainingInfo();
+  nUpdates = 0;
+  std::fill_n( firstMoments, paramSize, 0. );
+  std::fill_n( secondMoments, paramSize, 0. );
+}
+
+//==============================================================================
+std::size_t Adam::getTrainingStateSize() const
+{
+  // The moments followed by the number of updates:
+  return 2*paramSize + 1;
+}
+
+//==============================================================================
+void Adam::getTrainingState(REAL *buffer) const
+{
+  memcpy(buffer, firstMoments, paramSize*sizeof(REAL));
+  memcpy(buffer + paramSize, secondMoments, paramSize*sizeof(REAL));
+  buffer[2*paramSize] = static_cast<REAL>(nUpdates);
+}
+
+//==============================================================================
+void Adam::setTrainingState(const REAL *buffer)
+{
+  memcpy(firstMoments, buffer, paramSize*sizeof(REAL));
+  memcpy(secondMoments, buffer + paramSize, paramSize*sizeof(REAL));
+  nUpdates = static_cast<unsigned>(buffer[2*paramSize]);
+}
+
+//==============================================================================
+void Adam::showInfo() const
+{
+  Backpropagation::showInfo();
+  MSG_INFO("TRAINING ALGORITHM INFORMATION");
+  MSG_INFO("Training algorithm: Adam");
+  MSG_INFO("Gradients moving average decay rate (beta1) = " << beta1);
+  MSG_INFO("Squared gradients moving average decay rate (beta2) = " << beta2);
+  MSG_INFO("Denominator stability term (epsilon) = " << epsilon);
+}
+
+} // namespace TuningTool
@@ -3,8 +3,10 @@
 #include <cstdlib>
 #include <typeinfo>
 #include <sstream>
+#include <algorithm>
 
 #include "TuningTools/neuralnetwork/Backpropagation.h"
+#include "TuningTools/system/gemm.h"
 
 namespace TuningTool
 {
@@ -16,6 +18,7 @@ Backpropagation::Backpropagation()
     sigma(nullptr),
     dw(nullptr),
     db(nullptr),
+    grads(nullptr),
     frozenNode(nullptr){;}
  
 //==============================================================================
@@ -29,6 +32,7 @@ Backpropagation::Backpropagation(const NetConfHolder &net,
     sigma(nullptr),
     dw(nullptr),
     db(nullptr),
+    grads(nullptr),
     frozenNode(nullptr)
 {
 
@@ -41,14 +45,10 @@ Backpropagation::Backpropagation(const NetConfHolder &net,
     // For the frozen nodes, we first initialize them all as unfrozen.
     setFrozen(i, false);
     
-    // Initializing dw and db.
+    // Initializing sigma (dw and db are allocated zeroed).
     for (unsigned j=0; j<nNodes[i+1]; j++) 
     {
-      this->db[i][j] = 0.;
       this->sigma[i][j] = 0.;
-      for (unsigned k=0; k<nNodes[i]; k++) {
-        this->dw[i][j][k] = 0.;
-      }
     }
   }
 }
@@ -62,6 +62,7 @@ Backpropagation::Backpropagation(const Backpropagation &net)
     sigma(nullptr),
     dw(nullptr),
     db(nullptr),
+    grads(nullptr),
     frozenNode(nullptr)
 {
   this->operator=(net);
@@ -79,14 +80,7 @@ void Backpropagation::copyFrozenNodes(const Backpropagation &net)
 //==============================================================================
 void Backpropagation::copyDeltas(const Backpropagation &net)
 {
-  for (unsigned i=0; i<(nNodes.size() - 1); i++)
-  {
-    memcpy(db[i], net.db[i], nNodes[i+1]*sizeof(REAL));
-    for (unsigned j=0; j<nNodes[i+1]; j++)
-    {
-      memcpy(dw[i][j], net.dw[i][j], nNodes[i]*sizeof(REAL));
-    }
-  }
+  memcpy(grads, net.grads, paramSize*sizeof(REAL));
 }
 
 //==============================================================================
@@ -161,19 +155,12 @@ void Backpropagation::allocateSpace()
 
   try {
     frozenNode = new bool* [size];
-    db = new REAL* [size];
     sigma = new REAL* [size];
-    dw = new REAL** [size];
+    grads = allocateParameters(dw, db);
     for (unsigned i=0; i<size; i++)
     {
       frozenNode[i] = new bool [nNodes[i+1]];
-      db[i] = new REAL [nNodes[i+1]];
       sigma[i] = new REAL [nNodes[i+1]];
-      dw[i] = new REAL* [nNodes[i+1]];
-      for (unsigned j=0; j<nNodes[i+1]; j++)
-      {
-        dw[i][j] = new REAL [nNodes[i]];
-      }
     }
   } catch (const std::bad_alloc &xa) {
     MSG_FATAL("Abort! Reason: " << xa.what() );
@@ -183,8 +170,7 @@ void Backpropagation::allocateSpace()
 //==============================================================================
 Backpropagation::~Backpropagation()
 {
-  releaseMatrix(db);
-  releaseMatrix(dw);
+  releaseParameters(grads, dw, db);
   releaseMatrix(sigma);
 
   // Deallocating the frozenNode matrix.
@@ -249,22 +235,107 @@ void Backpropagation::calculateNewWeights(const REAL *output,
 }
 
 //==============================================================================
-void Backpropagation::addToGradient(const Backpropagation &net)
+void Backpropagation::retropropagateErrors(const REAL *output, 
+    const REAL *target,
+    const unsigned nEvents)
 {
-  //Accumulating the deltas.
-  for (unsigned i=0; i<(nNodes.size()-1); i++)
+  const unsigned size = nNodes.size() - 1;
+
+  if ( batchSigma.size() != size ) batchSigma.resize(size);
+  for (unsigned i=0; i<size; i++) {
+    if ( batchSigma[i].size() < nEvents*nNodes[i+1] ) {
+      batchSigma[i].resize( nEvents*nNodes[i+1] );
+    }
+  }
+
+  const unsigned nOut = nNodes[size];
+  REAL *outSigma = batchSigma[size-1].data();
+  for (unsigned e=0; e<nEvents; e++) {
+    for (unsigned i=0; i<nOut; i++) {
+      outSigma[e*nOut + i] = target[i] - output[e*nOut + i];
+    }
+  }
+  multTrfDeriv( size-1, output, outSigma, nEvents );
+
+  //Retropropagating the error: sigma[i] = sigma[i+1] x W[i+1]
+  for (int i=(size-2); i>=0; i--)
   {
-    for (unsigned j=0; j<nNodes[(i+1)]; j++)
+    const unsigned nLayer = nNodes[i+1];
+    REAL *layerSigma = batchSigma[i].data();
+    const REAL *layerOut = batchOutputs[i].data();
+    util::gemm_nn( batchSigma[i+1].data(), weights[i+1][0], layerSigma,
+        nEvents, nLayer, nNodes[i+2] );
+    multTrfDeriv( i, layerOut, layerSigma, nEvents );
+  }
+}
+
+//==============================================================================
+REAL Backpropagation::applySupervisedInputs(const REAL *input, 
+    const unsigned nEvents,
+    const REAL *target, 
+    const REAL* &output)
+{
+  // Propagating the input block.
+  output = propagateInputs(input, nEvents);
+
+  //Returning the sum of the events MSE
+  return sumSquaredErrors(output, target, nEvents, nNodes[nNodes.size()-1]);
+}
+
+//==============================================================================
+void Backpropagation::calculateNewWeights(const REAL *output, 
+    const REAL *target,
+    const unsigned nEvents)
+{
+  const unsigned size = nNodes.size() - 1;
+
+  retropropagateErrors(output, target, nEvents);
+
+  //Accumulating the deltas: dw[i] += sigma[i]^T x layerInput[i]
+  for (unsigned i=0; i<size; i++)
+  {
+    const REAL *layerSigma = batchSigma[i].data();
+    const REAL *layerInput = (i) ? batchOutputs[i-1].data() : batchInput;
+    util::gemm_tn( layerSigma, layerInput, dw[i][0],
+        nNodes[i+1], nNodes[i], nEvents );
+    for (unsigned e=0; e<nEvents; e++)
     {
-      for (unsigned k=0; k<nNodes[i]; k++)
-      {
-        dw[i][j][k] += net.dw[i][j][k];
-      }
-      db[i][j] += net.db[i][j];
+      const REAL *row = layerSigma + e*nNodes[i+1];
+      for (unsigned j=0; j<nNodes[(i+1)]; j++) db[i][j] += row[j];
     }
   }
 }
 
+//==============================================================================
+void Backpropagation::addToGradient(const Backpropagation &net)
+{
+  //Accumulating the deltas (padding values are kept zero on both buffers).
+  REAL *out = this->grads;
+  const REAL *in = net.grads;
+  for (std::size_t idx=0; idx<paramSize; idx++)
+  {
+    out[idx] += in[idx];
+  }
+}
+
+//==============================================================================
+void Backpropagation::getGradient(REAL *buffer) const
+{
+  memcpy(buffer, grads, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+void Backpropagation::setGradient(const REAL *buffer)
+{
+  memcpy(grads, buffer, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+void Backpropagation::resetGradient()
+{
+  std::fill_n(grads, paramSize, 0.);
+}
+
 //==============================================================================
 void Backpropagation::updateWeights(const unsigned numEvents)
 {
@@ -382,5 +453,11 @@ void Backpropagation::copyNeededTrainingInfoFast(const Backpropagation &net)
   this->copyDeltas(net); // Need to reset deltas
 }
 
+//===============================================================================
+void Backpropagation::resetNeededTrainingInfo()
+{
+  std::fill_n( grads, paramSize, 0. );
+}
+
 
 } // namespace TuningTool
@@ -0,0 +1,225 @@
+#include <vector>
+#include <string>
+#include <algorithm>
+
+#include "TuningTools/neuralnetwork/Momentum.h"
+
+namespace TuningTool
+{
+
+//==============================================================================
+Momentum::Momentum()
+  : IMsgService("Momentum"),
+    Backpropagation(),
+    vel_w(nullptr),
+    vel_b(nullptr),
+    velocities(nullptr){;}
+
+//==============================================================================
+Momentum::Momentum(const NetConfHolder &net,
+                   const MSG::Level msglevel,
+                   const std::string &name )
+  : IMsgService("Momentum"),
+    Backpropagation(net, msglevel, name),
+    momentum(net.getMomentum()),
+    vel_w(nullptr),
+    vel_b(nullptr),
+    velocities(nullptr)
+{
+  // Allocate space for this object (the velocities are allocated zeroed):
+  allocateSpace();
+}
+
+//==============================================================================
+Momentum::Momentum(const Momentum &net)
+  : IMsgService("Momentum"),
+    Backpropagation(),
+    vel_w(nullptr),
+    vel_b(nullptr),
+    velocities(nullptr)
+{
+  this->operator=(net);
+}
+
+//==============================================================================
+void Momentum::copyVelocities(const Momentum &net)
+{
+  memcpy(velocities, net.velocities, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+Momentum& Momentum::operator=(const Momentum &net)
+{
+  if ( this == &net) {
+    return *this;
+  }
+
+  Backpropagation::operator=(net);
+
+  momentum = net.momentum;
+
+  if (!isAllocated()){
+    allocateSpace();
+  }
+
+  this->copyVelocities(net);
+
+  return *this;
+}
+
+//==============================================================================
+bool Momentum::isAllocated() const
+{
+  if ( vel_w != nullptr && vel_b != nullptr )
+  {
+    return true;
+  } else if ( vel_w == nullptr && vel_b == nullptr )
+  {
+    return false;
+  } else {
+    MSG_FATAL("Momentum pointers point both to memory regions and to "
+        "nullptr.")
+  }
+}
+
+//==============================================================================
+void Momentum::allocateSpace()
+{
+  // Call parent space allocation:
+  if ( !Backpropagation::isAllocated() ) {
+    Backpropagation::allocateSpace();
+  }
+
+  if ( isAllocated() ) {
+    MSG_ERROR("Attempted to reallocate " << getLogName()
+        << "(" << m_name << ")");
+    return;
+  }
+
+  MSG_DEBUG("Allocating Momentum space for " << m_name << "...");
+
+  try {
+    velocities = allocateParameters(vel_w, vel_b);
+  } catch (const std::bad_alloc &xa) {
+    MSG_FATAL("Abort! Reason: " << xa.what() );
+  }
+}
+
+//==============================================================================
+Momentum::~Momentum()
+{
+  releaseParameters(velocities, vel_w, vel_b);
+}
+
+//==============================================================================
+void Momentum::updateRow(REAL *w, REAL *d, REAL *v,
+    const unsigned n,
+    const REAL val)
+{
+  const REAL mu = momentum;
+  const REAL rate = learningRate * val;
+  for (unsigned k=0; k<n; k++)
+  {
+    v[k] = mu * v[k] + rate * d[k];
+    w[k] += v[k];
+    d[k] = 0;
+  }
+}
+
+//==============================================================================
+void Momentum::updateWeights(const unsigned numEvents)
+{
+  const REAL val = 1. / static_cast<REAL>(numEvents);
+
+  for (unsigned i=0; i<(nNodes.size()-1); i++)
+  {
+    for (unsigned j=0; j<nNodes[(i+1)]; j++)
+    {
+      //If the node is frozen, we just reset the accumulators,
+      //otherwise, we actually train the weights connected to it.
+      if (frozenNode[i][j])
+      {
+        MSG_DEBUG("Skipping updating node " << j
+            << " from hidden layer " << i
+            << ", since it is frozen!");
+        std::fill_n( dw[i][j], nNodes[i], 0. );
+        if (usingBias[i]) {
+          db[i][j] = 0;
+        } else {
+          bias[i][j] = 0;
+        }
+      } else {
+        updateRow(weights[i][j], dw[i][j], vel_w[i][j], nNodes[i], val);
+        if (usingBias[i]) {
+          updateRow(&bias[i][j], &db[i][j], &vel_b[i][j], 1, val);
+        } else {
+          bias[i][j] = 0;
+        }
+      }
+    }
+  }
+}
+
+//===============================================================================
+void Momentum::copyNeededTrainingInfo(const Backpropagation &net)
+{
+  if ( this == &net) {
+    return;
+  }
+
+  Backpropagation::copyNeededTrainingInfo(net);
+
+  const Momentum *mom_net(nullptr);
+
+  if ( (mom_net = dynamic_cast<const Momentum*>(&net)) != nullptr )
+  {
+    this->copyVelocities(*mom_net);
+  } else {
+    MSG_FATAL("Attempted to copy needed information to a Momentum training "
+        "algorithm from an trainining algorithm which isn't an instance "
+        "from it!");
+  }
+}
+
+//===============================================================================
+void Momentum::copyNeededTrainingInfoFast(const Backpropagation &net)
+{
+  Backpropagation::copyNeededTrainingInfoFast(net);
+  this->copyVelocities(static_cast<const Momentum&>(net));
+}
+
+//==============================================================================
+void Momentum::resetNeededTrainingInfo()
+{
+  Backpropagation::resetNeededTrainingInfo();
+  std::fill_n( velocities, paramSize, 0. );
+}
+
+//==============================================================================
+std::size_t Momentum::getTrainingStateSize() const
+{
+  return paramSize;
+}
+
+//==============================================================================
+void Momentum::getTrainingState(REAL *buffer) const
+{
+  memcpy(buffer, velocities, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+void Momentum::setTrainingState(const REAL *buffer)
+{
+  memcpy(velocities, buffer, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+void Momentum::showInfo() const
+{
+  Backpropagation::showInfo();
+  MSG_INFO("TRAINING ALGORITHM INFORMATION");
+  MSG_INFO("Training algorithm: Gradient Descent with Momentum");
+  MSG_INFO("Momentum = " << momentum);
+}
+
+} // namespace TuningTool
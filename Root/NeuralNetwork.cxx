@@ -1,6 +1,7 @@
 
 #include "TuningTools/neuralnetwork/NeuralNetwork.h"
 #include "TuningTools/system/util.h"
+#include "TuningTools/system/gemm.h"
 
 #include <iostream>
 #include <new>
@@ -9,6 +10,7 @@
 #include <string>
 #include <sstream>
 #include <stdexcept>
+#include <algorithm>
 
 namespace TuningTool
 {
@@ -20,7 +22,11 @@ NeuralNetwork::NeuralNetwork()
     m_name("Unnamed"),
     weights(nullptr),
     bias(nullptr),
-    layerOutputs(nullptr){;}
+    params(nullptr),
+    paramSize(0),
+    layerOutputs(nullptr),
+    batchInput(nullptr),
+    fastTanh(false){;}
 
 //===============================================================================
 NeuralNetwork::NeuralNetwork( const NetConfHolder &net, 
@@ -31,8 +37,12 @@ NeuralNetwork::NeuralNetwork( const NetConfHolder &net,
     m_name(name),
     weights(nullptr),
     bias(nullptr),
+    params(nullptr),
+    paramSize(0),
     layerOutputs(nullptr),
-    nNodes(net.getNodes())
+    batchInput(nullptr),
+    nNodes(net.getNodes()),
+    fastTanh(net.getFastTanh())
 {
   MSG_DEBUG( "Creating new object of type " << getLogName() << "...");
   // Allocate memory for the neural network
@@ -71,8 +81,12 @@ NeuralNetwork::NeuralNetwork(const NeuralNetwork &net)
     m_name(net.m_name),
     weights(nullptr),
     bias(nullptr),
+    params(nullptr),
+    paramSize(0),
     layerOutputs(nullptr),
-    nNodes(net.nNodes)
+    batchInput(nullptr),
+    nNodes(net.nNodes),
+    fastTanh(net.fastTanh)
 {
   this->operator=(net);
 }
@@ -94,6 +108,7 @@ NeuralNetwork& NeuralNetwork::operator=(const NeuralNetwork &net)
   usingBias.assign(net.usingBias.begin(), net.usingBias.end());
   trfFunc.assign(net.trfFunc.begin(), net.trfFunc.end());
   trfFuncStr.assign(net.trfFuncStr.begin(), net.trfFuncStr.end());  
+  fastTanh = net.fastTanh;
 
   if (!isAllocated()){
     allocateSpace();
@@ -130,16 +145,26 @@ void NeuralNetwork::copyWeigthsFast(const NeuralNetwork &net)
   MSG_DEBUG( "Copying " << net.m_name << " network weigths to "
              << this->m_name );
 
+  // Weights and biases share the same buffer layout:
+  memcpy(params, net.params, paramSize*sizeof(REAL));
   for (unsigned i=0; i<(nNodes.size()-1); i++)
   {
-    memcpy(bias[i], net.bias[i], nNodes[i+1]*sizeof(REAL));
     memcpy(layerOutputs[i+1], net.layerOutputs[i+1], nNodes[i+1]*sizeof(REAL));
-    for (unsigned j=0; j<nNodes[i+1]; j++) {
-      memcpy(weights[i][j], net.weights[i][j], nNodes[i]*sizeof(REAL));
-    }
   }
 }
 
+//===============================================================================
+void NeuralNetwork::getParams(REAL *buffer) const
+{
+  memcpy(buffer, params, paramSize*sizeof(REAL));
+}
+
+//===============================================================================
+void NeuralNetwork::setParams(const REAL *buffer)
+{
+  memcpy(params, buffer, paramSize*sizeof(REAL));
+}
+
 //===============================================================================
 void NeuralNetwork::loadWeights( const std::vector<REAL> &weightsVec, 
     const std::vector<REAL> &biasVec )
@@ -202,12 +227,14 @@ bool NeuralNetwork::isAllocated() const
 {
   if ( layerOutputs != nullptr &&
        bias != nullptr &&
-       weights != nullptr )
+       weights != nullptr &&
+       params != nullptr )
   {
     return true;
   } else if ( layerOutputs == nullptr &&
               bias == nullptr &&
-              weights == nullptr )
+              weights == nullptr &&
+              params == nullptr )
   {
     return false;
   } else {
@@ -228,27 +255,75 @@ void NeuralNetwork::allocateSpace()
 
   MSG_DEBUG("Allocating NeuralNetwork space for " << m_name << "...");
 
+  const unsigned size = nNodes.size() - 1;
+
+  // Compute the parameter buffer layout, where each layer block (weights
+  // followed by biases) starts at an aligned position:
+  const std::size_t alignValues = PARAM_ALIGNMENT / sizeof(REAL);
+  layerOffset.resize(size);
+  paramSize = 0;
+  for (unsigned i=0; i<size; i++)
+  {
+    layerOffset[i] = paramSize;
+    const std::size_t layerSize = nNodes[i+1]*(nNodes[i] + 1);
+    paramSize += ( (layerSize + alignValues - 1) / alignValues ) * alignValues;
+  }
+
   try {
     layerOutputs = new REAL* [nNodes.size()];
     layerOutputs[0] = nullptr; // This will be a pointer to the input event.
 
-    const unsigned size = nNodes.size() - 1;
-
-    bias = new REAL* [size];
-    weights = new REAL** [size];
+    params = allocateParameters(weights, bias);
 
     for (unsigned i=0; i<size; i++)
     {
-      bias[i] = new REAL [nNodes[i+1]];
       layerOutputs[i+1] = new REAL [nNodes[i+1]];
-      weights[i] = new REAL* [nNodes[i+1]];
-      for (unsigned j=0; j<nNodes[i+1]; j++) weights[i][j] = new REAL [nNodes[i]];
     }
   } catch (const std::bad_alloc &xa) {
     MSG_FATAL("Abort! Reason: " << xa.what() );
   }
 }
 
+//===============================================================================
+REAL *NeuralNetwork::allocateParameters(REAL ***&w, REAL **&b) const
+{
+  const unsigned size = nNodes.size() - 1;
+  void *mem(nullptr);
+  if ( posix_memalign( &mem, PARAM_ALIGNMENT, paramSize*sizeof(REAL) ) ) {
+    throw std::bad_alloc();
+  }
+  REAL *buffer = static_cast<REAL*>(mem);
+  std::fill_n( buffer, paramSize, 0. );
+
+  w = new REAL** [size];
+  b = new REAL* [size];
+  for (unsigned i=0; i<size; i++)
+  {
+    REAL *layer = buffer + layerOffset[i];
+    w[i] = new REAL* [nNodes[i+1]];
+    for (unsigned j=0; j<nNodes[i+1]; j++) w[i][j] = layer + j*nNodes[i];
+    b[i] = layer + nNodes[i+1]*nNodes[i];
+  }
+  return buffer;
+}
+
+//===============================================================================
+void NeuralNetwork::releaseParameters(REAL *&buffer, REAL ***&w, REAL **&b) const
+{
+  if (w)
+  {
+    for (unsigned i=0; i<(nNodes.size()-1); i++)
+    {
+      delete [] w[i];
+    }
+    delete [] w;
+    w = nullptr;
+  }
+  // Biases are views of the buffer:
+  delete [] b; b = nullptr;
+  free(buffer); buffer = nullptr;
+}
+
 //===============================================================================
 NeuralNetwork::~NeuralNetwork()
 {
@@ -258,13 +333,12 @@ NeuralNetwork::~NeuralNetwork()
   const unsigned size = nNodes.size() - 1;
 
   // Deallocating the bias and weight matrices.
-  releaseMatrix(bias);
-  releaseMatrix(weights);
+  releaseParameters(params, weights, bias);
   
   // Deallocating the hidden outputs matrix.
   if (layerOutputs)
   {
-    for (unsigned i=1; i<size; i++)
+    for (unsigned i=1; i<=size; i++)
     {
       delete [] layerOutputs[i];
     }
@@ -326,43 +400,57 @@ const REAL* NeuralNetwork::propagateInput(const REAL *input) const
   return layerOutputs[size];
 }
 
+//===============================================================================
+const REAL* NeuralNetwork::propagateInputs(const REAL *input, 
+    const unsigned nEvents) const
+{
+  batchInput = input;
+  return propagateInputs(input, nEvents, batchOutputs);
+}
 
 //===============================================================================
-void NeuralNetwork::releaseMatrix(REAL **b)
+const REAL* NeuralNetwork::propagateInputs(const REAL *input, 
+    const unsigned nEvents, 
+    std::vector< std::vector<REAL> > &layersOutput) const
 {
-  if (b)
+  const unsigned size = (nNodes.size() - 1);
+
+  if ( layersOutput.size() != size ) layersOutput.resize(size);
+
+  // Propagating the block through the network, one layer at a time.
+  const REAL *layerInput = input;
+  for (unsigned i=0; i<size; i++)
   {
-    for (unsigned i=0; i<(nNodes.size()-1); i++)
-    {
-      if (b[i]) delete [] b[i];
-    }
-    delete [] b;
-    b = NULL;
+    const unsigned nOut = nNodes[i+1];
+    std::vector<REAL> &outVec = layersOutput[i];
+    if ( outVec.size() < nEvents*nOut ) outVec.resize( nEvents*nOut );
+    REAL *out = outVec.data();
+
+    // out = layerInput x W^T
+    util::gemm_nt( layerInput, weights[i][0], out, nEvents, nOut, nNodes[i] );
+    applyTrfFunc( i, out, nEvents );
+    layerInput = out;
   }
-}
 
+  // Returning the network's output.
+  return layersOutput[size-1].data();
+}
 
 //===============================================================================
-void NeuralNetwork::releaseMatrix(REAL ***w)
+void NeuralNetwork::releaseMatrix(REAL **b)
 {
-  if (w)
+  if (b)
   {
     for (unsigned i=0; i<(nNodes.size()-1); i++)
     {
-      if (w[i])
-      {
-        for (unsigned j=0; j<nNodes[i+1]; j++)
-        {
-          if (w[i][j]) delete [] w[i][j];
-        }
-        delete [] w[i];
-      }
+      if (b[i]) delete [] b[i];
     }
-    delete [] w;
-    w = NULL;
+    delete [] b;
+    b = NULL;
   }
 }
 
+
 //===============================================================================
 void NeuralNetwork::setUsingBias(const unsigned layer, const bool val)
 {
@@ -1,22 +1,31 @@
 #include "TuningTools/training/PatternRec.h"
+#include "TuningTools/system/util.h"
+
+#include <algorithm>
+#include <cmath>
+#include <random>
 
 //==============================================================================
 PatternRecognition::PatternRecognition(
     TuningTool::Backpropagation *net, std::vector< Ndarray<REAL,2>* > inTrn, 
     std::vector< Ndarray<REAL,2>* > inVal, std::vector< Ndarray<REAL,2>* > inTst,  
     const TrainGoal mode, const unsigned bSize,
-    const REAL signalWeight, const REAL noiseWeight, MSG::Level msglevel) 
+    const REAL signalWeight, const REAL noiseWeight, MSG::Level msglevel,
+    const unsigned seed) 
   : IMsgService( "PatternRecognition" ),
     Training(net, bSize, msglevel), 
+    seed(seed),
+    streamBlock(0),
     trainGoal(mode),
     goalDet(1.0),
-    goalFa(0.0)
+    goalFa(0.0),
+    rocResolution(0.01)
 {
   MSG_DEBUG("Starting a Pattern Recognition Training Object");
   // Initialize weights for SP calculation
   this->signalWeight = signalWeight;
   this->noiseWeight = noiseWeight;
-  bool hasTstData = !inTst.empty();
+  hasTstData = !inTst.empty();
   useSP = (trainGoal != MSE_STOP) ? true: false; 
 
   if (useSP) {
@@ -35,26 +44,60 @@ PatternRecognition::PatternRecognition(
   
   numPatterns = inTrn.size();
   MSG_DEBUG("Number of patterns: " << numPatterns);
-  outputSize = (numPatterns == 2) ? 1 : numPatterns;
+  // The network may have a single output (only for two patterns, where the
+  // first pattern is the +1 target) or one output for each pattern:
+  outputSize = net->getNumNodes( net->getNumLayers() - 1 );
+  if ( outputSize != numPatterns && !( outputSize == 1 && numPatterns == 2 ) ) 
+  {
+    MSG_FATAL("The network number of outputs (" << outputSize << ") must "
+        "be the number of patterns (" << numPatterns << "), or 1 when there "
+        "are two patterns.");
+  }
+  if ( useSP && numPatterns > 2 ) {
+    MSG_WARNING("The SP stop criteria only uses the first output, " 
+        "evaluated on the first two patterns.");
+  }
   
   // The last 2 parameters for the training case will not be used by the
   // function, so, there is no problem passing the corresponding validation
   // variables to this first function call.
   MSG_DEBUG("Allocating memory for training data.");
-  allocateDataset(inTrn, true, inTrnList, epochValOutputs, numValEvents);
+  allocateDataset(inTrn, true, inTrnList, trnSteps, 
+      epochValOutputs, numValEvents);
+  {
+    std::vector<unsigned> nTrnEvents;
+    for ( const auto* patData : inTrn ) nTrnEvents.push_back( patData->getShape(0) );
+    sampler = new EventSampler( nTrnEvents, batchSize, seed );
+  }
   MSG_DEBUG("Allocating memory for validation data.");
-  allocateDataset(inVal, false, inValList, epochValOutputs, numValEvents);
+  allocateDataset(inVal, false, inValList, valSteps, 
+      epochValOutputs, numValEvents);
   if (hasTstData) {
     MSG_DEBUG("Allocating memory for testing data.");
-    allocateDataset(inTst, false, inTstList, epochTstOutputs, numTstEvents);
+    allocateDataset(inTst, false, inTstList, tstSteps, 
+        epochTstOutputs, numTstEvents);
   }
+  // Per thread buffers used to gather the randomly selected training events
+  // (and the non-contiguous validation and test events) into contiguous
+  // blocks:
+  blockInputs.resize(nThreads);
+  for (unsigned i=0; i<nThreads; i++) {
+    blockInputs[i].resize(EVENT_BLOCK_SIZE*inputSize);
+  }
+  // Indexes of the events presented in each epoch:
+  trnIndices.resize(numPatterns);
+  trnErrors.resize(numPatterns);
+  for (unsigned i=0; i<numPatterns; i++) {
+    trnIndices[i].resize( sampler->count(i) );
+  }
+
   //Creating the targets for each class (maximum sparsed oututs).
   targList = new const REAL* [numPatterns];  
   for (unsigned i=0; i<numPatterns; i++)
   {
     REAL *target = new REAL [outputSize];
     for (unsigned j=0; j<outputSize; j++) target[j] = -1;
-    target[i] = 1;
+    if ( i < outputSize ) target[i] = 1;
     //Saving the target in the list.
     targList[i] = target;    
   }
@@ -66,9 +109,10 @@ PatternRecognition::PatternRecognition(
 //==============================================================================
 void PatternRecognition::allocateDataset(
     std::vector< Ndarray<REAL,2>* > dataSet, const bool forTrain, 
-    const REAL **&inList, REAL **&out, unsigned *&nEv)
+    const REAL **&inList, PatternSteps *&steps, REAL **&out, unsigned *&nEv)
 {
   inList = new const REAL* [numPatterns];
+  steps = new PatternSteps [numPatterns];
 
   if (!forTrain)
   {
@@ -80,12 +124,28 @@ void PatternRecognition::allocateDataset(
   {
     Ndarray<REAL,2>* patData = dataSet[i];
     inputSize = patData->getShape(1);
-    inList[i] = patData->getPtr();
+    steps[i].event = patData->getStep(0);
+    steps[i].feature = patData->getStep(1);
+    steps[i].storage = util::npy_type_to_storage( patData->getTypeNum() );
+    if ( steps[i].storage == REAL_STORAGE ) {
+      inList[i] = patData->getPtr();
+      steps[i].packed = nullptr;
+    } else {
+      inList[i] = nullptr;
+      steps[i].packed = reinterpret_cast<const npy_uint16*>( patData->getPtr() );
+      MSG_DEBUG("Events for pattern " << i << " are held on " 
+          << ( ( steps[i].storage == FLOAT16_STORAGE ) ? "float16" : "bfloat16" )
+          << " storage, they will be widened while propagated.");
+    }
+    if ( steps[i].event != static_cast<npy_intp>(inputSize)
+        || steps[i].feature != 1 ) {
+      MSG_DEBUG("Events for pattern " << i << " are not contiguous (strides "
+          "are (" << steps[i].event << "," << steps[i].feature << ")), "
+          "they will be gathered while propagated.");
+    }
 
     if (forTrain)
     {
-      // FIXME When changing to new DM version
-      dmTrn.push_back(new DataManager(patData->getShape(0)/*, batchSize*/));
       MSG_DEBUG("Number of events for pattern " << i 
           << ":" << patData->getShape(0));
     } else {
@@ -102,16 +162,20 @@ void PatternRecognition::allocateDataset(
 //==============================================================================
 void PatternRecognition::deallocateDataset( const bool forTrain, 
     const REAL **&inList, 
+    PatternSteps *&steps,
     REAL **&out, 
     unsigned *&nEv)
 {
+  if (forTrain) {
+    delete sampler; sampler = nullptr;
+  }
   for (unsigned i=0; i<numPatterns; i++)
   {
-    if (forTrain) delete dmTrn[i];
-    else if (useSP) delete [] out[i];
+    if (!forTrain && useSP) delete [] out[i];
   }
 
   delete [] inList;
+  delete [] steps;
   if (!forTrain)
   {
     delete [] nEv;
@@ -119,16 +183,134 @@ void PatternRecognition::deallocateDataset( const bool forTrain,
   }
 }
 
+//==============================================================================
+void PatternRecognition::setValidFraction( const REAL fraction )
+{
+  inValSubList.clear();
+  valSubSteps.clear();
+  numValSubEvents.clear();
+
+  if ( fraction >= 1. || fraction <= 0. ) {
+    if ( fraction <= 0. ) {
+      MSG_WARNING("Invalid validation fraction (" << fraction << "), using "
+          "the full validation set.");
+    }
+    valSubsample.clear();
+    return;
+  }
+
+  // The buffers of a previous subsample are kept:
+  valSubsample.resize(numPatterns);
+  inValSubList.resize(numPatterns);
+  valSubSteps.resize(numPatterns);
+  numValSubEvents.resize(numPatterns);
+  for (unsigned pat=0; pat<numPatterns; pat++)
+  {
+    const unsigned nEv = numValEvents[pat];
+    const unsigned nSub = std::min( nEv, std::max( 1u, 
+          static_cast<unsigned>( std::lround(fraction*nEv) ) ) );
+    // Draw the subsample with a partial shuffle, keeping the events ordered
+    // to access them sequentially:
+    std::mt19937 gen( seed + numPatterns + pat );
+    std::vector<unsigned> idx(nEv);
+    for (unsigned i=0; i<nEv; ++i) idx[i] = i;
+    for (unsigned i=0; i<nSub; ++i) {
+      std::uniform_int_distribution<unsigned> dist(i, nEv - 1);
+      std::swap( idx[i], idx[dist(gen)] );
+    }
+    idx.resize(nSub);
+    std::sort( idx.begin(), idx.end() );
+
+    valSubsample[pat].resize( nSub*inputSize );
+    for (unsigned i=0; i<nSub; ++i) {
+      gatherEvent( valSubsample[pat].data() + i*inputSize, inValList[pat], 
+          idx[i], valSteps[pat], inputSize );
+    }
+    inValSubList[pat] = valSubsample[pat].data();
+    valSubSteps[pat].event = inputSize;
+    valSubSteps[pat].feature = 1;
+    valSubSteps[pat].storage = REAL_STORAGE;
+    valSubSteps[pat].packed = nullptr;
+    numValSubEvents[pat] = nSub;
+    MSG_DEBUG("Validation subsample for pattern " << pat << " has " 
+        << nSub << " of " << nEv << " events.");
+  }
+  MSG_INFO("Using a fixed subsample of " << fraction*100. << "% of the "
+      "validation events for the stop criteria.");
+}
+
+//==============================================================================
+void PatternRecognition::setSampling( const std::string &mode, 
+    const std::vector<REAL> &weights, 
+    const REAL hardFraction )
+{
+  if ( !sampler->setMode( mode, weights, hardFraction ) ) {
+    MSG_WARNING("Invalid sampling mode (" << mode << ") or weights (one "
+        "non-negative weight is needed for each pattern), using " 
+        << SAMPLE_PATTERN_ID << " sampling.");
+    sampler->setMode( SAMPLE_PATTERN_ID, weights, hardFraction );
+  }
+  for (unsigned pat=0; pat<numPatterns; pat++)
+  {
+    trnIndices[pat].resize( sampler->count(pat) );
+    if ( sampler->useErrors() ) {
+      trnErrors[pat].resize( sampler->count(pat) );
+    } else {
+      trnErrors[pat].clear();
+    }
+    MSG_DEBUG("Pattern " << pat << " presents " << sampler->count(pat) 
+        << " of its " << sampler->size(pat) << " events on each epoch.");
+  }
+  if ( sampler->getMode() != SAMPLE_PATTERN_ID ) {
+    MSG_INFO("Using " << sampler->getMode() << " sampling of the training "
+        "events.");
+  }
+}
+
+//==============================================================================
+void PatternRecognition::setStreaming( const unsigned blockSize )
+{
+  streamBlock = blockSize;
+  sampler->setBlockSize( blockSize );
+  if ( blockSize ) {
+    MSG_INFO("Streaming the training events in blocks of " << blockSize 
+        << " consecutive events.");
+  }
+}
+
+//==============================================================================
+void PatternRecognition::prefetchEpoch()
+{
+  prefetcher.stop();
+  prefetcher.clear();
+  // The events are read in the order they are propagated:
+  for (unsigned pat=0; pat<numPatterns; pat++)
+  {
+    const PatternSteps &step = trnSteps[pat];
+    const std::size_t itemSize = ( step.packed ) ? sizeof(npy_uint16) 
+                                                 : sizeof(REAL);
+    const char *base = ( step.packed ) 
+        ? reinterpret_cast<const char*>( step.packed ) 
+        : reinterpret_cast<const char*>( inTrnList[pat] );
+    const std::size_t evBytes = ( (inputSize - 1)*step.feature + 1 )*itemSize;
+    for ( const unsigned pos : trnIndices[pat] ) {
+      prefetcher.add( base + pos*step.event*itemSize, evBytes );
+    }
+  }
+  prefetcher.start();
+}
+
 //==============================================================================
 PatternRecognition::~PatternRecognition()
 {
   // The last 2 parameters for the training case will not be used by the
   // function, so, there is no problem passing the corresponding validation
   // variables to this first function call.
-  deallocateDataset(true, inTrnList, epochValOutputs, numValEvents);
-  deallocateDataset(false, inValList, epochValOutputs, numValEvents);
+  deallocateDataset(true, inTrnList, trnSteps, epochValOutputs, numValEvents);
+  deallocateDataset(false, inValList, valSteps, epochValOutputs, numValEvents);
   if (hasTstData) {
-    deallocateDataset(false, inTstList, epochTstOutputs, numTstEvents);
+    deallocateDataset(false, inTstList, tstSteps, 
+        epochTstOutputs, numTstEvents);
   }
   for (unsigned i=0; i<numPatterns; i++) delete [] targList[i];
   delete [] targList;
@@ -165,64 +347,24 @@ REAL PatternRecognition::sp(const unsigned *nEvents,
   const REAL *noise = epochOutputs[TARG_NOISE];
   const REAL signalTarget = targList[TARG_SIGNAL][0];
   const REAL noiseTarget = targList[TARG_NOISE][0];
-  const int numSignalEvents = static_cast<int>(nEvents[TARG_SIGNAL]);
-  const int numNoiseEvents = static_cast<int>(nEvents[TARG_NOISE]);
-  const REAL RESOLUTION = 0.01;
   REAL maxSP    = -1.;
 
   //reset deltas 
   deltaDet = 999;
   deltaFa  = 999;
 
-  int i;
-#ifdef USE_OMP
-  int chunk = chunkSize;
-#endif
-
+  // Sort the outputs once and retrieve the efficiencies for all cuts:
+  rocDet.clear(); rocFa.clear(); rocSP.clear(); rocCut.clear();
+  util::genRoc( signal, nEvents[TARG_SIGNAL], noise, nEvents[TARG_NOISE],
+      signalTarget, noiseTarget, 
+      rocDet, rocFa, rocSP, rocCut, 
+      rocResolution, signalWeight, noiseWeight );
 
-  for (REAL pos = noiseTarget; pos < signalTarget; pos += RESOLUTION)
+  for ( std::size_t cutIdx = 0; cutIdx < rocCut.size(); ++cutIdx )
   {
-    REAL sigEffic = 0.;
-    REAL noiseEffic = 0.;
-    unsigned se, ne;
-    
-#ifdef USE_OMP
-    #pragma omp parallel shared(signal, noise, sigEffic, noiseEffic) \
-      private(i,se,ne)
-#endif
-    {
-      se = ne = 0;
-      
-#ifdef USE_OMP
-      #pragma omp for schedule(dynamic,chunk) nowait
-#endif
-      for (i=0; i<numSignalEvents; i++) if (signal[i] >= pos) se++;
-      
-#ifdef USE_OMP
-      #pragma omp critical
-#endif
-      sigEffic += static_cast<REAL>(se);
-
-#ifdef USE_OMP
-      #pragma omp for schedule(dynamic,chunk) nowait
-#endif
-      for (i=0; i<numNoiseEvents; i++) if (noise[i] < pos) ne++;
-      
-#ifdef USE_OMP
-      #pragma omp critical
-#endif
-      noiseEffic += static_cast<REAL>(ne);
-    }
-    
-    sigEffic /= static_cast<REAL>(numSignalEvents);
-    noiseEffic /= static_cast<REAL>(numNoiseEvents);
-
-    // Use weights for signal and noise efficiencies
-    sigEffic *= signalWeight;
-    noiseEffic *= noiseWeight;
-
-    //Using normalized SP calculation.
-    const REAL sp = sqrt( ((sigEffic + noiseEffic) / 2) * sqrt(sigEffic * noiseEffic) );
+    const REAL sigEffic   = rocDet[cutIdx];
+    const REAL noiseEffic = 1-rocFa[cutIdx];
+    const REAL sp         = rocSP[cutIdx];
 
     if (sp > maxSP){
       maxSP            = sp;
@@ -260,18 +402,25 @@ REAL PatternRecognition::sp(const unsigned *nEvents,
 //==============================================================================
 void PatternRecognition::getNetworkErrors(
     const REAL **inList, 
+    const PatternSteps *steps,
     const unsigned *nEvents,
     REAL **epochOutputs, 
     REAL &mseRet, 
     REAL &spRet, 
     REAL &detRet, 
-    REAL &faRet)
+    REAL &faRet,
+    double &propTime,
+    double &rocTime,
+    const TuningTool::NeuralNetwork *evalNet,
+    const unsigned nEvalThreads)
 {
+  const double start = util::wall_time();
   REAL gbError = 0.;
   TuningTool::Backpropagation **nv = this->netVec;
   int totEvents = 0;
 
   unsigned inputSize = this->inputSize;
+  unsigned outputSize = this->outputSize;
   bool useSP = this->useSP;
 
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
@@ -283,58 +432,135 @@ void PatternRecognition::getNetworkErrors(
   }
 #endif
   
-  for (unsigned pat=0; pat<numPatterns; pat++)
-  {
-    totEvents += nEvents[pat];
+  for (unsigned pat=0; pat<numPatterns; pat++) totEvents += nEvents[pat];
+
+  unsigned nPatterns = this->numPatterns;
+  unsigned blockSize = EVENT_BLOCK_SIZE;
+  const REAL **targets = this->targList;
+  std::vector<REAL> *blockBuffers = this->blockInputs.data();
+  std::vector< std::vector<REAL> > *evalOutputs = nullptr;
+  unsigned nUsedThreads = nThreads;
+  const REAL *output;
+  int b, thId;
+  unsigned pat;
+  REAL *block;
+  TuningTool::Backpropagation *thread_nv;
 
-    const REAL * target = targList[pat];
-    const REAL * input = inList[pat];
-    const REAL *output;
-    const int numEvents = nEvents[pat];
-    int i, thId;
-#ifdef USE_OMP
-    int chunk = chunkSize;
-#endif
-    TuningTool::Backpropagation *thread_nv;
-    
-    REAL *outList = (useSP) ? epochOutputs[pat] : nullptr;
-    
-    MSG_DEBUG("Applying performance calculation for pattern " 
-        << pat << " (" << numEvents << " events).");
+  if ( evalNet ) {
+    // The evaluation must not use the threads networks nor buffers, since
+    // they may be being used by trainNetwork:
+    nUsedThreads = std::max( 1u, std::min( nEvalThreads, nThreads ) );
+    if ( evalBlockInputs.size() < nUsedThreads ) {
+      evalBlockInputs.resize( nUsedThreads );
+      evalLayerOutputs.resize( nUsedThreads );
+      for (unsigned i=0; i<nUsedThreads; i++) {
+        evalBlockInputs[i].resize(EVENT_BLOCK_SIZE*inputSize);
+      }
+    }
+    blockBuffers = this->evalBlockInputs.data();
+    evalOutputs = this->evalLayerOutputs.data();
+  }
+
+  // When deterministic, the blocks errors are summed on the blocks order:
+  std::vector<unsigned> patFirstBlock;
+  std::vector<REAL> blockErrors;
+  if ( deterministic ) {
+    patFirstBlock.assign( nPatterns + 1, 0 );
+    for (pat=0; pat<nPatterns; pat++) {
+      patFirstBlock[pat+1] = patFirstBlock[pat] 
+        + ( nEvents[pat] + blockSize - 1 ) / blockSize;
+    }
+    blockErrors.resize( patFirstBlock[nPatterns] );
+  }
+  const unsigned *firstBlock = patFirstBlock.data();
+  REAL *blockErr = ( deterministic ) ? blockErrors.data() : nullptr;
+
+  MSG_DEBUG("Applying performance calculation for " << totEvents 
+      << " events.");
 
-    
 #ifdef USE_OMP
-    #pragma omp parallel default(none) \
-        shared(chunk,nv,inputSize,outList,useSP,input,target) \
-        private(i,thId,output,thread_nv) \
-        reduction(+:gbError)
+  #pragma omp parallel default(none) num_threads(nUsedThreads) \
+      shared(nv,inputSize,outputSize,useSP,nPatterns,blockSize,inList,steps,nEvents,targets,epochOutputs,blockBuffers,evalNet,evalOutputs,firstBlock,blockErr) \
+      private(b,pat,thId,output,thread_nv,block) \
+      reduction(+:gbError)
 #endif
-    { // fork
-      thId = omp_get_thread_num();
+  { // fork
+    thId = omp_get_thread_num();
 
-      thread_nv = nv[thId];
+    thread_nv = nv[thId];
+    block = blockBuffers[thId].data();
+
+    for (pat=0; pat<nPatterns; pat++)
+    {
+      const REAL *target = targets[pat];
+      const REAL *input = inList[pat];
+      const PatternSteps &step = steps[pat];
+      const bool contiguous = step.contiguous( inputSize );
+      const int numEvents = nEvents[pat];
+      const int numBlocks = (numEvents + blockSize - 1) / blockSize;
+      REAL *outList = (useSP) ? epochOutputs[pat] : nullptr;
 
 #ifdef USE_OMP
-      #pragma omp for schedule(dynamic, chunk) nowait
+      #pragma omp for schedule(dynamic,1) nowait
 #endif
-      for (i=0; i<numEvents; ++i)
+      for (b=0; b<numBlocks; ++b)
       {
-        gbError += thread_nv->applySupervisedInput(input + (i*inputSize), 
-            target, 
-            output);
-        if (useSP) outList[i] = output[0];
+        const int first = b*blockSize;
+        const unsigned nBlockEvents = std::min( blockSize, 
+            static_cast<unsigned>(numEvents - first) );
+        const REAL *blockInput = input + (first*inputSize);
+        if ( !contiguous ) {
+          for (unsigned e=0; e<nBlockEvents; ++e) {
+            gatherEvent(block + e*inputSize, input, first + e, step, inputSize);
+          }
+          blockInput = block;
+        }
+        REAL error;
+        if ( evalNet ) {
+          output = evalNet->propagateInputs(blockInput, 
+              nBlockEvents, 
+              evalOutputs[thId]);
+          error = TuningTool::NeuralNetwork::sumSquaredErrors(output, 
+              target, 
+              nBlockEvents, 
+              outputSize);
+        } else {
+          error = thread_nv->applySupervisedInputs(blockInput, 
+              nBlockEvents,
+              target, 
+              output);
+        }
+        if ( blockErr ) {
+          blockErr[firstBlock[pat] + b] = error;
+        } else {
+          gbError += error;
+        }
+        if (useSP) {
+          for (unsigned e=0; e<nBlockEvents; ++e) {
+            outList[first + e] = output[e*outputSize];
+          }
+        }
       } // no barrier
-    } // join
+    }
+  } // join
 
-    
+  for ( const REAL error : blockErrors ) gbError += error;
 
-    // Display some debuging messages
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
+  for (unsigned pat=0; pat<numPatterns; pat++)
+  {
+    const REAL *target = targList[pat];
+    const REAL *input = inList[pat];
+    const PatternSteps &step = steps[pat];
+    const int numEvents = nEvents[pat];
+    REAL *outList = (useSP) ? epochOutputs[pat] : nullptr;
+    std::vector<REAL> row(inputSize);
     MSG_DEBUG( "gbError is: " << gbError );
-    if ( msgLevel( MSG::DEBUG ) ) {
-      for (i=0; i<4; ++i)
+    if ( msgLevel( MSG::DEBUG ) && !evalNet ) {
+      for (int i=0; i<4; ++i)
       {
-        nv[0]->applySupervisedInput(input + (i*inputSize), 
+        gatherEvent(row.data(), input, i, step, inputSize);
+        nv[0]->applySupervisedInput(row.data(), 
             target, 
             output);
         nv[0]->printLayerOutputs();
@@ -346,7 +572,7 @@ void PatternRecognition::getNetworkErrors(
       {
         msg() << "[";
         for ( unsigned m = 0; m < inputSize; ++m ){
-          msg() << input[k*inputSize+m] << ",";
+          msg() << input[k*step.event+m*step.feature] << ",";
         } msg() << "],";
         if ( k != 2 ) msg() << endreq;
       } msg() << "]" << endreq;
@@ -357,12 +583,16 @@ void PatternRecognition::getNetworkErrors(
         msg() << outList[k] << ",";
       } msg() << "]" << endreq;
     }
-#endif
   }
+#endif
 
   mseRet = gbError / static_cast<REAL>(totEvents);
+  const double propEnd = util::wall_time();
+  propTime = propEnd - start;
+  rocTime = 0.;
   if (useSP)  {
     spRet = sp(nEvents, epochOutputs, detRet, faRet);
+    rocTime = util::wall_time() - propEnd;
     MSG_DEBUG( "spRet = " << spRet 
         << " | detRet = " << detRet 
         << " | faRet = "  << faRet );
@@ -370,6 +600,123 @@ void PatternRecognition::getNetworkErrors(
 }
 
 
+//==============================================================================
+REAL PatternRecognition::trainBlock( TuningTool::Backpropagation *net,
+    REAL *block,
+    const unsigned pat,
+    const unsigned first,
+    std::vector<REAL> *errors )
+{
+  const REAL *target = targList[pat];
+  const REAL *input = inTrnList[pat];
+  const PatternSteps &step = trnSteps[pat];
+  const unsigned *pos = trnIndices[pat].data();
+  const unsigned nBlockEvents = std::min( EVENT_BLOCK_SIZE, 
+      static_cast<unsigned>( trnIndices[pat].size() ) - first );
+  const REAL *output;
+
+  // Gather the selected events into a contiguous block:
+  for (unsigned e=0; e<nBlockEvents; ++e) {
+    gatherEvent(block + e*inputSize, input, pos[first + e], step, inputSize);
+  }
+
+  const REAL error = net->applySupervisedInputs(block, 
+      nBlockEvents,
+      target, 
+      output);
+
+  if ( errors ) {
+    REAL *blockErrors = errors[pat].data() + first;
+    for (unsigned e=0; e<nBlockEvents; ++e) {
+      blockErrors[e] = TuningTool::NeuralNetwork::sumSquaredErrors(
+          output + e*outputSize, target, 1, outputSize);
+    }
+  }
+
+  //Calculating the weight and bias update values.
+  net->calculateNewWeights(output, target, nBlockEvents);
+
+#if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
+  MSG_DEBUG( "Executing block starting at [" << first << "] of pattern [" 
+      << pat << "] with " << nBlockEvents << " events, first random "
+      "index was [" << pos[first] << "] and its output was [" 
+      << output[0] << "]" );
+  if ( first == 0 && msgLevel( MSG::DEBUG ) ) {
+    net->printWeigths();
+    net->printDeltas();
+  }
+#endif
+  return error;
+}
+
+//==============================================================================
+unsigned PatternRecognition::trainSlots( std::vector<REAL> *errors, 
+    REAL &gbError, 
+    double &busy )
+{
+  TuningTool::Backpropagation **nv = this->netVec;
+  std::vector<REAL> *blockBuffers = this->blockInputs.data();
+  unsigned blockSize = EVENT_BLOCK_SIZE;
+  unsigned nTrainThreads = this->nTrainThreads;
+
+  // The selected blocks of all patterns are numbered sequentially, pattern
+  // after pattern, and split on nSlots slots of consecutive blocks:
+  std::vector<unsigned> patFirstBlock( numPatterns + 1, 0 );
+  for (unsigned pat=0; pat<numPatterns; pat++) {
+    patFirstBlock[pat+1] = patFirstBlock[pat] 
+      + ( trnIndices[pat].size() + blockSize - 1 ) / blockSize;
+  }
+  unsigned nBlocks = patFirstBlock[numPatterns];
+  int nSlots = std::min( REDUCTION_SLOTS, nBlocks );
+  std::size_t paramSize = mainNet->getParamSize();
+  slotGrads.resize( nSlots*paramSize );
+  slotErrors.resize( nSlots );
+  REAL *grads = slotGrads.data();
+  REAL *slotErr = slotErrors.data();
+  const unsigned *firstBlock = patFirstBlock.data();
+  int s;
+
+#ifdef USE_OMP
+  #pragma omp parallel default(none) num_threads(nTrainThreads) \
+      shared(nv,blockBuffers,errors,blockSize,nBlocks,nSlots,paramSize,grads,slotErr,firstBlock) \
+      private(s) \
+      reduction(+:busy)
+#endif
+  {
+    const double threadStart = util::wall_time();
+    const int thId = omp_get_thread_num();
+    TuningTool::Backpropagation *thread_nv = nv[thId];
+    REAL *block = blockBuffers[thId].data();
+
+    // Each slot is computed from zeroed gradients by a single thread, so that
+    // its result does not depend on which thread computed it:
+#ifdef USE_OMP
+    #pragma omp for schedule(dynamic,1)
+#endif
+    for (s=0; s<nSlots; ++s)
+    {
+      const unsigned begin = ( static_cast<std::size_t>(s)*nBlocks ) / nSlots;
+      const unsigned end = ( static_cast<std::size_t>(s + 1)*nBlocks ) / nSlots;
+      unsigned pat = 0;
+      REAL error = 0.;
+      thread_nv->resetGradient();
+      for (unsigned g=begin; g<end; ++g) {
+        while ( g >= firstBlock[pat+1] ) ++pat;
+        error += trainBlock( thread_nv, block, pat, 
+            ( g - firstBlock[pat] )*blockSize, errors );
+      }
+      slotErr[s] = error;
+      thread_nv->getGradient( grads + s*paramSize );
+    }
+    busy += util::wall_time() - threadStart;
+  }
+
+  // Sum the errors on the slots order:
+  gbError = 0.;
+  for (int i=0; i<nSlots; ++i) gbError += slotErr[i];
+  return nSlots;
+}
+
 //==============================================================================
 REAL PatternRecognition::trainNetwork()
 {
@@ -378,94 +725,99 @@ REAL PatternRecognition::trainNetwork()
   TuningTool::Backpropagation *thread_nv;
   REAL gbError = 0;
   int totEvents = 0; // Holds the amount of events presented to the network.
-  unsigned inputSize = this->inputSize;
-#ifdef USE_OMP
-  int chunk = chunkSize;
-#endif
+  unsigned nPatterns = this->numPatterns;
+  unsigned blockSize = EVENT_BLOCK_SIZE;
 
-  for(unsigned pat=0; pat<numPatterns; pat++)
-  {
-    // wFactor will allow each pattern to have the same relevance, despite the
-    // number of events it contains.
-    const REAL *target = targList[pat];
-    const REAL *input = inTrnList[pat];
-    const REAL *output;
-    int i, thId;
-    unsigned pos = 0;
-    DataManager *dm = dmTrn[pat];
+  std::vector<REAL> *blockBuffers = this->blockInputs.data();
+  std::vector<unsigned> *indices = this->trnIndices.data();
 
+  // Select the events that will be presented on this epoch. This is done
+  // sequentially, so that the selection does not depend on the threads:
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
-    MSG_DEBUG("Printing Manager BEFORE running for pat[" << pat << "]");
-    if ( msgLevel( MSG::DEBUG ) ){
-      dm->print();
+  if ( msgLevel( MSG::DEBUG ) ){
+    for(unsigned pat=0; pat<numPatterns; pat++) {
+      MSG_DEBUG("Printing Manager BEFORE running for pat[" << pat << "]");
+      sampler->print(pat);
     }
+  }
 #endif
-
-    const int nEvents = (batchSize) ? batchSize : dm->size();
-
-    totEvents += nEvents;
-
+  sampler->sample( trnIndices );
+  if ( streamBlock ) prefetchEpoch();
+  for(unsigned pat=0; pat<numPatterns; pat++)
+  {
+    totEvents += indices[pat].size();
     MSG_DEBUG("Applying training set for pattern " 
         << pat << " by randomly selecting " 
-        << nEvents << " events (out of " << dm->size() << ").");
-
+        << indices[pat].size() << " events (out of " << sampler->size(pat) 
+        << ").");
+  }
+  // Per event errors, when needed by the sampler:
+  std::vector<REAL> *errors = ( sampler->useErrors() ) 
+                            ? this->trnErrors.data() : nullptr;
+
+  int b, thId;
+  unsigned pat;
+  REAL *block;
+  unsigned nTrainThreads = this->nTrainThreads;
+  // Summed time the threads spent on their blocks:
+  double busy = 0.;
+  unsigned nSlots = 0;
+  const double propStart = util::wall_time();
+
+  if ( deterministic ) {
+    nSlots = trainSlots( errors, gbError, busy );
+  } else {
 #ifdef USE_OMP
-    #pragma omp parallel default(none) \
-        shared(chunk,nv,inputSize,input,target,dm) \
-        private(i,thId,output,thread_nv,pos) \
-        reduction(+:gbError)
+  #pragma omp parallel default(none) num_threads(nTrainThreads) \
+      shared(nv,nPatterns,blockSize,indices,blockBuffers,errors) \
+      private(b,pat,thId,thread_nv,block) \
+      reduction(+:gbError,busy)
 #endif
-    {
-      thId = omp_get_thread_num();
+  {
+    const double threadStart = util::wall_time();
+    thId = omp_get_thread_num();
 
-      thread_nv = nv[thId];
+    thread_nv = nv[thId];
+    block = blockBuffers[thId].data();
 
+    for (pat=0; pat<nPatterns; pat++)
+    {
+      const int nEvents = indices[pat].size();
+      const int nBlocks = (nEvents + blockSize - 1) / blockSize;
+
+      // Threads do not need to wait for each other between patterns, since
+      // each of them accumulates its own gradients:
 #ifdef USE_OMP
-      #pragma omp for schedule(dynamic,chunk) nowait
+      #pragma omp for schedule(dynamic,1) nowait
 #endif
-      for (i=0; i<nEvents; ++i)
+      for (b=0; b<nBlocks; ++b)
       {
-        // FIXME When changing to new DM version
-#ifdef USE_OMP
-        #pragma omp critical
-#endif
-        pos = dm->get(/*i*/);
-
-        gbError += thread_nv->applySupervisedInput(
-            input + (pos*inputSize), 
-            target, 
-            output);
+        gbError += trainBlock( thread_nv, block, pat, b*blockSize, errors );
+      } // no barrier
+    }
+    busy += util::wall_time() - threadStart;
+  } // join
+  }
+  const double propEnd = util::wall_time();
 
-        //Calculating the weight and bias update values.
-        thread_nv->calculateNewWeights(output, target);
+  // Nothing else is read from the training datasets on this epoch:
+  if ( streamBlock ) prefetcher.stop();
 
-#if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
-        if ( i < 10 || i > nEvents - 10 ) {
-          MSG_DEBUG( "Thread[" << thId << "] executing index[" 
-              << i << "] got random index [" << pos << "] and output was [" 
-              << output[0] << "]" );
-          if ( msgLevel( MSG::DEBUG ) ) {
-            thread_nv->printLayerOutputs();
-            thread_nv->printWeigths();
-            thread_nv->printDeltas();
-          }
-        } else {
-          MSG_DEBUG( "Thread[" << thId << "] executing index[" 
-              << i << "] got random index [" << pos << "]" );
-        }
-#endif
-      }
+  // Keep the errors of the presented events for the next selections:
+  if ( errors ) {
+    for(unsigned pat=0; pat<numPatterns; pat++) {
+      sampler->setErrors( pat, indices[pat].data(), errors[pat].data(), 
+          indices[pat].size() );
     }
-
-    // FIXME Shift the data manager (when change to new version)
-    //dm->shift();
+  }
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
-    if ( msgLevel( MSG::DEBUG ) ){
+  if ( msgLevel( MSG::DEBUG ) ){
+    for(unsigned pat=0; pat<numPatterns; pat++) {
       MSG_DEBUG("Printing Manager AFTER running for pat[" << pat << "]");
-      dm->print();
+      sampler->print(pat);
     }
-#endif
   }
+#endif
 
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
   MSG_DEBUG("BEFORE UPDATES:");
@@ -481,8 +833,22 @@ REAL PatternRecognition::trainNetwork()
   }
 #endif
 
-  updateGradients();
+  const double reduceStart = util::wall_time();
+  if ( deterministic ) {
+    reduceSlotGradients( nSlots );
+  } else {
+    updateGradients();
+  }
+  const double updateStart = util::wall_time();
   updateWeights();
+  const double updateEnd = util::wall_time();
+
+  trnTimes.trn_prop    = propEnd - propStart;
+  trnTimes.trn_reduce  = updateStart - reduceStart;
+  trnTimes.trn_update  = updateEnd - updateStart;
+  trnTimes.trn_events  = totEvents;
+  trnTimes.trn_threads = nTrainThreads;
+  trnTimes.trn_busy    = busy;
 
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
   MSG_DEBUG("AFTER UPDATES:");
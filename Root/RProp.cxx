@@ -1,5 +1,6 @@
 #include <vector>
 #include <string>
+#include <algorithm>
 
 #include "TuningTools/neuralnetwork/RProp.h"
 
@@ -12,8 +13,10 @@ RProp::RProp()
     Backpropagation(),
     prev_dw(nullptr),
     prev_db(nullptr),
+    prevGrads(nullptr),
     delta_w(nullptr),
-    delta_b(nullptr){;}
+    delta_b(nullptr),
+    deltas(nullptr){;}
 
 //==============================================================================
 RProp::RProp(const NetConfHolder &net, 
@@ -28,28 +31,17 @@ RProp::RProp(const NetConfHolder &net,
     initEta(net.getInitEta()),
     prev_dw(nullptr),
     prev_db(nullptr),
+    prevGrads(nullptr),
     delta_w(nullptr),
-    delta_b(nullptr)
+    delta_b(nullptr),
+    deltas(nullptr)
 {
 
   // Allocate space for this object:
   allocateSpace();
 
   //Initializing the dynamically allocated values.
-  for (unsigned i=0; i<(nNodes.size() - 1); i++)
-  {
-    for (unsigned j=0; j<nNodes[i+1]; j++) 
-    {
-      prev_db[i][j] = 0.;
-      delta_b[i][j] = this->initEta;
-      
-      for (unsigned k=0; k<nNodes[i]; k++)
-      {
-        prev_dw[i][j][k] = 0.;
-        delta_w[i][j][k] = this->initEta;
-      }
-    }
-  }
+  RProp::resetNeededTrainingInfo();
 }
 
 //==============================================================================
@@ -58,8 +50,10 @@ RProp::RProp(const RProp &net)
     Backpropagation(),
     prev_dw(nullptr),
     prev_db(nullptr),
+    prevGrads(nullptr),
     delta_w(nullptr),
-    delta_b(nullptr)
+    delta_b(nullptr),
+    deltas(nullptr)
 {
   this->operator=(net);
 }
@@ -67,16 +61,8 @@ RProp::RProp(const RProp &net)
 //==============================================================================
 void RProp::copyPrevDeltas(const RProp &net)
 {
-  for (unsigned i=0; i<(nNodes.size() - 1); i++)
-  {
-    memcpy(prev_db[i], net.prev_db[i], nNodes[i+1]*sizeof(REAL));
-    memcpy(delta_b[i], net.delta_b[i], nNodes[i+1]*sizeof(REAL));
-    for (unsigned j=0; j<nNodes[i+1]; j++) 
-    {
-      memcpy(prev_dw[i][j], net.prev_dw[i][j], nNodes[i]*sizeof(REAL));
-      memcpy(delta_w[i][j], net.delta_w[i][j], nNodes[i]*sizeof(REAL));
-    }
-  }
+  memcpy(prevGrads, net.prevGrads, paramSize*sizeof(REAL));
+  memcpy(deltas, net.deltas, paramSize*sizeof(REAL));
 }
 
 //==============================================================================
@@ -140,32 +126,9 @@ void RProp::allocateSpace()
 
   MSG_DEBUG("Allocating RProp space for " << m_name << "...");
   
-  const unsigned size = nNodes.size() - 1;
-
   try {
-    // FIXME Discontinous memory allocation may affect on perfomance if
-    // compiler does not optimize this for us:
-    //
-    // Approach 1: Faster way, simply allocate each variable per time
-    //
-    // Approach 2: Allocate a continuous memory region and pass it to an
-    //             ndarray to manage it. 
-    prev_db = new REAL* [size];
-    delta_b = new REAL* [size];
-    prev_dw = new REAL** [size];
-    delta_w = new REAL** [size];
-    for (unsigned i=0; i<size; i++)
-    {
-      prev_db[i] = new REAL [nNodes[i+1]];
-      delta_b[i] = new REAL [nNodes[i+1]];
-      prev_dw[i] = new REAL* [nNodes[i+1]];
-      delta_w[i] = new REAL* [nNodes[i+1]];
-      for (unsigned j=0; j<nNodes[i+1]; j++) 
-      {
-        prev_dw[i][j] = new REAL [nNodes[i]];
-        delta_w[i][j] = new REAL [nNodes[i]];
-      }
-    }
+    prevGrads = allocateParameters(prev_dw, prev_db);
+    deltas = allocateParameters(delta_w, delta_b);
   } catch (const std::bad_alloc &xa) {
     MSG_FATAL("Abort! Reason: " << xa.what() );
   }
@@ -174,13 +137,9 @@ void RProp::allocateSpace()
 //==============================================================================
 RProp::~RProp()
 {
-  // Deallocating the delta bias matrix.
-  releaseMatrix(prev_db);
-  releaseMatrix(delta_b);
-
-  // Deallocating the delta weights matrix.
-  releaseMatrix(prev_dw);
-  releaseMatrix(delta_w);
+  // Deallocating the delta weights and biases buffers.
+  releaseParameters(prevGrads, prev_dw, prev_db);
+  releaseParameters(deltas, delta_w, delta_b);
 }
 
 
@@ -269,6 +228,38 @@ void RProp::copyNeededTrainingInfoFast(const Backpropagation &net)
   this->copyPrevDeltas(static_cast<const RProp&>(net));
 }
 
+//==============================================================================
+void RProp::resetNeededTrainingInfo()
+{
+  Backpropagation::resetNeededTrainingInfo();
+  std::fill_n( prevGrads, paramSize, 0. );
+  for (unsigned i=0; i<(nNodes.size() - 1); i++)
+  {
+    std::fill_n( delta_w[i][0], nNodes[i+1]*nNodes[i], this->initEta );
+    std::fill_n( delta_b[i], nNodes[i+1], this->initEta );
+  }
+}
+
+//==============================================================================
+std::size_t RProp::getTrainingStateSize() const
+{
+  return 2*paramSize;
+}
+
+//==============================================================================
+void RProp::getTrainingState(REAL *buffer) const
+{
+  memcpy(buffer, prevGrads, paramSize*sizeof(REAL));
+  memcpy(buffer + paramSize, deltas, paramSize*sizeof(REAL));
+}
+
+//==============================================================================
+void RProp::setTrainingState(const REAL *buffer)
+{
+  memcpy(prevGrads, buffer, paramSize*sizeof(REAL));
+  memcpy(deltas, buffer + paramSize, paramSize*sizeof(REAL));
+}
+
 
 //==============================================================================
 void RProp::showInfo() const
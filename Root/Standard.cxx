@@ -9,7 +9,8 @@ StandardTraining::StandardTraining( TuningTool::Backpropagation *net
     , const Ndarray<REAL,2>* inVal
     , const Ndarray<REAL,1>* outVal 
     , const unsigned bSize
-    , MSG::Level msglevel) 
+    , MSG::Level msglevel
+    , const unsigned seed) 
   : IMsgService( "Training" ),
     Training(net, bSize, msglevel)
 {
@@ -39,7 +40,7 @@ StandardTraining::StandardTraining( TuningTool::Backpropagation *net
   outputSize = outTrn->getShape(1);
  
   // FIXME When changing to new DM version
-  dmTrn = new DataManager( inTrn->getShape(0) /*, batchSize*/ );
+  dmTrn = new DataManager( inTrn->getShape(0), seed /*, batchSize*/ );
   numValEvents = inVal->getShape(0);
   MSG_DEBUG("Standard training was created.");
 }
@@ -1,8 +1,12 @@
 #include "TuningTools/TuningToolPyWrapper.h"
 
 // STL include(s)
+#include <algorithm>
 #include <cstdlib>
 #include <cstring>
+#include <exception>
+#include <future>
+#include <sstream>
 
 
 
@@ -31,6 +35,9 @@ TuningToolPyWrapper::TuningToolPyWrapper( const int msglevel, const bool useColo
   m_trainNetwork    = nullptr;
   m_train           = nullptr;
   m_stdTrainingType = true;
+  m_checkpointInterval = 0.;
+  m_lastCheckpoint  = 0.;
+  m_trainSeed       = 0;
 
   setSeed( seed );
 }
@@ -41,6 +48,7 @@ TuningToolPyWrapper::~TuningToolPyWrapper()
 
   MSG_DEBUG("Releasing memory...");
 
+  releaseTraining();
   if(m_trainNetwork)  delete m_trainNetwork;
   for(unsigned i = 0; i < m_saveNetworks.size(); ++i) {
     delete m_saveNetworks[i];
@@ -59,7 +67,7 @@ unsigned TuningToolPyWrapper::getSeed() const
 //==============================================================================
 void TuningToolPyWrapper::setSeed( const unsigned seed ) 
 {
-  unsigned m_seed = ( seed != std::numeric_limits<unsigned int>::max() )?
+  m_seed = ( seed != std::numeric_limits<unsigned int>::max() )?
       ( seed ) : ( time(nullptr) );
 
   MSG_INFO("Changing pseudo-random number generator seed to (" << 
@@ -69,292 +77,762 @@ void TuningToolPyWrapper::setSeed( const unsigned seed )
 }
 
 //==============================================================================
-py::list TuningToolPyWrapper::train_c()
+void TuningToolPyWrapper::prepareSaveNetworks(
+    std::vector< NeuralNetwork* > &saveNetworks,
+    Backpropagation &network )
 {
- 
-  // Output will be: [networks, trainEvolution]
-  py::list output;
-
-  TrainGoal trainGoal = m_net.getTrainGoal();
-  unsigned nClones = ( trainGoal == MULTI_STOP )?3:1;
+  const TrainGoal trainGoal = m_net.getTrainGoal();
+  const unsigned nClones = ( trainGoal == MULTI_STOP )?3:1;
 
-  if ( ! m_trainNetwork ) {
-    MSG_FATAL("Cannot train: no network was initialized!")
+  if ( saveNetworks.size() == nClones ) {
+    MSG_DEBUG("Copying initialized network to hold best training epoch...")
+    for ( auto& net : saveNetworks ) {
+      net->copyWeigthsFast( network );
+    }
+    return;
   }
+  for ( auto& net : saveNetworks ) delete net;
+  saveNetworks.clear();
 
   MSG_DEBUG("Cloning initialized network to hold best training epoch...")
   for(unsigned i = 0; i < nClones; ++i) {
     MSG_DEBUG("Cloning for index (" << i << ")" );
-    m_saveNetworks.push_back( m_trainNetwork->clone() );
+    saveNetworks.push_back( network.clone() );
     // FIXME: This strategy will not work when optimizing multiple DETs and FAs
     // at the same time...
     switch ( i )
     {
       case TRAINNET_DEFAULT_ID:
         if ( trainGoal == MSE_STOP ){
-          m_saveNetworks[i]->setName("NN_MSE_STOP");
+          saveNetworks[i]->setName("NN_MSE_STOP");
         } else {
-          m_saveNetworks[i]->setName("NN_SP_STOP");
+          saveNetworks[i]->setName("NN_SP_STOP");
         }
         break;
       case TRAINNET_DET_ID:
-        m_saveNetworks[i]->setName("NN_DET_STOP");
+        saveNetworks[i]->setName("NN_DET_STOP");
         break;
       case TRAINNET_FA_ID:
-        m_saveNetworks[i]->setName("NN_FA_STOP");
+        saveNetworks[i]->setName("NN_FA_STOP");
         break;
       default:
         throw std::runtime_error("Couldn't determine saved network type");
     }
   }
   MSG_DEBUG("Finished cloning...")
+}
 
-  //if(!m_tstData.empty()) m_stdTrainingType = false;
-  m_stdTrainingType = false;
-  // Check if goolType is mse default training  
-  bool useSP = (trainGoal != MSE_STOP)? true : false;
+//==============================================================================
+Training* TuningToolPyWrapper::newTraining( Backpropagation *network,
+    const unsigned trainSeed )
+{
+  const TrainGoal trainGoal = m_net.getTrainGoal();
 
-  const unsigned show         = m_net.getShow();
-  const unsigned fail_limit   = m_net.getMaxFail();
-  const unsigned nEpochs      = m_net.getEpochs();
   const unsigned batchSize    = m_net.getBatchSize();
   const unsigned signalWeight = m_net.getSPSignalWeight();
   const unsigned noiseWeight  = m_net.getSPNoiseWeight();
 
   MSG_DEBUG("Creating training object...")
+  if(m_tstData.empty())
+  {
+    // If I don't have tstData , I will use the valData as tstData for training.
+    return new PatternRecognition(network,
+        m_trnData, m_valData, m_valData,
+        trainGoal , batchSize, signalWeight, noiseWeight,
+        getMsgLevel(), trainSeed );
+  }
+  return new PatternRecognition( network,
+      m_trnData, m_valData, m_tstData,
+      trainGoal , batchSize, signalWeight, noiseWeight,
+      getMsgLevel(), trainSeed );
+}
+
+//==============================================================================
+void TuningToolPyWrapper::createTraining( const unsigned trainSeed )
+{
+  //if(!m_tstData.empty()) m_stdTrainingType = false;
+  m_stdTrainingType = false;
+
   if (m_stdTrainingType)
   {
     //m_train = new StandardTraining(m_network, m_in_trn, m_out_trn, m_in_val, m_out_val, batchSize,  getMsgLevel() );
   } else { // It is a pattern recognition network.
-    if(m_tstData.empty())
-    {
-      m_train = new PatternRecognition(m_trainNetwork, 
-          m_trnData, m_valData, m_valData, 
-          trainGoal , batchSize, signalWeight, noiseWeight, 
-          getMsgLevel() );
-    } else {
-      // If I don't have tstData , I will use the valData as tstData for training.
-      m_train = new PatternRecognition( m_trainNetwork, 
-          m_trnData, m_valData, m_tstData, 
-          trainGoal , batchSize, signalWeight, noiseWeight, 
-          getMsgLevel() );
-    } 
-    m_train->setUseColor( getUseColor() );
-    if(trainGoal == MULTI_STOP){
-      m_train->setReferences(m_net.getDet(), m_net.getFa());
-      m_train->setDeltaDet( MAX_DELTA_VALUE );
-      m_train->setDeltaFa( MAX_DELTA_VALUE );
-      MSG_DEBUG("Setting MultiStop Criteria with DET = " << m_net.getDet() << " and FA" << m_net.getFa() << " as references");
-    }
-
+    m_train = newTraining( m_trainNetwork, trainSeed );
   }// pattern recognition network
 
-#if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
-  MSG_DEBUG("Displaying configuration options...")
-  this->showInfo();
-  m_trainNetwork->showInfo();
-  m_train->showInfo(nEpochs);
-#endif
-
-  // Performing the training.
-  unsigned num_fails_mse = 0;
-  unsigned num_fails_sp  = 0;
-  unsigned num_fails_det = 0;
-  unsigned num_fails_fa  = 0;
-  unsigned dispCounter   = 0;
+  m_trainGoalCtx    = m_net.getTrainGoal();
+  m_batchSizeCtx    = m_net.getBatchSize();
+  m_signalWeightCtx = m_net.getSPSignalWeight();
+  m_noiseWeightCtx  = m_net.getSPNoiseWeight();
+}
 
+//==============================================================================
+void TuningToolPyWrapper::configureTraining( Training &train )
+{
+  train.setUseColor( getUseColor() );
+  train.setRocResolution( m_net.getRocResolution() );
+  train.setValidFraction( m_net.getValidFraction() );
+  train.setSampling( m_net.getSampling(),
+                     m_net.getSamplingWeights(),
+                     m_net.getHardFraction() );
+  train.setStreaming( m_net.getStreamBlock() );
+  train.setDeterministic( m_net.getDeterministic() );
+  if(m_net.getTrainGoal() == MULTI_STOP){
+    train.setReferences(m_net.getDet(), m_net.getFa());
+    MSG_DEBUG("Setting MultiStop Criteria with DET = " << m_net.getDet() << " and FA" << m_net.getFa() << " as references");
+  }
+}
 
-  REAL det_fitted, fa_fitted , delta_det, delta_fa = 0.;
-  ValResult is_best_mse, is_best_sp, is_best_det, is_best_fa;
-  bool stop_mse, stop_sp, stop_det, stop_fa = false;
+//==============================================================================
+void TuningToolPyWrapper::prepareTraining()
+{
+  const TrainGoal trainGoal = m_net.getTrainGoal();
+  // The events selection seed is drawn from the seeded generator, so that
+  // each training has its own reproducible stream. A resumed training keeps
+  // the seed it was started with:
+  const unsigned trainSeed  = ( m_resumeState.is_none() ) 
+      ? static_cast<unsigned>( std::rand() ) 
+      : static_cast<unsigned>( py::extract<unsigned>( m_resumeState["seed"] ) );
+  m_trainSeed = trainSeed;
+
+  if ( m_train 
+      && m_trainGoalCtx    == trainGoal 
+      && m_batchSizeCtx    == m_net.getBatchSize() 
+      && m_signalWeightCtx == m_net.getSPSignalWeight()
+      && m_noiseWeightCtx  == m_net.getSPNoiseWeight() ) 
+  {
+    MSG_DEBUG("Reusing training object bound to the current datasets...")
+    m_train->setSeed( trainSeed );
+    m_train->resetTraining();
+  } else {
+    releaseTraining();
+    createTraining( trainSeed );
+  }
 
-  // Calculating the max_fail limits for each case (MSE and SP, if the case).
-  const unsigned fail_limit_mse  = (useSP) ? (fail_limit / 2) : fail_limit; 
-  const unsigned fail_limit_sp   = (useSP) ? fail_limit : 0;
-  const unsigned fail_limit_det  = (useSP) ? fail_limit : 0;
-  const unsigned fail_limit_fa   = (useSP) ? fail_limit : 0;
+  configureTraining( *m_train );
+}
 
-  bool stop = false;
-  int stops_on(0);
-  unsigned epoch(0);
+//==============================================================================
+void TuningToolPyWrapper::beginTraining( InitTraining &s, const unsigned init )
+{
+  static_cast<TrainLoopState&>( s ) = TrainLoopState();
+  s.init = init;
+  // Every initialization draws the same events:
+  s.train->setSeed( m_trainSeed );
+  s.train->resetTraining();
+  prepareSaveNetworks( *s.saveNetworks, *s.network );
+
+  if(m_net.getTrainGoal() == MULTI_STOP){
+    s.train->setDeltaDet( MAX_DELTA_VALUE );
+    s.train->setDeltaFa( MAX_DELTA_VALUE );
+  }
 
-  REAL mse_val, sp_val, det_val, fa_val, mse_tst, sp_tst, det_tst, fa_tst = 0.;
-  roc::setpoint det_point_val, bestsp_point_val, fa_point_val;
-  roc::setpoint det_point_tst, bestsp_point_tst, fa_point_tst;
-  
-  MSG_DEBUG("Start looping...")
+#if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
+  MSG_DEBUG("Displaying configuration options...")
+  this->showInfo();
+  s.network->showInfo();
+  s.train->showInfo(m_net.getEpochs());
+#endif
 
-  // Training loop
-  for(; epoch < nEpochs; ++epoch){
-    MSG_DEBUG("=================== Start of Epoch (" << epoch 
-         << ") ===================");
+  // Training state checkpoints (see setCheckpoint):
+  if ( !m_checkpointFcn.is_none() ) {
+    s.trainingState.resize( s.network->getTrainingStateSize() );
+  }
 
-    // Training the network and calculating the new weights.
-    const REAL mse_trn = m_train->trainNetwork();
+  // Continue an interrupted training (see setResumeState):
+  if ( !init && !m_resumeState.is_none() ) {
+    const py::object state = m_resumeState;
+    m_resumeState = py::object();
+    auto stateBuffer = []( const py::object &obj, const std::size_t size ) 
+    {
+      std::vector<REAL> buffer = util::array_to_std_vector<REAL>( obj );
+      if ( buffer.size() != size ) {
+        throw std::runtime_error("Training state does not match the network "
+            "or the training algorithm.");
+      }
+      return buffer;
+    };
+    std::vector<REAL*> perfValues = s.perfValues();
+    std::vector< NeuralNetwork* > &saveNetworks = *s.saveNetworks;
+    // The weights must be set before the training algorithm state, which is
+    // copied with them to the threads networks:
+    s.network->setParams( stateBuffer( state["params"],
+          s.network->getParamSize() ).data() );
+    const py::object savedParams = state["saved_params"];
+    if ( static_cast<std::size_t>( py::len( savedParams ) ) != saveNetworks.size() ) {
+      throw std::runtime_error("Training state does not match the training goal.");
+    }
+    for ( unsigned i = 0; i < saveNetworks.size(); ++i ) {
+      saveNetworks[i]->setParams( stateBuffer( savedParams[i],
+            saveNetworks[i]->getParamSize() ).data() );
+    }
+    s.train->setTrainingState( stateBuffer( state["training"],
+          s.network->getTrainingStateSize() ).data() );
+    const std::vector<REAL> perf = stateBuffer( state["perf"], perfValues.size() );
+    for ( unsigned i = 0; i < perfValues.size(); ++i ) *perfValues[i] = perf[i];
+    s.epoch         = py::extract<unsigned>( state["epoch"] );
+    s.num_fails_mse = py::extract<unsigned>( state["num_fails"][0] );
+    s.num_fails_sp  = py::extract<unsigned>( state["num_fails"][1] );
+    s.num_fails_det = py::extract<unsigned>( state["num_fails"][2] );
+    s.num_fails_fa  = py::extract<unsigned>( state["num_fails"][3] );
+    s.dispCounter   = py::extract<unsigned>( state["display"] );
+    s.hasTstPerf    = py::extract<bool>( state["has_tst_perf"] );
+    std::istringstream goals( 
+        static_cast<std::string>( py::extract<std::string>( state["goals"] ) ) );
+    s.train->loadGoals( goals );
+    SamplerState sampler;
+    sampler.text    = py::extract<std::string>( state["sampler"] );
+    sampler.indexes = util::np_arrays_to_std_vectors<unsigned>( state["sampler_indexes"] );
+    sampler.errors  = util::np_arrays_to_std_vectors<REAL>( state["sampler_errors"] );
+    sampler.order   = util::np_arrays_to_std_vectors<unsigned>( state["sampler_order"] );
+    s.train->loadSampler( sampler );
+    MSG_INFO("Resuming the training from epoch " << s.epoch << ".");
+  }
+}
 
+//==============================================================================
+void TuningToolPyWrapper::evaluateEpoch( InitTraining &s, const unsigned ep,
+    const NeuralNetwork *evalNet, const unsigned evalThreads )
+{
+  Training *train = s.train;
+  const unsigned nEpochs    = m_net.getEpochs();
+  const unsigned validEvery = (m_net.getValidEvery()) ? m_net.getValidEvery() : 1;
+  const bool testOnBest     = m_net.getTestOnBest();
+
+  // The validation is only evaluated every validEvery epochs (and always
+  // on the last one). The stop criteria are only checked on the evaluated
+  // epochs, but the epochs in between count as failures.
+  s.validate = !(ep % validEvery) || (ep + 1 == nEpochs);
+  train->resetEvalTimes();
+
+  if ( s.validate ) {
     /*
-     * IF MULTI_STOP: 
+     * IF MULTI_STOP:
      *   mse_val: mse validation curve from the current training;
      *   sp_val : sp validation curve from SP_STOP (best point found into the ROC);
      *   det_val: det validation curve from FA_STOP (best detection from FA point);
      *   fa_val : fa validation curve form PD_STOP (best false alarm from DET point).
      */
-    m_train->valNetwork(mse_val, sp_val, det_val, fa_val);
+    if ( evalNet ) {
+      train->valNetwork(*evalNet, evalThreads, s.mse_val, s.sp_val, s.det_val, s.fa_val);
+    } else {
+      train->valNetwork(s.mse_val, s.sp_val, s.det_val, s.fa_val);
+    }
 
     // Expert function: return full information if MULTI_STOP is TRUE. If trainGoal is MSE_STOP this function will
     // return structs with zeros, not use for nothing. Otherwise, only the first argument will be used for
     // the SP_STOP case. Usually, the MULTI_STOP was set as default.
     // TODO: Test the MSE and SP stop case to check if we will have some bug into the code.
-    m_train->retrieve_operating_points( &bestsp_point_val, &det_point_val, &fa_point_val );
-    m_train->retrieve_fitted_values(det_fitted, fa_fitted, delta_det, delta_fa);
-
-    // Testing the new network if a testing dataset was passed.
-    if (!m_tstData.empty()){
-     /*
-      * IF MULTI_STOP: 
-      *   mse_tst: mse test curve from the current training;
-      *   sp_tst : sp test curve from SP_STOP (best point found into the ROC);
-      *   det_tst: det test curve from FA_STOP (best detection from FA point);
-      *   fa_tst : fa test curve form PD_STOP (best false alarm from DET point).
-      */
-      m_train->tstNetwork(mse_tst, sp_tst, det_tst, fa_tst);
-      m_train->retrieve_operating_points( &bestsp_point_tst, &det_point_tst, &fa_point_tst );
-    }
-
-    // Saving the best weight result.
-    m_train->isBestNetwork( mse_val, sp_val, det_val, fa_val, 
-                            is_best_mse, is_best_sp, is_best_det, is_best_fa);
-
-
-    if(epoch > MIN_TRAIN_EPOCH) {  
-    
-      // Saving best neworks depends on each criteria
-      if (is_best_mse == BETTER) {
-        num_fails_mse = 0;
-        MSG_DEBUG(BOLDMAGENTA << "Best mse was found with mse = " << mse_val << RESET);
-        if (trainGoal == MSE_STOP) {
-          m_saveNetworks[TRAINNET_DEFAULT_ID]->copyWeigthsFast(*m_trainNetwork);
-        }
-      } else if (is_best_mse == WORSE || is_best_mse == EQUAL) {
-        ++num_fails_mse;
-      }
+    train->retrieve_operating_points( &s.bestsp_point_val, &s.det_point_val, &s.fa_point_val );
+    train->retrieve_fitted_values(s.det_fitted, s.fa_fitted, s.delta_det, s.delta_fa);
 
-      if (is_best_sp == BETTER) {
-        num_fails_sp = 0;
-        if( (trainGoal == SP_STOP) || (trainGoal == MULTI_STOP) ) {
-          MSG_DEBUG(BOLDBLUE << "Best SP was found with SP = " << sp_val << RESET);
-          m_saveNetworks[TRAINNET_DEFAULT_ID]->copyWeigthsFast(*m_trainNetwork);
-        }
-      } else if (is_best_sp == WORSE || is_best_sp == EQUAL) {
-        ++num_fails_sp;
+    // Saving the best weight result. This must be done before testing,
+    // since the fitted deltas are computed by the last evaluated dataset.
+    train->isBestNetwork( s.mse_val, s.sp_val, s.det_val, s.fa_val,
+                          s.is_best_mse, s.is_best_sp, s.is_best_det, s.is_best_fa);
+  } else {
+    // Keep the last validation performance:
+    s.is_best_mse = s.is_best_sp = s.is_best_det = s.is_best_fa = EQUAL;
+  }
+
+  // Testing the new network if a testing dataset was passed. When
+  // testOnBest is set, the test is only evaluated when some criterion found
+  // a new best network, otherwise the last test performance is kept.
+  const bool foundBest = (s.is_best_mse == BETTER) || (s.is_best_sp == BETTER)
+                      || (s.is_best_det == BETTER) || (s.is_best_fa == BETTER);
+  if ( !m_tstData.empty() && s.validate
+      && ( !testOnBest || foundBest || !s.hasTstPerf ) )
+  {
+   /*
+    * IF MULTI_STOP:
+    *   mse_tst: mse test curve from the current training;
+    *   sp_tst : sp test curve from SP_STOP (best point found into the ROC);
+    *   det_tst: det test curve from FA_STOP (best detection from FA point);
+    *   fa_tst : fa test curve form PD_STOP (best false alarm from DET point).
+    */
+    if ( evalNet ) {
+      train->tstNetwork(*evalNet, evalThreads, s.mse_tst, s.sp_tst, s.det_tst, s.fa_tst);
+    } else {
+      train->tstNetwork(s.mse_tst, s.sp_tst, s.det_tst, s.fa_tst);
+    }
+    train->retrieve_operating_points( &s.bestsp_point_tst, &s.det_point_tst, &s.fa_point_tst );
+    s.hasTstPerf = true;
+  }
+}
+
+//==============================================================================
+bool TuningToolPyWrapper::updateEpoch( InitTraining &s, const unsigned ep,
+    const REAL mse_trn,
+    const NeuralNetwork &epochNet,
+    const PhaseTimes &epochTimes )
+{
+  const TrainGoal trainGoal = m_net.getTrainGoal();
+  // Check if goolType is mse default training
+  bool useSP = (trainGoal != MSE_STOP)? true : false;
+
+  const unsigned show         = m_net.getShow();
+  const unsigned fail_limit   = m_net.getMaxFail();
+
+  // Calculating the max_fail limits for each case (MSE and SP, if the case).
+  const unsigned fail_limit_mse  = (useSP) ? (fail_limit / 2) : fail_limit;
+  const unsigned fail_limit_sp   = (useSP) ? fail_limit : 0;
+  const unsigned fail_limit_det  = (useSP) ? fail_limit : 0;
+  const unsigned fail_limit_fa   = (useSP) ? fail_limit : 0;
+
+  Training *train = s.train;
+  std::vector< NeuralNetwork* > &saveNetworks = *s.saveNetworks;
+  bool stop = false;
+
+  if(ep > MIN_TRAIN_EPOCH) {
+
+    // Saving best neworks depends on each criteria
+    if (s.is_best_mse == BETTER) {
+      s.num_fails_mse = 0;
+      MSG_DEBUG(BOLDMAGENTA << "Best mse was found with mse = " << s.mse_val << RESET);
+      if (trainGoal == MSE_STOP) {
+        saveNetworks[TRAINNET_DEFAULT_ID]->copyWeigthsFast(epochNet);
       }
- 
-      if (is_best_det == BETTER) {
-        m_train->setDeltaDet( MIN_DELTA_VALUE );
-        num_fails_det = 0;
-        if(trainGoal == MULTI_STOP) {
-          MSG_DEBUG(BOLDGREEN << "Best det point was found with [det_fitted = " << det_fitted << "] and fa = " 
-                             << fa_val << RESET);
-          m_saveNetworks[TRAINNET_DET_ID]->copyWeigthsFast(*m_trainNetwork);
-        }
-      } else if (is_best_det == WORSE || is_best_det == EQUAL) {
-        ++num_fails_det;
+    } else if (s.is_best_mse == WORSE || s.is_best_mse == EQUAL) {
+      ++s.num_fails_mse;
+    }
+
+    if (s.is_best_sp == BETTER) {
+      s.num_fails_sp = 0;
+      if( (trainGoal == SP_STOP) || (trainGoal == MULTI_STOP) ) {
+        MSG_DEBUG(BOLDBLUE << "Best SP was found with SP = " << s.sp_val << RESET);
+        saveNetworks[TRAINNET_DEFAULT_ID]->copyWeigthsFast(epochNet);
       }
- 
-      if (is_best_fa == BETTER) {
-        m_train->setDeltaFa( MIN_DELTA_VALUE );
-        num_fails_fa = 0;
-        if(trainGoal == MULTI_STOP) {
-          MSG_DEBUG( BOLDRED << "Best fa point was found with det = " << det_val << " and [fa_fitted = " 
-                            << fa_fitted << "]" << RESET);
-          m_saveNetworks[TRAINNET_FA_ID]->copyWeigthsFast(*m_trainNetwork);
-        }
-      } else if (is_best_fa == WORSE || is_best_fa == EQUAL) {
-        ++num_fails_fa;
+    } else if (s.is_best_sp == WORSE || s.is_best_sp == EQUAL) {
+      ++s.num_fails_sp;
+    }
+
+    if (s.is_best_det == BETTER) {
+      train->setDeltaDet( MIN_DELTA_VALUE );
+      s.num_fails_det = 0;
+      if(trainGoal == MULTI_STOP) {
+        MSG_DEBUG(BOLDGREEN << "Best det point was found with [det_fitted = " << s.det_fitted << "] and fa = "
+                           << s.fa_val << RESET);
+        saveNetworks[TRAINNET_DET_ID]->copyWeigthsFast(epochNet);
       }
+    } else if (s.is_best_det == WORSE || s.is_best_det == EQUAL) {
+      ++s.num_fails_det;
+    }
 
-    }else{
-      m_train->resetBestGoal();
-    }
-
-    // Discovering which of the criterias are telling us to stop.
-    stop_mse  = num_fails_mse >= fail_limit_mse;
-    stop_sp   = num_fails_sp  >= fail_limit_sp;
-    stop_det  = num_fails_det >= fail_limit_det;
-    stop_fa   = num_fails_fa  >= fail_limit_fa;
-    
-    // Save train information
-    m_train->saveTrainInfo(epoch, mse_trn, mse_val, mse_tst, 
-                           bestsp_point_val, det_point_val, fa_point_val,
-                           bestsp_point_tst, det_point_tst, fa_point_tst,
-                           is_best_mse, is_best_sp, is_best_det, is_best_fa, 
-                           num_fails_mse, num_fails_sp, num_fails_det, num_fails_fa, 
-                           stop_mse, stop_sp, stop_det, stop_fa);
-
-    if( (trainGoal == MSE_STOP) && (stop_mse) ) stop = true;
-    if( (trainGoal == SP_STOP)  && (stop_mse) && (stop_sp) ) stop = true;
-    if( (trainGoal == MULTI_STOP) && (stop_mse) && (stop_sp) && (stop_det) && (stop_fa) ) stop = true;
-
-    // Number of stops flags on
-    stops_on = (int)stop_mse + (int)stop_sp + (int)stop_det + (int)stop_fa;
-
-    // Stop loop
-    if ( stop ) {
-      if ( show ) {
-        if ( !m_tstData.empty() ) { 
-          m_train->showTrainingStatus( epoch, 
-              mse_trn, mse_val, sp_val, mse_tst, sp_tst, 
-              stops_on );
-        } else {
-          m_train->showTrainingStatus( epoch, 
-              mse_trn, mse_val, sp_val, 
-              stops_on);
-        }
-        MSG_INFO("Maximum number of failures reached. " 
-                        "Finishing training...");
+    if (s.is_best_fa == BETTER) {
+      train->setDeltaFa( MIN_DELTA_VALUE );
+      s.num_fails_fa = 0;
+      if(trainGoal == MULTI_STOP) {
+        MSG_DEBUG( BOLDRED << "Best fa point was found with det = " << s.det_val << " and [fa_fitted = "
+                          << s.fa_fitted << "]" << RESET);
+        saveNetworks[TRAINNET_FA_ID]->copyWeigthsFast(epochNet);
       }
-      break;
+    } else if (s.is_best_fa == WORSE || s.is_best_fa == EQUAL) {
+      ++s.num_fails_fa;
     }
 
-    // Showing partial results at every "show" epochs (if show != 0).
+  }else{
+    train->resetBestGoal();
+  }
+
+  // Discovering which of the criterias are telling us to stop.
+  s.stop_mse  = s.num_fails_mse >= fail_limit_mse;
+  s.stop_sp   = s.num_fails_sp  >= fail_limit_sp;
+  s.stop_det  = s.num_fails_det >= fail_limit_det;
+  s.stop_fa   = s.num_fails_fa  >= fail_limit_fa;
+
+  // Save train information
+  PhaseTimes times = train->getEvalTimes();
+  times.trn_prop    = epochTimes.trn_prop;
+  times.trn_reduce  = epochTimes.trn_reduce;
+  times.trn_update  = epochTimes.trn_update;
+  times.trn_events  = epochTimes.trn_events;
+  times.trn_threads = epochTimes.trn_threads;
+  times.trn_busy    = epochTimes.trn_busy;
+  train->saveTrainInfo(ep, mse_trn, s.mse_val, s.mse_tst,
+                       s.bestsp_point_val, s.det_point_val, s.fa_point_val,
+                       s.bestsp_point_tst, s.det_point_tst, s.fa_point_tst,
+                       s.is_best_mse, s.is_best_sp, s.is_best_det, s.is_best_fa,
+                       s.num_fails_mse, s.num_fails_sp, s.num_fails_det, s.num_fails_fa,
+                       s.stop_mse, s.stop_sp, s.stop_det, s.stop_fa,
+                       times);
+
+  if ( s.validate ) {
+    if( (trainGoal == MSE_STOP) && (s.stop_mse) ) stop = true;
+    if( (trainGoal == SP_STOP)  && (s.stop_mse) && (s.stop_sp) ) stop = true;
+    if( (trainGoal == MULTI_STOP) && (s.stop_mse) && (s.stop_sp) && (s.stop_det) && (s.stop_fa) ) stop = true;
+  }
+
+  // Number of stops flags on
+  s.stops_on = (int)s.stop_mse + (int)s.stop_sp + (int)s.stop_det + (int)s.stop_fa;
+
+  // Stop loop
+  if ( stop ) {
     if ( show ) {
-      if ( !dispCounter ) {
+      if ( !m_tstData.empty() ) {
+        train->showTrainingStatus( ep,
+            mse_trn, s.mse_val, s.sp_val, s.mse_tst, s.sp_tst,
+            s.stops_on );
+      } else {
+        train->showTrainingStatus( ep,
+            mse_trn, s.mse_val, s.sp_val,
+            s.stops_on);
+      }
+      MSG_INFO("Maximum number of failures reached. "
+                      "Finishing training...");
+    }
+    return true;
+  }
 
-        if ( !m_tstData.empty() ) {
-          m_train->showTrainingStatus( epoch, 
-              mse_trn, mse_val, sp_val, mse_tst, sp_tst, 
-              stops_on );
-        } else {
-          m_train->showTrainingStatus( epoch, 
-              mse_trn, mse_val, sp_val, 
-              stops_on );
-        }
-        
+  // Showing partial results at every "show" epochs (if show != 0).
+  if ( show ) {
+    if ( !s.dispCounter ) {
+
+      if ( !m_tstData.empty() ) {
+        train->showTrainingStatus( ep,
+            mse_trn, s.mse_val, s.sp_val, s.mse_tst, s.sp_tst,
+            s.stops_on );
+      } else {
+        train->showTrainingStatus( ep,
+            mse_trn, s.mse_val, s.sp_val,
+            s.stops_on );
       }
-      dispCounter = (dispCounter + 1) % show;
+
     }
-  } if ( epoch == nEpochs ) {
-    MSG_INFO("Maximum number of epochs (" << 
+    s.dispCounter = (s.dispCounter + 1) % show;
+  }
+  return false;
+}
+
+//==============================================================================
+void TuningToolPyWrapper::holdTrainingState( InitTraining &s )
+{
+  s.network->getTrainingState( s.trainingState.data() );
+  s.train->saveSampler( s.samplerState );
+}
+
+//==============================================================================
+void TuningToolPyWrapper::checkpoint( InitTraining &s, const unsigned ep,
+    const NeuralNetwork &epochNet )
+{
+  MSG_DEBUG("Checkpointing the training state after epoch " << ep << ".");
+  const std::vector<REAL*> perfValues = s.perfValues();
+  REAL *data(nullptr);
+  py::dict state;
+  state["epoch"] = ep + 1;
+  state["seed"]  = m_trainSeed;
+  py::object params = util::new_np_array( epochNet.getParamSize(), data );
+  epochNet.getParams( data );
+  state["params"] = params;
+  py::list savedParams;
+  for ( const auto* net : *s.saveNetworks ) {
+    py::object netParams = util::new_np_array( net->getParamSize(), data );
+    net->getParams( data );
+    savedParams.append( netParams );
+  }
+  state["saved_params"] = savedParams;
+  py::object training = util::new_np_array( s.trainingState.size(), data );
+  std::copy( s.trainingState.begin(), s.trainingState.end(), data );
+  state["training"] = training;
+  py::object perf = util::new_np_array( perfValues.size(), data );
+  for ( unsigned i = 0; i < perfValues.size(); ++i ) data[i] = *perfValues[i];
+  state["perf"] = perf;
+  py::list numFails;
+  numFails.append( s.num_fails_mse ); numFails.append( s.num_fails_sp );
+  numFails.append( s.num_fails_det ); numFails.append( s.num_fails_fa );
+  state["num_fails"]    = numFails;
+  state["display"]      = s.dispCounter;
+  state["has_tst_perf"] = s.hasTstPerf;
+  std::ostringstream goals;
+  s.train->saveGoals( goals );
+  state["goals"]   = goals.str();
+  // Only the random engines states and positions are kept as text:
+  state["sampler"]         = s.samplerState.text;
+  state["sampler_indexes"] = util::std_vectors_to_np_arrays( s.samplerState.indexes );
+  state["sampler_errors"]  = util::std_vectors_to_np_arrays( s.samplerState.errors );
+  state["sampler_order"]   = util::std_vectors_to_np_arrays( s.samplerState.order );
+  state["evolution"] = flushTrainEvolution( s.train->getTrainInfo() );
+  m_checkpointFcn( s.init, state, py::object() );
+  m_lastCheckpoint = util::wall_time();
+}
+
+//==============================================================================
+void TuningToolPyWrapper::endTraining( InitTraining &s )
+{
+  const unsigned nEpochs = m_net.getEpochs();
+  if ( s.epoch == nEpochs ) {
+    MSG_INFO("Maximum number of epochs (" <<
         nEpochs << ") reached. Finishing training...");
   }
 
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
   if ( msgLevel( MSG::DEBUG ) ){
     MSG_DEBUG( "Printing last epoch weigths:" ){
-      m_trainNetwork->printWeigths();
+      s.network->printWeigths();
     }
   }
 #endif
 
   // Hold the train evolution before remove object
-  flushTrainEvolution( m_train->getTrainInfo() );
+  s.trnEvolution = flushTrainEvolution( s.train->getTrainInfo() );
+}
+
+//==============================================================================
+void TuningToolPyWrapper::trainLoop( InitTraining &s, const unsigned init )
+{
+  const unsigned nEpochs      = m_net.getEpochs();
+  const unsigned nThreads     = s.train->getNumThreads();
+  const unsigned evalThreads  = std::min( m_net.getPipelineThreads(), nThreads );
+  const bool pipeline         = evalThreads > 0;
+  Training *train = s.train;
+
+  beginTraining( s, init );
+  m_lastCheckpoint = util::wall_time();
+
+  MSG_DEBUG("Start looping...")
+
+  if ( !pipeline ) {
+    train->setTrainThreads( nThreads );
+
+    // Training loop
+    for(; s.epoch < nEpochs; ++s.epoch){
+      MSG_DEBUG("=================== Start of Epoch (" << s.epoch
+           << ") ===================");
+
+      // Training the network and calculating the new weights.
+      const REAL mse_trn = train->trainNetwork();
+
+      evaluateEpoch( s, s.epoch, nullptr, 0 );
+
+      if ( updateEpoch( s, s.epoch, mse_trn, *s.network,
+            train->getTrainTimes() ) ) break;
+
+      if ( checkpointDue() ) {
+        holdTrainingState( s );
+        checkpoint( s, s.epoch, *s.network );
+      }
+    }
+  } else {
+    /*
+     * Pipelined training loop: the weights obtained on each epoch are copied
+     * to a snapshot, which is evaluated by evalThreads threads while the
+     * remaining ones train the next epoch. The epoch is then updated against
+     * the snapshot, so that the results are the same as the ones from the
+     * sequential loop (only the last trained epoch is discarded on stop).
+     */
+    const unsigned trainThreads = (nThreads > evalThreads) ?
+      (nThreads - evalThreads) : 1;
+    MSG_INFO("Pipelining the epochs evaluation (" << evalThreads
+        << " threads) with the training (" << trainThreads << " threads).");
+    train->setTrainThreads( trainThreads );
+
+    NeuralNetwork snapshot( *s.network );
+    std::future<void> evaluation;
+    REAL snapshot_mse_trn = 0.;
+    PhaseTimes snapshot_times;
+    bool snapshot_checkpoint = false;
+    auto evaluateSnapshot = [&]( const unsigned ep )
+    {
+      evaluateEpoch( s, ep, &snapshot, evalThreads );
+    };
+
+    // Training loop
+    for(; s.epoch < nEpochs; ++s.epoch){
+      MSG_DEBUG("=================== Start of Epoch (" << s.epoch
+           << ") ===================");
+
+      // Training the network while the previous epoch is evaluated.
+      const REAL mse_trn = train->trainNetwork();
+
+      if ( evaluation.valid() ) {
+        evaluation.get();
+        if ( updateEpoch( s, s.epoch - 1, snapshot_mse_trn, snapshot,
+              snapshot_times ) ) {
+          --s.epoch; break;
+        }
+        if ( snapshot_checkpoint ) checkpoint( s, s.epoch - 1, snapshot );
+      }
+
+      snapshot.copyWeigthsFast( *s.network );
+      snapshot_mse_trn = mse_trn;
+      snapshot_times = train->getTrainTimes();
+      // The training state is held together with the snapshot, and it is
+      // checkpointed once the snapshot epoch is updated:
+      snapshot_checkpoint = checkpointDue();
+      if ( snapshot_checkpoint ) holdTrainingState( s );
+      evaluation = std::async( std::launch::async, evaluateSnapshot, s.epoch );
+    }
+    // Update the last evaluated epoch:
+    if ( evaluation.valid() ) {
+      evaluation.get();
+      if ( updateEpoch( s, s.epoch - 1, snapshot_mse_trn, snapshot,
+            snapshot_times ) ) --s.epoch;
+    }
+  }
+
+  endTraining( s );
+}
 
-  // Release memory
-  MSG_DEBUG("Releasing train algorithm...");
-  delete m_train;
+//==============================================================================
+void TuningToolPyWrapper::trainLockstep( const unsigned nInits,
+    const unsigned nSlots, py::list &output )
+{
+  const unsigned nEpochs     = m_net.getEpochs();
+  const unsigned nThreads    = m_train->getNumThreads();
+  const unsigned slotThreads = std::max( 1u, nThreads / nSlots );
+  MSG_INFO("Training " << nSlots << " initializations at once ("
+      << slotThreads << " threads each).");
+
+  // The first slot uses the wrapper network and training algorithm, while
+  // the others own their copies (whose weights are drawn when started):
+  std::vector<InitTraining> slots( nSlots );
+  for ( unsigned i = 0; i < nSlots; ++i ) {
+    InitTraining &s = slots[i];
+    if ( i ) {
+      s.owner        = true;
+      s.network      = dynamic_cast<Backpropagation*>( m_trainNetwork->clone() );
+      s.train        = newTraining( s.network, m_trainSeed );
+      s.saveNetworks = &s.ownSaveNetworks;
+      configureTraining( *s.train );
+    } else {
+      s.network      = m_trainNetwork;
+      s.train        = m_train;
+      s.saveNetworks = &m_saveNetworks;
+    }
+    s.train->setTrainThreads( slotThreads );
+  }
+
+  // The slots training an initialization, and the outputs of the finished
+  // initializations which are not handed yet:
+  std::vector<InitTraining*> active;
+  std::vector<py::list> finished( nInits );
+  std::vector<bool> isFinished( nInits, false );
+  unsigned nextInit = 0, nextOutput = 0;
+
+  auto finishInit = [&]( InitTraining &s )
+  {
+    endTraining( s );
+    py::list initOutput;
+    saveNetworksToPyList( initOutput, *s.saveNetworks );
+    initOutput.append( s.trnEvolution );
+    finished[s.init]   = initOutput;
+    isFinished[s.init] = true;
+  };
+
+  // Starts the next initialization on the slot, returning whether there was
+  // one left to be trained:
+  auto startInit = [&]( InitTraining &s ) -> bool
+  {
+    while ( nextInit < nInits ) {
+      // The first initialization uses the weights set by newff/loadff
+      if ( nextInit ) s.network->initWeights();
+      beginTraining( s, nextInit++ );
+      if ( s.epoch < nEpochs ) return true;
+      // A resumed initialization may have no epochs left:
+      finishInit( s );
+    }
+    return false;
+  };
+
+  auto handOutputs = [&]()
+  {
+    while ( nextOutput < nInits && isFinished[nextOutput] ) {
+      output.append( finished[nextOutput] );
+      if ( !m_checkpointFcn.is_none() ) {
+        m_checkpointFcn( nextOutput, py::object(), finished[nextOutput] );
+      }
+      finished[nextOutput] = py::list();
+      ++nextOutput;
+    }
+  };
+
+  for ( auto& s : slots ) {
+    if ( startInit( s ) ) active.push_back( &s );
+  }
+  handOutputs();
+  m_lastCheckpoint = util::wall_time();
+
+  while ( !active.empty() ) {
+    const int nActive = active.size();
+    InitTraining * const * const slotPtrs = active.data();
+    std::exception_ptr error;
+    int i;
+#ifdef USE_OMP
+    // The slots train and evaluate their epochs on their own threads teams:
+    const int maxActiveLevels = omp_get_max_active_levels();
+    if ( slotThreads > 1 ) omp_set_max_active_levels( 2 );
+#endif
+    // Train and evaluate one epoch of each initialization at once. No python
+    // object is used meanwhile:
+#ifdef USE_OMP
+    #pragma omp parallel for default(none) schedule(dynamic,1) \
+        num_threads(nActive) shared(error,slotPtrs,slotThreads) private(i)
+#endif
+    for ( i = 0; i < nActive; ++i ) {
+      InitTraining &s = *slotPtrs[i];
+      try {
+        s.mse_trn = s.train->trainNetwork();
+        evaluateEpoch( s, s.epoch, s.network, slotThreads );
+      } catch ( ... ) {
+#ifdef USE_OMP
+        #pragma omp critical
+#endif
+        error = std::current_exception();
+      }
+    }
+#ifdef USE_OMP
+    omp_set_max_active_levels( maxActiveLevels );
+#endif
+    if ( error ) std::rethrow_exception( error );
+
+    // Then update them on the initializations order. Only the first
+    // unfinished initialization, which is the one resumed by a later call,
+    // is checkpointed:
+    std::sort( active.begin(), active.end(),
+        []( const InitTraining *a, const InitTraining *b ){ return a->init < b->init; } );
+    const bool checkpointNow = checkpointDue();
+    std::vector<InitTraining*> stillActive;
+    for ( InitTraining *slot : active ) {
+      InitTraining &s = *slot;
+      MSG_DEBUG("=================== End of Epoch (" << s.epoch << ") of "
+          "initialization (" << s.init << ") ===================");
+      bool stop = updateEpoch( s, s.epoch, s.mse_trn, *s.network,
+          s.train->getTrainTimes() );
+      if ( !stop && checkpointNow && s.init == nextOutput ) {
+        holdTrainingState( s );
+        checkpoint( s, s.epoch, *s.network );
+      }
+      if ( !stop ) stop = ( ++s.epoch == nEpochs );
+      if ( stop ) {
+        finishInit( s );
+        if ( !startInit( s ) ) continue;
+      }
+      stillActive.push_back( slot );
+    }
+    active.swap( stillActive );
+    handOutputs();
+  }
+}
+
+//==============================================================================
+py::list TuningToolPyWrapper::train_c()
+{
+ 
+  // Output will be: [networks, trainEvolution]
+  py::list output;
+
+  if ( ! m_trainNetwork ) {
+    MSG_FATAL("Cannot train: no network was initialized!")
+  }
+
+  prepareTraining();
+  InitTraining s;
+  s.network      = m_trainNetwork;
+  s.train        = m_train;
+  s.saveNetworks = &m_saveNetworks;
+  trainLoop( s, 0 );
 
   MSG_DEBUG("Appending neural networks to python list...");
-  saveNetworksToPyList(output);
+  saveNetworksToPyList(output, m_saveNetworks);
 
   MSG_DEBUG("Printing list of appended objects...");
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
@@ -365,12 +843,72 @@ py::list TuningToolPyWrapper::train_c()
 #endif
   
   MSG_DEBUG("Appending training evolution to python list...");
-  output.append( trainEvolutionToPyList() );
+  output.append( s.trnEvolution );
 
   MSG_DEBUG("Exiting train_c...");
   return output;
 }
 
+//==============================================================================
+py::list TuningToolPyWrapper::train_many_c( const unsigned nInits )
+{
+  // Output will be: [[networks, trainEvolution] for each initialization]
+  py::list output;
+
+  if ( ! m_trainNetwork ) {
+    MSG_FATAL("Cannot train: no network was initialized!")
+  }
+  if ( !nInits ) return output;
+
+  // The training object (datasets, threads networks and buffers) is shared
+  // by all initializations trained one after the other:
+  prepareTraining();
+
+  const unsigned nSlots = std::min( std::min( m_net.getParallelInits(), nInits ),
+      m_train->getNumThreads() );
+  if ( nSlots > 1 ) {
+    trainLockstep( nInits, nSlots, output );
+    MSG_DEBUG("Exiting train_many_c...");
+    return output;
+  }
+
+  InitTraining s;
+  s.network      = m_trainNetwork;
+  s.train        = m_train;
+  s.saveNetworks = &m_saveNetworks;
+  for ( unsigned init = 0; init < nInits; ++init ) {
+    MSG_DEBUG("Training initialization (" << init << ")...");
+    // The first initialization uses the weights set by newff/loadff
+    if ( init ) m_trainNetwork->initWeights();
+    trainLoop( s, init );
+
+    py::list initOutput;
+    saveNetworksToPyList(initOutput, m_saveNetworks);
+    initOutput.append( s.trnEvolution );
+    output.append( initOutput );
+    if ( !m_checkpointFcn.is_none() ) {
+      m_checkpointFcn( init, py::object(), initOutput );
+    }
+  }
+
+  MSG_DEBUG("Exiting train_many_c...");
+  return output;
+}
+
+
+//==============================================================================
+void TuningToolPyWrapper::setCheckpoint( const py::object &fcn, 
+    const double interval )
+{
+  m_checkpointFcn      = fcn;
+  m_checkpointInterval = interval;
+}
+
+//==============================================================================
+void TuningToolPyWrapper::setResumeState( const py::object &state )
+{
+  m_resumeState = state;
+}
 
 //==============================================================================
 py::list TuningToolPyWrapper::valid_c( const DiscriminatorPyWrapper &net )
@@ -378,6 +916,7 @@ py::list TuningToolPyWrapper::valid_c( const DiscriminatorPyWrapper &net )
   std::vector<REAL> signal, noise;
   py::list output;
   bool useTst = !m_tstData.empty();
+  const REAL resolution = m_net.getValidRocResolution();
 
   if(useTst){
     signal.reserve( m_tstData[0]->getShape(0)
@@ -392,7 +931,7 @@ py::list TuningToolPyWrapper::valid_c( const DiscriminatorPyWrapper &net )
     sim( net, m_tstData[0], signal);  
     MSG_DEBUG("Propagating test dataset noise:");
     sim( net, m_tstData[1], noise);
-    output.append( genRoc(signal, noise, 0.005) );
+    output.append( genRoc(signal, noise, resolution) );
 
     MSG_DEBUG("Propagating validation dataset signal:");
     sim( net, m_valData[0], signal);  
@@ -402,7 +941,7 @@ py::list TuningToolPyWrapper::valid_c( const DiscriminatorPyWrapper &net )
     sim( net, m_trnData[0], signal);  
     MSG_DEBUG("Propagating train dataset noise:");
     sim( net, m_trnData[1], noise);
-    output.append( genRoc(signal, noise, 0.005) );
+    output.append( genRoc(signal, noise, resolution) );
   } else {
 
     signal.reserve( m_valData[0]->getShape(0)
@@ -416,82 +955,142 @@ py::list TuningToolPyWrapper::valid_c( const DiscriminatorPyWrapper &net )
     sim( net, m_valData[0], signal);  
     MSG_DEBUG("Propagating validation dataset noise:");
     sim( net, m_valData[1], noise);
-    output.append( genRoc(signal, noise, 0.005) );
+    output.append( genRoc(signal, noise, resolution) );
 
     MSG_DEBUG("Propagating train dataset signal:");
     sim( net, m_trnData[0], signal);  
     MSG_DEBUG("Propagating train dataset noise:");
     sim( net, m_trnData[1], noise);
-    output.append( genRoc(signal, noise, 0.005) );
+    output.append( genRoc(signal, noise, resolution) );
   }
   return output;    
 }
 
 
 //==============================================================================
-PyObject* TuningToolPyWrapper::sim_c( const DiscriminatorPyWrapper &net,
-    const py::numeric::array &data )
+py::object TuningToolPyWrapper::sim_c( const DiscriminatorPyWrapper &net,
+    const py::numeric::array &data, 
+    const py::object &out )
 {
-
-  // Check if our array is on the correct type:
-  auto handle = util::get_np_array( data );
+  // Check if our array is on the correct type (or on a compressed storage),
+  // using it without copying:
+  auto handle = util::get_np_array( data, 2, false, true );
   // Create our object holder:
   Ndarray<REAL,2> dataHandler( handle );
   // And extract information from it
-  long numOfEvents = dataHandler.getShape(0);
-  long inputSize = dataHandler.getShape(1);
-  const REAL *inputEvents  = dataHandler.getPtr();
-
-  // Create a PyObject of same length
-  PyObject *pyObj = PyArray_ZEROS( 1
-      , &numOfEvents
-      , type_to_npy_enum<REAL>::enum_val
-      , 0 );
+  npy_intp numOfEvents = dataHandler.getShape(0);
+  const npy_intp inputSize = dataHandler.getShape(1);
+  if ( inputSize != static_cast<npy_intp>(net.getNumNodes(0)) ) {
+    throw std::runtime_error("Input data number of features does not match "
+        "the network number of inputs.");
+  }
 
-  // Obtain an array representation of the python object (we use this
-  // for retrieving the raw data from the array):
-  PyArrayObject *out(nullptr);
-  out->base = pyObj;
+  // Retrieve output size information
+  npy_intp outputSize = net.getNumNodes( net.getNumLayers() - 1 );
+
+  PyObject *pyObj(nullptr);
+  if ( out.is_none() ) {
+    // Create a PyObject with the outputs shape:
+    npy_intp dims[2] = { numOfEvents, outputSize };
+    pyObj = PyArray_ZEROS( ( outputSize == 1 ) ? 1 : 2
+        , dims
+        , type_to_npy_enum<REAL>::enum_val
+        , 0 );
+    if ( ! pyObj ) {
+      throw std::runtime_error("Couldn't allocate the output numpy array!");
+    }
+  } else {
+    // Check whether we can write on the output buffer as it is:
+    pyObj = out.ptr();
+    if ( ! PyArray_Check( pyObj ) ) {
+      throw std::runtime_error("Output buffer must be a numpy.ndarray.");
+    }
+    PyArrayObject *outArray = reinterpret_cast<PyArrayObject*>(pyObj);
+    if ( PyArray_TYPE( outArray ) != type_to_npy_enum<REAL>::enum_val 
+        || ! PyArray_ISCARRAY( outArray ) ) 
+    {
+      throw std::runtime_error("Output buffer must be an aligned, writeable "
+          "and C-contiguous array of the compile time floating point type.");
+    }
+    if ( PyArray_SIZE( outArray ) != numOfEvents*outputSize ) {
+      throw std::runtime_error("Output buffer size does not match the number "
+          "of events times the network number of outputs.");
+    }
+    Py_INCREF( pyObj );
+  }
+  // Hold it on a smart pointer, so that it is released on errors:
+  py::object output( (py::handle<>( pyObj )) );
 
   // Retrieve its raw pointer:
-  REAL* outputEvents = reinterpret_cast<REAL*>(out->data);
-
-  /* This is commented b/c I think it is not needed */
-  // Create a smart pointer handle to it (we need it to be deleted
-  // as soon as it is not handled anymore)
-  //py::handle<> handle( out );
+  REAL* outputEvents = reinterpret_cast<REAL*>( 
+      PyArray_DATA( reinterpret_cast<PyArrayObject*>(pyObj) ) );
 
-  // Retrieve output size information
-  const std::size_t outputSize = net.getNumNodes( 
-      net.getNumLayers() - 1 );
+  propagateDataset( net, dataHandler, outputEvents );
 
-  auto netCopy = net;
+  return output;
+}
 
-  unsigned i;
+//==============================================================================
+void TuningToolPyWrapper::propagateDataset( const NeuralNetwork &net,
+    const Ndarray<REAL,2> &data, 
+    REAL *output ) const
+{
+  const unsigned numOfEvents = data.getShape(0);
+  const unsigned inputSize = data.getShape(1);
+  const unsigned outputSize = net.getNumNodes( net.getNumLayers() - 1 );
+  const REAL *input = data.getPtr();
+  const npy_intp evStep = data.getStep(0);
+  const npy_intp featStep = data.getStep(1);
+  // Events on a compressed storage are widened while gathered:
+  const DataStorage storage = util::npy_type_to_storage( data.getTypeNum() );
+  const npy_uint16 *packed = ( storage == REAL_STORAGE ) ? nullptr 
+      : reinterpret_cast<const npy_uint16*>( input );
+  // Events which are not contiguous are gathered into a block:
+  const bool contiguous = !packed && data.isCContiguous();
+  const int numBlocks = ( numOfEvents + EVENT_BLOCK_SIZE - 1 ) 
+                        / EVENT_BLOCK_SIZE;
+
+  // No python object is used from now on:
+  util::ReleaseGIL releaseGIL;
+
+  int b;
 #ifdef USE_OMP
-  int chunk = 1000;
-  #pragma omp parallel shared(inputEvents, outputEvents, chunk) \
-    private(i) firstprivate(netCopy)
+  #pragma omp parallel shared(net, input, packed, output) private(b)
 #endif
   {
+    // Each thread propagates its blocks on its own buffers:
+    std::vector< std::vector<REAL> > layersOutput;
+    std::vector<REAL> block( ( contiguous ) ? 0 : EVENT_BLOCK_SIZE*inputSize );
 #ifdef USE_OMP
-    #pragma omp for schedule(dynamic,chunk) nowait
+    #pragma omp for schedule(static)
 #endif
-    for ( i=0; i < numOfEvents; ++i )
+    for ( b = 0; b < numBlocks; ++b )
     {
-      std::copy_n( netCopy.propagateInput( inputEvents + (i*inputSize) ), 
-          outputSize,
-          outputEvents + (i*outputSize));
+      const unsigned first = b*EVENT_BLOCK_SIZE;
+      const unsigned nBlockEvents = std::min( EVENT_BLOCK_SIZE, 
+          numOfEvents - first );
+      const REAL *blockInput = input + first*inputSize;
+      if ( !contiguous ) {
+        for ( unsigned e = 0; e < nBlockEvents; ++e ) {
+          if ( packed ) {
+            util::widen_n( block.data() + e*inputSize, 
+                packed + ( first + e )*evStep, featStep, inputSize, storage );
+            continue;
+          }
+          const REAL *event = input + ( first + e )*evStep;
+          for ( unsigned k = 0; k < inputSize; ++k ) {
+            block[e*inputSize + k] = event[k*featStep];
+          }
+        }
+        blockInput = block.data();
+      }
+      std::copy_n( net.propagateInputs( blockInput, 
+                                        nBlockEvents, 
+                                        layersOutput ),
+          nBlockEvents*outputSize,
+          output + first*outputSize );
     }
   }
-
-  // TODO Check if arr(handle) does not allocate more space (it only uses the 
-  // handle to refer to the object. 
-  // TODO What does happen if I set it to return the PyArray instead?
-  //py::numeric::array arr( handle );
-  //return arr.copy();
-  return pyObj;
-
 }
 
 //==============================================================================
@@ -502,11 +1101,17 @@ void TuningToolPyWrapper::setData( const py::list& data,
   // it:
   std::vector< Ndarray<REAL,2>* > &set = this->*setPtr;
 
+  // The training object is bound to the previous datasets:
+  releaseTraining();
+
   // Check if set is empty, where we need to clean its previous memory:
   if ( !set.empty() ) {
     releaseDataSet( set );
   }
 
+  // Bytes viewed by the datasets and kept alive by them:
+  std::size_t viewedBytes(0), pinnedBytes(0);
+
   // Loop over list and check for elements in which we can extract:
   for( unsigned pattern = 0; pattern < py::len( data ); pattern++ )
   {
@@ -516,14 +1121,28 @@ void TuningToolPyWrapper::setData( const py::list& data,
     {
       // Extract our array:
       const auto &pyObj = static_cast<py::numeric::array>(extractor());
-      // Make sure that the input type is a numpy array and get it:
-      auto handle = util::get_np_array( pyObj );
+      // Make sure that the input type is a numpy array and get a view of it
+      // (this raises if the array could only be used through a copy). The
+      // float16 and bfloat16 arrays are kept on their compressed storage:
+      auto handle = util::get_np_array( pyObj, 2, false, true );
       // Retrieve our dataHandler:
       auto dataHandler = new Ndarray< REAL, 2 >( handle );
+      const bool compressed = util::npy_type_to_storage( 
+          dataHandler->getTypeNum() ) != REAL_STORAGE;
+      const std::size_t patViewed = dataHandler->getShape(0) 
+                                  * dataHandler->getShape(1) 
+                                  * ( ( compressed ) ? sizeof(npy_uint16) 
+                                                     : sizeof(REAL) );
+      const std::size_t patPinned = util::get_np_pinned_bytes( handle.get() );
+      viewedBytes += patViewed; pinnedBytes += patPinned;
       // If we arrived here, it is OK, put it on our data set:
       MSG_DEBUG( "Added dataset of size (" 
                  << dataHandler->getShape(0) << "," 
-                 << dataHandler->getShape(1) << ")"
+                 << dataHandler->getShape(1) << ") with strides ("
+                 << dataHandler->getStep(0) << ","
+                 << dataHandler->getStep(1) << "), viewing "
+                 << patViewed << " bytes and pinning " 
+                 << patPinned << " bytes."
                );
       set.push_back( dataHandler );
     } else {
@@ -536,59 +1155,123 @@ void TuningToolPyWrapper::setData( const py::list& data,
           << ")." );
     }
   }
+  MSG_INFO( "Bound " << set.size() << " pattern datasets without copying: "
+      << viewedBytes / 1048576. << " MB viewed, " 
+      << pinnedBytes / 1048576. << " MB pinned." );
 }
 
 //==============================================================================
-void TuningToolPyWrapper::flushTrainEvolution( 
+py::dict TuningToolPyWrapper::flushTrainEvolution(
     const std::list<TrainData*> &trnEvolution )
 {
 
-  m_trnEvolution.clear();  
+  py::dict evolution;
+  const npy_intp nEpochs = trnEvolution.size();
+
+  // Create the columns:
+  unsigned *epoch, *numFailsMse, *numFailsSP, *numFailsDet, *numFailsFa;
+  REAL *mseTrn, *mseVal, *mseTst;
+  bool *isBestMse, *isBestSP, *isBestDet, *isBestFa;
+  bool *stopMse, *stopSP, *stopDet, *stopFa;
+  evolution["epoch"]         = util::new_np_array( nEpochs, epoch       );
+  evolution["mse_trn"]       = util::new_np_array( nEpochs, mseTrn      );
+  evolution["mse_val"]       = util::new_np_array( nEpochs, mseVal      );
+  evolution["mse_tst"]       = util::new_np_array( nEpochs, mseTst      );
+  evolution["is_best_mse"]   = util::new_np_array( nEpochs, isBestMse   );
+  evolution["is_best_sp"]    = util::new_np_array( nEpochs, isBestSP    );
+  evolution["is_best_det"]   = util::new_np_array( nEpochs, isBestDet   );
+  evolution["is_best_fa"]    = util::new_np_array( nEpochs, isBestFa    );
+  evolution["num_fails_mse"] = util::new_np_array( nEpochs, numFailsMse );
+  evolution["num_fails_sp"]  = util::new_np_array( nEpochs, numFailsSP  );
+  evolution["num_fails_det"] = util::new_np_array( nEpochs, numFailsDet );
+  evolution["num_fails_fa"]  = util::new_np_array( nEpochs, numFailsFa  );
+  evolution["stop_mse"]      = util::new_np_array( nEpochs, stopMse     );
+  evolution["stop_sp"]       = util::new_np_array( nEpochs, stopSP      );
+  evolution["stop_det"]      = util::new_np_array( nEpochs, stopDet     );
+  evolution["stop_fa"]       = util::new_np_array( nEpochs, stopFa      );
+
+  // The phases times (in seconds), the training throughput (events per
+  // second) and the training threads utilisation (their busy fraction while
+  // propagating):
+  double *timeTrnProp, *timeTrnReduce, *timeTrnUpdate;
+  double *timeValProp, *timeValRoc, *timeTstProp, *timeTstRoc;
+  double *trnEventsPerSec, *trnThreadUtil;
+  evolution["time_trn_prop"]      = util::new_np_array( nEpochs, timeTrnProp     );
+  evolution["time_trn_reduce"]    = util::new_np_array( nEpochs, timeTrnReduce   );
+  evolution["time_trn_update"]    = util::new_np_array( nEpochs, timeTrnUpdate   );
+  evolution["time_val_prop"]      = util::new_np_array( nEpochs, timeValProp     );
+  evolution["time_val_roc"]       = util::new_np_array( nEpochs, timeValRoc      );
+  evolution["time_tst_prop"]      = util::new_np_array( nEpochs, timeTstProp     );
+  evolution["time_tst_roc"]       = util::new_np_array( nEpochs, timeTstRoc      );
+  evolution["trn_events_per_sec"] = util::new_np_array( nEpochs, trnEventsPerSec );
+  evolution["trn_thread_util"]    = util::new_np_array( nEpochs, trnThreadUtil   );
+
+  // The operating points are stored on <point>_<sp|det|fa>_<val|tst> columns:
+  const char *pointNames[3] = { "bestsp_point", "det_point", "fa_point" };
+  const char *dsNames[2] = { "val", "tst" };
+  roc::setpoint TrainData::* const pointMembers[3][2] = {
+    { &TrainData::bestsp_point_val, &TrainData::bestsp_point_tst },
+    { &TrainData::det_point_val,    &TrainData::det_point_tst    },
+    { &TrainData::fa_point_val,     &TrainData::fa_point_tst     }
+  };
+  REAL *pointColumns[3][2][3];
+  for ( unsigned p = 0; p < 3; ++p ) {
+    for ( unsigned ds = 0; ds < 2; ++ds ) {
+      const std::string prefix = std::string(pointNames[p]) + "_";
+      const std::string suffix = std::string("_") + dsNames[ds];
+      evolution[prefix + "sp" + suffix]  = util::new_np_array( nEpochs,
+          pointColumns[p][ds][0] );
+      evolution[prefix + "det" + suffix] = util::new_np_array( nEpochs,
+          pointColumns[p][ds][1] );
+      evolution[prefix + "fa" + suffix]  = util::new_np_array( nEpochs,
+          pointColumns[p][ds][2] );
+    }
+  }
 
+  // And fill them:
+  npy_intp i = 0;
   for( const auto& cTrnData : trnEvolution ) 
   {
-
-    TrainDataPyWrapper trainData;
-
-    trainData.setEpoch       ( cTrnData->epoch         );
-    trainData.setMseTrn      ( cTrnData->mse_trn       );
-    trainData.setMseVal      ( cTrnData->mse_val       );
-    trainData.setMseTst      ( cTrnData->mse_tst       );
-    trainData.setIsBestMse   ( cTrnData->is_best_mse   );
-    trainData.setIsBestSP    ( cTrnData->is_best_sp    );
-    trainData.setIsBestDet   ( cTrnData->is_best_det   );
-    trainData.setIsBestFa    ( cTrnData->is_best_fa    );
-    trainData.setNumFailsMse ( cTrnData->num_fails_mse );
-    trainData.setNumFailsSP  ( cTrnData->num_fails_sp  );
-    trainData.setNumFailsDet ( cTrnData->num_fails_det );
-    trainData.setNumFailsFa  ( cTrnData->num_fails_fa  );
-    trainData.setStopMse     ( cTrnData->stop_mse      );
-    trainData.setStopSP      ( cTrnData->stop_sp       );
-    trainData.setStopDet     ( cTrnData->stop_det      );
-    trainData.setStopFa      ( cTrnData->stop_fa       );
- 
-    //Expert methods to attach the operating point information into the object
-    trainData.set_bestsp_point_sp_val ( cTrnData->bestsp_point_val.sp  );
-    trainData.set_bestsp_point_det_val( cTrnData->bestsp_point_val.det );
-    trainData.set_bestsp_point_fa_val ( cTrnData->bestsp_point_val.fa  );
-    trainData.set_bestsp_point_sp_tst ( cTrnData->bestsp_point_tst.sp  );
-    trainData.set_bestsp_point_det_tst( cTrnData->bestsp_point_tst.det );
-    trainData.set_bestsp_point_fa_tst ( cTrnData->bestsp_point_tst.fa  );
-    trainData.set_det_point_sp_val    ( cTrnData->det_point_val.sp     );
-    trainData.set_det_point_det_val   ( cTrnData->det_point_val.det    );
-    trainData.set_det_point_fa_val    ( cTrnData->det_point_val.fa     );
-    trainData.set_det_point_sp_tst    ( cTrnData->det_point_tst.sp     );
-    trainData.set_det_point_det_tst   ( cTrnData->det_point_tst.det    );
-    trainData.set_det_point_fa_tst    ( cTrnData->det_point_tst.fa     );
-    trainData.set_fa_point_sp_val     ( cTrnData->fa_point_val.sp      );
-    trainData.set_fa_point_det_val    ( cTrnData->fa_point_val.det     );
-    trainData.set_fa_point_fa_val     ( cTrnData->fa_point_val.fa      );
-    trainData.set_fa_point_sp_tst     ( cTrnData->fa_point_tst.sp      );
-    trainData.set_fa_point_det_tst    ( cTrnData->fa_point_tst.det     );
-    trainData.set_fa_point_fa_tst     ( cTrnData->fa_point_tst.fa      );
-
-    m_trnEvolution.push_back(trainData);
+    epoch[i]       = cTrnData->epoch;
+    mseTrn[i]      = cTrnData->mse_trn;
+    mseVal[i]      = cTrnData->mse_val;
+    mseTst[i]      = cTrnData->mse_tst;
+    isBestMse[i]   = ( cTrnData->is_best_mse == BETTER );
+    isBestSP[i]    = ( cTrnData->is_best_sp  == BETTER );
+    isBestDet[i]   = ( cTrnData->is_best_det == BETTER );
+    isBestFa[i]    = ( cTrnData->is_best_fa  == BETTER );
+    numFailsMse[i] = cTrnData->num_fails_mse;
+    numFailsSP[i]  = cTrnData->num_fails_sp;
+    numFailsDet[i] = cTrnData->num_fails_det;
+    numFailsFa[i]  = cTrnData->num_fails_fa;
+    stopMse[i]     = cTrnData->stop_mse;
+    stopSP[i]      = cTrnData->stop_sp;
+    stopDet[i]     = cTrnData->stop_det;
+    stopFa[i]      = cTrnData->stop_fa;
+    for ( unsigned p = 0; p < 3; ++p ) {
+      for ( unsigned ds = 0; ds < 2; ++ds ) {
+        const roc::setpoint &point = (*cTrnData).*pointMembers[p][ds];
+        pointColumns[p][ds][0][i] = point.sp;
+        pointColumns[p][ds][1][i] = point.det;
+        pointColumns[p][ds][2][i] = point.fa;
+      }
+    }
+    const PhaseTimes &times = cTrnData->times;
+    const double trnTime = times.trn_prop + times.trn_reduce + times.trn_update;
+    timeTrnProp[i]     = times.trn_prop;
+    timeTrnReduce[i]   = times.trn_reduce;
+    timeTrnUpdate[i]   = times.trn_update;
+    timeValProp[i]     = times.val_prop;
+    timeValRoc[i]      = times.val_roc;
+    timeTstProp[i]     = times.tst_prop;
+    timeTstRoc[i]      = times.tst_roc;
+    trnEventsPerSec[i] = ( trnTime > 0. ) ? times.trn_events / trnTime : 0.;
+    trnThreadUtil[i]   = ( times.trn_prop > 0. && times.trn_threads ) 
+                       ? times.trn_busy / ( times.trn_threads * times.trn_prop ) 
+                       : 0.;
+    ++i;
   }
+  return evolution;
 }
 
 //==============================================================================
@@ -604,6 +1287,10 @@ void TuningToolPyWrapper::showInfo()
        << "  IncEta        :"  << m_net.getIncEta()      << "\n"
        << "  DecEta        :"  << m_net.getDecEta()      << "\n"
        << "  InitEta       :"  << m_net.getInitEta()     << "\n"
+       << "  Momentum      :"  << m_net.getMomentum()    << "\n"
+       << "  Beta1         :"  << m_net.getBeta1()       << "\n"
+       << "  Beta2         :"  << m_net.getBeta2()       << "\n"
+       << "  Epsilon       :"  << m_net.getEpsilon()     << "\n"
        << "  Epochs        :"  << m_net.getEpochs() )
 }
 
@@ -626,16 +1313,32 @@ bool TuningToolPyWrapper::newff(
 //==============================================================================
 bool TuningToolPyWrapper::loadff( const py::list &nodes, 
     const py::list &trfFunc,  
-    const py::list &weights, 
-    const py::list &bias, 
+    const py::object &weights, 
+    const py::object &bias, 
     const std::string &trainFcn )
 {
   if( !allocateNetwork( nodes, trfFunc, trainFcn) ) {
     return false;
   }
 
-  m_trainNetwork->loadWeights( util::to_std_vector<REAL>(weights), 
-      util::to_std_vector<REAL>(bias));
+  const std::vector<REAL> weightsVec = util::array_to_std_vector<REAL>(weights);
+  const std::vector<REAL> biasVec = util::array_to_std_vector<REAL>(bias);
+
+  // Check if we have the right number of parameters:
+  std::size_t nWeights(0), nBias(0);
+  for ( unsigned layer = 0; layer + 1 < m_trainNetwork->getNumLayers(); ++layer ) {
+    nWeights += m_trainNetwork->getNumNodes(layer) 
+              * m_trainNetwork->getNumNodes(layer + 1);
+    nBias += m_trainNetwork->getNumNodes(layer + 1);
+  }
+  if ( weightsVec.size() != nWeights || biasVec.size() != nBias ) {
+    MSG_ERROR("Number of weights (" << weightsVec.size() << ") and bias (" 
+        << biasVec.size() << ") do not match the network topology, which "
+        "needs " << nWeights << " weights and " << nBias << " bias.");
+    return false;
+  }
+
+  m_trainNetwork->loadWeights( weightsVec, biasVec );
   return true;
 }
 
@@ -646,6 +1349,22 @@ bool TuningToolPyWrapper::allocateNetwork(
     const std::string &trainFcn )
 {
 
+  std::vector<unsigned> nNodes = util::to_std_vector<unsigned>(nodes);
+  std::vector<std::string> trfFuncVec = util::to_std_vector<std::string>(trfFunc);
+  // Any number of hidden layers may be used, each one with its own transfer
+  // function:
+  if ( nNodes.size() < 2 || trfFuncVec.size() != nNodes.size() - 1 ) {
+    MSG_WARNING( "The network needs at least an input and an output layer "
+        "and one transfer function for each layer but the input (got " 
+        << nNodes.size() << " layers and " << trfFuncVec.size() 
+        << " transfer functions)." );
+    return false;
+  }
+
+  // The training object may only be kept for the same number of outputs:
+  const unsigned nOutputs = ( m_trainNetwork ) 
+      ? m_trainNetwork->getNumNodes( m_trainNetwork->getNumLayers() - 1 ) : 0;
+
   // Reset all networks
   if ( m_trainNetwork ){
     delete m_trainNetwork; m_trainNetwork = nullptr;
@@ -655,9 +1374,8 @@ bool TuningToolPyWrapper::allocateNetwork(
     m_saveNetworks.clear();
   }
  
-  std::vector<unsigned> nNodes = util::to_std_vector<unsigned>(nodes);
   m_net.setNodes(nNodes);
-  m_net.setTrfFunc( util::to_std_vector<std::string>(trfFunc) );
+  m_net.setTrfFunc( trfFuncVec );
   m_net.setTrainFcn(trainFcn);
 
   if ( trainFcn == TRAINRP_ID ) {
@@ -666,11 +1384,24 @@ bool TuningToolPyWrapper::allocateNetwork(
   } else if( trainFcn == TRAINGD_ID ) {
     MSG_DEBUG( "Creating Backpropagation object...");
     m_trainNetwork = new Backpropagation(m_net, getMsgLevel(), "NN_TRAINGD");
+  } else if( trainFcn == TRAINGDM_ID ) {
+    MSG_DEBUG( "Creating Momentum object...");
+    m_trainNetwork = new Momentum(m_net, getMsgLevel(), "NN_TRAINGDM");
+  } else if( trainFcn == TRAINADAM_ID ) {
+    MSG_DEBUG( "Creating Adam object...");
+    m_trainNetwork = new Adam(m_net, getMsgLevel(), "NN_TRAINADAM");
   } else {
     MSG_WARNING( "Invalid training algorithm option(" << trainFcn << ")!" );
+    releaseTraining();
     return false;
   }
   m_trainNetwork->setUseColor( getUseColor() );
+  // Keep the training object datasets, only cloning the new network:
+  if ( nNodes.back() != nOutputs ) {
+    releaseTraining();
+  } else if ( m_train ) {
+    m_train->setNetwork( m_trainNetwork );
+  }
   return true;
 }
 
@@ -684,45 +1415,28 @@ void TuningToolPyWrapper::sim( const DiscriminatorPyWrapper &net,
   long numOfEvents = data->getShape(0);
   MSG_DEBUG("numOfEvents: " << numOfEvents);
 
+  // Get the number of outputs from neural network:
+  const std::size_t outputSize = net.getNumNodes( net.getNumLayers() - 1 );
+
   // Old end position:
   size_t oldSize = outputVec.size();
 
   // Increase size to handle data:
-  outputVec.resize( oldSize + numOfEvents );
+  outputVec.resize( oldSize + numOfEvents*outputSize );
 
-  // Retrieve old end output position:
-  std::vector<REAL>::iterator outItr = outputVec.begin() + oldSize;
+  // Propagate it into the new end space:
+  propagateDataset( net, *data, outputVec.data() + oldSize );
 
-  // Get the number of outputs from neural network:
-  const std::size_t outputSize = net.getNumNodes( net.getNumLayers() - 1 );
-
-  MSG_DEBUG("Creating a copy of neural network: ");
-  auto netCopy = net;
-  netCopy.setName( netCopy.getName() + "_MultiThread");
-
-  npy_intp i;
-  MSG_DEBUG("Initialize loop: ");
-#ifdef USE_OMP
-  int chunk = 1000;
-  #pragma omp parallel shared(data, outItr, chunk) \
-      private(i) firstprivate(netCopy)
-#endif
-  {
-#ifdef USE_OMP
-    #pragma omp for schedule(dynamic, chunk) nowait
-#endif
-    for ( i=0; i < numOfEvents; ++i )
-    {
-      const auto &rings = (*data)[i];
-      std::copy_n( netCopy.propagateInput( rings.getPtr() ), 
-          outputSize,
-          outItr + (i*outputSize));
+  // Keep only the first output, which is the one used as discriminant:
+  if ( outputSize > 1 ) {
+    for ( long e = 1; e < numOfEvents; ++e ) {
+      outputVec[oldSize + e] = outputVec[oldSize + e*outputSize];
     }
+    outputVec.resize( oldSize + numOfEvents );
   }
-  MSG_DEBUG("Finished loop.");
+  MSG_DEBUG("Finished propagation.");
 }
 
-
 //==============================================================================
 py::list TuningToolPyWrapper::genRoc( const std::vector<REAL> &signal, 
     const std::vector<REAL> &noise, 
@@ -800,6 +1514,38 @@ py::object multiply(const py::list &list, float f)
   return output;
 }
 
+//==============================================================================
+py::object DiscriminatorPyWrapper::weights() const
+{
+  npy_intp nWeights(0);
+  for ( unsigned i = 0; i + 1 < nNodes.size(); ++i ) {
+    nWeights += nNodes[i] * nNodes[i+1];
+  }
+  REAL *data(nullptr);
+  py::object output = util::new_np_array( nWeights, data );
+  // Each layer weight matrix is contiguous on the parameters buffer:
+  for ( unsigned i = 0; i + 1 < nNodes.size(); ++i ) {
+    data = std::copy_n( NeuralNetwork::weights[i][0], nNodes[i] * nNodes[i+1], 
+        data );
+  }
+  return output;
+}
+
+//==============================================================================
+py::object DiscriminatorPyWrapper::bias() const
+{
+  npy_intp nBias(0);
+  for ( unsigned i = 0; i + 1 < nNodes.size(); ++i ) {
+    nBias += nNodes[i+1];
+  }
+  REAL *data(nullptr);
+  py::object output = util::new_np_array( nBias, data );
+  for ( unsigned i = 0; i + 1 < nNodes.size(); ++i ) {
+    data = std::copy_n( NeuralNetwork::bias[i], nNodes[i+1], data );
+  }
+  return output;
+}
+
 
 namespace __expose_TuningToolPyWrapper__ 
 {
@@ -852,49 +1598,8 @@ py::object* expose_DiscriminatorPyWrapper()
     .def("getWeight",               &DiscriminatorPyWrapper::getWeight      )
     .def("getTrfFuncName",          &DiscriminatorPyWrapper::getTrfFuncName )
     .def("getName",                 &DiscriminatorPyWrapper::getName        )
-  ;
-  return &_c;
-}
-
-//==============================================================================
-py::object* expose_TrainDataPyWrapper()
-{
-  static py::object _c = py::class_<TrainDataPyWrapper>("TrainDataPyWrapper", 
-                                                         py::no_init)
-    .add_property("epoch"               , &TrainDataPyWrapper::getEpoch                )
-    .add_property("mseTrn"              , &TrainDataPyWrapper::getMseTrn               )
-    .add_property("mseVal"              , &TrainDataPyWrapper::getMseVal               )
-    .add_property("mseTst"              , &TrainDataPyWrapper::getMseTst               )
-    .add_property("bestsp_point_sp_val" , &TrainDataPyWrapper::get_bestsp_point_sp_val )
-    .add_property("bestsp_point_det_val", &TrainDataPyWrapper::get_bestsp_point_det_val)
-    .add_property("bestsp_point_fa_val" , &TrainDataPyWrapper::get_bestsp_point_fa_val )
-    .add_property("bestsp_point_sp_tst" , &TrainDataPyWrapper::get_bestsp_point_sp_tst )
-    .add_property("bestsp_point_det_tst", &TrainDataPyWrapper::get_bestsp_point_det_tst)
-    .add_property("bestsp_point_fa_tst" , &TrainDataPyWrapper::get_bestsp_point_fa_tst )
-    .add_property("det_point_sp_val"    , &TrainDataPyWrapper::get_det_point_sp_val    )
-    .add_property("det_point_det_val"   , &TrainDataPyWrapper::get_det_point_det_val   )
-    .add_property("det_point_fa_val"    , &TrainDataPyWrapper::get_det_point_fa_val    )
-    .add_property("det_point_sp_tst"    , &TrainDataPyWrapper::get_det_point_sp_tst    )
-    .add_property("det_point_det_tst"   , &TrainDataPyWrapper::get_det_point_det_tst   )
-    .add_property("det_point_fa_tst"    , &TrainDataPyWrapper::get_det_point_fa_tst    )
-    .add_property("fa_point_sp_val"     , &TrainDataPyWrapper::get_fa_point_sp_val     )
-    .add_property("fa_point_det_val"    , &TrainDataPyWrapper::get_fa_point_det_val    )
-    .add_property("fa_point_fa_val"     , &TrainDataPyWrapper::get_fa_point_fa_val     )
-    .add_property("fa_point_sp_tst"     , &TrainDataPyWrapper::get_fa_point_sp_tst     )
-    .add_property("fa_point_det_tst"    , &TrainDataPyWrapper::get_fa_point_det_tst    )
-    .add_property("fa_point_fa_tst"     , &TrainDataPyWrapper::get_fa_point_fa_tst     )
-    .add_property("isBestMse"           , &TrainDataPyWrapper::getIsBestMse            )
-    .add_property("isBestSP"            , &TrainDataPyWrapper::getIsBestSP             )
-    .add_property("isBestDet"           , &TrainDataPyWrapper::getIsBestDet            )
-    .add_property("isBestFa"            , &TrainDataPyWrapper::getIsBestFa             )
-    .add_property("numFailsMse"         , &TrainDataPyWrapper::getNumFailsMse          )
-    .add_property("numFailsSP"          , &TrainDataPyWrapper::getNumFailsSP           )
-    .add_property("numFailsDet"         , &TrainDataPyWrapper::getNumFailsDet          )
-    .add_property("numFailsFa"          , &TrainDataPyWrapper::getNumFailsFa           )
-    .add_property("stopMse"             , &TrainDataPyWrapper::getStopMse              )
-    .add_property("stopSP"              , &TrainDataPyWrapper::getStopSP               )
-    .add_property("stopDet"             , &TrainDataPyWrapper::getStopDet              )
-    .add_property("stopFa"              , &TrainDataPyWrapper::getStopFa               )
+    .def("weights",                 &DiscriminatorPyWrapper::weights        )
+    .def("bias",                    &DiscriminatorPyWrapper::bias           )
   ;
   return &_c;
 }
@@ -909,7 +1614,12 @@ py::object* expose_TuningToolPyWrapper()
     .def("loadff"                 ,&TuningToolPyWrapper::loadff            )
     .def("newff"                  ,&TuningToolPyWrapper::newff             )
     .def("train_c"                ,&TuningToolPyWrapper::train_c           )
-    .def("sim_c"                  ,&TuningToolPyWrapper::sim_c             )
+    .def("train_many_c"           ,&TuningToolPyWrapper::train_many_c      )
+    .def("setCheckpoint"          ,&TuningToolPyWrapper::setCheckpoint     )
+    .def("setResumeState"         ,&TuningToolPyWrapper::setResumeState    )
+    .def("sim_c"                  ,&TuningToolPyWrapper::sim_c
+                                  ,( py::arg("net"), py::arg("data")
+                                   , py::arg("out") = py::object() )     )
     .def("valid_c"                ,&TuningToolPyWrapper::valid_c           )
     .def("showInfo"               ,&TuningToolPyWrapper::showInfo          )
     .def("setFrozenNode"          ,&TuningToolPyWrapper::setFrozenNode     )
@@ -942,6 +1652,14 @@ py::object* expose_TuningToolPyWrapper()
                                   ,&TuningToolPyWrapper::setDecEta         )
     .add_property("initEta"       ,&TuningToolPyWrapper::getInitEta
                                   ,&TuningToolPyWrapper::setInitEta        )
+    .add_property("momentum"      ,&TuningToolPyWrapper::getMomentum
+                                  ,&TuningToolPyWrapper::setMomentum       )
+    .add_property("beta1"         ,&TuningToolPyWrapper::getBeta1
+                                  ,&TuningToolPyWrapper::setBeta1          )
+    .add_property("beta2"         ,&TuningToolPyWrapper::getBeta2
+                                  ,&TuningToolPyWrapper::setBeta2          )
+    .add_property("epsilon"       ,&TuningToolPyWrapper::getEpsilon
+                                  ,&TuningToolPyWrapper::setEpsilon        )
     .add_property("epochs"        ,&TuningToolPyWrapper::getEpochs
                                   ,&TuningToolPyWrapper::setEpochs         )
 
@@ -954,6 +1672,35 @@ py::object* expose_TuningToolPyWrapper()
                                   ,&TuningToolPyWrapper::setDet            )
     .add_property("fa"            ,&TuningToolPyWrapper::getFa
                                   ,&TuningToolPyWrapper::setFa             )
+    .add_property("rocResolution" ,&TuningToolPyWrapper::getRocResolution
+                                  ,&TuningToolPyWrapper::setRocResolution  )
+    .add_property("validRocResolution"
+                                  ,&TuningToolPyWrapper::getValidRocResolution
+                                  ,&TuningToolPyWrapper::setValidRocResolution )
+    .add_property("validEvery"    ,&TuningToolPyWrapper::getValidEvery
+                                  ,&TuningToolPyWrapper::setValidEvery     )
+    .add_property("testOnBest"    ,&TuningToolPyWrapper::getTestOnBest
+                                  ,&TuningToolPyWrapper::setTestOnBest     )
+    .add_property("validFraction" ,&TuningToolPyWrapper::getValidFraction
+                                  ,&TuningToolPyWrapper::setValidFraction  )
+    .add_property("fastTanh"      ,&TuningToolPyWrapper::getFastTanh
+                                  ,&TuningToolPyWrapper::setFastTanh       )
+    .add_property("pipelineThreads"
+                                  ,&TuningToolPyWrapper::getPipelineThreads
+                                  ,&TuningToolPyWrapper::setPipelineThreads )
+    .add_property("sampling"      ,&TuningToolPyWrapper::getSampling
+                                  ,&TuningToolPyWrapper::setSampling       )
+    .add_property("samplingWeights"
+                                  ,&TuningToolPyWrapper::getSamplingWeights
+                                  ,&TuningToolPyWrapper::setSamplingWeights )
+    .add_property("hardFraction"  ,&TuningToolPyWrapper::getHardFraction
+                                  ,&TuningToolPyWrapper::setHardFraction   )
+    .add_property("streamBlock"   ,&TuningToolPyWrapper::getStreamBlock
+                                  ,&TuningToolPyWrapper::setStreamBlock    )
+    .add_property("deterministic" ,&TuningToolPyWrapper::getDeterministic
+                                  ,&TuningToolPyWrapper::setDeterministic  )
+    .add_property("parallelInits" ,&TuningToolPyWrapper::getParallelInits
+                                  ,&TuningToolPyWrapper::setParallelInits  )
 
 
 
@@ -16,6 +16,5 @@ BOOST_PYTHON_MODULE(libTuningTools)
   __expose_TuningToolPyWrapper__::expose_multiply();
 
   __expose_TuningToolPyWrapper__::expose_DiscriminatorPyWrapper();
-  __expose_TuningToolPyWrapper__::expose_TrainDataPyWrapper();
   __expose_TuningToolPyWrapper__::expose_TuningToolPyWrapper();
 }
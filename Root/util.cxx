@@ -13,6 +13,8 @@
 // STL include(s):
 #include <vector>
 #include <string>
+#include <algorithm>
+#include <cmath>
 
 namespace __expose_system_util__ {
 
@@ -44,8 +46,8 @@ REAL get_norm_of_weight( REAL *weight , size_t size){
 }
 
 //==============================================================================
-void genRoc( const std::vector<REAL> &signal, 
-    const std::vector<REAL> &noise, 
+void genRoc( const REAL *signal, const unsigned nSignal,
+    const REAL *noise, const unsigned nNoise,
     REAL signalTarget, REAL noiseTarget, 
     std::vector<REAL> &det,  std::vector<REAL> &fa, 
     std::vector<REAL> &sp, std::vector<REAL> &cut, 
@@ -53,49 +55,46 @@ void genRoc( const std::vector<REAL> &signal,
     REAL signalWeight,
     REAL noiseWeight)
 {
-  const unsigned nSignal = signal.size();
-  const unsigned nNoise  = noise.size();
-  const REAL* sPtr = signal.data();
-  const REAL* nPtr = noise.data();
-  unsigned i(0);
+  // Sort the outputs only once:
+  std::vector<REAL> sSorted( signal, signal + nSignal );
+  std::vector<REAL> nSorted( noise, noise + nNoise );
+  std::sort( sSorted.begin(), sSorted.end() );
+  std::sort( nSorted.begin(), nSorted.end() );
+
+  // Build the cuts, which must be in ascending order:
+  std::vector<REAL> cuts;
+  if ( RESOLUTION > 0 ) {
+    cuts.reserve( static_cast<std::size_t>( 
+          std::ceil( (signalTarget - noiseTarget) / RESOLUTION ) ) + 1 );
+    for (REAL pos = noiseTarget; pos < signalTarget; pos += RESOLUTION) {
+      cuts.push_back( pos );
+    }
+  } else {
+    // Exact mode: each distinct output is a cut
+    cuts.resize( nSignal + nNoise );
+    std::merge( sSorted.begin(), sSorted.end(), 
+        nSorted.begin(), nSorted.end(), 
+        cuts.begin() );
+    cuts.erase( std::unique( cuts.begin(), cuts.end() ), cuts.end() );
+  }
 
-#ifdef USE_OMP
-  int chunk = 10000;
-#endif
+  det.reserve( det.size() + cuts.size() );
+  fa.reserve(  fa.size()  + cuts.size() );
+  sp.reserve(  sp.size()  + cuts.size() );
+  cut.reserve( cut.size() + cuts.size() );
 
-  for (REAL pos = noiseTarget; pos < signalTarget; pos += RESOLUTION)
+  // Number of signal and noise events below the current cut:
+  std::size_t sBelow(0), nBelow(0);
+
+  for ( const REAL pos : cuts ) 
   {
-    REAL sigEffic = 0.;
-    REAL noiseEffic = 0.;
-    unsigned se, ne;
-#ifdef USE_OMP
-    #pragma omp parallel shared(sPtr, nPtr, sigEffic, noiseEffic) private(i,se,ne)
-#endif
-    {
-      se = ne = 0;
-#ifdef USE_OMP
-      #pragma omp for schedule(dynamic,chunk) nowait
-#endif
-      for (i=0; i<nSignal; i++) if (sPtr[i] >= pos) se++;
-      
-#ifdef USE_OMP
-      #pragma omp critical
-#endif
-      sigEffic += static_cast<REAL>(se);
-
-#ifdef USE_OMP
-      #pragma omp for schedule(dynamic,chunk) nowait
-#endif
-      for (i=0; i<nNoise; i++) if (nPtr[i] < pos) ne++;
-      
-#ifdef USE_OMP
-      #pragma omp critical
-#endif
-      noiseEffic += static_cast<REAL>(ne);
-    }
-    
-    sigEffic /= static_cast<REAL>(nSignal);
-    noiseEffic /= static_cast<REAL>(nNoise);
+    while ( sBelow < nSignal && sSorted[sBelow] < pos ) ++sBelow;
+    while ( nBelow < nNoise  && nSorted[nBelow] < pos ) ++nBelow;
+
+    REAL sigEffic = static_cast<REAL>(nSignal - sBelow) 
+                  / static_cast<REAL>(nSignal);
+    REAL noiseEffic = static_cast<REAL>(nBelow) 
+                    / static_cast<REAL>(nNoise);
 
     // Use weights for signal and noise efficiencies
     sigEffic *= signalWeight;
@@ -110,11 +109,29 @@ void genRoc( const std::vector<REAL> &signal,
 }
 
 //==============================================================================
-py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, int ndims ) 
+void genRoc( const std::vector<REAL> &signal, 
+    const std::vector<REAL> &noise, 
+    REAL signalTarget, REAL noiseTarget, 
+    std::vector<REAL> &det,  std::vector<REAL> &fa, 
+    std::vector<REAL> &sp, std::vector<REAL> &cut, 
+    const REAL RESOLUTION, 
+    REAL signalWeight,
+    REAL noiseWeight)
 {
-  // Make sure that the input type is a numpy array:
-  if ( static_cast<std::string>(py::extract<std::string>(
-          pyObj.attr("__class__").attr("__name__"))) != "ndarray")
+  genRoc( signal.data(), signal.size(), 
+      noise.data(), noise.size(), 
+      signalTarget, noiseTarget, 
+      det, fa, sp, cut, 
+      RESOLUTION, signalWeight, noiseWeight );
+}
+
+//==============================================================================
+py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, int ndims,
+    bool allowCopy, bool allowCompressed ) 
+{
+  // Make sure that the input type is a numpy array (or one of its subclasses,
+  // such as the numpy.memmap arrays):
+  if ( ! PyArray_Check( pyObj.ptr() ) )
   {
     throw std::runtime_error( "Input an object of type " 
         + static_cast<std::string>(
@@ -124,7 +141,9 @@ py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, int ndims )
   // holds the correct type:
   char type = static_cast<char>(py::extract<char>(
         pyObj.attr("dtype").attr("char")));
-  if ( type != type_to_npy_enum<REAL>::ctypes_char )
+  const bool compressed = allowCompressed 
+    && ( type == NPY_HALFLTR || type == NPY_USHORTLTR );
+  if ( type != type_to_npy_enum<REAL>::ctypes_char && !compressed )
   {
     throw std::runtime_error(std::string("numpy.ndarray is of type ")
         + std::string("").append(1, type ) 
@@ -133,13 +152,39 @@ py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, int ndims )
         + std::string("").append(1, type_to_npy_enum<REAL>::ctypes_char) 
         + "')");
   }
-  // Create numpy object:
-  PyObject* numpy = PyArray_FROM_OTF(pyObj.ptr()
-                       , NPY_FLOAT
-                       , NPY_IN_ARRAY  // Make sure that object is continuous
-                      );
-  if ( ! numpy ) {
-    throw std::runtime_error("Couldn't create numpy array from input object!");
+  PyObject* numpy(nullptr);
+  if ( allowCopy ) {
+    // Create numpy object:
+    numpy = PyArray_FROM_OTF(pyObj.ptr()
+                         , ( compressed ) 
+                           ? PyArray_TYPE( pyObj.ptr() ) 
+                           : NPY_FLOAT
+                         , NPY_IN_ARRAY  // Make sure that object is continuous
+                        );
+    if ( ! numpy ) {
+      throw std::runtime_error("Couldn't create numpy array from input object!");
+    }
+  } else {
+    // Only take a new reference to the input object, refusing any layout
+    // which could only be used through a copy:
+    numpy = pyObj.ptr();
+    PyArrayObject *array = reinterpret_cast<PyArrayObject*>(numpy);
+    if ( ! PyArray_ISALIGNED( array ) ) {
+      throw std::runtime_error("numpy.ndarray is not aligned and would need "
+          "to be copied. Please, input an aligned array.");
+    }
+    if ( ! PyArray_ISNOTSWAPPED( array ) ) {
+      throw std::runtime_error("numpy.ndarray is not in the machine byte "
+          "order and would need to be copied. Please, input a native byte "
+          "order array.");
+    }
+    for ( int dim = 0; dim < PyArray_NDIM( array ); ++dim ) {
+      if ( PyArray_STRIDE( array, dim ) % PyArray_ITEMSIZE( array ) ) {
+        throw std::runtime_error("numpy.ndarray strides are not a multiple "
+            "of its item size and would need to be copied.");
+      }
+    }
+    Py_INCREF( numpy );
   }
 
   py::handle<PyObject> ptr(numpy);
@@ -151,4 +196,18 @@ py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, int ndims )
   return ptr;
 }
 
+//==============================================================================
+std::size_t get_np_pinned_bytes( PyObject *numpy )
+{
+  // Walk through the views until the array owning the memory:
+  PyObject *base = numpy;
+  while ( PyArray_Check( base ) 
+      && PyArray_BASE( reinterpret_cast<PyArrayObject*>(base) )
+      && PyArray_Check( PyArray_BASE( reinterpret_cast<PyArrayObject*>(base) ) ) )
+  {
+    base = PyArray_BASE( reinterpret_cast<PyArrayObject*>(base) );
+  }
+  return PyArray_NBYTES( reinterpret_cast<PyArrayObject*>(base) );
+}
+
 } // namespace util
@@ -23,9 +23,12 @@ namespace py = boost::python;
 #include "TuningTools/system/util.h"
 #include "TuningTools/system/macros.h"
 #include "TuningTools/system/ndarray.h"
+#include "TuningTools/system/storage.h"
 #include "TuningTools/neuralnetwork/NetConfHolder.h"
 #include "TuningTools/neuralnetwork/Backpropagation.h"
 #include "TuningTools/neuralnetwork/RProp.h"
+#include "TuningTools/neuralnetwork/Momentum.h"
+#include "TuningTools/neuralnetwork/Adam.h"
 #include "TuningTools/neuralnetwork/FeedForward.h"
 #include "TuningTools/training/Standard.h"
 #include "TuningTools/training/PatternRec.h"
@@ -61,103 +64,10 @@ void translate_ty(const WrongTypeError& e);
 void expose_exceptions();
 void expose_multiply();
 py::object* expose_DiscriminatorPyWrapper();
-py::object* expose_TrainDataPyWrapper();
 py::object* expose_TuningToolPyWrapper();
 
 }
 
-///Helper class
-class TrainDataPyWrapper
-{
-
-  private:
-   
-    ValResult m_is_best_mse;
-    ValResult m_is_best_sp;
-    ValResult m_is_best_det;
-    ValResult m_is_best_fa;
-    unsigned m_epoch;
-    unsigned m_num_fails_mse;
-    unsigned m_num_fails_sp;
-    unsigned m_num_fails_det;
-    unsigned m_num_fails_fa;
-    bool m_stop_mse;
-    bool m_stop_sp;
-    bool m_stop_det;
-    bool m_stop_fa;
-
-    //MSE_STOP, SP_STOP and MULTI_STOP
-    REAL m_mse_trn;
-    REAL m_mse_val;
-    REAL m_mse_tst;
-    //SP_STOP and MULTI_STOP
-    REAL m_bestsp_point_sp_val;
-    REAL m_bestsp_point_det_val;
-    REAL m_bestsp_point_fa_val;
-    REAL m_bestsp_point_sp_tst;
-    REAL m_bestsp_point_det_tst;
-    REAL m_bestsp_point_fa_tst;
-    //SP_STOP and MULTI_STOP
-    REAL m_det_point_sp_val;
-    REAL m_det_point_det_val;
-    REAL m_det_point_fa_val;
-    REAL m_det_point_sp_tst;
-    REAL m_det_point_det_tst;
-    REAL m_det_point_fa_tst;
-    //SP_STOP and MULTI_STOP
-    REAL m_fa_point_sp_val;
-    REAL m_fa_point_det_val;
-    REAL m_fa_point_fa_val;
-    REAL m_fa_point_sp_tst;
-    REAL m_fa_point_det_tst;
-    REAL m_fa_point_fa_tst;
- 
-  public:
-
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , setMseTrn, getMseTrn, m_mse_trn);
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , setMseVal, getMseVal, m_mse_val);
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , setMseTst, getMseTst, m_mse_tst);
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_sp_val , get_bestsp_point_sp_val , m_bestsp_point_sp_val );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_det_val, get_bestsp_point_det_val, m_bestsp_point_det_val);
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_fa_val , get_bestsp_point_fa_val , m_bestsp_point_fa_val ); 
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_sp_tst , get_bestsp_point_sp_tst , m_bestsp_point_sp_tst );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_det_tst, get_bestsp_point_det_tst, m_bestsp_point_det_tst);
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_bestsp_point_fa_tst , get_bestsp_point_fa_tst , m_bestsp_point_fa_tst );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_sp_val    , get_det_point_sp_val    , m_det_point_sp_val    );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_det_val   , get_det_point_det_val   , m_det_point_det_val   );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_fa_val    , get_det_point_fa_val    , m_det_point_fa_val    ); 
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_sp_tst    , get_det_point_sp_tst    , m_det_point_sp_tst    );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_det_tst   , get_det_point_det_tst   , m_det_point_det_tst   );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_det_point_fa_tst    , get_det_point_fa_tst    , m_det_point_fa_tst    );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_sp_val     , get_fa_point_sp_val     , m_fa_point_sp_val     );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_det_val    , get_fa_point_det_val    , m_fa_point_det_val    );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_fa_val     , get_fa_point_fa_val     , m_fa_point_fa_val     ); 
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_sp_tst     , get_fa_point_sp_tst     , m_fa_point_sp_tst     );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_det_tst    , get_fa_point_det_tst    , m_fa_point_det_tst    );
-    PRIMITIVE_SETTER_AND_GETTER(REAL      , set_fa_point_fa_tst     , get_fa_point_fa_tst     , m_fa_point_fa_tst     );
-    PRIMITIVE_SETTER_AND_GETTER(unsigned  , setEpoch, getEpoch, m_epoch);
-    PRIMITIVE_SETTER_AND_GETTER(unsigned  , setNumFailsMse, getNumFailsMse, m_num_fails_mse);
-    PRIMITIVE_SETTER_AND_GETTER(unsigned  , setNumFailsSP, getNumFailsSP, m_num_fails_sp);
-    PRIMITIVE_SETTER_AND_GETTER(unsigned  , setNumFailsDet, getNumFailsDet, m_num_fails_det);
-    PRIMITIVE_SETTER_AND_GETTER(unsigned  , setNumFailsFa, getNumFailsFa, m_num_fails_fa);
-    PRIMITIVE_SETTER_AND_GETTER(bool      , setStopMse, getStopMse, m_stop_mse);
-    PRIMITIVE_SETTER_AND_GETTER(bool      , setStopSP, getStopSP, m_stop_sp);
-    PRIMITIVE_SETTER_AND_GETTER(bool      , setStopDet, getStopDet, m_stop_det);
-    PRIMITIVE_SETTER_AND_GETTER(bool      , setStopFa, getStopFa, m_stop_fa);
-    
-    PRIMITIVE_SETTER(ValResult , setIsBestMse, m_is_best_mse);
-    PRIMITIVE_SETTER(ValResult , setIsBestSP,  m_is_best_sp);
-    PRIMITIVE_SETTER(ValResult , setIsBestDet, m_is_best_det);
-    PRIMITIVE_SETTER(ValResult , setIsBestFa,  m_is_best_fa);
-
-    //Helper functions
-    bool getIsBestMse(){ return (m_is_best_mse == BETTER)  ? true:false;}
-    bool getIsBestSP(){  return (m_is_best_sp  == BETTER)  ? true:false;}
-    bool getIsBestDet(){ return (m_is_best_det  == BETTER) ? true:false;}
-    bool getIsBestFa(){  return (m_is_best_fa  == BETTER)  ? true:false;}
-
-};
-
 //==========================================================================================
 //==========================================================================================
 //==========================================================================================
@@ -176,6 +86,23 @@ class DiscriminatorPyWrapper : public NeuralNetwork {
 
     ~DiscriminatorPyWrapper(){;}
 
+    /**
+     * @brief Return the weights of all layers on a numpy array
+     *
+     * The weights are ordered by layer, node and then by previous layer node
+     * (i.e. each layer weight matrix in row-major order), which is the
+     * order expected by loadff.
+     **/
+    py::object weights() const;
+
+    /**
+     * @brief Return the biases of all layers on a numpy array
+     *
+     * The biases are ordered by layer and then by node, which is the order
+     * expected by loadff.
+     **/
+    py::object bias() const;
+
 };
 
 /**
@@ -217,8 +144,13 @@ class TuningToolPyWrapper : public MsgService
     NetConfHolder          m_net;
     /// @brief The backpropagation neural network
     Backpropagation       *m_trainNetwork;
-    /// @brief The training algorithm
+    /// @brief The training algorithm, kept while bound to the same datasets
     Training              *m_train; 
+    /// @brief Configuration m_train was created with
+    TrainGoal              m_trainGoalCtx;
+    unsigned               m_batchSizeCtx;
+    unsigned               m_signalWeightCtx;
+    unsigned               m_noiseWeightCtx;
     /// @brief Resulting neural networks to be saved
     std::vector< NeuralNetwork* > m_saveNetworks;
     /// @}
@@ -226,16 +158,233 @@ class TuningToolPyWrapper : public MsgService
     /// Whether to use standard training
     bool m_stdTrainingType;
 
-    /// Hold a list of TrainDataPyWrapper
-    std::vector<TrainDataPyWrapper> m_trnEvolution;
+    /// Training checkpoints (see setCheckpoint and setResumeState)
+    /// @{
+    /// @brief Called with the training state and the initializations output
+    py::object m_checkpointFcn;
+    /// @brief Minimum time (in seconds) between two training state checkpoints
+    double     m_checkpointInterval;
+    /// @brief Wall time of the last training state checkpoint
+    double     m_lastCheckpoint;
+    /// @brief Training state which the next training is resumed from
+    py::object m_resumeState;
+    /// @brief Seed of the training events selection (of every initialization)
+    unsigned   m_trainSeed;
     /// @}
+    /// @}
+
+    /**
+     * @brief The epochs loop state of a training
+     *
+     * It is kept between the epochs, so that the epochs of several trainings
+     * may be interleaved (see train_many_c).
+     **/
+    struct TrainLoopState
+    {
+      /// Epoch to be trained next and the training error of the last one
+      unsigned epoch  = 0;
+      REAL mse_trn    = 0.;
+      /// Stop criteria
+      unsigned num_fails_mse = 0, num_fails_sp = 0, num_fails_det = 0, num_fails_fa = 0;
+      unsigned dispCounter = 0;
+      int stops_on = 0;
+      REAL det_fitted = 0., fa_fitted = 0., delta_det = 0., delta_fa = 0.;
+      ValResult is_best_mse = EQUAL, is_best_sp = EQUAL, is_best_det = EQUAL, is_best_fa = EQUAL;
+      bool stop_mse = false, stop_sp = false, stop_det = false, stop_fa = false;
+      /// Last evaluated performance (kept by the epochs without validation)
+      REAL mse_val = 0., sp_val = 0., det_val = 0., fa_val = 0.;
+      REAL mse_tst = 0., sp_tst = 0., det_tst = 0., fa_tst = 0.;
+      roc::setpoint det_point_val, bestsp_point_val, fa_point_val;
+      roc::setpoint det_point_tst, bestsp_point_tst, fa_point_tst;
+      bool hasTstPerf = false;
+      bool validate   = false;
+      /// Training algorithm and events selection states held to be checkpointed
+      std::vector<REAL> trainingState;
+      SamplerState samplerState;
+      /// Training evolution columns (see flushTrainEvolution)
+      py::dict trnEvolution;
+
+      /// The performance kept between epochs, as held by the checkpoints
+      std::vector<REAL*> perfValues()
+      {
+        return { &mse_val, &sp_val, &det_val, &fa_val, 
+                 &mse_tst, &sp_tst, &det_tst, &fa_tst,
+                 &bestsp_point_val.sp, &bestsp_point_val.det, &bestsp_point_val.fa,
+                 &det_point_val.sp,    &det_point_val.det,    &det_point_val.fa,
+                 &fa_point_val.sp,     &fa_point_val.det,     &fa_point_val.fa,
+                 &bestsp_point_tst.sp, &bestsp_point_tst.det, &bestsp_point_tst.fa,
+                 &det_point_tst.sp,    &det_point_tst.det,    &det_point_tst.fa,
+                 &fa_point_tst.sp,     &fa_point_tst.det,     &fa_point_tst.fa };
+      }
+    };
+
+    /**
+     * @brief The training of an initialization
+     *
+     * It binds the epochs loop state to the training network, algorithm and
+     * best networks used by the initialization. They are either the wrapper
+     * ones or copies owned by it (see train_many_c).
+     **/
+    struct InitTraining : public TrainLoopState
+    {
+      unsigned init = 0;
+      Backpropagation *network = nullptr;
+      Training *train = nullptr;
+      std::vector< NeuralNetwork* > *saveNetworks = nullptr;
+      /// Whether the network and training algorithm are owned
+      bool owner = false;
+      std::vector< NeuralNetwork* > ownSaveNetworks;
+
+      InitTraining() = default;
+      InitTraining( const InitTraining& ) = delete;
+      InitTraining& operator=( const InitTraining& ) = delete;
+      ~InitTraining()
+      {
+        for ( auto* net : ownSaveNetworks ) delete net;
+        if ( owner ) { delete train; delete network; }
+      }
+    };
 
     /// @name TuningToolPyWrapper private methods:
     /// @{
     /**
-     * @brief Append training evolution to list
+     * @brief Set the training evolution columns
+     *
+     * Each training evolution field is stored on a numpy array with one entry
+     * per epoch, keyed by its DataTrainEvolution name (e.g. mse_trn,
+     * bestsp_point_sp_val, is_best_mse, num_fails_sp, stop_fa).
+     **/
+    py::dict flushTrainEvolution( const std::list<TrainData*> &trnEvolution );
+
+    /**
+     * @brief Set the networks holding the best training epochs of network
+     *
+     * They are cloned from the training network on the first call and only
+     * have their weights copied from it afterwards.
+     **/
+    void prepareSaveNetworks( std::vector< NeuralNetwork* > &saveNetworks,
+        Backpropagation &network );
+
+    /**
+     * @brief Return a new training algorithm of network for the current
+     *        datasets
+     **/
+    Training* newTraining( Backpropagation *network, 
+        const unsigned trainSeed );
+
+    /**
+     * @brief Create the training algorithm (m_train) for the current datasets
+     **/
+    void createTraining( const unsigned trainSeed );
+
+    /**
+     * @brief Apply the training configuration to the training algorithm
+     **/
+    void configureTraining( Training &train );
+
+    /**
+     * @brief Prepare the training algorithm to train the current network
+     *
+     * The training algorithm is a persistent context: its datasets views,
+     * events selection indexes, outputs and threads buffers are only
+     * recreated when the datasets or the training goal, batch size or SP
+     * weights change. Otherwise it is only reseeded and reset, which gives
+     * the same training as a newly created object.
+     **/
+    void prepareTraining();
+
+    /**
+     * @brief Release the training algorithm (e.g. when datasets change)
+     **/
+    void releaseTraining()
+    {
+      if ( m_train ) {
+        MSG_DEBUG("Releasing train algorithm...");
+        delete m_train; m_train = nullptr;
+      }
+    }
+
+    /**
+     * @brief Start the training of initialization init from its network
+     *        current weights
+     *
+     * The training algorithm is reset to the training events selection seed
+     * (so that every initialization draws the same events) and the epochs
+     * loop state is cleared. The first initialization is resumed from the
+     * resume state, when set.
+     **/
+    void beginTraining( InitTraining &s, const unsigned init );
+
+    /**
+     * @brief Evaluate the weights obtained on epoch ep
+     *
+     * Runs the validation, the best network search and the test. When
+     * evalNet is set, it is evaluated (using evalThreads threads) instead of
+     * the training network.
+     **/
+    void evaluateEpoch( InitTraining &s, const unsigned ep, 
+        const NeuralNetwork *evalNet, const unsigned evalThreads );
+
+    /**
+     * @brief Update the failure counters of epoch ep
+     *
+     * The best networks are copied from epochNet (the network holding the
+     * weights evaluated by evaluateEpoch), and the epoch training information
+     * is saved together with the phases times (the training ones from
+     * epochTimes). Returns whether the training must be stopped.
+     **/
+    bool updateEpoch( InitTraining &s, const unsigned ep, const REAL mse_trn,
+        const NeuralNetwork &epochNet, const PhaseTimes &epochTimes );
+
+    /// Whether a training state checkpoint is due
+    bool checkpointDue() const
+    {
+      return !m_checkpointFcn.is_none() 
+          && util::wall_time() - m_lastCheckpoint >= m_checkpointInterval;
+    }
+
+    /**
+     * @brief Hold the training algorithm and the events selection states,
+     *        which must be done right after training the epoch to be
+     *        checkpointed.
+     **/
+    void holdTrainingState( InitTraining &s );
+
+    /**
+     * @brief Hand the training state after epoch ep (already updated) to the
+     *        checkpoint function, where epochNet holds the epoch weights.
+     **/
+    void checkpoint( InitTraining &s, const unsigned ep, 
+        const NeuralNetwork &epochNet );
+
+    /**
+     * @brief Finish the training, holding its evolution
      **/
-    void flushTrainEvolution( const std::list<TrainData*> &trnEvolution );
+    void endTraining( InitTraining &s );
+
+    /**
+     * @brief Run the epochs loop of initialization init from its network
+     *        current weights
+     *
+     * The best networks are kept on the initialization save networks and the
+     * training evolution on its trnEvolution. If pipelineThreads is set, each
+     * epoch evaluation is done by that number of threads concurrently with
+     * the next epoch training.
+     **/
+    void trainLoop( InitTraining &s, const unsigned init );
+
+    /**
+     * @brief Train the nInits initializations in lockstep on nSlots slots
+     *
+     * Each slot has its own network, training algorithm and best networks,
+     * and its share of the threads. One epoch of each slot initialization is
+     * trained and evaluated at once, and then they are updated one after the
+     * other. A finished slot starts the next initialization. The outputs are
+     * appended to output (and handed to the checkpoint function) on the
+     * initializations order.
+     **/
+    void trainLockstep( const unsigned nInits, const unsigned nSlots, 
+        py::list &output );
 
     /**
      * Allocate neural network with input configuration
@@ -245,7 +394,17 @@ class TuningToolPyWrapper : public MsgService
         const std::string &trainFcn );
 
     /**
-     * Set dataset input
+     * @brief Set dataset input
+     *
+     * The numpy arrays are never copied: C-contiguous, strided and
+     * Fortran-ordered float arrays are used in place, while arrays which
+     * could only be used through a copy (misaligned or byte-swapped) raise an
+     * exception. The bytes viewed and kept alive by the datasets are reported.
+     *
+     * float16 and uint16 (holding bfloat16 values) arrays are also accepted,
+     * in which case the events are widened to REAL when propagated. So are
+     * numpy.memmap arrays, whose training events may be streamed from their
+     * files (see the streamBlock property).
      **/
     void setData( const py::list& data, 
       std::vector< Ndarray<REAL,2>* > TuningToolPyWrapper::* const setPtr );
@@ -266,35 +425,39 @@ class TuningToolPyWrapper : public MsgService
 
     /**
      * @brief propagate data throw neural network
+     *
+     * Only the network first output is appended to outputVec.
      **/
     void sim( const DiscriminatorPyWrapper &net, 
         const Ndarray<REAL,2> *data,
         std::vector<float> &outputVec);
 
+    /**
+     * @brief Propagate all data events through the network into output
+     *
+     * The events are propagated in blocks of EVENT_BLOCK_SIZE events, shared
+     * among the threads, which all use the same network. The output must
+     * have space for the (nEvents x nOutputs) row-major network outputs. The
+     * python GIL is released during the propagation.
+     **/
+    void propagateDataset( const NeuralNetwork &net, 
+        const Ndarray<REAL,2> &data,
+        REAL *output ) const;
+
     /**
      * @brief Generate region of criteria
+     *
+     * If resolution is not positive, every distinct output is used as a cut.
      **/
     py::list genRoc( const std::vector<REAL> &signalVec, 
         const std::vector<REAL> &noiseVec, 
         REAL resolution );
 
-    /**
-     * @brief Return a list of TrainDataPyWrapper
-     **/
-    py::list trainEvolutionToPyList()
-    {
-      py::list trainList;
-      for( auto& trainDataPyWrapper : m_trnEvolution )
-      {
-        trainList.append( util::transfer_to_python( new TrainDataPyWrapper( trainDataPyWrapper ) ) );
-      }
-      return trainList;
-    };
-
     /**
      * @brief Return a list of wrapped NeuralNetwork to python 
      **/
-    void saveNetworksToPyList(py::list &list)
+    void saveNetworksToPyList(py::list &list, 
+        const std::vector< NeuralNetwork* > &saveNetworks)
     {
       // Create a new lit
       py::list netList;
@@ -304,7 +467,7 @@ class TuningToolPyWrapper : public MsgService
       int counter = 0;
 #endif
       // This actually works because python list is a mutable object:
-      for ( auto& net : m_saveNetworks ) 
+      for ( auto& net : saveNetworks ) 
       {
 #if defined(TUNINGTOOL_DBG_LEVEL) && TUNINGTOOL_DBG_LEVEL > 0
         MSG_DEBUG("Appending neural network [" << counter++ << "] to list");
@@ -338,10 +501,13 @@ class TuningToolPyWrapper : public MsgService
                 const std::string &trainFcn = TRAINRP_ID );
 
     /**
-     * Load feed forward neural network
+     * @brief Load feed forward neural network
+     *
+     * The weights and bias may either be lists or numpy arrays, as
+     * returned by DiscriminatorPyWrapper weights() and bias().
      **/
-    bool loadff( const py::list &nodes,  const py::list &trfFunc,
-                 const py::list &weight, const py::list &bias,
+    bool loadff( const py::list &nodes,    const py::list &trfFunc,
+                 const py::object &weight, const py::object &bias,
                  const std::string &trainFcn = TRAINRP_ID);
 
     /**
@@ -365,18 +531,100 @@ class TuningToolPyWrapper : public MsgService
      *
      *     [network_stop_by_sp, network_stop_by_det, network_stop_by_fa]
      *
-     * The train data evolution is a list of TrainDataPyWrapper and networks is
-     * a list of DiscriminatorPyWrapper. Basically, the outputs are:
+     * The train data evolution is a dict of numpy arrays, with one entry per
+     * epoch (see flushTrainEvolution), and networks is a list of
+     * DiscriminatorPyWrapper. Basically, the outputs are:
      *
-     *     [list_of_DeiscriminatorPyWrapper, list_of_TrainDataPyWrapper]
+     *     [list_of_DeiscriminatorPyWrapper, train_evolution_dict]
      **/
     py::list train_c();
 
+    /**
+     * @brief Train several initializations of the neural network
+     *
+     * The first initialization starts from the current network weights, and
+     * each of the following ones from new random weights, drawn on the
+     * initializations order. Every initialization draws the same training
+     * events. The training object (datasets, threads networks and buffers)
+     * is created only once and shared by the initializations trained one
+     * after the other.
+     *
+     * When parallelInits is above one, that number of initializations (at
+     * most one per thread) is trained in lockstep instead, with the threads
+     * split among them (see trainLockstep). This improves the throughput
+     * when the networks are too small for the epochs to use all threads
+     * efficiently. Each initialization is then trained as it would be alone
+     * with its share of threads (i.e. the tuned networks are the same as the
+     * ones trained one after the other when deterministic is set), but
+     * pipelineThreads is not used.
+     *
+     * Returns a list with the train_c output of each initialization:
+     *
+     *     [[list_of_DiscriminatorPyWrapper, train_evolution_dict], ...]
+     **/
+    py::list train_many_c( const unsigned nInits );
+
+    /**
+     * @brief Hand the training state and outputs to fcn while training
+     *
+     * During train_c and train_many_c, fcn is called as:
+     *
+     *     fcn( init, state, None )
+     *
+     * at the end of the first epoch finished interval seconds after the
+     * training started or after the previous call, where state is a dict
+     * holding everything needed to resume the training of the initialization
+     * from the next epoch (see setResumeState): the networks parameters, the
+     * training algorithm buffers, the stop criteria, the events selection
+     * and the training evolution up to that epoch. The training is only
+     * interrupted for the time needed to copy it. When each initialization
+     * finishes, fcn is also called as:
+     *
+     *     fcn( init, None, [list_of_DiscriminatorPyWrapper, train_evolution_dict] )
+     *
+     * The outputs are always handed on the initializations order. When
+     * several initializations are trained at once (see train_many_c), only
+     * the first unfinished one has its state handed. A None fcn disables the
+     * checkpoints.
+     **/
+    void setCheckpoint( const py::object &fcn, const double interval );
+
+    /**
+     * @brief Resume the next training from a state handed by setCheckpoint
+     *
+     * The next train_c (or the first initialization of the next
+     * train_many_c) continues the training from the state instead of the
+     * current network weights, using the same events selection seed. The
+     * network must have been created with the same nodes and training
+     * algorithm, and the datasets and configuration must be the same.
+     *
+     * The returned training evolution only holds the epochs trained after
+     * the state, which must be appended to the evolution held by it. Since
+     * the pseudo-random generator state is not restored, only the resumed
+     * initialization continues as the interrupted training would.
+     **/
+    void setResumeState( const py::object &state );
+
     /**
      * @brief Feed-forward the data input on network
+     *
+     * The data is a (nEvents x nInputs) float array, which is used without
+     * being copied (it may be strided or Fortran-ordered, as well as a
+     * float16 or bfloat16 array, see setData). Returns the network
+     * outputs as a (nEvents) array for single output networks and a
+     * (nEvents x nOutputs) array otherwise. 
+     *
+     * When out is given, the outputs are written on it and it is returned
+     * instead. It must be an aligned, writeable and C-contiguous float array
+     * with nEvents x nOutputs elements. This allows the same buffer to be
+     * reused when evaluating many datasets.
+     *
+     * The python GIL is released while propagating, so other python threads
+     * can run meanwhile.
      **/
-    PyObject* sim_c( const DiscriminatorPyWrapper &net,
-                     const py::numeric::array &data );
+    py::object sim_c( const DiscriminatorPyWrapper &net,
+                      const py::numeric::array &data,
+                      const py::object &out = py::object() );
 
     /**
      * @brief Obtain the input datasets output propagated at neural network
@@ -444,9 +692,38 @@ class TuningToolPyWrapper : public MsgService
     MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setIncEta,         getIncEta         );
     MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setDecEta,         getDecEta         );
     MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setInitEta,        getInitEta        );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setMomentum,       getMomentum       );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setBeta1,          getBeta1          );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setBeta2,          getBeta2          );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setEpsilon,        getEpsilon        );
     MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setDet,            getDet            );
     MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setFa,             getFa             );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setRocResolution,  getRocResolution  );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setValidRocResolution, getValidRocResolution );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, unsigned,    setValidEvery,     getValidEvery     );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, bool,        setTestOnBest,     getTestOnBest     );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setValidFraction,  getValidFraction  );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, bool,        setFastTanh,       getFastTanh       );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, unsigned,    setPipelineThreads, getPipelineThreads );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, REAL,        setHardFraction,   getHardFraction   );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, unsigned,    setStreamBlock,    getStreamBlock    );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, bool,        setDeterministic,  getDeterministic  );
+    MEMBER_PRIMITIVE_SETTER_AND_GETTER ( m_net, unsigned,    setParallelInits,  getParallelInits  );
     MEMBER_OBJECT_SETTER_AND_GETTER    ( m_net, std::string, setTrainFcn,       getTrainFcn       );
+
+    /// Training events sampling mode (see EventSampler)
+    std::string getSampling() const { return m_net.getSampling(); }
+    void setSampling( const std::string &mode ) { m_net.setSampling( mode ); }
+
+    /// Patterns weights used by the weighted sampling mode
+    py::list getSamplingWeights() const 
+    { 
+      return util::std_vector_to_py_list<REAL>( m_net.getSamplingWeights() ); 
+    }
+    void setSamplingWeights( const py::object &weights ) 
+    { 
+      m_net.setSamplingWeights( util::to_std_vector<REAL>( weights ) ); 
+    }
     /// @}
 };
 
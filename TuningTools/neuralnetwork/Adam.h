@@ -0,0 +1,172 @@
+#ifndef TUNINGTOOLS_ADAM_H
+#define TUNINGTOOLS_ADAM_H
+
+#include "TuningTools/system/defines.h"
+
+#include <vector>
+
+#include "RingerCore/MsgStream.h"
+#include "TuningTools/neuralnetwork/Backpropagation.h"
+#include "TuningTools/neuralnetwork/NetConfHolder.h"
+
+namespace TuningTool
+{
+
+/**
+ * This class implements the Adam (adaptive moment estimation) training
+ * algorithm. Each weight (and bias) is moved by the ratio between the
+ * exponential moving averages of its mean gradients (m) and squared mean
+ * gradients (v), corrected by their initialization bias:
+ *
+ *   m = beta1 * m + (1 - beta1) * g
+ *   v = beta2 * v + (1 - beta2) * g^2
+ *   w = w + learningRate * (m / (1 - beta1^t)) / (sqrt(v / (1 - beta2^t)) + epsilon)
+ *
+ * where t is the number of updates, so that each parameter has its own step
+ * size, as in RProp, while following the gradient magnitude.
+ *
+ * The moments are held on contiguous buffers with the same layout as the
+ * network parameters, so that each node row is updated on a single loop.
+ **/
+class Adam : public Backpropagation
+{
+  protected:
+    //Class attributes.
+
+    /// The decay rate of the gradients moving average.
+    REAL beta1;
+
+    /// The decay rate of the squared gradients moving average.
+    REAL beta2;
+
+    /// The term added to the denominator for numerical stability.
+    REAL epsilon;
+
+    /// The number of updates applied since the last reset.
+    unsigned nUpdates;
+
+    /// The first (m) and second (v) moments of each weight.
+    REAL ***m_w;
+    REAL ***v_w;
+
+    /// The first (m) and second (v) moments of each bias.
+    REAL **m_b;
+    REAL **v_b;
+
+    /// Contiguous buffers (params layout) holding the moments values
+    REAL *firstMoments;
+    REAL *secondMoments;
+
+    /**
+     * @brief Returns if space needed is already allocated
+     *
+     * Override FeedForward version, with same behavior, but for space needed
+     * by Adam.
+     **/
+    bool isAllocated() const;
+
+    /**
+     * @brief Dynamically allocates all the memory we need.
+     *
+     * This function will take the nNodes vector ans will allocate all the
+     * memory that must be dynamically allocated.
+     **/
+    virtual void allocateSpace();
+
+    /**
+     * @brief Updates the n contiguous parameters w with their accumulated
+     *        deltas d (scaled by val) and moments m and v, resetting the
+     *        deltas.
+     *
+     * c1 and c2 are the bias corrections of the first and second moments.
+     **/
+    void updateRow(REAL *w, REAL *d, REAL *m, REAL *v, const unsigned n,
+        const REAL val, const REAL c1, const REAL c2);
+
+    void copyMoments(const Adam &net);
+
+  public:
+
+    /**
+     * @brief Update the weights and bias matrices.
+     * @param[in] numEvents The number of events applied to the network during the training phase.
+     * @see TuningTool::Backpropagation#updateWeights()
+     **/
+    void updateWeights(const unsigned numEvents);
+
+    /// Empty constructor
+    Adam();
+
+    /**
+     * @brief Copy constructor
+     *
+     * @param[in] net The network that we will copy the parameters from.
+     **/
+    Adam(const Adam &net);
+
+    /**
+     * @brief Constructor taking the network configuration.
+     **/
+    Adam( const NetConfHolder &net,
+          const MSG::Level msglevel,
+          const std::string &name);
+
+    /// Returns a dynamically allocated clone of the object.
+    virtual NeuralNetwork *clone(){ return new Adam(*this); }
+
+    /**
+     * @brief Copies all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void copyNeededTrainingInfo(const Backpropagation &net) override;
+
+    /**
+     * @brief Fast copies all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void copyNeededTrainingInfoFast(const Backpropagation &net) override;
+
+    /**
+     * @brief Resets all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void resetNeededTrainingInfo() override;
+
+    /**
+     * @brief Training information kept between epochs
+     *
+     * See overriden Backpropagation versions for more information.
+     **/
+    ///@{
+    virtual std::size_t getTrainingStateSize() const override;
+    virtual void getTrainingState(REAL *buffer) const override;
+    virtual void setTrainingState(const REAL *buffer) override;
+    ///@}
+
+    /// Class destructor.
+    virtual ~Adam();
+
+    /**
+     * @brief Gives the neural network information.
+     * @see TuningTool::NeuralNetwork#showInfo
+     **/
+    virtual void showInfo() const;
+
+    /**
+     * @brief Copy the status from the passing network.
+     *
+     * The space for weights and bias info must have been previously created.
+     *
+     * @param[in] net The network from where to copy the data from.
+     **/
+    Adam& operator=(const Adam &net);
+};
+}
+
+#endif
@@ -76,6 +76,14 @@ class Backpropagation : public NeuralNetwork
      * allocated by the class and automatically released at the end. 
      **/
     REAL **db;
+
+    /**
+     * @brief Contiguous buffer holding the dw and db values.
+     *
+     * It has the same layout as the network params buffer, so that the
+     * gradients can be copied and reduced as a single array.
+     **/
+    REAL *grads;
     
 
     /**
@@ -95,6 +103,15 @@ class Backpropagation : public NeuralNetwork
      * @see TuningTool::NeuralNetwork#setFreeze
      **/
     bool **frozenNode;
+
+    /**
+     * @brief Contains the gradient of each node for a block of events.
+     *
+     * Same as sigma, but filled by the batched retropropagation, where
+     * batchSigma[x] holds the nEvents x nNodes[x+1] row-major sigmas of the
+     * layer x (where 0 is the first hidden layer).
+     **/
+    std::vector< std::vector<REAL> > batchSigma;
     /// @}
 
     
@@ -112,6 +129,20 @@ class Backpropagation : public NeuralNetwork
      **/
     virtual void retropropagateError(const REAL *output, const REAL *target);
 
+    /**
+     * @brief Retropropagates the error of a block of events.
+     *
+     * As retropropagateError, but for the last block of events propagated by
+     * propagateInputs, filling batchSigma.
+     * @param[in] output The nEvents x nOutputs block generated by the network.
+     * @param[in] target The desired (target) output value, which is the same
+     *            for all events in the block.
+     * @param[in] nEvents The number of events in the block.
+     **/
+    virtual void retropropagateErrors(const REAL *output, 
+                                      const REAL *target,
+                                      const unsigned nEvents);
+
     /**
      * @brief Returns if space needed is already allocated
      *
@@ -194,6 +225,23 @@ class Backpropagation : public NeuralNetwork
      * @param[in] net The network from where to get the gradients from.
      **/
     virtual void addToGradient(const Backpropagation &net);
+
+    /**
+     * @brief Copies the gradients buffer into buffer.
+     *
+     * The buffer must hold getParamSize() values.
+     **/
+    void getGradient(REAL *buffer) const;
+
+    /**
+     * @brief Replaces the gradients by the getParamSize() values in buffer.
+     **/
+    void setGradient(const REAL *buffer);
+
+    /**
+     * @brief Zeroes the gradients (keeping any other training information).
+     **/
+    void resetGradient();
     
     /**
      * @brief Sets the freeze/unfreeze status of an specific node.
@@ -313,6 +361,37 @@ class Backpropagation : public NeuralNetwork
     virtual void calculateNewWeights(const REAL *output, 
                                      const REAL *target);
 
+    /**
+     * @brief Propagates a block of events and calculates their MSE error.
+     *
+     * Batched version of applySupervisedInput, where all events in the block
+     * share the same target.
+     * @param[in] input The nEvents x nInputs row-major input block.
+     * @param[in] nEvents The number of events in the block.
+     * @param[in] target The desired (target) output for all events.
+     * @param[out] output This pointer will point to the nEvents x nOutputs
+     *             output block generated by the network.
+     * @return The sum of the MSE errors of each event in the block.
+     **/
+    virtual REAL applySupervisedInputs(const REAL *input, 
+                                       const unsigned nEvents,
+                                       const REAL *target,
+                                       const REAL* &output);
+
+    /**
+     * @brief Calculates the new weight values for a block of events.
+     *
+     * Batched version of calculateNewWeights, to be called after
+     * applySupervisedInputs. The gradients of all events in the block are
+     * accumulated through matrix products.
+     * @param[in] output The output block generated by applySupervisedInputs.
+     * @param[in] target The desired (target) output for all events.
+     * @param[in] nEvents The number of events in the block.
+     **/
+    virtual void calculateNewWeights(const REAL *output, 
+                                     const REAL *target,
+                                     const unsigned nEvents);
+
     /**
      * @brief Updates the weight and biases matrices.
      *
@@ -356,6 +435,44 @@ class Backpropagation : public NeuralNetwork
      * destination.
      **/
     virtual void copyNeededTrainingInfoFast(const Backpropagation &net);
+
+    /**
+     * @brief Resets all information that is used by training for the next
+     *        epoch
+     *
+     * The training information is set back to the state of a newly created
+     * network, so that the network can be trained again from new weights
+     * (e.g. after initWeights) without being reallocated.
+     *
+     * Every inherited class that adds information to copyNeededTrainingInfo
+     * should also reset it here.
+     **/
+    virtual void resetNeededTrainingInfo();
+
+    /**
+     * @brief Number of REAL values needed to hold the training information
+     *        kept between epochs (see getTrainingState).
+     *
+     * Every inherited class that adds information to copyNeededTrainingInfo
+     * should also add it to the training state.
+     **/
+    virtual std::size_t getTrainingStateSize() const { return 0; }
+
+    /**
+     * @brief Copies the training information kept between epochs (i.e. the
+     *        optimiser buffers) into buffer, which must hold
+     *        getTrainingStateSize() values.
+     *
+     * Together with the network parameters, it allows restarting the
+     * training from where it was stopped (see setTrainingState).
+     **/
+    virtual void getTrainingState(REAL * /*buffer*/) const {;}
+
+    /**
+     * @brief Replaces the training information kept between epochs by the
+     *        one retrieved by getTrainingState.
+     **/
+    virtual void setTrainingState(const REAL * /*buffer*/) {;}
     ///@}
 
     /***
@@ -0,0 +1,154 @@
+#ifndef TUNINGTOOLS_MOMENTUM_H
+#define TUNINGTOOLS_MOMENTUM_H
+
+#include "TuningTools/system/defines.h"
+
+#include <vector>
+
+#include "RingerCore/MsgStream.h"
+#include "TuningTools/neuralnetwork/Backpropagation.h"
+#include "TuningTools/neuralnetwork/NetConfHolder.h"
+
+namespace TuningTool
+{
+
+/**
+ * This class implements the gradient descent with momentum training
+ * algorithm. Each weight (and bias) is moved by its velocity, which
+ * accumulates the mean gradients of the previous epochs:
+ *
+ *   v = momentum * v + learningRate * g
+ *   w = w + v
+ *
+ * so that the steps grow along the directions where the gradient keeps its
+ * sign, and oscillations across the other ones are damped.
+ *
+ * The velocities are held on a contiguous buffer with the same layout as the
+ * network parameters, so that each node row is updated on a single loop.
+ **/
+class Momentum : public Backpropagation
+{
+  protected:
+    //Class attributes.
+
+    /// The fraction of the previous velocity kept on each epoch.
+    REAL momentum;
+
+    /// The velocity of each weight.
+    REAL ***vel_w;
+
+    /// The velocity of each bias.
+    REAL **vel_b;
+
+    /// Contiguous buffer (params layout) holding the vel_w and vel_b values
+    REAL *velocities;
+
+    /**
+     * @brief Returns if space needed is already allocated
+     *
+     * Override FeedForward version, with same behavior, but for space needed
+     * by Momentum.
+     **/
+    bool isAllocated() const;
+
+    /**
+     * @brief Dynamically allocates all the memory we need.
+     *
+     * This function will take the nNodes vector ans will allocate all the
+     * memory that must be dynamically allocated.
+     **/
+    virtual void allocateSpace();
+
+    /**
+     * @brief Updates the n contiguous parameters w with their accumulated
+     *        deltas d (scaled by val) and velocities v, resetting the deltas.
+     **/
+    void updateRow(REAL *w, REAL *d, REAL *v, const unsigned n, const REAL val);
+
+    void copyVelocities(const Momentum &net);
+
+  public:
+
+    /**
+     * @brief Update the weights and bias matrices.
+     * @param[in] numEvents The number of events applied to the network during the training phase.
+     * @see TuningTool::Backpropagation#updateWeights()
+     **/
+    void updateWeights(const unsigned numEvents);
+
+    /// Empty constructor
+    Momentum();
+
+    /**
+     * @brief Copy constructor
+     *
+     * @param[in] net The network that we will copy the parameters from.
+     **/
+    Momentum(const Momentum &net);
+
+    /**
+     * @brief Constructor taking the network configuration.
+     **/
+    Momentum( const NetConfHolder &net,
+              const MSG::Level msglevel,
+              const std::string &name);
+
+    /// Returns a dynamically allocated clone of the object.
+    virtual NeuralNetwork *clone(){ return new Momentum(*this); }
+
+    /**
+     * @brief Copies all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void copyNeededTrainingInfo(const Backpropagation &net) override;
+
+    /**
+     * @brief Fast copies all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void copyNeededTrainingInfoFast(const Backpropagation &net) override;
+
+    /**
+     * @brief Resets all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void resetNeededTrainingInfo() override;
+
+    /**
+     * @brief Training information kept between epochs
+     *
+     * See overriden Backpropagation versions for more information.
+     **/
+    ///@{
+    virtual std::size_t getTrainingStateSize() const override;
+    virtual void getTrainingState(REAL *buffer) const override;
+    virtual void setTrainingState(const REAL *buffer) override;
+    ///@}
+
+    /// Class destructor.
+    virtual ~Momentum();
+
+    /**
+     * @brief Gives the neural network information.
+     * @see TuningTool::NeuralNetwork#showInfo
+     **/
+    virtual void showInfo() const;
+
+    /**
+     * @brief Copy the status from the passing network.
+     *
+     * The space for weights and bias info must have been previously created.
+     *
+     * @param[in] net The network from where to copy the data from.
+     **/
+    Momentum& operator=(const Momentum &net);
+};
+}
+
+#endif
@@ -32,6 +32,10 @@ class NetConfHolder : public MsgService {
     REAL m_incEta           = 1.10;
     REAL m_decEta           = 0.5;
     REAL m_initEta          = 0.1;
+    REAL m_momentum         = 0.9;
+    REAL m_beta1            = 0.9;
+    REAL m_beta2            = 0.999;
+    REAL m_epsilon          = 1E-8;
     TrainGoal m_trainGoal   = MSE_STOP;
     unsigned m_maxFail      = 50;
     unsigned m_nEpochs      = 1000;
@@ -42,6 +46,32 @@ class NetConfHolder : public MsgService {
     //Custom stop train parameters
     REAL m_detReference     = 1.0;
     REAL m_faReference      = 0.0;
+    //ROC cut resolution (not positive values use every distinct output)
+    REAL m_rocResolution      = 0.01;
+    REAL m_validRocResolution = 0.005;
+    //Evaluation schedule (validate every N epochs, test only on new bests)
+    unsigned m_validEvery     = 1;
+    bool m_testOnBest         = false;
+    //Fraction of each pattern validation set used by the stop criteria
+    REAL m_validFraction      = 1.;
+    //Use the tanh rational approximation (see util::fast_tanh)
+    bool m_fastTanh           = false;
+    //Threads evaluating each epoch while the next one is trained (0 disables)
+    unsigned m_pipelineThreads = 0;
+    //Training events sampling mode (see EventSampler), the patterns weights
+    //used by the weighted mode and the fraction of the hardest background
+    //events used by the hard negative mode
+    std::string m_sampling    = SAMPLE_PATTERN_ID;
+    std::vector<REAL> m_samplingWeights;
+    REAL m_hardFraction       = 0.5;
+    //Number of consecutive training events drawn at once and read ahead from
+    //memory-mapped datasets (0 disables streaming)
+    unsigned m_streamBlock    = 0;
+    //Make the tuning independent of the number of threads
+    bool m_deterministic      = false;
+    //Initializations trained at once by train_many_c (one or less trains
+    //them one after the other)
+    unsigned m_parallelInits  = 1;
 
     /// @}
 
@@ -152,11 +182,28 @@ class NetConfHolder : public MsgService {
     PRIMITIVE_SETTER_AND_GETTER(REAL, setIncEta           , getIncEta             , m_incEta              );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setDecEta           , getDecEta             , m_decEta              );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setInitEta          , getInitEta            , m_initEta             );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setMomentum         , getMomentum           , m_momentum            );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setBeta1            , getBeta1              , m_beta1               );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setBeta2            , getBeta2              , m_beta2               );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setEpsilon          , getEpsilon            , m_epsilon             );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setEpochs           , getEpochs             , m_nEpochs             );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setBatchSize        , getBatchSize          , m_batchSize           );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setShow             , getShow               , m_show                );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setDet              , getDet                , m_detReference        );      
     PRIMITIVE_SETTER_AND_GETTER(REAL, setFa               , getFa                 , m_faReference         );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setRocResolution    , getRocResolution      , m_rocResolution       );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setValidRocResolution, getValidRocResolution, m_validRocResolution  );      
+    PRIMITIVE_SETTER_AND_GETTER(unsigned, setValidEvery   , getValidEvery         , m_validEvery          );      
+    PRIMITIVE_SETTER_AND_GETTER(bool, setTestOnBest       , getTestOnBest         , m_testOnBest          );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setValidFraction    , getValidFraction      , m_validFraction       );      
+    PRIMITIVE_SETTER_AND_GETTER(bool, setFastTanh         , getFastTanh           , m_fastTanh            );      
+    PRIMITIVE_SETTER_AND_GETTER(unsigned, setPipelineThreads, getPipelineThreads  , m_pipelineThreads     );      
+    OBJECT_SETTER_AND_GETTER(std::string, setSampling     , getSampling           , m_sampling            );      
+    OBJECT_SETTER_AND_GETTER(std::vector<REAL>, setSamplingWeights, getSamplingWeights, m_samplingWeights   );      
+    PRIMITIVE_SETTER_AND_GETTER(REAL, setHardFraction     , getHardFraction       , m_hardFraction        );      
+    PRIMITIVE_SETTER_AND_GETTER(unsigned, setStreamBlock  , getStreamBlock        , m_streamBlock         );      
+    PRIMITIVE_SETTER_AND_GETTER(bool, setDeterministic    , getDeterministic      , m_deterministic       );      
+    PRIMITIVE_SETTER_AND_GETTER(unsigned, setParallelInits, getParallelInits      , m_parallelInits       );      
     PRIMITIVE_SETTER_AND_GETTER(std::vector<std::string>, setTrfFunc   , getTrfFunc    , m_trfFuncStr     );      
 };
 
@@ -11,6 +11,7 @@
 #include "RingerCore/MsgStream.h"
 #include "TuningTools/system/util.h"
 #include "TuningTools/system/macros.h"
+#include "TuningTools/system/transfer.h"
 #include "TuningTools/neuralnetwork/NetConfHolder.h"
 
 /**
@@ -68,6 +69,10 @@ class NeuralNetwork : public MsgService
      *  - x: the layer index (where 0 is the first hidden layer).
      *  - y: the index of the node in layer x.
      *  - z: the index of the node in layer x-1.
+     *
+     * Each layer matrix is a contiguous row-major block starting at w[x][0],
+     * so that it can be directly used by the batched matrix products. The
+     * weights are views to the params buffer.
      **/
     REAL ***weights;
     
@@ -76,9 +81,25 @@ class NeuralNetwork : public MsgService
      * Stores the biases matrix, where the dimensions (b[x][y]) are:
      *  - x: the layer index (where 0 is the first hidden layer).
      *  - y: the index of the node in layer x.
+     * The biases are views to the params buffer.
      **/
     REAL **bias;
 
+    /**
+     * @brief Contiguous aligned buffer holding all network parameters.
+     *
+     * For each layer, it holds its row-major weight matrix followed by its
+     * biases, where each layer block starts at an aligned position (see
+     * layerOffset). Any padding value is kept as zero.
+     **/
+    REAL *params;
+
+    /// The number of REAL values in a parameter buffer (including padding)
+    std::size_t paramSize;
+
+    /// The offset of each layer block within a parameter buffer
+    std::vector<std::size_t> layerOffset;
+
     /**
      * @brief Stores the output generated by each layer.
      *
@@ -89,6 +110,21 @@ class NeuralNetwork : public MsgService
      *   - y: the output generated by the node y in layer x.
      **/
     mutable REAL **layerOutputs;
+
+    /// Pointer to the block of events being propagated by propagateInputs
+    mutable const REAL *batchInput;
+
+    /**
+     * @brief Stores the output generated by each layer for a block of events.
+     *
+     * Same as layerOutputs, but filled by propagateInputs. The dimensions
+     * (batchOutputs[x][e*nNodes[x+1] + y]) are:
+     *   - x: the layer index (where 0 is the first hidden layer).
+     *   - e: the event index within the block.
+     *   - y: the output generated by the node y in layer x.
+     * Its space is only grown when a larger block is propagated.
+     **/
+    mutable std::vector< std::vector<REAL> > batchOutputs;
     
     /**
      * @brief Store the number of nodes in each layer (including the input layer).
@@ -126,6 +162,9 @@ class NeuralNetwork : public MsgService
 
     /// This vector holds the trf name function that can be: tansig or liner
     std::vector<std::string>       trfFuncStr;
+
+    /// Whether the tanh rational approximation (util::fast_tanh) is used
+    bool fastTanh;
     ///@}
 
     /// Inline standart methods.
@@ -140,11 +179,13 @@ class NeuralNetwork : public MsgService
      * @param[in] deriv If true, the function will calculate the dervative,
      *            otherwise, the hyperbolic tangent value of "val".
      * @return The hyperbolic value of "val" (\f$ \tanh(val) \f$), if "deriv"
-     *         = false, or its derivative \f$1 - val^2\f$ otherwise.
+     *         = false, or its derivative \f$1 - val^2\f$ otherwise. The
+     *         approximation util::fast_tanh is used when fastTanh is set.
      **/
     REAL hyperbolicTangent(REAL val, bool deriv) const 
     {
-      return (deriv) ? (1 - (val*val)) : tanh(val);
+      if (deriv) return (1 - (val*val));
+      return (fastTanh) ? util::fast_tanh(val) : tanh(val);
     }
 
     /**
@@ -158,6 +199,37 @@ class NeuralNetwork : public MsgService
      **/
     REAL linear(REAL val, bool deriv) const {return (deriv) ? 1 : val;};
 
+    /**
+     * @brief Adds the biases and applies the transfer function of a layer
+     *        to a block of events.
+     *
+     * The whole (nEvents x nNodes[layer+1]) row-major block is processed by
+     * the util transfer kernels at once, instead of calling the trfFunc
+     * pointer for each node.
+     **/
+    void applyTrfFunc(const unsigned layer, REAL *out, 
+        const unsigned nEvents) const
+    {
+      const unsigned nOut = nNodes[layer+1];
+      util::add_row_bias( out, bias[layer], nEvents, nOut );
+      if ( trfFunc[layer] == &NeuralNetwork::hyperbolicTangent ) {
+        if ( fastTanh ) util::fast_tanh_n( out, nEvents*nOut );
+        else util::tanh_n( out, nEvents*nOut );
+      }
+    }
+
+    /**
+     * @brief Multiplies the sigma block by the transfer function derivative
+     *        of a layer, written on its outputs.
+     **/
+    void multTrfDeriv(const unsigned layer, const REAL *out, REAL *sigma,
+        const unsigned nEvents) const
+    {
+      if ( trfFunc[layer] == &NeuralNetwork::hyperbolicTangent ) {
+        util::mult_tanh_deriv_n( out, sigma, nEvents*nNodes[layer+1] );
+      }
+    }
+
 
     /**
      * @brief Releases the memory used by a bias matrix.
@@ -172,18 +244,27 @@ class NeuralNetwork : public MsgService
     void releaseMatrix(REAL **b);
     
     
+
     /**
+     * @brief Allocates a buffer with the parameter buffer layout.
      *
-     * @brief Releases the memory used by a weight matrix.
+     * A single zero-filled aligned buffer of paramSize values is allocated,
+     * and the w and b pointers are set as views to each of its layer weight
+     * rows and biases, in the same way as the weights and bias properties.
+     * This allows weight-like quantities (e.g. gradients) to be copied and
+     * reduced as a single contiguous array. The buffer must be released with
+     * releaseParameters.
      *
-     * This method releases the memory dynamically allocated for a weight
-     * matrix (or any other matrix that has the exactly same size), by using
-     * the size information of the weight matrix.
-     * If successfull, the pointer will be assigned to NULL.
+     * @return The allocated buffer.
+     **/
+    REAL *allocateParameters(REAL ***&w, REAL **&b) const;
+
+    /**
+     * @brief Releases a buffer allocated by allocateParameters and its views.
      *
-     * @param w A pointer to a weight matrix.
+     * If successfull, the pointers will be assigned to nullptr.
      **/
-    void releaseMatrix(REAL ***w);
+    void releaseParameters(REAL *&buffer, REAL ***&w, REAL **&b) const;
 
     /**
      * @brief Returns if space needed is already allocated
@@ -240,6 +321,54 @@ class NeuralNetwork : public MsgService
      **/
     virtual const REAL* propagateInput(const REAL *input) const;
 
+    /**
+     * @brief Propagates a block of events through the network.
+     *
+     * As propagateInput, but for nEvents contiguous events, where each layer
+     * is computed as a single matrix product. The output of each layer is
+     * stored in batchOutputs.
+     * @param input  The nEvents x nNodes[0] row-major input block.
+     * @param nEvents The number of events in the block.
+     * @return A pointer to the nEvents x nNodes[nNodes.size()-1] row-major
+     *         network's output.
+     **/
+    virtual const REAL* propagateInputs(const REAL *input, 
+                                        const unsigned nEvents) const;
+
+    /**
+     * @brief Propagates a block of events using the given output buffers.
+     *
+     * As propagateInputs, but each layer output is stored in layersOutput
+     * (grown as needed) instead of batchOutputs. Since the network is not
+     * changed, many threads can use the same network at the same time, each
+     * of them with its own buffers.
+     **/
+    const REAL* propagateInputs(const REAL *input, 
+                                const unsigned nEvents,
+                                std::vector< std::vector<REAL> > &layersOutput) const;
+
+    /**
+     * @brief Returns the sum of the events mean squared errors
+     *
+     * The output holds the (nEvents x nOut) row-major outputs of a block of
+     * events, which all have the same target.
+     **/
+    static REAL sumSquaredErrors(const REAL *output, 
+        const REAL *target,
+        const unsigned nEvents, 
+        const unsigned nOut)
+    {
+      REAL error = 0;
+      for (unsigned e=0; e<nEvents; e++) {
+        REAL evError = 0;
+        for (unsigned i=0; i<nOut; i++) {
+          evError += SQR(target[i] - output[e*nOut + i]);
+        }
+        error += evError / nOut;
+      }
+      return error;
+    }
+
     /**
      * @brief Returns a clone of the object.
      *
@@ -275,6 +404,18 @@ class NeuralNetwork : public MsgService
      **/
     void copyWeigthsFast(const NeuralNetwork &net);
 
+    /**
+     * @brief Copies the weights and biases into buffer, on the params
+     *        layout. The buffer must hold getParamSize() values.
+     **/
+    void getParams(REAL *buffer) const;
+
+    /**
+     * @brief Replaces the weights and biases by the getParamSize() values in
+     *        buffer, on the params layout.
+     **/
+    void setParams(const REAL *buffer);
+
     /**
      * @brief Copy the status from the passing network.
      *
@@ -339,6 +480,12 @@ class NeuralNetwork : public MsgService
       return nNodes.size();
     }
 
+    /// Gets the number of REAL values in a parameter buffer
+    std::size_t getParamSize() const 
+    {
+      return paramSize;
+    }
+
     /**
      * @brief Gets the number of nodes in a specific layer.
      * @return The number of nodes in the layer.
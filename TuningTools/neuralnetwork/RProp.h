@@ -92,6 +92,9 @@ class RProp : public Backpropagation
      * calculated in the last epoch.
      **/
     REAL **prev_db;
+
+    /// Contiguous buffer (params layout) holding the prev_dw and prev_db values
+    REAL *prevGrads;
     
     
     /**
@@ -112,6 +115,9 @@ class RProp : public Backpropagation
      **/
     REAL **delta_b;
 
+    /// Contiguous buffer (params layout) holding the delta_w and delta_b values
+    REAL *deltas;
+
     /**
      * @brief Gets the smaller of two numbers.
      * This method takes two numbers and returns the smallest of them.
@@ -238,6 +244,25 @@ class RProp : public Backpropagation
      **/
     virtual void copyNeededTrainingInfoFast(const Backpropagation &net) override;
 
+    /**
+     * @brief Resets all information that is used by training for the next
+     *        epoch
+     *
+     * See overriden Backpropagation version for more information.
+     **/
+    virtual void resetNeededTrainingInfo() override;
+
+    /**
+     * @brief Training information kept between epochs
+     *
+     * See overriden Backpropagation versions for more information.
+     **/
+    ///@{
+    virtual std::size_t getTrainingStateSize() const override;
+    virtual void getTrainingState(REAL *buffer) const override;
+    virtual void setTrainingState(const REAL *buffer) override;
+    ///@}
+
     /**
      * @brief Class destructor.
      * Releases all the dynamically allocated memory used by the class, so
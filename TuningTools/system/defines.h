@@ -101,6 +101,24 @@ struct type_to_npy_enum< double > {
   static constexpr char ctypes_char = 'd';
 };
 
+/**
+ * @brief Specialization for unsigned enum.
+ **/
+template<>
+struct type_to_npy_enum< unsigned > {
+  static constexpr NPY_TYPES enum_val = NPY_UINT;
+  static constexpr char ctypes_char = 'I';
+};
+
+/**
+ * @brief Specialization for bool enum.
+ **/
+template<>
+struct type_to_npy_enum< bool > {
+  static constexpr NPY_TYPES enum_val = NPY_BOOL;
+  static constexpr char ctypes_char = '?';
+};
+
 
 /**
  * @brief Macro to call pointers to member functions.
@@ -154,6 +172,39 @@ const std::string TRAINGD_ID = "traingd";
 const std::string TRAINRP_ID = "trainrp";
 
 
+/**
+ * @brief String ID for the Gradient Descent with Momentum neural training.
+ *
+ * This is the only ID for the Gradient Descent with Momentum neural training
+ * for files, so, every time that a file wants to make a reference that it
+ * will use this training, this reference is done by this value.
+ **/
+const std::string TRAINGDM_ID = "traingdm";
+
+
+/**
+ * @brief String ID for the Adam (adaptive moment estimation) neural training.
+ *
+ * This is the only ID for the Adam neural training for files, so, every time
+ * that a file wants to make a reference that it will use this training, this
+ * reference is done by this value.
+ **/
+const std::string TRAINADAM_ID = "trainadam";
+
+
+/**
+ * @brief String IDs for the training events sampling modes.
+ *
+ * See EventSampler for their description.
+ **/
+/// @{
+const std::string SAMPLE_PATTERN_ID    = "pattern";
+const std::string SAMPLE_STRATIFIED_ID = "stratified";
+const std::string SAMPLE_WEIGHTED_ID   = "weighted";
+const std::string SAMPLE_HARDNEG_ID    = "hardnegative";
+/// @}
+
+
 /// String ID used to inform that no value has been supplied.
 const std::string NONE_ID = "NONE";
 
@@ -171,6 +222,32 @@ const std::string NONE_ID = "NONE";
  **/
 const unsigned NUMBER_MIN_OF_EPOCHS = 5;
 
+/**
+ * Number of events propagated at once through the batched (matrix product)
+ * feedforward and error retropropagation.
+ **/
+const unsigned EVENT_BLOCK_SIZE = 64;
+
+/**
+ * Alignment (in bytes) of the contiguous parameter buffers holding the
+ * network weights, biases and their gradients (a cache line, which also
+ * covers the SIMD registers widths).
+ **/
+const unsigned PARAM_ALIGNMENT = 64;
+
+/**
+ * Maximum number of slots (sets of consecutive event blocks) whose gradients
+ * are summed pairwise by the deterministic reduction (see
+ * Training::setDeterministic).
+ **/
+const unsigned REDUCTION_SLOTS = 64;
+
+/**
+ * Stride (in bytes) used to read ahead the pages of memory-mapped datasets
+ * (see PagePrefetcher). Larger pages are only touched more than once.
+ **/
+const unsigned PREFETCH_PAGE_SIZE = 4096;
+
 /// This is the position into a std::vector that will be hold the save
 /// networks during the training step.
 /// @{
@@ -188,4 +265,13 @@ enum TrainGoal{
   MULTI_STOP = 2,
 };
 
+/**
+ * Storage type of the datasets elements (see TuningTools/system/storage.h)
+ **/
+enum DataStorage{
+  REAL_STORAGE     = 0,
+  FLOAT16_STORAGE  = 1,
+  BFLOAT16_STORAGE = 2,
+};
+
 #endif
@@ -0,0 +1,138 @@
+#ifndef TUNINGTOOLS_SYSTEM_GEMM_H
+#define TUNINGTOOLS_SYSTEM_GEMM_H
+
+#include "TuningTools/system/defines.h"
+
+#include <cstring>
+#include <algorithm>
+
+#ifdef USE_BLAS
+#include <cblas.h>
+#include <type_traits>
+#endif
+
+/**
+ * @brief Dense matrix products used by the batched propagation.
+ *
+ * All matrices are row-major and contiguous. When compiled with USE_BLAS, the
+ * products are delegated to cblas_sgemm, otherwise cache-blocked loops are
+ * used, which are written so that the innermost loop runs over contiguous
+ * memory and can be vectorized by the compiler.
+ **/
+namespace util
+{
+
+/// Number of rows processed at a time by the cache-blocked loops
+const unsigned GEMM_ROW_BLOCK = 32;
+
+/**
+ * @brief C = beta*C + A x B^T
+ *
+ * Dimensions are: A (M x K), B (N x K) and C (M x N). This is the layer
+ * feedforward product, where A holds the events and B the weights.
+ **/
+inline
+void gemm_nt( const REAL *A, const REAL *B, REAL *C,
+    const unsigned M, const unsigned N, const unsigned K,
+    const REAL beta = 0. )
+{
+#ifdef USE_BLAS
+  static_assert( std::is_same<REAL,float>::value,
+      "BLAS kernels are only available for single precision." );
+  cblas_sgemm( CblasRowMajor, CblasNoTrans, CblasTrans,
+      M, N, K, 1., A, K, B, K, beta, C, N );
+#else
+  for ( unsigned i0 = 0; i0 < M; i0 += GEMM_ROW_BLOCK )
+  {
+    const unsigned iEnd = std::min( i0 + GEMM_ROW_BLOCK, M );
+    // Keep this block of A rows on cache while sweeping B:
+    for ( unsigned j = 0; j < N; ++j )
+    {
+      const REAL *bRow = B + j*K;
+      for ( unsigned i = i0; i < iEnd; ++i )
+      {
+        const REAL *aRow = A + i*K;
+        REAL acc = 0.;
+        for ( unsigned k = 0; k < K; ++k ) acc += aRow[k] * bRow[k];
+        C[i*N + j] = ( beta != 0. ) ? ( beta * C[i*N + j] + acc ) : acc;
+      }
+    }
+  }
+#endif
+}
+
+/**
+ * @brief C = beta*C + A x B
+ *
+ * Dimensions are: A (M x K), B (K x N) and C (M x N). This is the error
+ * retropropagation product, where A holds the events sigmas and B the weights.
+ **/
+inline
+void gemm_nn( const REAL *A, const REAL *B, REAL *C,
+    const unsigned M, const unsigned N, const unsigned K,
+    const REAL beta = 0. )
+{
+#ifdef USE_BLAS
+  cblas_sgemm( CblasRowMajor, CblasNoTrans, CblasNoTrans,
+      M, N, K, 1., A, K, B, N, beta, C, N );
+#else
+  for ( unsigned i = 0; i < M; ++i )
+  {
+    REAL *cRow = C + i*N;
+    if ( beta == 0. ) {
+      std::fill_n( cRow, N, 0. );
+    } else if ( beta != 1. ) {
+      for ( unsigned j = 0; j < N; ++j ) cRow[j] *= beta;
+    }
+    const REAL *aRow = A + i*K;
+    for ( unsigned k = 0; k < K; ++k )
+    {
+      const REAL a = aRow[k];
+      const REAL *bRow = B + k*N;
+      for ( unsigned j = 0; j < N; ++j ) cRow[j] += a * bRow[j];
+    }
+  }
+#endif
+}
+
+/**
+ * @brief C = beta*C + A^T x B
+ *
+ * Dimensions are: A (K x M), B (K x N) and C (M x N). This is the gradient
+ * accumulation product, where A holds the events sigmas and B the previous
+ * layer outputs.
+ **/
+inline
+void gemm_tn( const REAL *A, const REAL *B, REAL *C,
+    const unsigned M, const unsigned N, const unsigned K,
+    const REAL beta = 1. )
+{
+#ifdef USE_BLAS
+  cblas_sgemm( CblasRowMajor, CblasTrans, CblasNoTrans,
+      M, N, K, 1., A, M, B, N, beta, C, N );
+#else
+  if ( beta == 0. ) {
+    std::fill_n( C, M*N, 0. );
+  } else if ( beta != 1. ) {
+    for ( unsigned idx = 0; idx < M*N; ++idx ) C[idx] *= beta;
+  }
+  for ( unsigned k0 = 0; k0 < K; k0 += GEMM_ROW_BLOCK )
+  {
+    const unsigned kEnd = std::min( k0 + GEMM_ROW_BLOCK, K );
+    for ( unsigned i = 0; i < M; ++i )
+    {
+      REAL *cRow = C + i*N;
+      for ( unsigned k = k0; k < kEnd; ++k )
+      {
+        const REAL a = A[k*M + i];
+        const REAL *bRow = B + k*N;
+        for ( unsigned j = 0; j < N; ++j ) cRow[j] += a * bRow[j];
+      }
+    }
+  }
+#endif
+}
+
+} // namespace util
+
+#endif // TUNINGTOOLS_SYSTEM_GEMM_H
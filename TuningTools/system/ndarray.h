@@ -64,6 +64,8 @@ class Ndarray
     npy_intp *m_shape;
     /// @brief numpy raw pointer strides for each dimensional
     npy_intp m_steps[ndim];
+    /// @brief numpy type number of the elements
+    int m_typeNum;
 
     // @brief hold the smart pointer to enlarge numpy life span
     py::handle<PyObject> m_handle;
@@ -83,7 +85,7 @@ class Ndarray
     /// Ctors
     /// @{
     /// Empty ctor:
-    Ndarray(){;}
+    Ndarray() : m_typeNum( type_to_npy_enum<datatype>::enum_val ){;}
     /// Ndarray constructor
     Ndarray(datatype * const data, 
             npy_intp * const shape, 
@@ -99,6 +101,21 @@ class Ndarray
     /// Ndarray method to get length of given axis
     npy_intp getShape(const int axis) const;
 
+    /// Ndarray method to get the stride (in number of elements) of given axis
+    npy_intp getStep(const int axis) const;
+
+    /// Returns whether the elements are laid as a C-contiguous block
+    bool isCContiguous() const;
+
+    /**
+     * @brief Returns the numpy type number of the elements
+     *
+     * It differs from the datatype one for the arrays holding compressed
+     * datasets (see TuningTools/system/storage.h), whose elements must not be
+     * read through the datatype pointers.
+     **/
+    int getTypeNum() const { return m_typeNum; }
+
     /**
      * @brief Ndarray overloaded []-operator.
      *
@@ -130,7 +147,8 @@ template<typename datatype, int ndim>
 Ndarray<datatype, ndim>::Ndarray(datatype *const data, 
                                  npy_intp *const shape, 
                                  const npy_intp *const steps)
-  : m_data(nullptr)
+  : m_data(nullptr),
+    m_typeNum( type_to_npy_enum<datatype>::enum_val )
 {
   this->m_data = data;
   this->m_shape = shape;
@@ -149,6 +167,7 @@ Ndarray<datatype, ndim>::Ndarray(const Ndarray<datatype, ndim>& array)
   // FIXME Shouldn't this copy data?
   this->m_data = array.m_data;
   this->m_shape = array.m_shape;
+  this->m_typeNum = array.m_typeNum;
   for ( int i = 0; i < ndim; ++i){
     this->m_steps[i] = array.m_steps[i];
   }
@@ -161,6 +180,7 @@ Ndarray<datatype, ndim>::Ndarray(const py::handle<PyObject> &handle)
 {
   this->m_data    = reinterpret_cast<datatype*>(PyArray_DATA(handle.get()));
   this->m_shape   = PyArray_DIMS( handle.get() );
+  this->m_typeNum = PyArray_TYPE( handle.get() );
   int itemsize = PyArray_ITEMSIZE( handle.get() );
   for ( int i = 0; i < ndim; ++i){
     this->m_steps[i] = PyArray_STRIDE( handle.get(), i )/ itemsize;
@@ -179,6 +199,32 @@ npy_intp Ndarray<datatype, ndim>::getShape(const int axis) const
   }
 }
 
+//==============================================================================
+template<typename datatype, int ndim>
+npy_intp Ndarray<datatype, ndim>::getStep(const int axis) const
+{
+  if ( axis < ndim && axis >= 0) {
+    return this->m_steps[axis];
+  } else {
+    return 0;
+  }
+}
+
+//==============================================================================
+template<typename datatype, int ndim>
+bool Ndarray<datatype, ndim>::isCContiguous() const
+{
+  npy_intp expected = 1;
+  for ( int dim = ndim - 1; dim >= 0; --dim ) {
+    // Strides of unitary axes are irrelevant:
+    if ( getShape( dim ) != 1 && this->m_steps[dim] != expected ) {
+      return false;
+    }
+    expected *= getShape( dim );
+  }
+  return true;
+}
+
 //==============================================================================
 template<typename datatype, int ndim>
   typename getItemTraits<datatype, ndim>::returnType
@@ -287,6 +333,9 @@ class Ndarray<datatype, 1>
     /// Ndarray method to get length of given axis
     npy_intp getShape(const int axis = 0) const;
 
+    /// Ndarray method to get the stride (in number of elements) of given axis
+    npy_intp getStep(const int axis = 0) const;
+
     /**
      * Partial specialised [] operator: for 1D arrays, return an element rather
      * than a subarray 
@@ -359,6 +408,17 @@ npy_intp Ndarray<datatype, 1>::getShape(const int axis) const
   }
 }
 
+//==============================================================================
+template<typename datatype>
+npy_intp Ndarray<datatype, 1>::getStep(const int axis) const
+{
+  if ( axis < 1 && axis >= 0) {
+    return this->m_step;
+  } else {
+    return 0;
+  }
+}
+
 //==============================================================================
 template<typename datatype>
 typename getItemTraits<datatype, 1>::returnType
@@ -0,0 +1,84 @@
+#ifndef TUNINGTOOLS_SYSTEM_PREFETCH_H
+#define TUNINGTOOLS_SYSTEM_PREFETCH_H
+
+#include "TuningTools/system/defines.h"
+
+#include <vector>
+#include <thread>
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+
+/**
+ * @brief Reads ahead memory ranges on a background thread
+ *
+ * It is used for datasets which are memory-mapped files (e.g. numpy.memmap
+ * arrays): the thread touches a byte of each page of the ranges, in the order
+ * they were added, so that they are read from the disk while the events
+ * already resident are propagated. The pages are only read, thus the
+ * operating system is free to evict them afterwards.
+ **/
+class PagePrefetcher
+{
+  private:
+    std::vector< const char* > begins;
+    std::vector< const char* > ends;
+    std::thread worker;
+    std::atomic<bool> stopFlag;
+
+    void run()
+    {
+      volatile char sink = 0;
+      for ( std::size_t r = 0; r < begins.size(); ++r ) {
+        // Start at the range first page boundary:
+        const char *page = begins[r] - reinterpret_cast<std::uintptr_t>(
+            begins[r] ) % PREFETCH_PAGE_SIZE;
+        for ( ; page < ends[r]; page += PREFETCH_PAGE_SIZE ) {
+          if ( stopFlag.load( std::memory_order_relaxed ) ) return;
+          sink = *( page < begins[r] ? begins[r] : page );
+        }
+      }
+      (void) sink;
+    }
+
+  public:
+
+    PagePrefetcher() : stopFlag(false) {;}
+
+    ~PagePrefetcher() { stop(); }
+
+    /// Remove the ranges (the background thread must not be running)
+    void clear() { begins.clear(); ends.clear(); }
+
+    /// Add the range [begin, begin+nBytes), merging it with the last one if
+    /// they are adjacent
+    void add( const void *begin, const std::size_t nBytes )
+    {
+      const char *b = static_cast<const char*>( begin );
+      if ( !ends.empty() && ends.back() == b ) {
+        ends.back() = b + nBytes;
+      } else {
+        begins.push_back( b ); ends.push_back( b + nBytes );
+      }
+    }
+
+    /// Number of (merged) ranges
+    std::size_t size() const { return begins.size(); }
+
+    /// Start reading the ranges on the background thread
+    void start()
+    {
+      stop();
+      stopFlag = false;
+      worker = std::thread( &PagePrefetcher::run, this );
+    }
+
+    /// Interrupt the reading (if still running) and wait for the thread
+    void stop()
+    {
+      stopFlag = true;
+      if ( worker.joinable() ) worker.join();
+    }
+};
+
+#endif // TUNINGTOOLS_SYSTEM_PREFETCH_H
@@ -0,0 +1,98 @@
+#ifndef TUNINGTOOLS_SYSTEM_STORAGE_H
+#define TUNINGTOOLS_SYSTEM_STORAGE_H
+
+#include "TuningTools/system/defines.h"
+
+#include <cstdint>
+#include <cstring>
+#include <cstddef>
+
+#if defined(__F16C__)
+#include <immintrin.h>
+#endif
+
+/**
+ * @brief Conversions from the compressed datasets storage types.
+ *
+ * The datasets may be held as float16 (numpy float16 arrays) or bfloat16
+ * (numpy uint16 arrays holding the upper half of the float32 bits) to halve
+ * their memory footprint. Their events are widened to REAL when gathered into
+ * the propagation blocks, so that all the computations remain on REAL.
+ **/
+namespace util
+{
+
+/// Returns the storage of a numpy array of type typeNum
+inline
+DataStorage npy_type_to_storage( const int typeNum )
+{
+  switch ( typeNum ) {
+    case NPY_HALF:
+      return FLOAT16_STORAGE;
+    case NPY_USHORT:
+      return BFLOAT16_STORAGE;
+    default:
+      return REAL_STORAGE;
+  }
+}
+
+/// Widen a IEEE 754 half precision value
+inline
+float half_to_float( const npy_uint16 h )
+{
+#if defined(__F16C__)
+  return _cvtsh_ss( h );
+#else
+  const uint32_t sign = static_cast<uint32_t>( h & 0x8000u ) << 16;
+  const uint32_t expo = ( h >> 10 ) & 0x1fu;
+  uint32_t mant = h & 0x3ffu;
+  uint32_t bits = sign;
+  if ( expo == 0x1fu ) {
+    // Infinities and (quiet) NaNs:
+    bits |= 0x7f800000u | ( mant << 13 ) | ( ( mant ) ? 0x400000u : 0u );
+  } else if ( expo ) {
+    bits |= ( ( expo + 112 ) << 23 ) | ( mant << 13 );
+  } else if ( mant ) {
+    // Subnormals are normalized values in single precision:
+    uint32_t e = 113;
+    while ( !( mant & 0x400u ) ) { mant <<= 1; --e; }
+    bits |= ( e << 23 ) | ( ( mant & 0x3ffu ) << 13 );
+  }
+  float f;
+  std::memcpy( &f, &bits, sizeof(f) );
+  return f;
+#endif
+}
+
+/// Widen a bfloat16 value
+inline
+float bfloat16_to_float( const npy_uint16 b )
+{
+  const uint32_t bits = static_cast<uint32_t>( b ) << 16;
+  float f;
+  std::memcpy( &f, &bits, sizeof(f) );
+  return f;
+}
+
+/**
+ * @brief Widen n values spaced by step elements into the contiguous dst
+ *
+ * storage must be one of the compressed storages.
+ **/
+inline
+void widen_n( REAL *dst,
+    const npy_uint16 *src,
+    const npy_intp step,
+    const std::size_t n,
+    const DataStorage storage )
+{
+  if ( storage == BFLOAT16_STORAGE ) {
+    for ( std::size_t k = 0; k < n; ++k ) dst[k] = bfloat16_to_float( src[k*step] );
+  } else {
+    for ( std::size_t k = 0; k < n; ++k ) dst[k] = half_to_float( src[k*step] );
+  }
+}
+
+} // namespace util
+
+#endif // TUNINGTOOLS_SYSTEM_STORAGE_H
@@ -0,0 +1,99 @@
+#ifndef TUNINGTOOLS_SYSTEM_TRANSFER_H
+#define TUNINGTOOLS_SYSTEM_TRANSFER_H
+
+#include "TuningTools/system/defines.h"
+
+#include <cmath>
+#include <cstddef>
+
+/**
+ * @brief Transfer function kernels used by the batched propagation.
+ *
+ * The kernels are applied to a whole (events x nodes) layer block at once.
+ * Their loops have no branches nor calls (except std::tanh on the exact
+ * mode), so that they can be vectorized by the compiler.
+ **/
+namespace util
+{
+
+/// Inputs beyond this value have tanh rounded to +-1 in single precision
+const REAL FAST_TANH_CLAMP = 7.90531110763549805;
+
+/**
+ * @brief Rational approximation of the hyperbolic tangent
+ *
+ * It uses a 13/6 degree rational polynomial on the input clamped to
+ * [-FAST_TANH_CLAMP, FAST_TANH_CLAMP]. The absolute error with respect to
+ * std::tanh is below 1e-6 in single precision (see
+ * scripts/validate/trf_benchmark.py for its effect on the tuning).
+ **/
+inline
+REAL fast_tanh( REAL x )
+{
+  // Coefficients of the odd numerator and even denominator polynomials:
+  const REAL a13 = -2.76076847742355e-16, a11 = 2.00018790482477e-13,
+             a9  = -8.60467152213735e-11, a7  = 5.12229709037114e-08,
+             a5  =  1.48572235717979e-05, a3  = 6.37261928875436e-04,
+             a1  =  4.89352455891786e-03;
+  const REAL b6  =  1.19825839466702e-06, b4  = 1.18534705686654e-04,
+             b2  =  2.26843463243900e-03, b0  = 4.89352518554385e-03;
+  x = ( x > FAST_TANH_CLAMP ) ? FAST_TANH_CLAMP : x;
+  x = ( x < -FAST_TANH_CLAMP ) ? -FAST_TANH_CLAMP : x;
+  const REAL x2 = x * x;
+  const REAL p = x * ( a1 + x2 * ( a3 + x2 * ( a5 + x2 * ( a7 + x2 * ( a9 
+          + x2 * ( a11 + x2 * a13 ) ) ) ) ) );
+  const REAL q = b0 + x2 * ( b2 + x2 * ( b4 + x2 * b6 ) );
+  return p / q;
+}
+
+/// x[i] = tanh(x[i]), for i in [0,n)
+inline
+void tanh_n( REAL *x, const std::size_t n )
+{
+  for ( std::size_t i = 0; i < n; ++i ) x[i] = std::tanh( x[i] );
+}
+
+/// x[i] = fast_tanh(x[i]), for i in [0,n)
+inline
+void fast_tanh_n( REAL *x, const std::size_t n )
+{
+#ifdef USE_OMP
+  #pragma omp simd
+#endif
+  for ( std::size_t i = 0; i < n; ++i ) x[i] = fast_tanh( x[i] );
+}
+
+/**
+ * @brief sigma[i] *= 1 - out[i]^2, for i in [0,n)
+ *
+ * This is the tanh derivative written on its outputs.
+ **/
+inline
+void mult_tanh_deriv_n( const REAL *out, REAL *sigma, const std::size_t n )
+{
+#ifdef USE_OMP
+  #pragma omp simd
+#endif
+  for ( std::size_t i = 0; i < n; ++i ) sigma[i] *= ( REAL(1) - out[i]*out[i] );
+}
+
+/**
+ * @brief x[e*nCols + j] += b[j], for e in [0,nRows) and j in [0,nCols)
+ **/
+inline
+void add_row_bias( REAL *x, const REAL *b,
+    const unsigned nRows, const unsigned nCols )
+{
+  for ( unsigned e = 0; e < nRows; ++e )
+  {
+    REAL *row = x + e*nCols;
+#ifdef USE_OMP
+    #pragma omp simd
+#endif
+    for ( unsigned j = 0; j < nCols; ++j ) row[j] += b[j];
+  }
+}
+
+} // namespace util
+
+#endif // TUNINGTOOLS_SYSTEM_TRANSFER_H
@@ -8,6 +8,7 @@
 #include <iostream>
 #include <vector>
 #include <map>
+#include <chrono>
 #include "math.h"
 
 // Define system variables
@@ -35,6 +36,27 @@ std::vector< T > to_std_vector( const py::object& iterable )
       py::stl_input_iterator< T >( ) );
 }
 
+//==============================================================================
+/**
+ * @brief Same as to_std_vector, but copying the array buffer at once when
+ *        the object is a numpy array (of any numerical type)
+ **/
+template< typename T >
+inline 
+std::vector< T > array_to_std_vector( const py::object& obj )
+{
+  if ( ! PyArray_Check( obj.ptr() ) ) {
+    return to_std_vector< T >( obj );
+  }
+  // This is a (contiguous) view of the object when it is already of type T:
+  py::handle<PyObject> array( PyArray_FROM_OTF( obj.ptr(), 
+        type_to_npy_enum<T>::enum_val, 
+        NPY_IN_ARRAY ) );
+  PyArrayObject *arrayObj = reinterpret_cast<PyArrayObject*>( array.get() );
+  const T *data = reinterpret_cast<const T*>( PyArray_DATA( arrayObj ) );
+  return std::vector< T >( data, data + PyArray_SIZE( arrayObj ) );
+}
+
 //==============================================================================
 template< typename T >
 inline 
@@ -67,6 +89,15 @@ void cat_std_vector( std::vector<T> a, std::vector<T> &b)
   b.insert( b.end(),a.begin(), a.end() );
 }
 
+//==============================================================================
+/// Return a monotonic wall clock time (in seconds) used to time the epochs
+inline
+double wall_time()
+{
+  return std::chrono::duration<double>( 
+      std::chrono::steady_clock::now().time_since_epoch() ).count();
+}
+
 /// Return a float random number between min and max value
 /// This function will be used to generate the weight random numbers
 float rand_float_range(float min = -1.0, float max = 1.0);
@@ -74,6 +105,26 @@ float rand_float_range(float min = -1.0, float max = 1.0);
 /// Return the norm of the weight
 REAL get_norm_of_weight( REAL *weight , size_t size);
 
+/**
+ * @brief Fill roc values from target values
+ *
+ * The outputs are sorted only once and each cut efficiency is then obtained
+ * by advancing a cursor over the sorted signal and noise outputs, so that the
+ * cost is O(n log n + nCuts) instead of O(n x nCuts).
+ *
+ * When RESOLUTION is positive, the cuts are placed on the regular grid
+ * [noiseTarget, signalTarget) with RESOLUTION steps. Otherwise, the exact
+ * ROC is computed, where every distinct output value is used as a cut.
+ **/
+void genRoc( const REAL *signal, const unsigned nSignal,
+    const REAL *noise, const unsigned nNoise,
+    REAL signalTarget, REAL noiseTarget, 
+    std::vector<REAL> &det,  std::vector<REAL> &fa, 
+    std::vector<REAL> &sp, std::vector<REAL> &cut, 
+    const REAL RESOLUTION = 0.01, 
+    REAL signalWeight = 1,
+    REAL noiseWeight = 1);
+
 /// Fill roc values from target values
 void genRoc( const std::vector<REAL> &signal, 
     const std::vector<REAL> &noise, 
@@ -84,10 +135,75 @@ void genRoc( const std::vector<REAL> &signal,
     REAL signalWeight = 1,
     REAL noiseWeight = 1);
 
-/// Check whether numpy array representation is correct
+/**
+ * @brief Check whether numpy array representation is correct
+ *
+ * When allowCopy is set, the array is converted to an aligned C-contiguous
+ * array, which is a copy of the input whenever its layout differs. Otherwise,
+ * the returned handle is always a view of the input: strided and
+ * Fortran-ordered arrays are accepted as they are (the Ndarray keeps their
+ * strides) and an exception is raised when a copy would be needed, i.e. for
+ * misaligned or byte-swapped arrays.
+ *
+ * When allowCompressed is set, float16 and uint16 (bfloat16) arrays are also
+ * accepted and kept on their own type (see TuningTools/system/storage.h).
+ **/
 py::handle<PyObject> get_np_array( const py::numeric::array &pyObj, 
-                                   int ndim = 2 );
+                                   int ndim = 2,
+                                   bool allowCopy = true,
+                                   bool allowCompressed = false );
+
+/**
+ * @brief Retrieve the number of bytes kept alive by the numpy array
+ *
+ * This is the size of the array owning the memory, which may be larger than
+ * the array itself when it is a view.
+ **/
+std::size_t get_np_pinned_bytes( PyObject *numpy );
+
+
+/**
+ * @brief Create a new unidimensional numpy array with size elements
+ *
+ * The data pointer is set to the (not initialized) array data.
+ **/
+template< typename T >
+py::object new_np_array( npy_intp size, T *&data )
+{
+  PyObject *pyObj = PyArray_SimpleNew( 1, &size, 
+      type_to_npy_enum<T>::enum_val );
+  if ( ! pyObj ) {
+    throw std::runtime_error("Couldn't allocate numpy array!");
+  }
+  data = reinterpret_cast<T*>( 
+      PyArray_DATA( reinterpret_cast<PyArrayObject*>(pyObj) ) );
+  return py::object( py::handle<>( pyObj ) );
+}
 
+/// Copy each vector of vecs to a new numpy array of the returned list
+template< typename T >
+py::list std_vectors_to_np_arrays( const std::vector< std::vector<T> > &vecs )
+{
+  py::list arrays;
+  T *data(nullptr);
+  for ( const auto &vec : vecs ) {
+    py::object array = new_np_array( vec.size(), data );
+    std::copy( vec.begin(), vec.end(), data );
+    arrays.append( array );
+  }
+  return arrays;
+}
+
+/// Copy each numpy array (or iterable) of arrays to a vector of the result
+template< typename T >
+std::vector< std::vector<T> > np_arrays_to_std_vectors( const py::object &arrays )
+{
+  std::vector< std::vector<T> > vecs;
+  for ( py::stl_input_iterator<py::object> it( arrays ), end; it != end; ++it ) {
+    vecs.push_back( array_to_std_vector<T>( *it ) );
+  }
+  return vecs;
+}
 
 /// @brief Transfer ownership to a Python object.  If the transfer fails,
 ///        then object will be destroyed and an exception is thrown.
@@ -111,6 +227,23 @@ py::object transfer_to_python(T* t)
   ptr.release();
   return object;
 }
+
+/**
+ * @brief Release the python global interpreter lock within its scope
+ *
+ * No python object may be accessed while it is alive. The lock is taken back
+ * on its destruction, including when an exception is raised.
+ **/
+class ReleaseGIL
+{
+  private:
+    PyThreadState *m_state;
+  public:
+    ReleaseGIL() : m_state( PyEval_SaveThread() ){;}
+    ~ReleaseGIL(){ PyEval_RestoreThread( m_state ); }
+    ReleaseGIL( const ReleaseGIL& ) = delete;
+    ReleaseGIL& operator=( const ReleaseGIL& ) = delete;
+};
  
 } // namespace util
 
@@ -2,9 +2,37 @@
 #define TUNINGTOOLS_TRAINING_PATTERNREC_H
 
 #include <vector>
+#include <algorithm>
 
 #include "TuningTools/system/defines.h"
+#include "TuningTools/system/storage.h"
+#include "TuningTools/system/prefetch.h"
 #include "TuningTools/training/Training.h"
+#include "TuningTools/training/Sampler.h"
+
+/**
+ * @brief Strides (in number of elements) and storage of a pattern dataset
+ *
+ * The datasets are used as views of the numpy arrays, so that their events
+ * and features may not be contiguous (e.g. Fortran ordered arrays). Datasets
+ * on a compressed storage are read through packed (their input list entry is
+ * null) and always gathered.
+ **/
+struct PatternSteps
+{
+  npy_intp event;
+  npy_intp feature;
+  DataStorage storage;
+  const npy_uint16 *packed;
+
+  /// Whether the events can be propagated without being gathered
+  bool contiguous( const unsigned inputSize ) const
+  {
+    return storage == REAL_STORAGE 
+        && event == static_cast<npy_intp>(inputSize) 
+        && feature == 1;
+  }
+};
 
 
 class PatternRecognition : public Training
@@ -14,6 +42,9 @@ class PatternRecognition : public Training
     const REAL **inValList;
     const REAL **inTstList;
     const REAL **targList;
+    PatternSteps *trnSteps;
+    PatternSteps *valSteps;
+    PatternSteps *tstSteps;
     REAL **epochValOutputs;
     REAL **epochTstOutputs;
     REAL signalWeight;
@@ -25,7 +56,31 @@ class PatternRecognition : public Training
     unsigned *numTstEvents;
     bool useSP;
     bool hasTstData;
-    std::vector<DataManager*> dmTrn;
+    // Selects the training events of each epoch
+    EventSampler *sampler;
+    // Per thread buffers holding blocks of EVENT_BLOCK_SIZE training events
+    std::vector< std::vector<REAL> > blockInputs;
+    // Per thread buffers used when evaluating a network other than the
+    // threads networks (see getNetworkErrors)
+    std::vector< std::vector<REAL> > evalBlockInputs;
+    std::vector< std::vector< std::vector<REAL> > > evalLayerOutputs;
+    // Indexes of the training events presented on the current epoch
+    std::vector< std::vector<unsigned> > trnIndices;
+    // Errors of the training events presented on the current epoch (only
+    // filled when the sampler uses them)
+    std::vector< std::vector<REAL> > trnErrors;
+    // Seed for the training events selection
+    unsigned seed;
+    // Reads ahead the training events of each epoch when streaming them
+    // from memory-mapped files (see setStreaming)
+    unsigned streamBlock;
+    PagePrefetcher prefetcher;
+    // Fixed validation subsample used by the stop criteria (empty when the
+    // full validation set is used)
+    std::vector< std::vector<REAL> > valSubsample;
+    std::vector< const REAL* > inValSubList;
+    std::vector< PatternSteps > valSubSteps;
+    std::vector< unsigned > numValSubEvents;
 
     // This will be used to select the validation criteria
     TrainGoal trainGoal;
@@ -50,25 +105,83 @@ class PatternRecognition : public Training
     roc::setpoint det_point;    /* .det is the detFitted */
     roc::setpoint fa_point;     /* .fa is the faFitted   */
     roc::setpoint bestsp_point; /* .sp is the max sp point found into the Receive Operation Curve (ROC)*/
+
+    // ROC cut resolution. If not positive, every distinct output is a cut
+    REAL rocResolution;
+    // ROC holders, kept to avoid reallocating them at every epoch
+    std::vector<REAL> rocDet;
+    std::vector<REAL> rocFa;
+    std::vector<REAL> rocSP;
+    std::vector<REAL> rocCut;
  
 
     void allocateDataset( std::vector<Ndarray<REAL,2>*> dataSet, 
                           const bool forTrain, 
-                          const REAL **&inList, REAL **&out, 
-                          unsigned *&nEv);
+                          const REAL **&inList, PatternSteps *&steps,
+                          REAL **&out, unsigned *&nEv);
 
     void deallocateDataset(const bool forTrain, 
                            const REAL **&inList, 
+                           PatternSteps *&steps,
                            REAL **&out,
                            unsigned *&nEv);
     
+    /**
+     * @brief Propagates the datasets and computes their performance
+     *
+     * When evalNet is set, it is propagated with nEvalThreads threads
+     * (using their own buffers) instead of the threads networks, so that
+     * this can run concurrently with trainNetwork.
+     **/
     void getNetworkErrors(const REAL **inList, 
+                          const PatternSteps *steps,
                           const unsigned *nEvents, 
                           REAL **epochOutputs, 
                           REAL &mseRet, 
                           REAL &spRet, 
                           REAL &detRet, 
-                          REAL &faDet);
+                          REAL &faDet,
+                          double &propTime,
+                          double &rocTime,
+                          const TuningTool::NeuralNetwork *evalNet = nullptr,
+                          const unsigned nEvalThreads = 0);
+
+    /// Evaluates the validation set (or its subsample) into epochValOutputs
+    void validate(const TuningTool::NeuralNetwork *evalNet,
+                  const unsigned nEvalThreads,
+                  REAL &mseVal, 
+                  REAL &spVal, 
+                  REAL &detVal,
+                  REAL &faVal)
+    {
+      if ( !inValSubList.empty() ) {
+        getNetworkErrors(inValSubList.data(), 
+                         valSubSteps.data(),
+                         numValSubEvents.data(), 
+                         epochValOutputs, 
+                         mseVal, 
+                         spVal, 
+                         detVal, 
+                         faVal,
+                         evalTimes.val_prop,
+                         evalTimes.val_roc,
+                         evalNet,
+                         nEvalThreads);
+      } else {
+        getNetworkErrors(inValList, 
+                         valSteps,
+                         numValEvents, 
+                         epochValOutputs, 
+                         mseVal, 
+                         spVal, 
+                         detVal, 
+                         faVal,
+                         evalTimes.val_prop,
+                         evalTimes.val_roc,
+                         evalNet,
+                         nEvalThreads);
+      }
+    }
 
     /// Helper function
     void isBestGoal( const REAL currError, 
@@ -84,6 +197,57 @@ class PatternRecognition : public Training
       else isBestRet = EQUAL;
     };
 
+    /**
+     * @brief Copy the event at position pos into the contiguous row
+     *
+     * Events on a compressed storage are widened to REAL.
+     **/
+    static void gatherEvent( REAL *row, 
+                             const REAL *input, 
+                             const npy_intp pos, 
+                             const PatternSteps &step, 
+                             const unsigned inputSize )
+    {
+      if ( step.packed ) {
+        util::widen_n( row, step.packed + pos*step.event, step.feature, 
+            inputSize, step.storage );
+        return;
+      }
+      const REAL *event = input + pos*step.event;
+      if ( step.feature == 1 ) {
+        std::copy_n( event, inputSize, row );
+      } else {
+        for ( unsigned k = 0; k < inputSize; ++k ) {
+          row[k] = event[k*step.feature];
+        }
+      }
+    }
+
+    /// Start reading ahead the training events selected for this epoch
+    void prefetchEpoch();
+
+    /**
+     * @brief Trains net with the block of the selected events of the pattern
+     *        starting at position first, returning its summed error
+     *
+     * The events are gathered into block and their errors are kept in errors
+     * (when set) for the sampler.
+     **/
+    REAL trainBlock( TuningTool::Backpropagation *net,
+                     REAL *block,
+                     const unsigned pat,
+                     const unsigned first,
+                     std::vector<REAL> *errors );
+
+    /**
+     * @brief Deterministic version of the trainNetwork propagation
+     *
+     * The selected blocks are split on the reduction slots (see
+     * Training::setDeterministic), whose gradients are left on slotGrads.
+     * Returns the number of slots and sets gbError and the threads busy time.
+     **/
+    unsigned trainSlots( std::vector<REAL> *errors, REAL &gbError, double &busy );
+
   public:
 
     PatternRecognition(TuningTool::Backpropagation *net, 
@@ -93,7 +257,8 @@ class PatternRecognition : public Training
                        TrainGoal  mode, const unsigned bSize,
                        const REAL signalWeigh = 1.0, 
                        const REAL noiseWeight = 1.0, 
-                       MSG::Level msglevel = MSG::INFO);
+                       MSG::Level msglevel = MSG::INFO,
+                       const unsigned seed = 0);
 
     virtual ~PatternRecognition();
 
@@ -102,7 +267,10 @@ class PatternRecognition : public Training
      *
      * Calculates the SP product. This method will run through the dynamic
      * range of the outputs, calculating the SP product in each lambda value.
-     * Returning, at the end, the maximum SP product obtained.
+     * Returning, at the end, the maximum SP product obtained. The outputs are
+     * sorted only once per call (see util::genRoc), and the lambda values are
+     * either placed on the rocResolution grid or, when rocResolution is not
+     * positive, on every distinct output value.
      *
      * If trainGoal is SP_STOP, det and fa will be the detection and false alarm
      * over the max sp point founded. But if the trains mode is MULTI_STOP, these
@@ -119,12 +287,25 @@ class PatternRecognition : public Training
     virtual void tstNetwork(REAL &mseTst, REAL &spTst, REAL &detTst, REAL &faTst)
     {
       MSG_DEBUG("Starting testing process for an epoch.");
-      getNetworkErrors(inTstList, numTstEvents, epochTstOutputs, mseTst, spTst, detTst, faTst);
+      getNetworkErrors(inTstList, tstSteps, numTstEvents, epochTstOutputs, mseTst, spTst, detTst, faTst,
+          evalTimes.tst_prop, evalTimes.tst_roc);
+    }
+
+    virtual void tstNetwork(const TuningTool::NeuralNetwork &net, 
+        const unsigned nEvalThreads, 
+        REAL &mseTst, REAL &spTst, REAL &detTst, REAL &faTst)
+    {
+      MSG_DEBUG("Starting testing process for an epoch snapshot.");
+      getNetworkErrors(inTstList, tstSteps, numTstEvents, epochTstOutputs, mseTst, spTst, detTst, faTst,
+          evalTimes.tst_prop, evalTimes.tst_roc, &net, nEvalThreads);
     }
 
 
     /// Applies the validating set of each pattern for the network's validation.
     /**
+     * If a validation fraction was set (see setValidFraction), only the
+     * fixed validation subsample is presented to the network.
+     *
      * This method takes the one or more pattern's validating events (input and
      * targets) and presents them to the network. At the end, the mean training
      * error is returned. Since it is a validating function, the network is not
@@ -144,13 +325,15 @@ class PatternRecognition : public Training
                             REAL &faVal)
     {
       MSG_DEBUG("Starting validation process for an epoch.");
-      getNetworkErrors(inValList, 
-                       numValEvents, 
-                       epochValOutputs, 
-                       mseVal, 
-                       spVal, 
-                       detVal, 
-                       faVal);
+      validate(nullptr, 0, mseVal, spVal, detVal, faVal);
+    }
+
+    virtual void valNetwork(const TuningTool::NeuralNetwork &net, 
+        const unsigned nEvalThreads, 
+        REAL &mseVal, REAL &spVal, REAL &detVal, REAL &faVal)
+    {
+      MSG_DEBUG("Starting validation process for an epoch snapshot.");
+      validate(&net, nEvalThreads, mseVal, spVal, detVal, faVal);
     }
 
 
@@ -205,11 +388,86 @@ class PatternRecognition : public Training
       min_delta_fa = delta;
     }
 
+    void setRocResolution( REAL resolution ){
+      rocResolution = resolution;
+    }
+
+    /**
+     * @brief Use a fixed subsample of each pattern validation set on valNetwork
+     *
+     * The subsample keeps the fraction of the events of each pattern (so that
+     * the class proportions are kept), it is drawn only once using the
+     * training seed and its events are gathered into contiguous buffers,
+     * which are reused when the subsample is drawn again.
+     * Fractions greater or equal to 1 restore the full validation set.
+     **/
+    void setValidFraction( REAL fraction );
+
+    /**
+     * @brief Restart the training events selection from a new seed
+     *
+     * The selection is the same as the one of a new object created with this
+     * seed. The validation subsample is only drawn again by setValidFraction.
+     **/
+    void setSeed( const unsigned seed )
+    {
+      this->seed = seed;
+      sampler->setSeed(seed);
+    }
+
+    /**
+     * @brief Set how the training events of each epoch are selected
+     *
+     * See EventSampler for the available modes. Invalid modes or weights
+     * fall back to the SAMPLE_PATTERN_ID mode.
+     **/
+    void setSampling( const std::string &mode, 
+                      const std::vector<REAL> &weights, 
+                      const REAL hardFraction );
+
+    /**
+     * @brief Stream the training events from memory-mapped datasets
+     *
+     * When blockSize is positive, the randomly selected training events are
+     * runs of blockSize consecutive events (see EventSampler::setBlockSize)
+     * and the pages holding the events of each epoch are read ahead on a
+     * background thread, so that datasets larger than the memory can be
+     * trained on while their files are read sequentially. A null blockSize
+     * restores the events selection.
+     **/
+    void setStreaming( const unsigned blockSize );
+
     virtual void resetBestGoal(){
       Training::resetBestGoal();
       bestGoalSP = bestGoalDet = bestGoalFa = 0.0;
     }
 
+    virtual void saveGoals( std::ostream &os ) const
+    {
+      Training::saveGoals( os );
+      os << ' ' << bestGoalSP << ' ' << bestGoalDet << ' ' << bestGoalFa
+         << ' ' << min_delta_det << ' ' << min_delta_fa;
+    }
+
+    virtual void loadGoals( std::istream &is )
+    {
+      Training::loadGoals( is );
+      is >> bestGoalSP >> bestGoalDet >> bestGoalFa 
+         >> min_delta_det >> min_delta_fa;
+    }
+
+    /// Write the training events selection state (see EventSampler::save)
+    void saveSampler( SamplerState &state ) const
+    {
+      sampler->save( state );
+    }
+
+    /// Restore the training events selection state written by saveSampler
+    void loadSampler( const SamplerState &state )
+    {
+      sampler->load( state );
+    }
+
     void retrieve_fitted_values( REAL &det, REAL &fa, REAL &dDet, REAL &dFa)
     {
       det = det_point.det;  fa = fa_point.fa;  dDet = deltaDet;  dFa = deltaFa;
@@ -0,0 +1,306 @@
+#ifndef TUNINGTOOLS_TRAINING_SAMPLER_H
+#define TUNINGTOOLS_TRAINING_SAMPLER_H
+
+#include "TuningTools/system/defines.h"
+
+#include <vector>
+#include <string>
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <numeric>
+#include <sstream>
+#include <stdexcept>
+
+#include "TuningTools/training/Training.h"
+
+/**
+ * @brief Selects the training events presented on each epoch
+ *
+ * The events of each pattern are drawn from its own DataManager, so that the
+ * selection is reproducible from the seed. The number of events of each
+ * pattern per epoch depends on the sampling mode:
+ *
+ *  - SAMPLE_PATTERN_ID: batchSize events of each pattern (or all of its
+ *    events when batchSize is 0);
+ *  - SAMPLE_STRATIFIED_ID: numPatterns*batchSize events (or all the events
+ *    when batchSize is 0), split among the patterns on the training set
+ *    proportions;
+ *  - SAMPLE_WEIGHTED_ID: the same number of events, split among the patterns
+ *    proportionally to the sampling weights;
+ *  - SAMPLE_HARDNEG_ID: as SAMPLE_PATTERN_ID, but a fraction of the events
+ *    of the background patterns (all but the first one) are the events with
+ *    the largest error when they were last presented (never presented events
+ *    come first).
+ *
+ * Patterns with less events than requested are oversampled. All buffers are
+ * allocated when the mode is set, so that sampling an epoch does not
+ * allocate.
+ *
+ * When a block size is set (see setBlockSize), the randomly drawn events are
+ * runs of consecutive events, drawn as shuffled blocks, so that datasets on
+ * memory-mapped files are read in large sequential chunks.
+ **/
+class EventSampler
+{
+  private:
+    std::vector<DataManager*> dm;
+    std::vector<unsigned> nEvents;
+    unsigned batchSize;
+    unsigned seed;
+    // Number of consecutive events drawn at once (0 draws single events)
+    unsigned blockSize;
+    std::string mode;
+    // Number of events (and of hardest events) drawn per epoch
+    std::vector<unsigned> counts;
+    std::vector<unsigned> nHard;
+    // Error of each event when it was last presented and the events ranking
+    // buffers (only used by SAMPLE_HARDNEG_ID)
+    std::vector< std::vector<REAL> > errors;
+    std::vector< std::vector<unsigned> > order;
+
+    /// Fill idx with the events of the next blocks of the pattern
+    void sampleBlocks( const unsigned pat, unsigned *idx, unsigned n )
+    {
+      while ( n ) {
+        const unsigned first = dm[pat]->get() * blockSize;
+        const unsigned len = std::min( std::min( blockSize, 
+              nEvents[pat] - first ), n );
+        std::iota( idx, idx + len, first );
+        idx += len; n -= len;
+      }
+    }
+
+  public:
+
+    EventSampler( const std::vector<unsigned> &nEvents,
+        const unsigned batchSize,
+        const unsigned seed )
+      : nEvents(nEvents),
+        batchSize(batchSize),
+        seed(seed),
+        blockSize(0),
+        mode(SAMPLE_PATTERN_ID)
+    {
+      for (unsigned pat=0; pat<nEvents.size(); pat++) {
+        // Each pattern has its own reproducible pseudo-random stream:
+        dm.push_back( new DataManager( nEvents[pat], seed + pat ) );
+      }
+      setMode( SAMPLE_PATTERN_ID, std::vector<REAL>(), 0. );
+    }
+
+    ~EventSampler()
+    {
+      for ( auto& patDm : dm ) {
+        delete patDm; patDm = nullptr;
+      }
+    }
+
+    unsigned numPatterns() const { return nEvents.size(); }
+
+    /// Number of training events of the pattern
+    unsigned size( const unsigned pat ) const { return nEvents[pat]; }
+
+    /// Number of events of the pattern drawn on each epoch
+    unsigned count( const unsigned pat ) const { return counts[pat]; }
+
+    const std::string& getMode() const { return mode; }
+
+    unsigned getBlockSize() const { return blockSize; }
+
+    /// Whether the events errors must be informed through setErrors
+    bool useErrors() const { return mode == SAMPLE_HARDNEG_ID; }
+
+    /**
+     * @brief Restart the selection from a new seed
+     *
+     * The selection is the same as the one of a new object created with this
+     * seed and set to the same mode.
+     **/
+    void setSeed( const unsigned seed )
+    {
+      this->seed = seed;
+      for (unsigned pat=0; pat<numPatterns(); pat++) {
+        dm[pat]->reset( seed + pat );
+        std::fill( errors[pat].begin(), errors[pat].end(),
+            std::numeric_limits<REAL>::max() );
+        std::iota( order[pat].begin(), order[pat].end(), 0u );
+      }
+    }
+
+    /**
+     * @brief Set the number of consecutive events drawn at once
+     *
+     * The blocks of each pattern are drawn from their own DataManager, which
+     * is created again from the current seed when the size changes. A block
+     * is truncated when fewer events remain to be drawn on the epoch.
+     **/
+    void setBlockSize( const unsigned newBlockSize )
+    {
+      if ( newBlockSize == blockSize ) return;
+      blockSize = newBlockSize;
+      for (unsigned pat=0; pat<numPatterns(); pat++) {
+        delete dm[pat];
+        dm[pat] = new DataManager( ( blockSize ) 
+            ? ( nEvents[pat] + blockSize - 1 ) / blockSize 
+            : nEvents[pat], seed + pat );
+      }
+    }
+
+    /**
+     * @brief Set the sampling mode
+     *
+     * The weights are only used by SAMPLE_WEIGHTED_ID, where there must be a
+     * non-negative weight for each pattern, and hardFraction only by
+     * SAMPLE_HARDNEG_ID. Returns false (keeping the previous mode) on
+     * unknown modes or invalid weights.
+     **/
+    bool setMode( const std::string &newMode,
+        const std::vector<REAL> &weights,
+        const REAL hardFraction )
+    {
+      const unsigned nPatterns = numPatterns();
+      const bool perPattern = ( newMode == SAMPLE_PATTERN_ID
+                             || newMode == SAMPLE_HARDNEG_ID );
+      std::vector<REAL> patWeights( nPatterns, 1. );
+      if ( newMode == SAMPLE_STRATIFIED_ID ) {
+        for (unsigned pat=0; pat<nPatterns; pat++) patWeights[pat] = nEvents[pat];
+      } else if ( newMode == SAMPLE_WEIGHTED_ID ) {
+        if ( weights.size() != nPatterns
+            || *std::min_element( weights.begin(), weights.end() ) < 0.
+            || std::accumulate( weights.begin(), weights.end(), REAL(0) ) <= 0. )
+        {
+          return false;
+        }
+        patWeights = weights;
+      } else if ( !perPattern ) {
+        return false;
+      }
+      mode = newMode;
+
+      // Number of events presented on each epoch:
+      const unsigned total = ( batchSize )
+          ? nPatterns*batchSize
+          : std::accumulate( nEvents.begin(), nEvents.end(), 0u );
+      const REAL sumWeights = std::accumulate( patWeights.begin(),
+          patWeights.end(), REAL(0) );
+      counts.resize( nPatterns ); nHard.resize( nPatterns );
+      errors.resize( nPatterns ); order.resize( nPatterns );
+      for (unsigned pat=0; pat<nPatterns; pat++)
+      {
+        if ( perPattern ) {
+          counts[pat] = ( batchSize ) ? batchSize : nEvents[pat];
+        } else {
+          counts[pat] = ( patWeights[pat] > 0. )
+              ? std::max( 1u, static_cast<unsigned>(
+                    std::lround( total * patWeights[pat] / sumWeights ) ) )
+              : 0;
+        }
+        nHard[pat] = 0;
+        if ( useErrors() && pat ) {
+          const REAL fraction = std::max( REAL(0), std::min( REAL(1), hardFraction ) );
+          nHard[pat] = std::min( nEvents[pat], static_cast<unsigned>(
+                std::lround( fraction * counts[pat] ) ) );
+        }
+        if ( nHard[pat] ) {
+          if ( errors[pat].size() != nEvents[pat] ) {
+            errors[pat].assign( nEvents[pat], std::numeric_limits<REAL>::max() );
+            order[pat].resize( nEvents[pat] );
+            std::iota( order[pat].begin(), order[pat].end(), 0u );
+          }
+        } else {
+          errors[pat].clear(); order[pat].clear();
+        }
+      }
+      return true;
+    }
+
+    /**
+     * @brief Select the events of the next epoch
+     *
+     * indices must have been resized to the number of events of each pattern
+     * (see count).
+     **/
+    void sample( std::vector< std::vector<unsigned> > &indices )
+    {
+      for (unsigned pat=0; pat<numPatterns(); pat++)
+      {
+        unsigned *idx = indices[pat].data();
+        const unsigned hard = nHard[pat];
+        if ( hard ) {
+          // Partially rank the events, keeping the previous ranking as a
+          // starting point:
+          const REAL *err = errors[pat].data();
+          std::nth_element( order[pat].begin(), order[pat].begin() + hard,
+              order[pat].end(),
+              [err]( const unsigned a, const unsigned b ){ return err[a] > err[b]; } );
+          std::copy_n( order[pat].begin(), hard, idx );
+        }
+        if ( blockSize ) {
+          sampleBlocks( pat, idx + hard, counts[pat] - hard );
+        } else {
+          dm[pat]->get( idx + hard, counts[pat] - hard );
+        }
+      }
+    }
+
+    /// Set the errors of the n events of the pattern at the idx positions
+    void setErrors( const unsigned pat,
+        const unsigned *idx,
+        const REAL *err,
+        const unsigned n )
+    {
+      if ( errors[pat].empty() ) return;
+      REAL *patErrors = errors[pat].data();
+      for (unsigned i=0; i<n; i++) patErrors[idx[i]] = err[i];
+    }
+
+    void print( const unsigned pat ) const { dm[pat]->print(); }
+
+    /**
+     * @brief Write the selection state of each pattern to state
+     *
+     * The errors and ranking of the events are also kept when they are used
+     * (SAMPLE_HARDNEG_ID), so that the next epochs selection can be restored
+     * by load on a sampler set to the same mode and block size. The state
+     * buffers are reused when state is written again.
+     **/
+    void save( SamplerState &state ) const
+    {
+      std::ostringstream os;
+      state.indexes.resize( numPatterns() );
+      for (unsigned pat=0; pat<numPatterns(); pat++)
+      {
+        dm[pat]->save( os, state.indexes[pat] );
+        os << '\n';
+      }
+      state.text   = os.str();
+      state.errors = errors;
+      state.order  = order;
+    }
+
+    /// Restore the selection state written by save
+    void load( const SamplerState &state )
+    {
+      if ( state.indexes.size() != numPatterns() || 
+           state.errors.size()  != errors.size() ||
+           state.order.size()   != order.size() ) {
+        throw std::runtime_error("Sampler state does not match the number "
+            "of patterns.");
+      }
+      std::istringstream is( state.text );
+      for (unsigned pat=0; pat<numPatterns(); pat++)
+      {
+        dm[pat]->load( is, state.indexes[pat] );
+        if ( state.errors[pat].size() != errors[pat].size() ||
+             state.order[pat].size()  != order[pat].size() ) {
+          throw std::runtime_error("Sampler state does not match the "
+              "sampling mode.");
+        }
+        std::copy( state.errors[pat].begin(), state.errors[pat].end(), errors[pat].begin() );
+        std::copy( state.order[pat].begin(),  state.order[pat].end(),  order[pat].begin() );
+      }
+    }
+};
+
+#endif
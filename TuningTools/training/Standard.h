@@ -25,7 +25,8 @@ class StandardTraining : public Training
         , const Ndarray<REAL,2> *inVal 
         , const Ndarray<REAL,1> *outVal 
         , const unsigned bSize
-        , const MSG::Level msglevel);
+        , const MSG::Level msglevel
+        , const unsigned seed = 0);
   
     virtual ~StandardTraining();
     
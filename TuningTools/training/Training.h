@@ -5,10 +5,16 @@
 
 #include <list>
 #include <iomanip>
+#include <iostream>
+#include <limits>
 #include <cmath>
 #include <vector>
 #include <algorithm>
 #include <cstdlib>
+#include <numeric>
+#include <random>
+#include <string>
+#include <stdexcept>
 
 #include "RingerCore/MsgStream.h"
 #include "TuningTools/neuralnetwork/Backpropagation.h"
@@ -30,6 +36,31 @@ namespace roc{
 }
 
 
+/**
+ * @brief Wall clock time (in seconds) spent on the phases of an epoch
+ *
+ * The training threads busy time is the sum, over the threads, of the time
+ * each of them spent propagating its blocks, so that its ratio to
+ * trn_threads*trn_prop gives the threads utilisation.
+ **/
+struct PhaseTimes
+{
+  // Training forward and backward propagation, threads gradients reduction
+  // and weights update
+  double trn_prop   = 0.;
+  double trn_reduce = 0.;
+  double trn_update = 0.;
+  // Number of training events, threads used and their summed busy time
+  unsigned trn_events  = 0;
+  unsigned trn_threads = 0;
+  double trn_busy      = 0.;
+  // Validation and test propagation and ROC sweep (null when not evaluated)
+  double val_prop = 0.;
+  double val_roc  = 0.;
+  double tst_prop = 0.;
+  double tst_roc  = 0.;
+};
+
 //This struct will hold the training info to be ruterned to the user.
 struct TrainData
 {
@@ -64,15 +95,16 @@ struct TrainData
   bool stop_sp;
   bool stop_det;
   bool stop_fa;
+  // Time spent on each phase
+  PhaseTimes times;
 };
 
-// FIXME: Change this to be a better distribution generator
-namespace {
-  int rndidx (int i) { return std::rand()%i; }
-}
-
 /**
  * @brief Simple DataManager 
+ *
+ * Each DataManager has its own pseudo-random generator, so that the events
+ * order only depends on its seed, and not on the number of threads or on any
+ * other use of the global generator.
  **/
 class DataManager
 {
@@ -80,16 +112,18 @@ class DataManager
     std::vector<unsigned>::const_iterator pos;
     std::vector<unsigned> vec;
     unsigned numEvents;
+    std::mt19937 gen;
     
   public:
-    DataManager(const unsigned numEvents)
-      : numEvents(numEvents)
+    DataManager(const unsigned numEvents, const unsigned seed)
+      : numEvents(numEvents),
+        gen(seed)
     {
       vec.reserve(numEvents);
       for (unsigned i=0; i<numEvents; i++) {
         vec.push_back(i);
       }
-      random_shuffle(vec.begin(), vec.end(), rndidx );
+      std::shuffle(vec.begin(), vec.end(), gen);
       pos = vec.begin();
     }
     
@@ -110,11 +144,75 @@ class DataManager
     {
       if (pos == vec.end())
       {
-        random_shuffle(vec.begin(), vec.end(), rndidx);
+        std::shuffle(vec.begin(), vec.end(), gen);
         pos = vec.begin();
       }
       return *pos++;
     }
+
+    /**
+     * @brief Restart the events selection from a new seed
+     *
+     * The selection is the same as the one of a new DataManager created with
+     * this seed, but the indexes vector is not reallocated.
+     **/
+    inline void reset(const unsigned seed)
+    {
+      gen.seed(seed);
+      std::iota(vec.begin(), vec.end(), 0u);
+      std::shuffle(vec.begin(), vec.end(), gen);
+      pos = vec.begin();
+    }
+
+    /// Retrieve the next n events indexes into idx
+    inline void get(unsigned *idx, const unsigned n)
+    {
+      for (unsigned i=0; i<n; i++) idx[i] = get();
+    }
+
+    /**
+     * @brief Write the selection state to os and idx
+     *
+     * The state is the random engine state and the position of the next
+     * event, written to os, and the shuffled indexes, copied to idx, so that
+     * it is restored at a cost which does not depend on the number of events
+     * retrieved.
+     **/
+    inline void save(std::ostream &os, std::vector<unsigned> &idx) const
+    {
+      os << gen << ' ' << (pos - vec.begin());
+      idx = vec;
+    }
+
+    /// Restore the selection state written by save
+    inline void load(std::istream &is, const std::vector<unsigned> &idx)
+    {
+      std::size_t cursor(0);
+      is >> gen >> cursor;
+      if ( idx.size() != vec.size() || cursor > vec.size() ) {
+        throw std::runtime_error("DataManager state does not match its "
+            "number of events.");
+      }
+      std::copy( idx.begin(), idx.end(), vec.begin() );
+      pos = vec.begin() + cursor;
+    }
+};
+
+/**
+ * @brief The training events selection state (see EventSampler::save)
+ *
+ * The random engines states and positions are kept as text, while the
+ * buffers, whose size is the number of events, are kept as they are.
+ **/
+struct SamplerState
+{
+  /// The random engines states and positions of each pattern
+  std::string text;
+  /// The shuffled events (or blocks) indexes of each pattern
+  std::vector< std::vector<unsigned> > indexes;
+  /// The events errors and ranking of each pattern (only for SAMPLE_HARDNEG_ID)
+  std::vector< std::vector<REAL> > errors;
+  std::vector< std::vector<unsigned> > order;
 };
 
 class Training : public MsgService
@@ -126,8 +224,19 @@ class Training : public MsgService
     std::list<TrainData*>    trnEvolution;
     REAL bestGoal;
     unsigned nThreads;
+    // Number of threads used by trainNetwork (at most nThreads)
+    unsigned nTrainThreads;
     unsigned batchSize;
     int chunkSize;
+    // Phases times of the last trainNetwork call (training fields) and of
+    // the evaluations since the last resetEvalTimes call (the others)
+    PhaseTimes trnTimes;
+    PhaseTimes evalTimes;
+    // Whether the results must not depend on the number of threads (see
+    // setDeterministic) and the gradients and errors of each reduction slot
+    bool deterministic;
+    std::vector<REAL> slotGrads;
+    std::vector<REAL> slotErrors;
   
     void updateGradients()
     {
@@ -135,6 +244,32 @@ class Training : public MsgService
         mainNet->addToGradient(*netVec[i]);
       }
     }
+
+    /**
+     * @brief Sets the main network gradients to the sum of the nSlots
+     *        slotGrads gradients.
+     *
+     * The sum is pairwise (slot s+stride is added to slot s, doubling the
+     * stride on each level), so that its order does not depend on the threads
+     * which computed the slots.
+     **/
+    void reduceSlotGradients(const unsigned nSlots)
+    {
+      if ( !nSlots ) {
+        mainNet->resetGradient();
+        return;
+      }
+      const std::size_t paramSize = mainNet->getParamSize();
+      REAL *grads = slotGrads.data();
+      for (unsigned stride=1; stride<nSlots; stride*=2) {
+        for (unsigned s=0; s+stride<nSlots; s+=2*stride) {
+          REAL *out = grads + s*paramSize;
+          const REAL *in = out + stride*paramSize;
+          for (std::size_t idx=0; idx<paramSize; idx++) out[idx] += in[idx];
+        }
+      }
+      mainNet->setGradient(grads);
+    }
   
     void updateWeights()
     {
@@ -159,7 +294,8 @@ class Training : public MsgService
       : IMsgService("Training", MSG::INFO ),
         MsgService( level ),
         mainNet(nullptr),
-        netVec(nullptr)
+        netVec(nullptr),
+        deterministic(false)
     {
       msg().width(5);
       bestGoal = 10000000000.;
@@ -175,20 +311,12 @@ class Training : public MsgService
 #endif
 
       nThreads = static_cast<unsigned>(nt);
+      nTrainThreads = nThreads;
       chunkSize = static_cast<int>(std::ceil(static_cast<float>(batchSize) 
                                    / static_cast<float>(nThreads)));
 
-      netVec = new TuningTool::Backpropagation* [nThreads];
-
-      MSG_DEBUG("Cloning training neural network " << nThreads 
-          << "times (one for each thread).")
-      mainNet = netVec[0] = n;
-      for (unsigned i=1; i<nThreads; i++)
-      {
-        netVec[i] = new TuningTool::Backpropagation(*n);
-        netVec[i]->setName(netVec[i]->getName() + "_Thread[" + 
-            std::to_string(i) + "]" );
-      }
+      netVec = new TuningTool::Backpropagation* [nThreads]();
+      setNetwork(n);
     }
   
   
@@ -202,7 +330,7 @@ class Training : public MsgService
       for ( auto& trainData : trnEvolution ) {
         delete trainData; trainData = nullptr;
       }
-      delete netVec;
+      delete [] netVec;
     };
   
   
@@ -217,6 +345,7 @@ class Training : public MsgService
      * @param[in] epoch The epoch number.
      * @param[in] trnError The training error obtained in that epoch.
      * @param[in] valError The validation error obtained in that epoch.
+     * @param[in] times The time spent on each phase of that epoch.
      **/
     virtual void saveTrainInfo(const unsigned epoch, 
         const REAL mse_trn, 
@@ -233,7 +362,8 @@ class Training : public MsgService
         const unsigned num_fails_mse, const unsigned num_fails_sp, 
         const unsigned num_fails_det, const unsigned num_fails_fa,
         const bool stop_mse,          const bool stop_sp, 
-        const bool stop_det,          const bool stop_fa) 
+        const bool stop_det,          const bool stop_fa,
+        const PhaseTimes &times = PhaseTimes()) 
     {
       TrainData *trainData = new TrainData;    
       trainData->epoch                  = epoch;
@@ -270,6 +400,7 @@ class Training : public MsgService
       trainData->stop_sp                = stop_sp;
       trainData->stop_det               = stop_det;
       trainData->stop_fa                = stop_fa;
+      trainData->times                  = times;
       trnEvolution.push_back(trainData);
     }
 
@@ -330,13 +461,136 @@ class Training : public MsgService
     virtual void tstNetwork(REAL &mseTst, REAL &spTst, REAL &detTst, REAL &faTst) = 0;
   
     virtual void valNetwork(REAL &mseVal, REAL &spVal, REAL &detVal, REAL &faVal) = 0;
+
+    /*
+     * Same as above, but evaluating net (e.g. a snapshot of the training
+     * network) with nEvalThreads threads. They do not use the threads
+     * networks, so that they can run concurrently with trainNetwork.
+     */
+    virtual void tstNetwork(const TuningTool::NeuralNetwork &net, 
+        const unsigned nEvalThreads, 
+        REAL &mseTst, REAL &spTst, REAL &detTst, REAL &faTst) = 0;
+
+    virtual void valNetwork(const TuningTool::NeuralNetwork &net, 
+        const unsigned nEvalThreads, 
+        REAL &mseVal, REAL &spVal, REAL &detVal, REAL &faVal) = 0;
     
     virtual REAL trainNetwork() = 0;  
 
+    /// Number of threads (and threads networks) available
+    unsigned getNumThreads() const { return nThreads; }
+
+    /// Training phases times of the last trainNetwork call
+    const PhaseTimes& getTrainTimes() const { return trnTimes; }
+
+    /// Evaluation phases times since the last resetEvalTimes call
+    const PhaseTimes& getEvalTimes() const { return evalTimes; }
+
+    void resetEvalTimes() { evalTimes = PhaseTimes(); }
+
+    /**
+     * @brief Make the training independent of the number of threads
+     *
+     * When set, the events of each epoch are split on a fixed partition of
+     * (at most REDUCTION_SLOTS) slots of consecutive blocks, each slot
+     * gradient is computed by a single thread, the slots gradients are summed
+     * pairwise and their errors on the slots order. The evaluation errors are
+     * also summed on the blocks order. The tuned networks are then the same
+     * (bit by bit) for any number of threads.
+     **/
+    void setDeterministic(const bool d) { deterministic = d; }
+
+    bool getDeterministic() const { return deterministic; }
+
+    /**
+     * @brief Set the number of threads used by trainNetwork
+     *
+     * The remaining threads may be used meanwhile to evaluate a snapshot of
+     * the training network. The value is kept within [1,nThreads].
+     **/
+    void setTrainThreads( const unsigned n )
+    {
+      nTrainThreads = std::max( 1u, std::min( n, nThreads ) );
+    }
+
     virtual void resetBestGoal(){
       bestGoal = 10000000000.;
     }
 
+    /**
+     * @brief Write the stop criteria state (best goals found so far) to os
+     *
+     * Together with the networks and sampler states, it allows restarting
+     * an interrupted training (see loadGoals).
+     **/
+    virtual void saveGoals( std::ostream &os ) const
+    {
+      os << std::setprecision( std::numeric_limits<REAL>::max_digits10 )
+         << bestGoal;
+    }
+
+    /// Restore the stop criteria state written by saveGoals
+    virtual void loadGoals( std::istream &is )
+    {
+      is >> bestGoal;
+    }
+
+    /**
+     * @brief Replace the main network training information kept between
+     *        epochs (see Backpropagation::setTrainingState), which is also
+     *        copied to the threads networks.
+     **/
+    void setTrainingState( const REAL *state )
+    {
+      mainNet->setTrainingState( state );
+      for (unsigned i=1; i<nThreads; i++) {
+        netVec[i]->copyNeededTrainingInfoFast(*mainNet);
+      }
+    }
+
+    /**
+     * @brief Binds this object to a new main network
+     *
+     * The threads networks are cloned again from it, while the datasets and
+     * buffers are kept. This allows training networks with other topologies
+     * on the same datasets without recreating this object.
+     **/
+    void setNetwork( TuningTool::Backpropagation *n )
+    {
+      MSG_DEBUG("Cloning training neural network " << nThreads 
+          << "times (one for each thread).")
+      mainNet = netVec[0] = n;
+      for (unsigned i=1; i<nThreads; i++)
+      {
+        delete netVec[i];
+        netVec[i] = new TuningTool::Backpropagation(*n);
+        netVec[i]->setName(netVec[i]->getName() + "_Thread[" + 
+            std::to_string(i) + "]" );
+      }
+    }
+
+    /**
+     * @brief Prepares this object to train the main network from its current
+     *        weights.
+     *
+     * This allows training several initializations of the main network while
+     * keeping the datasets and the threads networks allocated. The training
+     * evolution is cleared, so it must be retrieved beforehand.
+     **/
+    virtual void resetTraining()
+    {
+      MSG_DEBUG("Resetting training state.");
+      for ( auto& trainData : trnEvolution ) {
+        delete trainData; trainData = nullptr;
+      }
+      trnEvolution.clear();
+      resetBestGoal();
+      mainNet->resetNeededTrainingInfo();
+      for (unsigned i=1; i<nThreads; i++) {
+        netVec[i]->copyNeededTrainingInfoFast(*mainNet);
+      }
+    }
+
 
     //******************************************************************************
     /* PatternRec class*/
@@ -346,6 +600,20 @@ class Training : public MsgService
     /* PatternRec class*/
     virtual void setDeltaFa( REAL )=0;
     /* PatternRec class*/
+    virtual void setRocResolution( REAL )=0;
+    /* PatternRec class*/
+    virtual void setValidFraction( REAL )=0;
+    /* PatternRec class*/
+    virtual void setSeed( unsigned )=0;
+    /* PatternRec class*/
+    virtual void setSampling( const std::string &, const std::vector<REAL> &, REAL )=0;
+    /* PatternRec class*/
+    virtual void setStreaming( unsigned )=0;
+    /* PatternRec class*/
+    virtual void saveSampler( SamplerState & ) const=0;
+    /* PatternRec class*/
+    virtual void loadSampler( const SamplerState & )=0;
+    /* PatternRec class*/
     virtual void retrieve_fitted_values(REAL &, REAL &, REAL &, REAL &)=0;
     /* PatternRec class*/
     virtual void retrieve_operating_points( roc::setpoint * /*sp*/,  roc::setpoint * /*det*/, roc::setpoint * /*fa*/)=0;
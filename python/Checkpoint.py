@@ -0,0 +1,124 @@
+__all__ = ['TuningCheckpoint']
+
+import os, errno, time
+from copy import deepcopy
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+
+from RingerCore import Logger, traverse
+
+class TuningCheckpoint( Logger ):
+  """
+    Checkpoint of the tuning of a job configuration.
+
+    It holds the output (tunedDiscr, tuningInfo) of the finished
+    initializations of each tuned unit, which is a (sort, neuron, hidden
+    layers template index) tuple, together with the training state of the
+    first unfinished initialization (see TuningWrapper.train_many_c). They are
+    written to disk at most every interval seconds (never when interval is
+    None, i.e. when only resuming from a checkpoint). Each write goes to a
+    temporary file which then replaces the checkpoint file, so that an
+    interrupted write never corrupts the previous checkpoint.
+
+    A job resumed from the checkpoint skips the finished initializations and
+    restarts the interrupted one from its training state (the ones tuned at
+    once with it are tuned again from the start).
+  """
+
+  _version = 1
+
+  def __init__(self, path, interval = 300., **kw):
+    Logger.__init__( self, kw )
+    self.path     = path
+    self.interval = interval
+    # Finished initializations output (with raw benchmarks) of each unit:
+    self._done    = {}
+    # The (unit, init, state) of the initialization being tuned:
+    self._state   = None
+    self._lastWrite = time.time()
+
+  def load(self):
+    """
+      Reads the checkpoint written by a previous job, returning whether it
+      was found.
+    """
+    if not os.path.exists( self.path ):
+      return False
+    with open( self.path, 'rb' ) as f:
+      raw = pickle.load( f )
+    if raw['version'] != self._version:
+      self._fatal("Checkpoint %s version (%d) is not supported.", self.path, raw['version'], ValueError)
+    self._done, self._state = raw['done'], raw['state']
+    self._info( "Resuming from checkpoint %s (%d finished initializations%s).", self.path,
+                sum( len( done ) for done in self._done.values() ),
+                ', one partially tuned' if self._state is not None else '' )
+    return True
+
+  def finished(self, unit):
+    """
+      Returns the list with the output (tunedDiscr, tuningInfo) of the
+      finished initializations of the unit.
+    """
+    from TuningTools.TuningJob import ReferenceBenchmark
+    ret = []
+    for tunedDiscr, tuningInfo in self._done.get( unit, [] ):
+      tunedDiscr = deepcopy( tunedDiscr )
+      for obj in traverse( tunedDiscr, simple_ret = True ):
+        obj['benchmark'] = ReferenceBenchmark.fromRawObj( obj['benchmark'] )
+      ret.append( (tunedDiscr, tuningInfo) )
+    return ret
+
+  def resumeState(self, unit):
+    """
+      Returns the training state of the first initialization of the unit
+      which is not finished, or None if it has not been started.
+    """
+    if self._state is not None:
+      stateUnit, init, state = self._state
+      if stateUnit == unit and init == len( self._done.get( unit, [] ) ):
+        return state
+    return None
+
+  def update(self, unit, state = None, output = None):
+    """
+      Adds the output of the next finished initialization of the unit, or
+      replaces the training state of the initialization being tuned. The
+      checkpoint is written if interval seconds elapsed since the last write.
+    """
+    if output is not None:
+      tunedDiscr, tuningInfo = output
+      tunedDiscr = deepcopy( tunedDiscr )
+      for obj in traverse( tunedDiscr, simple_ret = True ):
+        obj['benchmark'] = obj['benchmark'].toRawObj()
+      self._done.setdefault( unit, [] ).append( (tunedDiscr, tuningInfo) )
+      self._state = None
+    if state is not None:
+      self._state = ( unit, len( self._done.get( unit, [] ) ), state )
+    if self.interval is not None and time.time() - self._lastWrite >= self.interval:
+      self.write()
+
+  def write(self):
+    """
+      Writes the checkpoint, replacing the previous one.
+    """
+    tmpPath = '%s.%d.tmp' % ( self.path, os.getpid() )
+    with open( tmpPath, 'wb' ) as f:
+      pickle.dump( { 'version' : self._version
+                   , 'done'    : self._done
+                   , 'state'   : self._state }, f, pickle.HIGHEST_PROTOCOL )
+      f.flush()
+      os.fsync( f.fileno() )
+    os.rename( tmpPath, self.path )
+    self._lastWrite = time.time()
+    self._debug( "Written checkpoint %s.", self.path )
+
+  def remove(self):
+    """
+      Removes the checkpoint (i.e. once the tuning output is saved).
+    """
+    try:
+      os.remove( self.path )
+    except OSError as e:
+      if e.errno != errno.ENOENT: raise
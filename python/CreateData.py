@@ -697,9 +697,11 @@ class BenchmarkEfficiencyArchieve( LoggerStreamable ):
   @classmethod
   def load(cls, filePath, retrieveBinsInfo = False,
            etaBinIdx = None, etBinIdx = None, loadCrossEfficiencies = False,
-           loadEfficiencies = True, retrieveVersion = False):
+           loadEfficiencies = True, retrieveVersion = False, loadPatterns = True):
     """
-    Load this class information.
+    Load this class information. The TuningDataArchieve patterns are not
+    loaded when loadPatterns is False (i.e. when retrieving them from a
+    SharedTuningData).
     """
     lLogger = Logger.getModuleLogger( cls.__name__ )
     # Open file:
@@ -729,10 +731,68 @@ class BenchmarkEfficiencyArchieve( LoggerStreamable ):
     else:
       if cls is BenchmarkEfficiencyArchieve and loadEfficiencies == False:
         lLogger.fatal("It is not possible to set loadEfficiencies to False when using BenchmarkEfficiencyArchieve.")
+      extraKw = {}
+      if cls is not BenchmarkEfficiencyArchieve:
+        extraKw['loadPatterns'] = loadPatterns
       return cls.fromRawObj(rawObj, etaBinIdx = etaBinIdx, 
                                     etBinIdx = etBinIdx, 
                                     loadCrossEfficiencies = loadCrossEfficiencies,
-                                    loadEfficiencies = loadEfficiencies )
+                                    loadEfficiencies = loadEfficiencies,
+                                    **extraKw )
+
+def _readNpyHeader( f ):
+  """
+  Returns the (shape, fortran_order, dtype) header of the .npy file object f,
+  leaving it positioned at the array data.
+  """
+  version = np.lib.format.read_magic( f )
+  if version == (1, 0):
+    return np.lib.format.read_array_header_1_0( f )
+  elif version == (2, 0):
+    return np.lib.format.read_array_header_2_0( f )
+  raise ValueError( "Unsupported .npy format version %r." % ( version, ) )
+
+def _readExactly( f, nBytes ):
+  """
+  Reads nBytes from the file object f, which may return fewer of them at once.
+  """
+  data = []
+  while nBytes:
+    buf = f.read( nBytes )
+    if not buf:
+      raise ValueError( "Unexpected end of the .npy data." )
+    data.append( buf ); nBytes -= len( buf )
+  return b''.join( data )
+
+def _streamNpy( f, path, dtype = None, fortran = None, chunkSize = 1 << 24 ):
+  """
+  Copies the .npy file object f to the .npy file path by chunks of about
+  chunkSize bytes, converting it to dtype and to the fortran (or C) order when
+  they are given.
+  """
+  shape, fortranOrder, srcDtype = _readNpyHeader( f )
+  if srcDtype.hasobject:
+    raise ValueError( "Object arrays cannot be streamed." )
+  out = np.lib.format.open_memmap( path, mode = 'w+', shape = shape,
+                                   dtype = srcDtype if dtype is None else dtype,
+                                   fortran_order = fortranOrder if fortran is None else fortran )
+  try:
+    if not shape:
+      out[()] = np.frombuffer( _readExactly( f, srcDtype.itemsize ), dtype = srcDtype )[0]
+    else:
+      # The data is stored by slices of the slowest varying axis:
+      axis = len( shape ) - 1 if fortranOrder else 0
+      sliceBytes = srcDtype.itemsize * int( np.prod( shape[:axis] + shape[axis+1:] ) )
+      step = max( 1, chunkSize // max( sliceBytes, 1 ) )
+      for start in range( 0, shape[axis], step ):
+        count = min( step, shape[axis] - start )
+        chunkShape = shape[:axis] + ( count, ) + shape[axis+1:]
+        idx = [ slice( None ) ] * len( shape ); idx[axis] = slice( start, start + count )
+        out[ tuple( idx ) ] = np.frombuffer( _readExactly( f, count * sliceBytes ), dtype = srcDtype
+                                           ).reshape( chunkShape, order = 'F' if fortranOrder else 'C' )
+    out.flush()
+  finally:
+    del out
 
 class TuningDataArchieveRDS( BenchmarkEfficiencyArchieveRDS ):
   """
@@ -785,10 +845,13 @@ class TuningDataArchieveRDC( BenchmarkEfficiencyArchieveRDC ):
 
   def __init__(self, **kw):
     BenchmarkEfficiencyArchieveRDC.__init__( self, **kw )
+    self.loadPatterns = True
 
   def treatObj( self, obj, npData ):
     # Check the efficiencies base keys:
     obj = BenchmarkEfficiencyArchieveRDC.treatObj(self, obj, npData)
+    if not self.loadPatterns:
+      return obj
     # Check the patterns base keys:
     if obj._readVersion <= np.array(4):
       sgnBaseKey, bkgBaseKey = 'signal_rings', 'background_rings'
@@ -905,6 +968,82 @@ class TuningDataArchieve( BenchmarkEfficiencyArchieve ):
   def backgroundBaseInfo( self ):
     return self._backgroundBaseInfo
 
+  @classmethod
+  def _binMembers(cls, zf, etBinIdx = None, etaBinIdx = None):
+    """
+    Returns the members of the npz file zf holding the bin patterns, keyed as
+    signalPatterns and backgroundPatterns, and its base information, keyed as
+    signalBaseInfo_<idx> and backgroundBaseInfo_<idx>, when available. Raises
+    KeyError when the bin patterns are not found.
+    """
+    from TuningTools.dataframe import BaseInfo
+    binStr = 'etBin_%d_etaBin_%d' % ( etBinIdx or 0, etaBinIdx or 0 )
+    names = set( zf.namelist() )
+    members = {}
+    for base in ('signal', 'background'):
+      key = next( ( key for key in ( base + 'Patterns_' + binStr, base + '_patterns_' + binStr, 
+                                     base + '_rings_' + binStr, base + 'Patterns', base + '_rings' )
+                    if key + '.npy' in names ), None )
+      if key is None:
+        raise KeyError( "No %s patterns on the file for the bin %s." % ( base, binStr ) )
+      members[base + 'Patterns'] = key + '.npy'
+      infos = [ base + BaseInfo.tostring( idx ) + '_' + binStr + '.npy' for idx in range( BaseInfo.nInfo ) ]
+      if all( info in names for info in infos ):
+        for idx, info in enumerate( infos ):
+          members[base + 'BaseInfo_%d' % idx] = info
+    return members
+
+  @classmethod
+  def loadPatternsShape(cls, filePath, etBinIdx = None, etaBinIdx = None):
+    """
+    Returns the (signal, background) patterns shapes of the bin. They are
+    read from the headers of the npz file members, without decompressing the
+    patterns, falling back to loading them when the file cannot be read so.
+    """
+    import zipfile
+    try:
+      shapes = []
+      with zipfile.ZipFile( filePath ) as zf:
+        members = cls._binMembers( zf, etBinIdx, etaBinIdx )
+        for name in ('signalPatterns', 'backgroundPatterns'):
+          f = zf.open( members[name] )
+          try:
+            shapes.append( _readNpyHeader( f )[0] )
+          finally:
+            f.close()
+      return tuple( shapes )
+    except (zipfile.BadZipfile, KeyError, ValueError) as e:
+      Logger.getModuleLogger( cls.__name__ ).debug( "Loading the patterns to retrieve their shapes (%s).", e )
+      tdArchieve = cls.load( filePath, etBinIdx = etBinIdx, etaBinIdx = etaBinIdx,
+                             loadEfficiencies = False )
+      return tdArchieve.signalPatterns.shape, tdArchieve.backgroundPatterns.shape
+
+  @classmethod
+  def extractBin(cls, filePath, directory, etBinIdx = None, etaBinIdx = None):
+    """
+    Writes the bin patterns and base information to the signalPatterns,
+    backgroundPatterns, signalBaseInfo_<idx> and backgroundBaseInfo_<idx>
+    .npy files on directory, returning the number of base information arrays
+    of each class. The npz file members are decompressed by chunks straight
+    into the .npy files, so that the bin is never held in memory, and the
+    patterns are converted to the npCurrent representation on the way.
+    Raises zipfile.BadZipfile, KeyError or ValueError when the members cannot
+    be streamed.
+    """
+    import zipfile, os
+    with zipfile.ZipFile( filePath ) as zf:
+      members = cls._binMembers( zf, etBinIdx, etaBinIdx )
+      for name, member in members.items():
+        isPattern = name.endswith( 'Patterns' )
+        f = zf.open( member )
+        try:
+          _streamNpy( f, os.path.join( directory, name + '.npy' ),
+                      dtype = npCurrent.fp_dtype if isPattern else None,
+                      fortran = npCurrent.isfortran if isPattern else None )
+        finally:
+          f.close()
+    return sum( 1 for name in members if name.startswith( 'signalBaseInfo' ) )
+
   def drawProfiles(self):
     from itertools import product
     for etBin, etaBin in progressbar(product(range(self.nEtBins),range(self.nEtaBins)), self.nEtBins*self.nEtaBins,
@@ -288,6 +288,10 @@ class CrossValid( LoggerStreamable ):
     """
     return self._nSorts
 
+  def nBoxes(self):
+    "Number of boxes"
+    return self._nBoxes
+
   def nTrain(self):
     "Number of training boxes"
     return self._nTrain
@@ -386,6 +390,27 @@ class CrossValid( LoggerStreamable ):
       cl[idx] = np.append(cl[idx], evts_remainder[ npCurrent.access( pidx=':', oidx=slice(idx,idx+1) ) ], axis = npCurrent.odim )
     return cl
 
+  def getBoxesEvents(self, boxes, evts):
+    """
+    Retrieve the indexes of the events of a class with evts events which are
+    gathered, in order, into the dataset made of boxes (i.e. when it is split
+    by __call__ without subsets).
+    """
+    if not self.isRevertible():
+      self._fatal("The boxes events are only defined for box-based cross-validation methods.",
+                  NotImplementedError)
+    if evts < self._nBoxes:
+      self._fatal("Too few events for dividing data.")
+    evtsPerBox = evts // self._nBoxes
+    remainder  = evts % self._nBoxes
+    idxs = []
+    for box in boxes:
+      idxs.append( np.arange( box * evtsPerBox, ( box + 1 ) * evtsPerBox ) )
+      # The remaining events are appended to the first boxes:
+      if box < remainder:
+        idxs.append( np.array( [evts - remainder + box] ) )
+    return np.concatenate( idxs )
+
   def getBoxIdxs(self, ds, sort):
     """
     Retrieve boxes for the input datasets and for a sort index
@@ -1369,18 +1369,19 @@ class PerfHolder( LoggerStreamable ):
     self.roc_tst              = tunedDiscrData['summaryInfo']['roc_test']
     self.roc_operation        = tunedDiscrData['summaryInfo']['roc_operation']
     trainEvo                  = tunedEvolutionData
-    self.epoch                = np.array( range(len(trainEvo['mse_trn'])),  dtype ='float_')
+    self.epoch                = np.arange( len(trainEvo['mse_trn']),  dtype ='float_')
     self.nEpoch               = len(self.epoch)
     def toNpArray( obj, key, d, dtype, default = []):
       """
-      Set self value to a numpy array of the dict value
+      Set self value to a numpy array of the dict value (the value is
+      only converted when it is not already an array of this dtype)
       """
       if ':' in key:
         key = key.split(':')
         sKey, dKey = key
       else:
         sKey, dKey = key, key
-      setattr(obj, sKey, np.array( d.get(dKey, default), dtype = dtype ) )
+      setattr(obj, sKey, np.asarray( d.get(dKey, default), dtype = dtype ) )
     # end of toNpArray
     
     try:
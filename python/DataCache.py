@@ -0,0 +1,125 @@
+__all__ = ['TuningDataCache']
+
+import os, errno, hashlib, shutil
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+import numpy as np
+
+from RingerCore import Logger
+from TuningTools.coreDef import npCurrent
+
+def _updateHash( h, obj ):
+  """
+    Updates the hash h with a canonical representation of the raw object
+    obj (i.e. dicts are hashed sorted by their keys).
+  """
+  if isinstance( obj, dict ):
+    h.update( b'{' )
+    for key in sorted( obj, key = repr ):
+      _updateHash( h, key ); _updateHash( h, obj[key] )
+    h.update( b'}' )
+  elif isinstance( obj, ( list, tuple ) ):
+    h.update( b'[' )
+    for item in obj: _updateHash( h, item )
+    h.update( b']' )
+  elif isinstance( obj, np.ndarray ):
+    h.update( ( 'array(%s,%r)' % ( obj.dtype.str, obj.shape ) ).encode() )
+    h.update( np.ascontiguousarray( obj ).tobytes() )
+  else:
+    h.update( ( repr( obj ) + ',' ).encode() )
+
+class TuningDataCache( Logger ):
+  """
+    On-disk cache of the cross-validation sorts of a tuning data file, after
+    their pre-processing.
+
+    Each entry holds the training, validation and test datasets of a sort with
+    the pre-processing chain applied, together with the chain fitted on the
+    training dataset. It is addressed by a hash of the data file (path, size
+    and modification time), of the bin, of the pre-processing chain settings
+    and of the sort cross-validation boxes, so that the jobs splitting the same bin and
+    sort (i.e. by neuron or initialization ranges) reuse it instead of
+    splitting and pre-processing the patterns again. The cached datasets are
+    mapped read-only.
+
+    Entries are written on a temporary directory which is then renamed, so
+    that concurrent jobs never read a partially written entry. The cache is
+    never cleaned up by the jobs.
+  """
+
+  _version = 2
+
+  def __init__(self, dataLocation, directory, **kw):
+    Logger.__init__( self, kw )
+    self.directory = os.path.abspath( directory )
+    dataLocation = os.path.abspath( dataLocation )
+    stat = os.stat( dataLocation )
+    self._dataId = '%s:%d:%r' % ( dataLocation, stat.st_size, stat.st_mtime )
+    try:
+      os.makedirs( self.directory )
+    except OSError as e:
+      if e.errno != errno.EEXIST: raise
+
+  def key(self, etBinIdx, etaBinIdx, ppChain, crossValid, sort):
+    """
+      Returns the cache key of the sort of the bin pre-processed by ppChain.
+      The chain is identified by its raw object, which holds the settings of
+      each pre-processing: it must be given before its parameters are taken
+      from the training data.
+    """
+    key = '%d|%s|%s|%s|%r|%r|%r|%r|%r' % ( self._version, self._dataId, etBinIdx, etaBinIdx
+                                         , crossValid.nBoxes()
+                                         , tuple( crossValid.getTrnBoxIdxs( sort ) )
+                                         , tuple( crossValid.getValBoxIdxs( sort ) )
+                                         , tuple( crossValid.getTstBoxIdxs( sort ) )
+                                         , ( npCurrent.pdim, npCurrent.odim ) )
+    h = hashlib.sha1( key.encode() )
+    _updateHash( h, ppChain.toRawObj() )
+    return h.hexdigest()
+
+  def load(self, key):
+    """
+      Returns the cached (trnData, valData, tstData, ppChain) of key, or None
+      if it was not cached.
+    """
+    path = os.path.join( self.directory, key )
+    indexPath = os.path.join( path, 'index.pic' )
+    if not os.path.exists( indexPath ):
+      return None
+    with open( indexPath, 'rb' ) as f:
+      index = pickle.load( f )
+    from TuningTools.PreProc import PreProcChain
+    ppChain = PreProcChain.fromRawObj( index['ppChain'] )
+    data = [ [ np.load( os.path.join( path, '%s_%d.npy' % ( name, idx ) ), mmap_mode = 'r' )
+               for idx in range( index[name] ) ] for name in ( 'trnData', 'valData', 'tstData' ) ]
+    self._debug( "Loaded cache entry %s.", path )
+    return data[0], data[1], data[2], ppChain
+
+  def store(self, key, trnData, valData, tstData, ppChain):
+    """
+      Caches the pre-processed datasets and the fitted ppChain on key. When
+      another job cached key meanwhile, its entry is kept.
+    """
+    path = os.path.join( self.directory, key )
+    if os.path.exists( path ):
+      return
+    tmpPath = '%s.%d.tmp' % ( path, os.getpid() )
+    self._info( "Caching the pre-processed datasets on %s...", path )
+    try:
+      os.makedirs( tmpPath )
+      index = { 'ppChain' : ppChain.toRawObj() }
+      for name, data in ( ( 'trnData', trnData ), ( 'valData', valData ), ( 'tstData', tstData ) ):
+        index[name] = len( data )
+        for idx, pat in enumerate( data ):
+          np.save( os.path.join( tmpPath, '%s_%d.npy' % ( name, idx ) ), pat )
+      # The index is the last file written, flagging the entry as complete:
+      with open( os.path.join( tmpPath, 'index.pic' ), 'wb' ) as f:
+        pickle.dump( index, f, pickle.HIGHEST_PROTOCOL )
+      os.rename( tmpPath, path )
+    except OSError:
+      # The rename fails when the entry was written by another job:
+      if not os.path.exists( path ): raise
+    finally:
+      shutil.rmtree( tmpPath, ignore_errors = True )
@@ -12,6 +12,22 @@ class DataTrainEvolution:
     Class TrainDataEvolution is a sub class. This hold the train evolution into a
     list. Basically this is like a c++ struct.
   """
+
+  # Fields kept from the FastNet core training evolution columns
+  _slimKeys = ( 'mse_trn', 'mse_val', 'mse_tst'
+              , 'bestsp_point_sp_val', 'bestsp_point_det_val', 'bestsp_point_fa_val'
+              , 'bestsp_point_sp_tst', 'bestsp_point_det_tst', 'bestsp_point_fa_tst'
+              , 'det_point_sp_val', 'det_point_det_val', 'det_point_fa_val'
+              , 'det_point_sp_tst', 'det_point_det_tst', 'det_point_fa_tst'
+              , 'fa_point_sp_val', 'fa_point_det_val', 'fa_point_fa_val'
+              , 'fa_point_sp_tst', 'fa_point_det_tst', 'fa_point_fa_tst' )
+  _fullKeys = ( 'num_fails_mse', 'num_fails_sp', 'num_fails_det', 'num_fails_fa'
+              , 'stop_mse', 'stop_sp', 'stop_det', 'stop_fa' )
+  # Per epoch phases times (in seconds), training throughput (events per
+  # second) and training threads utilisation from the FastNet core
+  _timingKeys = ( 'time_trn_prop', 'time_trn_reduce', 'time_trn_update'
+                , 'time_val_prop', 'time_val_roc', 'time_tst_prop', 'time_tst_roc'
+                , 'trn_events_per_sec', 'trn_thread_util' )
   def __init__(self, train=None, full_data=False):
     #Slim data
     self.mse_trn        = list()  
@@ -37,12 +53,16 @@ class DataTrainEvolution:
     self.fa_point_det_tst        = list()  
     self.fa_point_fa_tst         = list()  
 
-    #Train evolution information
-    is_best_mse    = list() 
-    is_best_sp     = list() 
-    is_best_det    = list() 
-    is_best_fa     = list()  
- 
+    self.time_trn_prop           = list()
+    self.time_trn_reduce         = list()
+    self.time_trn_update         = list()
+    self.time_val_prop           = list()
+    self.time_val_roc            = list()
+    self.time_tst_prop           = list()
+    self.time_tst_roc            = list()
+    self.trn_events_per_sec      = list()
+    self.trn_thread_util         = list()
+
     if full_data:
       self.num_fails_mse  = list() 
       self.num_fails_sp   = list() 
@@ -53,57 +73,26 @@ class DataTrainEvolution:
       self.stop_det       = list() 
       self.stop_fa        = list() 
 
-    #Get train evolution information from TrainDatapyWrapper
+    #Get train evolution information from the core
     if train is not None:
       from coreDef import coreConf, TuningToolCores
       if coreConf() is TuningToolCores.FastNet:
-        self.maxEpoch = len(train)
-        for i in range(len(train)):
-          
-          self.mse_trn.append              ( train[i].mseTrn               )
-          self.mse_val.append              ( train[i].mseVal               )
-          self.mse_tst.append              ( train[i].mseTst               )
-
-          self.bestsp_point_sp_val.append  ( train[i].bestsp_point_sp_val  )
-          self.bestsp_point_det_val.append ( train[i].bestsp_point_det_val )
-          self.bestsp_point_fa_val.append  ( train[i].bestsp_point_fa_val  )
-          self.bestsp_point_sp_tst.append  ( train[i].bestsp_point_sp_tst  )
-          self.bestsp_point_det_tst.append ( train[i].bestsp_point_det_tst )
-          self.bestsp_point_fa_tst.append  ( train[i].bestsp_point_fa_tst  )
-   
-          self.det_point_sp_val.append     ( train[i].det_point_sp_val     )
-          self.det_point_det_val.append    ( train[i].det_point_det_val    )
-          self.det_point_fa_val.append     ( train[i].det_point_fa_val     )
-          self.det_point_sp_tst.append     ( train[i].det_point_sp_tst     )
-          self.det_point_det_tst.append    ( train[i].det_point_det_tst    )
-          self.det_point_fa_tst.append     ( train[i].det_point_fa_tst     )
-   
-          self.fa_point_sp_val.append      ( train[i].fa_point_sp_val      )
-          self.fa_point_det_val.append     ( train[i].fa_point_det_val     )
-          self.fa_point_fa_val.append      ( train[i].fa_point_fa_val      )
-          self.fa_point_sp_tst.append      ( train[i].fa_point_sp_tst      )
-          self.fa_point_det_tst.append     ( train[i].fa_point_det_tst     )
-          self.fa_point_fa_tst.append      ( train[i].fa_point_fa_tst      )
-          
-          is_best_mse.append               ( train[i].isBestMse            )
-          is_best_sp.append                ( train[i].isBestSP             )
-          is_best_det.append               ( train[i].isBestDet            )
-          is_best_fa.append                ( train[i].isBestFa             )
-
-          if full_data:
-            self.num_fails_mse.append ( train[i].numFailsMse )
-            self.num_fails_sp.append  ( train[i].numFailsSP  )
-            self.num_fails_det.append ( train[i].numFailsDet )
-            self.num_fails_fa.append  ( train[i].numFailsFa  )
-            self.stop_mse.append      ( train[i].stopMse     )
-            self.stop_sp.append       ( train[i].stopSP      )
-            self.stop_det.append      ( train[i].stopDet     )
-            self.stop_fa.append       ( train[i].stopFa      )
-
-        self.epoch_best_mse = self.__lastIndex(is_best_mse,  True)
-        self.epoch_best_sp  = self.__lastIndex(is_best_sp ,  True)
-        self.epoch_best_det = self.__lastIndex(is_best_det,  True)
-        self.epoch_best_fa  = self.__lastIndex(is_best_fa ,  True)
+        # The core returns a dict with one numpy array (column) per field,
+        # holding the values for each epoch:
+        self.maxEpoch = len(train['epoch'])
+        for key in self._slimKeys:
+          setattr( self, key, train[key] )
+        if full_data:
+          for key in self._fullKeys:
+            setattr( self, key, train[key] )
+        for key in self._timingKeys:
+          if key in train:
+            setattr( self, key, train[key] )
+
+        self.epoch_best_mse = self.__lastIndex(train['is_best_mse'], True)
+        self.epoch_best_sp  = self.__lastIndex(train['is_best_sp'] , True)
+        self.epoch_best_det = self.__lastIndex(train['is_best_det'], True)
+        self.epoch_best_fa  = self.__lastIndex(train['is_best_fa'] , True)
       elif coreConf() is TuningToolCores.keras:
         self.maxEpoch = len(train.epoch)
         self.mse_trn = train.history['loss']
@@ -136,11 +125,8 @@ class DataTrainEvolution:
     return raw
 
   def __lastIndex(self,  l, value ):
-    try:
-      l.reverse()
-      return len(l) - 1 - l.index(value)
-    except ValueError:
-      return len(l) - 1 
+    idx = np.flatnonzero( np.asarray(l) == value )
+    return int(idx[-1]) if idx.size else len(l) - 1
 
 class Layer:
   def __init__(self, w, b, **kw):
@@ -104,11 +104,32 @@ class UndoPreProcError(RuntimeError):
 # - Add remove_constant_rows
 # - Check for Inf, NaNs and so on
 
+def _chunksMean( chunks, fcn = None ):
+  """
+    Returns the mean over the events of all classes of the chunks() training
+    dataset (see PrepObj.takeParamsInChunks) of fcn applied to them (or of the
+    events themselves), accumulated on float64.
+  """
+  total = None; nEvents = 0
+  for chunk in chunks():
+    for cdata in chunk:
+      if fcn is not None: cdata = fcn( cdata )
+      cSum = cdata.sum( axis=npCurrent.odim, dtype=np.float64 )
+      total = cSum if total is None else total + cSum
+      nEvents += cdata.shape[npCurrent.odim]
+  return ( total / nEvents ).astype( npCurrent.fp_dtype ).reshape( 
+            npCurrent.access( pidx=total.shape[0],
+                              oidx=1 ) )
+
 class PrepObj( LoggerStreamable ):
   """
     This is the base class of all pre-processing objects.
   """
 
+  # Whether takeParams calculates parameters from the training data (instead
+  # of only applying the pre-processing to it):
+  _takesParams = False
+
   def __init__(self, d = {}, **kw):
     d.update( kw )
     LoggerStreamable.__init__(self, d)
@@ -136,6 +157,18 @@ class PrepObj( LoggerStreamable ):
     self._debug("No need to retrieve any parameters from data.")
     return data
 
+  def takeParamsInChunks(self, chunks):
+    """
+      Calculate pre-processing parameters from a training dataset which is
+      not held in memory: chunks() returns a new iterator over it, as lists
+      with a chunk of the events of each class. The pre-processings which
+      cannot calculate their parameters this way raise NotImplementedError.
+    """
+    if self._takesParams:
+      self._fatal("%s parameters cannot be taken from chunks of the training data.", 
+                  self.__class__.__name__, NotImplementedError)
+    self._debug("No need to retrieve any parameters from data.")
+
   def release(self):
     """
       Release calculated pre-proessing parameters.
@@ -264,6 +297,7 @@ class RemoveMean( PrepObj ):
   """
   _streamerObj = LoggerRawDictStreamer(toPublicAttrs = {'_mean'})
   _cnvObj = RawDictCnv(toProtectedAttrs = {'_mean'})
+  _takesParams = True
 
   def __init__(self, d = {}, **kw):
     d.update( kw ); del kw
@@ -291,6 +325,12 @@ class RemoveMean( PrepObj ):
                               oidx=1 ) )
     return self._apply(trnData)
 
+  def takeParamsInChunks(self, chunks):
+    """
+      Calculate mean for transformation from the chunks() training dataset.
+    """
+    self._mean = _chunksMean( chunks )
+
   def __str__(self):
     """
       String representation of the object.
@@ -332,6 +372,7 @@ class UnitaryRMS( PrepObj ):
 
   _streamerObj = LoggerRawDictStreamer(toPublicAttrs = {'_invRMS'})
   _cnvObj = RawDictCnv(toProtectedAttrs = {'_invRMS'})
+  _takesParams = True
 
   def __init__(self, d = {}, **kw):
     d.update( kw ); del kw
@@ -363,6 +404,14 @@ class UnitaryRMS( PrepObj ):
     self._invRMS = 1 / tmpArray
     return self._apply(trnData)
 
+  def takeParamsInChunks(self, chunks):
+    """
+      Calculate rms for transformation from the chunks() training dataset.
+    """
+    tmpArray = np.sqrt( _chunksMean( chunks, np.square ) )
+    tmpArray[tmpArray==0] = 1
+    self._invRMS = 1 / tmpArray
+
   def __str__(self):
     """
       String representation of the object.
@@ -679,6 +728,7 @@ class MapStd( PrepObj ):
 
   _streamerObj = LoggerRawDictStreamer(toPublicAttrs = {'_mean', '_invRMS'})
   _cnvObj = RawDictCnv(toProtectedAttrs = {'_mean','_invRMS'})
+  _takesParams = True
 
   def __init__(self, d = {}, **kw):
     d.update( kw ); del kw
@@ -718,6 +768,16 @@ class MapStd( PrepObj ):
     self._invRMS = 1 / tmpArray
     return self._apply(trnData)
 
+  def takeParamsInChunks(self, chunks):
+    """
+      Calculate mean and rms for transformation from the chunks() training
+      dataset, which is read twice.
+    """
+    self._mean = _chunksMean( chunks )
+    tmpArray = np.sqrt( _chunksMean( chunks, lambda cdata: np.square( cdata - self._mean ) ) )
+    tmpArray[tmpArray==0] = 1
+    self._invRMS = 1 / tmpArray
+
   def __str__(self):
     """
       String representation of the object.
@@ -784,6 +844,12 @@ class MapStd_MassInvariant( MapStd ):
     #trnData *= self._invRMS
     #return trnData
 
+  def takeParamsInChunks(self, chunks):
+    """
+      MapStd_MassInvariant parameters cannot be taken from chunks.
+    """
+    PrepObj.takeParamsInChunks(self, chunks)
+
   def __str__(self):
     """
       String representation of the object.
@@ -801,6 +867,8 @@ class PCA( PrepObj ):
   """
     PCA preprocessing 
   """
+  _takesParams = True
+
   def __init__(self, d = {}, **kw):
     d.update( kw ); del kw
     PrepObj.__init__( self, d )
@@ -880,6 +948,7 @@ class KernelPCA( PrepObj ):
   """
   _explained_variance_ratio = None
   _cov = None
+  _takesParams = True
 
   def __init__(self, d = {}, **kw):
     d.update( kw ); del kw
@@ -1092,7 +1161,8 @@ class RingerEtaMu(Norm1):
       ret = []
       for i, cdata in enumerate(data):
         norms = self.__retrieveNorm(cdata[ npCurrent.access( pidx=(0, 100) ) ])
-        rings = cdata[ npCurrent.access( pidx=(0, 100) ) ] / norms[i]
+        # Each event rings are normalized by their own norm:
+        rings = cdata[ npCurrent.access( pidx=(0, 100) ) ] / norms
         eta   = cdata[ npCurrent.access( pidx=(100,101), oidx=':' )] 
         eta   = ((np.abs(eta) - np.abs(self._etamin))*np.sign(eta))/np.max(self._etamax)
         mu    = cdata[ npCurrent.access( pidx=(101,102) ,oidx=':') ]
@@ -1194,6 +1264,23 @@ class PreProcChain ( Logger ):
     for pp in self:
       trnData = pp.takeParams(trnData)
 
+  def takeParamsInChunks(self, chunks):
+    """
+      Take pre-processing parameters for all objects in chain from the
+      chunks() training dataset (see PrepObj.takeParamsInChunks). Each object
+      takes them from the chunks pre-processed by the previous ones.
+    """
+    if not self:
+      self._warning("No pre-processing available in this chain.")
+      return
+    for idx, pp in enumerate(self):
+      def ppChunks( previous = self[:idx] ):
+        for chunk in chunks():
+          for prevPP in previous:
+            chunk = prevPP(chunk)
+          yield chunk
+      pp.takeParamsInChunks(ppChunks)
+
   def concatenate(self, trnData, extraData):
     """
       Concatenate extra patterns into the data input
@@ -0,0 +1,157 @@
+__all__ = ['SharedTuningData']
+
+import os, errno, fcntl, atexit, hashlib, shutil, zipfile
+from contextlib import contextmanager
+import numpy as np
+
+from RingerCore import Logger
+
+@contextmanager
+def _flock( path ):
+  """
+    Holds an exclusive lock on the file path, creating it (and its directory)
+    if needed. If the file is removed while waiting for the lock, the lock is
+    taken on the new file instead.
+  """
+  while True:
+    try:
+      os.makedirs( os.path.dirname( path ) )
+    except OSError as e:
+      if e.errno != errno.EEXIST: raise
+    fd = os.open( path, os.O_RDWR | os.O_CREAT, 0o600 )
+    fcntl.flock( fd, fcntl.LOCK_EX )
+    try:
+      if os.fstat( fd ).st_ino == os.stat( path ).st_ino: break
+    except OSError:
+      pass
+    os.close( fd )
+  try:
+    yield
+  finally:
+    fcntl.flock( fd, fcntl.LOCK_UN )
+    os.close( fd )
+
+def _isAlive( pid ):
+  """
+    Returns whether the process pid is running.
+  """
+  try:
+    os.kill( pid, 0 )
+  except OSError as e:
+    return e.errno == errno.EPERM
+  return True
+
+class SharedTuningData( Logger ):
+  """
+    Node-wide shared copy of the raw patterns of a tuning data file.
+
+    The patterns (and base information) of each bin are decompressed once into
+    .npy files on a node directory (by default /dev/shm, which is held in
+    memory) by the first process requesting them. Every process then maps them
+    read-only, so that all the jobs and workers tuning the same file hold a
+    single copy of the raw patterns.
+
+    Each instance holds a reference to the shared copy until it is released
+    (at exit at the latest). The last running process releasing its reference
+    removes the shared copy, as well as the references left by the processes
+    which did not finish properly.
+  """
+
+  def __init__(self, dataLocation, directory = '/dev/shm', **kw):
+    Logger.__init__( self, kw )
+    self.dataLocation = os.path.abspath( dataLocation )
+    stat = os.stat( self.dataLocation )
+    # The shared copy is identified by the file path, size and modification time:
+    key = hashlib.md5( ( '%s:%d:%r' % ( self.dataLocation, stat.st_size, stat.st_mtime ) ).encode() )
+    self.path = os.path.join( directory, 'TuningTools.shared.' + key.hexdigest()[:16] )
+    self._lockPath = os.path.join( self.path, 'lock' )
+    self._refsPath = os.path.join( self.path, 'refs' )
+    self._pid = os.getpid()
+    self._ref = '%d.%d' % ( self._pid, id( self ) )
+    with _flock( self._lockPath ):
+      try:
+        os.makedirs( self._refsPath )
+      except OSError as e:
+        if e.errno != errno.EEXIST: raise
+      open( os.path.join( self._refsPath, self._ref ), 'w' ).close()
+    self._released = False
+    atexit.register( self.release )
+    self._debug( "Attached to the shared copy of %s on %s.", self.dataLocation, self.path )
+
+  def load(self, etBinIdx = None, etaBinIdx = None):
+    """
+      Returns the bin patterns ([signal, background]) and base information
+      ((signal, background) lists) as read-only memory-mapped arrays. The bin
+      is written to the shared copy if it is not there yet, decompressing the
+      data file members by chunks when possible (see
+      TuningDataArchieve.extractBin), so that the bin is never held in memory.
+    """
+    binPath = os.path.join( self.path, 'et%s.eta%s' % ( etBinIdx, etaBinIdx ) )
+    donePath = os.path.join( binPath, 'done' )
+    with _flock( binPath + '.lock' ):
+      if not os.path.exists( donePath ):
+        self._info( "Writing the shared copy of the (etBinIdx=%s,etaBinIdx=%s) patterns on %s...",
+                    etBinIdx, etaBinIdx, binPath )
+        if not os.path.isdir( binPath ):
+          os.makedirs( binPath )
+        from TuningTools.CreateData import TuningDataArchieve
+        try:
+          nBaseInfo = TuningDataArchieve.extractBin( self.dataLocation, binPath,
+                                                     etBinIdx = etBinIdx, etaBinIdx = etaBinIdx )
+        except (zipfile.BadZipfile, KeyError, ValueError) as e:
+          self._debug( "Loading the patterns to write their shared copy (%s).", e )
+          nBaseInfo = self.__writeLoaded( binPath, etBinIdx, etaBinIdx )
+        with open( donePath, 'w' ) as f:
+          f.write( str( nBaseInfo ) )
+      with open( donePath ) as f:
+        nBaseInfo = int( f.read() )
+    mmap = lambda name: np.load( os.path.join( binPath, name + '.npy' ), mmap_mode = 'r' )
+    patterns = [ mmap( 'signalPatterns' ), mmap( 'backgroundPatterns' ) ]
+    baseInfo = ( [ mmap( 'signalBaseInfo_%d' % idx )     for idx in range( nBaseInfo ) ],
+                 [ mmap( 'backgroundBaseInfo_%d' % idx ) for idx in range( nBaseInfo ) ] )
+    return patterns, baseInfo
+
+  def __writeLoaded(self, binPath, etBinIdx, etaBinIdx):
+    """
+      Writes the bin to binPath from the loaded data file, returning the
+      number of base information arrays of each class.
+    """
+    from TuningTools.CreateData import TuningDataArchieve
+    tdArchieve = TuningDataArchieve.load( self.dataLocation, etBinIdx = etBinIdx,
+                                          etaBinIdx = etaBinIdx, loadEfficiencies = False )
+    arrays = { 'signalPatterns'     : tdArchieve.signalPatterns
+             , 'backgroundPatterns' : tdArchieve.backgroundPatterns }
+    for idx, ( sgnInfo, bkgInfo ) in enumerate( zip( tdArchieve.signalBaseInfo,
+                                                     tdArchieve.backgroundBaseInfo ) ):
+      arrays['signalBaseInfo_%d' % idx]     = sgnInfo
+      arrays['backgroundBaseInfo_%d' % idx] = bkgInfo
+    if any( not isinstance( array, np.ndarray ) for array in arrays.values() ):
+      self._fatal( "Only a single bin patterns can be shared.", TypeError )
+    for name, array in arrays.items():
+      np.save( os.path.join( binPath, name + '.npy' ), array )
+    return len( tdArchieve.signalBaseInfo )
+
+  def release(self):
+    """
+      Releases the reference to the shared copy, removing it if no other
+      running process holds a reference to it. The arrays already mapped
+      remain valid.
+    """
+    # The forked processes do not release their parent reference:
+    if self._released or os.getpid() != self._pid:
+      return
+    self._released = True
+    with _flock( self._lockPath ):
+      try:
+        os.remove( os.path.join( self._refsPath, self._ref ) )
+      except OSError:
+        pass
+      inUse = False
+      for ref in ( os.listdir( self._refsPath ) if os.path.isdir( self._refsPath ) else [] ):
+        if _isAlive( int( ref.split('.')[0] ) ):
+          inUse = True
+        else:
+          os.remove( os.path.join( self._refsPath, ref ) )
+      if not inUse:
+        self._debug( "Removing the shared copy on %s.", self.path )
+        shutil.rmtree( self.path, ignore_errors = True )
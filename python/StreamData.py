@@ -0,0 +1,111 @@
+__all__ = ['SortStreamer']
+
+import os, tempfile
+import numpy as np
+
+from RingerCore import Logger
+from TuningTools.coreDef import npCurrent
+
+def newMemmap(directory, shape, dtype, fortran = False):
+  """
+    Returns a writable numpy.memmap backed by a new temporary .npy file on
+    directory, together with the file path. The array is to be mapped
+    read-only by mapReadOnly once it is written.
+  """
+  fd, path = tempfile.mkstemp( prefix = 'tuning-stream-', suffix = '.npy', dir = directory )
+  os.close( fd )
+  try:
+    array = np.lib.format.open_memmap( path, mode = 'w+', dtype = dtype, shape = shape,
+                                       fortran_order = fortran )
+  except:
+    os.remove( path )
+    raise
+  return array, path
+
+def mapReadOnly(path):
+  """
+    Returns the .npy file path mapped read-only. The file is removed as soon
+    as it is mapped, so that its disk space is released together with the
+    array.
+  """
+  try:
+    return np.load( path, mmap_mode = 'r' )
+  finally:
+    os.remove( path )
+
+class SortStreamer( Logger ):
+  """
+    Out-of-core extraction and pre-processing of the cross-validation sorts.
+
+    The training, validation and test datasets of a sort are gathered from
+    the (memory-mapped) raw patterns by chunks of chunkSize events, which are
+    pre-processed and written to temporary .npy files on directory. The
+    pre-processing parameters are taken from the training dataset chunks
+    (see PreProcChain.takeParamsInChunks), reading them once for each pass
+    needed by the chain. Only the chunks being processed are then held in
+    memory, and the datasets are returned as read-only memory-mapped arrays,
+    whose files are removed once mapped.
+
+    The datasets are the same (up to the precision of the pre-processing
+    parameters, which are accumulated on float64) as the ones split by the
+    CrossValid and pre-processed in memory, but they are held on float32.
+    Only the box-based cross-validation methods without subsets are
+    supported.
+  """
+
+  def __init__(self, directory, chunkSize = 16384, **kw):
+    Logger.__init__( self, kw )
+    self.directory = directory
+    self.chunkSize = chunkSize
+
+  def __call__(self, patterns, sort, crossValid, ppChain, baseInfo = None):
+    """
+      Returns the (trnData, valData, tstData) of sort, pre-processed by
+      ppChain, whose parameters are taken from the training dataset. The
+      patterns base information (one list for each class) is concatenated to
+      them by ppChain when it is given.
+    """
+    # The events of each class gathered by each dataset:
+    boxes = [ crossValid.getTrnBoxIdxs( sort ), crossValid.getValBoxIdxs( sort ) ]
+    if crossValid.nTest():
+      boxes.append( crossValid.getTstBoxIdxs( sort ) )
+    events = [ [ crossValid.getBoxesEvents( dsBoxes, pat.shape[npCurrent.odim] ) for pat in patterns ]
+               for dsBoxes in boxes ]
+    for name, dsEvents in zip( ('Train     ', 'Validation', 'Test'), events ):
+      self._info( '%s #Events/class: %r', name, [ len( idxs ) for idxs in dsEvents ] )
+
+    def chunks( dsEvents, apply = False ):
+      for cl, ( pat, idxs ) in enumerate( zip( patterns, dsEvents ) ):
+        for start in range( 0, len( idxs ), self.chunkSize ):
+          idx = idxs[start:start+self.chunkSize]
+          chunk = [ pat[ npCurrent.access( oidx = idx ) ] ]
+          if baseInfo is not None:
+            chunk = ppChain.concatenate( chunk, [ [ info[ npCurrent.access( oidx = idx ) ]
+                                                    for info in baseInfo[cl] ] ] )
+          yield cl, start, ( ppChain( chunk ) if apply else chunk )
+
+    self._info('Tuning pre-processing chain (%s) on chunks of the training dataset...', ppChain)
+    ppChain.takeParamsInChunks( lambda: ( chunk for _, _, chunk in chunks( events[0] ) ) )
+    self._info('Applying pre-processing chain to all sets...')
+    datasets = []
+    for dsEvents in events:
+      paths = [None] * len( patterns )
+      try:
+        out = None
+        for cl, start, ( chunk, ) in chunks( dsEvents, apply = True ):
+          if not start:
+            if out is not None: out.flush()
+            out, paths[cl] = newMemmap( self.directory,
+                                        npCurrent.shape( npat = chunk.shape[npCurrent.pdim],
+                                                         nobs = len( dsEvents[cl] ) ),
+                                        npCurrent.fp_dtype, npCurrent.isfortran )
+          out[ npCurrent.access( oidx = slice( start, start + chunk.shape[npCurrent.odim] ) ) ] = chunk
+        out.flush(); del out
+        datasets.append( [ mapReadOnly( path ) for path in paths ] )
+      except:
+        for path in paths:
+          if path is not None and os.path.exists( path ): os.remove( path )
+        raise
+    trnData, valData = datasets[:2]
+    tstData = datasets[2] if len( datasets ) > 2 else []
+    return trnData, valData, tstData
@@ -981,6 +981,36 @@ class TuningJob(Logger):
         - outputFileBase ['nn.tuned']: The tuning outputFile starting string.
             It will also contain a custom string representing the configuration
             used to tune the discriminator.
+        - sharedData [None]: The node directory (i.e. '/dev/shm') where the
+            raw patterns of each bin are shared with the other jobs tuning the
+            same data file (see SharedTuningData). The patterns are then read
+            once per node and mapped by each job instead of loaded on its own
+            memory. When None, each job loads its own patterns.
+        - dataCache [None]: The directory where the pre-processed datasets of
+            each cross-validation sort are cached (see TuningDataCache), so
+            that the jobs tuning the same bin and sort map them instead of
+            splitting and pre-processing the patterns again. The sorts of
+            subset (cluster) files or of non box-based cross-validation
+            methods are not cached. When None, no cache is used.
+        - checkpointInterval [None]: The interval (in seconds) between the
+            writes of each configuration checkpoint (see TuningCheckpoint),
+            holding its finished initializations and the training state of the
+            initialization being tuned (FastNet only). The checkpoint is
+            written on the output directory and removed once the configuration
+            is saved. When None, no checkpoint is written.
+        - resume [False]: Whether to resume an interrupted job: the
+            configurations already saved on the output directory are skipped,
+            and the finished initializations on each configuration checkpoint
+            are reused, while the interrupted one is resumed from its training
+            state.
+        - architectures [[['n']]]: The grid of hidden layers templates tuned
+            for each neuron on the neuronBoundsCol. Each template is a list
+            (or a comma separated string) with the number of neurons of each
+            hidden layer, where 'n' is replaced by the current neuron. I.e.
+            [['n'], ['n', 5], ['n', 'n']] tunes networks with the nodes
+            [nInputs, n, 1], [nInputs, n, 5, 1] and [nInputs, n, n, 1]. Each
+            template, but the default one, is saved on its own file, whose name
+            contains its layers (i.e. 'hn0005.arch-nx5').
         - showEvo (TuningWrapper prop) [50]: The number of iterations wher
             performance is shown (used as a boolean on ExMachina).
         - maxFail (TuningWrapper prop) [50]: Maximum number of failures
@@ -995,7 +1025,9 @@ class TuningJob(Logger):
         - batchSize (TuningWrapper prop) [number of observations of the class
             with the less observations]: Set the batch size used during tuning.
         - algorithmName (TuningWrapper prop) [resilient back-propgation]: The
-            tuning method to use.
+            tuning method to use. The FastNet core accepts 'trainrp' (resilient
+            back-propagation), 'traingd' (gradient descent), 'traingdm'
+            (gradient descent with momentum) and 'trainadam' (Adam).
         - batchMethod (TuningWrapper prop) [MinClassSize]: The method to choose 
             the batching size. Use one of those decribed by BatchSizeMethod
             EnumStringification.
@@ -1012,8 +1044,80 @@ class TuningJob(Logger):
             algorithm.
         - doMultiStop (FastNet prop) [True]: Tune classifier using P_D, P_F and
           SP when set to True. Uses only SP when set to False.
+        - exactRoc (FastNet prop) [False]: Use every distinct discriminator
+          output as a ROC cut instead of the fixed resolution threshold grid.
+        - validEvery (FastNet prop) [1]: Evaluate the validation set only every
+          validEvery epochs. Epochs without validation count as failures and
+          keep the last evaluated performance on the training evolution.
+        - testOnBest (FastNet prop) [False]: Only evaluate the test set on the
+          epochs where a new best network was found by any stop criterion.
+        - validFraction (FastNet prop) [1.]: Fraction of each pattern
+          validation set, sampled once per tuning using the seed, which is
+          used by the stop criteria.
+        - fastTanh (FastNet prop) [False]: Use a vectorized rational
+          approximation of the hyperbolic tangent (absolute error below 1e-6)
+          instead of the exact function.
+        - pipelineThreads (FastNet prop) [0]: When positive, each epoch is
+          evaluated by this number of threads while the remaining ones train
+          the next epoch. The tuning results are the same as without it.
+        - sampling (FastNet prop) ['pattern']: How the training events of
+          each epoch are selected. 'pattern' draws batchSize events of each
+          pattern; 'stratified' draws the same total number of events split
+          on the training set class proportions; 'weighted' splits them
+          according to samplingWeights; and 'hardnegative' works as
+          'pattern', but draws hardFraction of the background events among
+          the ones with the largest errors when they were last presented.
+        - samplingWeights (FastNet prop) [[]]: The weight of each pattern
+          used by the 'weighted' sampling.
+        - hardFraction (FastNet prop) [.5]: The fraction of the background
+          events drawn among the hardest ones by the 'hardnegative' sampling.
+        - dataStorage (FastNet prop) ['float32']: The storage of the
+          datasets given to the core. 'float16' and 'bfloat16' halve their
+          memory, the events being widened to float32 when propagated (all
+          the computations remain on float32). The float16 values are
+          limited to 65504, so it requires normalized patterns (i.e. with the
+          Norm1 pre-processing), while bfloat16 has the float32 range.
+        - streamDir (FastNet prop) [None]: When set, the datasets of each
+          sort are written to temporary files on this directory and given to
+          the core as memory-mapped arrays, so that only the events being
+          propagated need to be resident in memory during the tuning. The raw
+          patterns are mapped from their shared copy (on sharedData, or on
+          this directory when it is not set), and the sorts of box-based
+          cross-validation methods without subset (cluster) files are
+          gathered and pre-processed from them by chunks of events (see
+          SortStreamer), which allows tuning bins larger than the memory. Their
+          pre-processing parameters must then be taken by chunks (i.e. no
+          PCA). The other sorts are still split and pre-processed in memory.
+          The datasets already memory-mapped (i.e. from the dataCache) are
+          given to the core as they are.
+        - streamBlock (FastNet prop) [1024 when streaming, 0 otherwise]: The
+          number of consecutive training events drawn at once, whose pages
+          are read ahead from the files on a background thread.
+        - deterministic (FastNet prop) [False]: Split the training events
+          on a fixed partition whose gradients are summed pairwise in a fixed
+          order, so that the tuned networks are the same (bit by bit) for any
+          number of threads. See scripts/validate/reduction_benchmark.py for
+          its throughput cost.
+        - parallelInits (FastNet prop) [1]: Number of initializations
+          trained at once (in lockstep, one epoch of each at a time), with
+          the threads split among them. It improves the throughput of the
+          networks too small to use all threads efficiently. When
+          deterministic, the tuned networks are the same as the ones trained
+          one after the other. See scripts/validate/init_lockstep_benchmark.py.
+        - learningRate (FastNet prop) [0.05]: The step size used by the
+          'traingd', 'traingdm' and 'trainadam' algorithms.
+        - momentum (FastNet prop) [0.9]: The fraction of the previous step
+          kept by the 'traingdm' algorithm.
+        - beta1 (FastNet prop) [0.9]: The decay rate of the 'trainadam'
+          gradients moving average.
+        - beta2 (FastNet prop) [0.999]: The decay rate of the 'trainadam'
+          squared gradients moving average.
+        - epsilon (FastNet prop) [1e-8]: The 'trainadam' denominator
+          stability term.
+        See scripts/validate/optimizer_benchmark.py to compare the algorithms.
     """
     import gc, os.path
+    from glob import glob
     from copy import deepcopy
     ### Retrieve configuration from input values:
     ## We start with basic information:
@@ -1023,6 +1127,10 @@ class TuningJob(Logger):
     outputFileBase = retrieve_kw(kw, 'outputFileBase',  'nn.tuned'        )
     outputDir      = retrieve_kw(kw, 'outputDirectory', ''                )
     outputDir      = os.path.abspath( outputDir )
+    sharedDataDir  = retrieve_kw(kw, 'sharedData',      None              )
+    checkpointInterval = retrieve_kw(kw, 'checkpointInterval', None       )
+    resume         = retrieve_kw(kw, 'resume',          False             )
+    dataCacheDir   = retrieve_kw(kw, 'dataCache',       None              )
     ## Now we go to parameters which need higher treating level, starting with
     ## the CrossValid object:
     # Make sure that the user didn't try to use both options:
@@ -1094,6 +1202,19 @@ class TuningJob(Logger):
     for initBounds in initBoundsCol():
       if initBounds.lowerBound() < 0:
         self._fatal("Attempted to create an initialization index lower than 0.", ValueError)
+    # Retrieve the hidden layers templates:
+    architectures = retrieve_kw( kw, 'architectures', [['n']] )
+    if type(architectures) not in (list, tuple):
+      architectures = [architectures]
+    def fixArchitecture( arch ):
+      if isinstance( arch, basestring ): arch = csvStr2List( arch )
+      elif type(arch) not in (list, tuple): arch = [arch]
+      arch = [ layer if layer == 'n' else int(layer) for layer in arch ]
+      if not arch or any( layer != 'n' and layer < 1 for layer in arch ):
+        self._fatal("Invalid hidden layers template %r: it must have at least one layer "
+                    "and each layer must have at least one neuron." % arch, ValueError)
+      return arch
+    architectures = [ fixArchitecture( arch ) for arch in architectures ]
     nSortsVal = crossValid.nSorts()
     ## Retrieve binning information: 
     etBins  = retrieve_kw(kw, 'etBins',  None )
@@ -1165,6 +1286,7 @@ class TuningJob(Logger):
     # Retrieve some useful information and keep it on memory
     nConfigs = len( neuronBoundsCol )
     ## Now create the tuning wrapper:
+    from TuningTools.coreDef import coreConf, TuningToolCores
     from TuningTools.TuningWrapper import TuningWrapper
                                    # Wrapper confs:
     tuningWrapper = TuningWrapper( level                 = self.level
@@ -1184,6 +1306,25 @@ class TuningJob(Logger):
                                    # FastNet confs:
                                  , seed                  = retrieve_kw( kw, 'seed',                  NotSet)
                                  , doMultiStop           = retrieve_kw( kw, 'doMultiStop',           NotSet)
+                                 , exactRoc              = retrieve_kw( kw, 'exactRoc',              NotSet)
+                                 , validEvery            = retrieve_kw( kw, 'validEvery',            NotSet)
+                                 , testOnBest            = retrieve_kw( kw, 'testOnBest',            NotSet)
+                                 , validFraction         = retrieve_kw( kw, 'validFraction',         NotSet)
+                                 , fastTanh              = retrieve_kw( kw, 'fastTanh',              NotSet)
+                                 , pipelineThreads       = retrieve_kw( kw, 'pipelineThreads',       NotSet)
+                                 , sampling              = retrieve_kw( kw, 'sampling',              NotSet)
+                                 , samplingWeights       = retrieve_kw( kw, 'samplingWeights',       NotSet)
+                                 , hardFraction          = retrieve_kw( kw, 'hardFraction',          NotSet)
+                                 , dataStorage           = retrieve_kw( kw, 'dataStorage',           NotSet)
+                                 , streamDir             = retrieve_kw( kw, 'streamDir',             NotSet)
+                                 , streamBlock           = retrieve_kw( kw, 'streamBlock',           NotSet)
+                                 , deterministic         = retrieve_kw( kw, 'deterministic',         NotSet)
+                                 , parallelInits         = retrieve_kw( kw, 'parallelInits',         NotSet)
+                                 , learningRate          = retrieve_kw( kw, 'learningRate',          NotSet)
+                                 , momentum              = retrieve_kw( kw, 'momentum',              NotSet)
+                                 , beta1                 = retrieve_kw( kw, 'beta1',                 NotSet)
+                                 , beta2                 = retrieve_kw( kw, 'beta2',                 NotSet)
+                                 , epsilon               = retrieve_kw( kw, 'epsilon',               NotSet)
                                  )
    
 
@@ -1203,6 +1344,24 @@ class TuningJob(Logger):
     checkForUnusedVars( kw, self._warning )
     del kw
 
+    sharedData = streamer = None
+    if tuningWrapper.streamDir:
+      # The raw patterns are then mapped from their shared copy, and the sorts
+      # are gathered and pre-processed from them by chunks of events:
+      from TuningTools.StreamData import SortStreamer
+      streamer = SortStreamer( tuningWrapper.streamDir, level = self.level )
+      if not sharedDataDir: sharedDataDir = tuningWrapper.streamDir
+    if sharedDataDir:
+      from TuningTools.SharedData import SharedTuningData
+      sharedData = SharedTuningData( dataLocation, sharedDataDir, level = self.level )
+    dataCache = None
+    if dataCacheDir:
+      from TuningTools.DataCache import TuningDataCache
+      dataCache = TuningDataCache( dataLocation, dataCacheDir, level = self.level )
+      # The chains may be shared by several sorts and are fitted in place,
+      # so the cache keys are taken from a copy of them which is never fitted:
+      ppConfigCol = deepcopy( ppCol )
+
     from itertools import product
     for etBinIdx, etaBinIdx in product( range( nEtBins if nEtBins is not None else 1 ) if etBins is None \
                                    else etBins(), 
@@ -1220,14 +1379,22 @@ class TuningJob(Logger):
       tdArchieve = TuningDataArchieve.load(dataLocation, etBinIdx = etBinIdx if isEtDependent else None,
                                            etaBinIdx = etaBinIdx if isEtaDependent else None,
                                            loadEfficiencies = True if refFile is None else False,
-                                           loadCrossEfficiencies = True if refFile is None else False
+                                           loadCrossEfficiencies = True if refFile is None else False,
+                                           loadPatterns = sharedData is None
                                            )
-      patterns = [tdArchieve.signalPatterns, tdArchieve.backgroundPatterns]
-      
-      #FIXME: Only this version is supported
-      if tdVersion >= 6:
+      if sharedData is None:
+        basePatterns = [tdArchieve.signalPatterns, tdArchieve.backgroundPatterns]
         baseInfo = (tdArchieve.signalBaseInfo, tdArchieve.backgroundBaseInfo)
+        # The raw patterns are kept pristine for all sorts of this bin, which
+        # only gather their datasets from them:
+        for pat in basePatterns:
+          pat.flags.writeable = False
       else:
+        basePatterns, baseInfo = sharedData.load( etBinIdx if isEtDependent else None,
+                                                  etaBinIdx if isEtaDependent else None )
+      
+      #FIXME: Only this version is supported
+      if tdVersion < 6:
         baseInfo = (None, None)
 
 
@@ -1314,44 +1481,101 @@ class TuningJob(Logger):
       # For the bounded variables, we loop them together for the collection:
       for confNum, neuronBounds, sortBounds, initBounds in \
           zip(range(nConfigs), neuronBoundsCol, sortBoundsCol, initBoundsCol ):
+        neuronStr = neuronBounds.formattedString('hn')
+        def outputFile( arch ):
+          archNeuronStr = neuronStr
+          if arch != ['n']:
+            archNeuronStr += '.arch-' + 'x'.join( str(layer) for layer in arch )
+          return os.path.join(
+              outputDir
+              ,'{outputFileBase}.{ppStr}.{neuronStr}.{sortStr}.{initStr}.{saveBinStr}.pic'.format( 
+                        outputFileBase = outputFileBase, 
+                        ppStr = 'pp-' + ppCol[etBinIdx][etaBinIdx][sortBounds.endBound()].shortName()[:12], # Truncate on 12th char
+                        neuronStr = archNeuronStr, 
+                        sortStr = sortBounds.formattedString('s'),
+                        initStr = initBounds.formattedString('i'),
+                        saveBinStr = saveBinStr )
+              )
+        # The saved file name may have an extension appended:
+        if resume and all( glob( outputFile( arch ) + '*' ) for arch in architectures ):
+          self._info('Skipping configuration file number %d%s, which is already saved.', confNum, binStr)
+          continue
         self._info('Running configuration file number %d%s', confNum, binStr)
-        tunedDiscr = []
-        tuningInfo = []
+        checkpoint = None
+        if checkpointInterval is not None or resume:
+          from TuningTools.Checkpoint import TuningCheckpoint
+          checkpoint = TuningCheckpoint( os.path.join( outputDir
+                                       , '{outputFileBase}.{neuronStr}.{sortStr}.{initStr}.{saveBinStr}.checkpoint'.format(
+                                          outputFileBase = outputFileBase,
+                                          neuronStr = neuronStr,
+                                          sortStr = sortBounds.formattedString('s'),
+                                          initStr = initBounds.formattedString('i'),
+                                          saveBinStr = saveBinStr ) )
+                                       , checkpointInterval, level = self.level )
+          if resume: checkpoint.load()
+        # Tuned discriminators and information for each hidden layers template:
+        tunedDiscr = [[] for _ in architectures]
+        tuningInfo = [[] for _ in architectures]
         nSorts = len(sortBounds)
         # Finally loop within the configuration bounds
         for sort in sortBounds():
           ppChain = ppCol[etBinIdx][etaBinIdx][sort]
-          #FIXME: Only this version is supported
-          if tdVersion >= 6:
-            patterns = ppChain.concatenate(patterns, baseInfo)
-
-          self._info('Extracting cross validation sort %d%s.', sort, binStr)
-          if clusterCol:
-            cluster = clusterCol[etBinIdx][etaBinIdx][sort]
-            # Setting extra information if needed.
-            if cluster.isDependent():
-              self._info("Setting dependent patterns into the subset configuration...")
-              cluster.setDependentPatterns( baseInfo )
-            # Cluster is a LimitedList of clusters [cl_pattern1, cl_pattern2, ...]
-            trnData, valData, tstData = crossValid( patterns, sort, cluster )
+          cacheKey = cached = None
+          # The cached sorts are only defined by their cross-validation boxes:
+          if dataCache is not None and clusterCol is None and crossValid.isRevertible():
+            cacheKey = dataCache.key( etBinIdx if isEtDependent else None, 
+                                      etaBinIdx if isEtaDependent else None,
+                                      ppConfigCol[etBinIdx][etaBinIdx][sort], 
+                                      crossValid, sort )
+            cached = dataCache.load( cacheKey )
+          if cached is not None:
+            self._info('Using the cached pre-processed cross validation sort %d%s.', sort, binStr)
+            trnData, valData, tstData, ppChain = cached
+            ppChain.level = self.level
+            # Keep the fitted chain, as it is saved with the tuned discriminators:
+            ppCol[etBinIdx][etaBinIdx][sort] = ppChain
+          elif streamer is not None and clusterCol is None and crossValid.isRevertible():
+            self._info('Extracting cross validation sort %d%s by chunks of events.', sort, binStr)
+            #FIXME: Only this version is supported
+            trnData, valData, tstData = streamer( basePatterns, sort, crossValid, ppChain, 
+                                                  baseInfo if tdVersion >= 6 else None )
+            if cacheKey is not None:
+              dataCache.store( cacheKey, trnData, valData, tstData, ppChain )
           else:
-            # Here, not apply subset generator
-            trnData, valData, tstData = crossValid( patterns, sort  )
-          del patterns # Keep only one data representation
+            patterns = basePatterns
+            #FIXME: Only this version is supported
+            if tdVersion >= 6:
+              patterns = ppChain.concatenate(patterns, baseInfo)
+
+            self._info('Extracting cross validation sort %d%s.', sort, binStr)
+            if clusterCol:
+              cluster = clusterCol[etBinIdx][etaBinIdx][sort]
+              # Setting extra information if needed.
+              if cluster.isDependent():
+                self._info("Setting dependent patterns into the subset configuration...")
+                cluster.setDependentPatterns( baseInfo )
+              # Cluster is a LimitedList of clusters [cl_pattern1, cl_pattern2, ...]
+              trnData, valData, tstData = crossValid( patterns, sort, cluster )
+            else:
+              # Here, not apply subset generator
+              trnData, valData, tstData = crossValid( patterns, sort  )
+            del patterns
          
-          # Take ppChain parameters on training data:
-          self._info('Tuning pre-processing chain (%s)...', ppChain)
-          ppChain.takeParams( trnData )
-          self._debug('Done tuning pre-processing chain!')
-          self._info('Applying pre-processing chain to all sets...')
-          # Apply ppChain:
-          self._debug('Applying pp chain to train dataset...')
-          trnData = ppChain( trnData )
-          self._debug('Applying pp chain to validation dataset...')
-          valData = ppChain( valData ) 
-          self._debug('Applying pp chain to test dataset...')
-          tstData = ppChain( tstData )
-          self._debug('Done applying the pre-processing chain to all sets!')
+            # Take ppChain parameters on training data:
+            self._info('Tuning pre-processing chain (%s)...', ppChain)
+            ppChain.takeParams( trnData )
+            self._debug('Done tuning pre-processing chain!')
+            self._info('Applying pre-processing chain to all sets...')
+            # Apply ppChain:
+            self._debug('Applying pp chain to train dataset...')
+            trnData = ppChain( trnData )
+            self._debug('Applying pp chain to validation dataset...')
+            valData = ppChain( valData ) 
+            self._debug('Applying pp chain to test dataset...')
+            tstData = ppChain( tstData )
+            self._debug('Done applying the pre-processing chain to all sets!')
+            if cacheKey is not None:
+              dataCache.store( cacheKey, trnData, valData, tstData, ppChain )
 
 
           # Retrieve resulting data shape
@@ -1366,59 +1590,64 @@ class TuningJob(Logger):
           tuningWrapper.setSortIdx(sort)
           # Garbage collect now, before entering training stage:
           gc.collect()
-          # And loop over neuron configurations and initializations:
-          for neuron in neuronBounds():
-            for init in initBounds():
-              self._info('Training <Neuron = %d, sort = %d, init = %d>%s...', \
-                  neuron, sort, init, binStr)
-              self._info( 'Discriminator Configuration: input = %d, hidden layer = %d, output = %d',\
-                  nInputs, neuron, 1)
-              tuningWrapper.newff([nInputs, neuron, 1])
-              cTunedDiscr, cTuningInfo = tuningWrapper.train_c()
-              self._debug('Finished C++ tuning, appending tuned discriminators to tuning record...')
-              # Append retrieved tuned discriminators and its tuning information
-              tunedDiscr.append( cTunedDiscr )
-              tuningInfo.append( cTuningInfo )
-            self._debug('Finished all initializations for neuron %d...', neuron)
-          self._debug('Finished all neurons for sort %d...', sort)
-          # Finished all inits for this sort, we need to undo the crossValid if
-          # we are going to do a new sort, otherwise we continue
-          if not ( (confNum+1) == nConfigs and sort == sortBounds.endBound()):
-            if crossValid.isRevertible() and ppChain.isRevertible() and clusterCol is None:
-              trnData = tuningWrapper.trnData(release = True)
-              valData = tuningWrapper.valData(release = True)
-              tstData = tuningWrapper.testData(release = True)
-              patterns = crossValid.revert( trnData, valData, tstData, sort = sort )
-              del trnData, valData, tstData
-              patterns = ppChain( patterns , revert = True )
+          # And loop over neuron configurations, hidden layers templates and initializations:
+          for neuron, (archIdx, arch) in product( neuronBounds(), enumerate( architectures ) ):
+            hiddenLayers = [ neuron if layer == 'n' else layer for layer in arch ]
+            nodes = [nInputs] + hiddenLayers + [1]
+            unit = (sort, neuron, archIdx)
+            finished = checkpoint.finished( unit ) if checkpoint is not None else []
+            if finished:
+              self._info('Reusing %d checkpointed initializations of <Neuron = %d, sort = %d>%s.', \
+                  len(finished), neuron, sort, binStr)
+            for cTunedDiscr, cTuningInfo in finished:
+              tunedDiscr[archIdx].append( cTunedDiscr )
+              tuningInfo[archIdx].append( cTuningInfo )
+            checkpointFcn = None
+            if checkpointInterval is not None:
+              checkpointFcn = lambda init, state, output, unit = unit: checkpoint.update( unit, state, output )
+            if len(finished) == len(initBounds):
+              self._debug('All initializations for neuron %d and hidden layers %r were checkpointed.', neuron, hiddenLayers)
+            elif coreConf() is TuningToolCores.FastNet:
+              # Train all initializations at once, sharing the training datasets:
+              self._info('Training <Neuron = %d, sort = %d, nInits = %d>%s...', \
+                  neuron, sort, len(initBounds) - len(finished), binStr)
+              self._info( 'Discriminator Configuration: input = %d, hidden layers = %r, output = %d',\
+                  nInputs, hiddenLayers, 1)
+              tuningWrapper.newff(nodes)
+              for cTunedDiscr, cTuningInfo in tuningWrapper.train_many_c( len(initBounds) - len(finished),
+                  checkpoint = checkpointFcn, interval = checkpointInterval,
+                  resumeState = checkpoint.resumeState( unit ) if checkpoint is not None else None ):
+                # Append retrieved tuned discriminators and its tuning information
+                tunedDiscr[archIdx].append( cTunedDiscr )
+                tuningInfo[archIdx].append( cTuningInfo )
+              self._debug('Finished C++ tuning, appended tuned discriminators to tuning record...')
             else:
-              # We cannot revert ppChain, reload data:
-              self._info('Re-opening raw data...')
-              tdArchieve = TuningDataArchieve.load(dataLocation, etBinIdx = etBinIdx if isEtDependent else None,
-                                                    etaBinIdx = etaBinIdx if isEtaDependent else None)
-              patterns = (tdArchieve.signalPatterns, tdArchieve.backgroundPatterns)
-
-
-              del tdArchieve
+              for init in list( initBounds() )[len(finished):]:
+                self._info('Training <Neuron = %d, sort = %d, init = %d>%s...', \
+                    neuron, sort, init, binStr)
+                self._info( 'Discriminator Configuration: input = %d, hidden layers = %r, output = %d',\
+                    nInputs, hiddenLayers, 1)
+                tuningWrapper.newff(nodes)
+                cTunedDiscr, cTuningInfo = tuningWrapper.train_c()
+                self._debug('Finished C++ tuning, appending tuned discriminators to tuning record...')
+                # Append retrieved tuned discriminators and its tuning information
+                tunedDiscr[archIdx].append( cTunedDiscr )
+                tuningInfo[archIdx].append( cTuningInfo )
+                if checkpointFcn is not None:
+                  checkpointFcn( init, None, (cTunedDiscr, cTuningInfo) )
+            self._debug('Finished all initializations for neuron %d and hidden layers %r...', neuron, hiddenLayers)
+          self._debug('Finished all neurons for sort %d...', sort)
+          # Finished all inits for this sort. Free its datasets before gathering
+          # the next sort ones, so that only the base patterns and a single sort
+          # datasets are held at once:
+          tuningWrapper.releaseData()
+          gc.collect()
           self._debug('Finished all hidden layer neurons for sort %d...', sort)
         self._debug('Finished all sorts for configuration %d in collection...', confNum)
         ## Finished retrieving all tuned discriminators for this config file for
         ## this pre-processing. Now we head to save what we've done so far:
         # This pre-processing was tuned during this tuning configuration:
         tunedPP = PreProcCollection( [ ppCol[etBinIdx][etaBinIdx][sort] for sort in sortBounds() ] )
-        # Define output file name:
-        fulloutput = os.path.join(
-            outputDir
-            ,'{outputFileBase}.{ppStr}.{neuronStr}.{sortStr}.{initStr}.{saveBinStr}.pic'.format( 
-                      outputFileBase = outputFileBase, 
-                      ppStr = 'pp-' + ppChain.shortName()[:12], # Truncate on 12th char
-                      neuronStr = neuronBounds.formattedString('hn'), 
-                      sortStr = sortBounds.formattedString('s'),
-                      initStr = initBounds.formattedString('i'),
-                      saveBinStr = saveBinStr )
-            )
-
-        self._info('Saving file named %s...', fulloutput)
         extraKw = {}
         if nEtBins is not None:
           extraKw['etBinIdx'] = etBinIdx
@@ -1429,21 +1658,31 @@ class TuningJob(Logger):
           #extraKw['etaBin'] = etaBins[etaBinIdx]
           extraKw['etaBin'] = etaBins
 
-        savedFile = TunedDiscrArchieve( neuronBounds = neuronBounds, 
-                                        sortBounds = sortBounds, 
-                                        initBounds = initBounds,
-                                        tunedDiscr = tunedDiscr,
-                                        tuningInfo = tuningInfo,
-                                        tunedPP = tunedPP,
-                                        **extraKw
-                                      ).save( fulloutput, compress )
-        self._info('File "%s" saved!', savedFile)
+        for archIdx, arch in enumerate( architectures ):
+          # Define output file name:
+          fulloutput = outputFile( arch )
+          self._info('Saving file named %s...', fulloutput)
+          savedFile = TunedDiscrArchieve( neuronBounds = neuronBounds, 
+                                          sortBounds = sortBounds, 
+                                          initBounds = initBounds,
+                                          tunedDiscr = tunedDiscr[archIdx],
+                                          tuningInfo = tuningInfo[archIdx],
+                                          tunedPP = tunedPP,
+                                          **extraKw
+                                        ).save( fulloutput, compress )
+          self._info('File "%s" saved!', savedFile)
+        if checkpoint is not None:
+          checkpoint.remove()
 
 
 
       # Finished all configurations we had to do
+      del basePatterns
       self._info('Finished tuning job!')
 
+    if sharedData is not None:
+      sharedData.release()
+
   # end of __call__ member fcn
 
 class TunedDiscrArchieveCol( Logger ):
@@ -0,0 +1,253 @@
+__all__ = ['TuningJobPool']
+
+import os, time
+from multiprocessing import Process, cpu_count
+
+from RingerCore                   import ( Logger, NotSet, csvStr2List, retrieve_kw
+                                         , masterLevel )
+from RingerCore.LoopingBounds     import *
+
+from TuningTools.TuningJob        import TuningJob, fixLoopingBoundsCol
+from TuningTools.coreDef          import npCurrent
+
+def _availableCpus():
+  """
+    Returns the sorted list of cpus the current process may run on.
+  """
+  if hasattr( os, 'sched_getaffinity' ):
+    return sorted( os.sched_getaffinity( 0 ) )
+  return list( range( cpu_count() ) )
+
+def _pinProcess( cpus ):
+  """
+    Restricts the current process to the cpus, returning whether it succeeded.
+  """
+  if hasattr( os, 'sched_setaffinity' ):
+    os.sched_setaffinity( 0, cpus )
+    return True
+  from distutils.spawn import find_executable
+  if find_executable( 'taskset' ):
+    from subprocess import call
+    with open( os.devnull, 'w' ) as devnull:
+      return not call( [ 'taskset', '-pc', ','.join( str( cpu ) for cpu in cpus )
+                       , str( os.getpid() ) ], stdout = devnull )
+  return False
+
+def _runUnit( dataLocation, cpus, jobKw ):
+  """
+    The worker process body: pins itself to the cpus, sets the number of
+    OpenMP threads accordingly and runs the work unit TuningJob.
+  """
+  # The core is only loaded by the TuningJob, so that OpenMP reads these:
+  os.environ['OMP_NUM_THREADS'] = str( len( cpus ) )
+  if not _pinProcess( cpus ):
+    Logger.getModuleLogger( __name__ ).warning( "Couldn't pin worker %d to cpus %r."
+                                              , os.getpid(), cpus )
+  TuningJob()( dataLocation, **jobKw )
+
+class TuningJobPool( Logger ):
+  """
+    Runs a TuningJob on a pool of local worker processes.
+
+    The job is broken into independent work units, one for each
+    (etBin, etaBin, sort, neuron) of its configurations, each tuning all the
+    configuration initializations. Each work unit runs a TuningJob on its own
+    worker process, pinned to its own subset of the available cpus (which
+    are used by its OpenMP threads), and saves its own tuned discriminators
+    file (i.e. one file for each sort instead of one for each configuration).
+
+    The work units are dispatched by decreasing estimated cost (number of
+    events of the bin x neurons x initializations x hidden layers templates),
+    so that the largest ones do not delay the end of the job. The failed
+    work units are dispatched again up to maxRetries times.
+
+    When the job shares its data (see the TuningJob sharedData option), the
+    bins are written to the shared copy while estimating the work units cost,
+    which is kept until all the work units are finished.
+
+    The tuning core must not have been loaded by the calling process, since
+    the workers would then inherit its OpenMP configuration.
+  """
+
+  def __init__(self, nWorkers = None, coresPerWorker = None, maxRetries = 1,
+               pollInterval = 1., logger = None ):
+    """
+      Initialize the TuningJobPool:
+        - nWorkers [number of cpus / coresPerWorker]: The number of work units
+            running at once.
+        - coresPerWorker [number of cpus / nWorkers]: The number of cpus
+            assigned to each worker.
+        - maxRetries [1]: The number of times a failed work unit is run again.
+        - pollInterval [1.]: The interval (in seconds) between the workers
+            status checks.
+    """
+    Logger.__init__( self, logger = logger )
+    cpus = _availableCpus()
+    if coresPerWorker in (None, NotSet):
+      coresPerWorker = max( len( cpus ) // nWorkers, 1 ) if nWorkers not in (None, NotSet) else 1
+    if nWorkers in (None, NotSet):
+      nWorkers = max( len( cpus ) // coresPerWorker, 1 )
+    if nWorkers < 1 or coresPerWorker < 1:
+      self._fatal("The number of workers and of cores per worker must be at least 1.", ValueError)
+    if nWorkers * coresPerWorker > len( cpus ):
+      self._warning("Requested %d workers with %d cpus each, but only %d cpus are available. "
+                    "The workers will share cpus.", nWorkers, coresPerWorker, len( cpus ) )
+    # The cpus assigned to each worker slot:
+    self.slots = [ [ cpus[ ( slot * coresPerWorker + idx ) % len( cpus ) ]
+                     for idx in range( coresPerWorker ) ] for slot in range( nWorkers ) ]
+    self.maxRetries   = maxRetries
+    self.pollInterval = pollInterval
+    # The shared copy of the job data, when attached:
+    self.sharedData   = None
+
+  def workUnits(self, dataLocation, **kw):
+    """
+      Returns the work units of the TuningJob called with the dataLocation and
+      kw arguments, sorted by decreasing estimated cost. Each work unit is a
+      dictionary holding its 'cost', 'name' and the TuningJob arguments
+      ('jobKw') overriding the bins and the looping bounds.
+    """
+    from TuningTools.CreateData import TuningDataArchieve
+    kw = dict( kw )
+    ## Retrieve the looping bounds as the TuningJob does:
+    confFileList = retrieve_kw( kw, 'confFileList', None )
+    if not confFileList:
+      neuronBoundsCol = retrieve_kw( kw, 'neuronBoundsCol', MatlabLoopingBounds(5, 5) )
+      sortBoundsCol   = retrieve_kw( kw, 'sortBoundsCol',   NotSet )
+      initBoundsCol   = retrieve_kw( kw, 'initBoundsCol',   PythonLoopingBounds(100) )
+      if sortBoundsCol is NotSet:
+        from TuningTools.CrossValid import CrossValid, CrossValidArchieve
+        crossValidFile = kw.get( 'crossValidFile', None )
+        if crossValidFile not in (None, NotSet):
+          with CrossValidArchieve( crossValidFile ) as crossValid: pass
+        else:
+          crossValid = kw.get( 'crossValid', None ) or CrossValid( level = self.level )
+        sortBoundsCol = PythonLoopingBounds( crossValid.nSorts() )
+    else:
+      from TuningTools.CreateTuningJobFiles import TuningJobConfigArchieve
+      neuronBoundsCol = LoopingBoundsCollection()
+      sortBoundsCol   = LoopingBoundsCollection()
+      initBoundsCol   = LoopingBoundsCollection()
+      for confFile in csvStr2List( confFileList ):
+        with TuningJobConfigArchieve( confFile ) as (neuronBounds, sortBounds, initBounds):
+          neuronBoundsCol += neuronBounds
+          sortBoundsCol   += sortBounds
+          initBoundsCol   += initBounds
+    neuronBoundsCol = fixLoopingBoundsCol( neuronBoundsCol, MatlabLoopingBounds )
+    sortBoundsCol   = fixLoopingBoundsCol( sortBoundsCol,   PythonLoopingBounds )
+    initBoundsCol   = fixLoopingBoundsCol( initBoundsCol,   PythonLoopingBounds )
+    # The units keep the hidden layers templates, which are only counted here:
+    architectures = kw.get( 'architectures', NotSet )
+    if architectures in (None, NotSet):
+      architectures = [['n']]
+    elif type(architectures) not in (list, tuple):
+      architectures = [architectures]
+    ## Retrieve the bins:
+    isEtDependent, isEtaDependent, nEtBins, nEtaBins = TuningDataArchieve.load( dataLocation,
+                                                                                retrieveBinsInfo = True )
+    etBins  = retrieve_kw( kw, 'etBins',  None )
+    etaBins = retrieve_kw( kw, 'etaBins', None )
+    if type(etBins) in (int,float):
+      etBins = [etBins, etBins]
+    if type(etaBins) in (int,float):
+      etaBins = [etaBins, etaBins]
+    etBins  = MatlabLoopingBounds( etBins  ).list() if etBins  is not None else range( nEtBins  if nEtBins  is not None else 1 )
+    etaBins = MatlabLoopingBounds( etaBins ).list() if etaBins is not None else range( nEtaBins if nEtaBins is not None else 1 )
+    ## The units keep the other TuningJob arguments:
+    for key in ('neuronBoundsCol', 'sortBoundsCol', 'initBoundsCol', 'etBins', 'etaBins'):
+      kw.pop( key, None )
+    units = []
+    from itertools import product
+    for etBinIdx, etaBinIdx in product( etBins, etaBins ):
+      # Number of events of this bin:
+      if self.sharedData is not None:
+        patterns, _ = self.sharedData.load( etBinIdx if isEtDependent else None,
+                                            etaBinIdx if isEtaDependent else None )
+        nEvents = sum( pat.shape[npCurrent.odim] for pat in patterns )
+        del patterns
+      else:
+        # The workers load the patterns themselves, only their shapes are needed:
+        nEvents = sum( shape[npCurrent.odim] for shape in 
+                       TuningDataArchieve.loadPatternsShape( dataLocation, 
+                                                             etBinIdx = etBinIdx if isEtDependent else None,
+                                                             etaBinIdx = etaBinIdx if isEtaDependent else None ) )
+      binKw = {}
+      if isEtDependent:  binKw['etBins']  = etBinIdx
+      if isEtaDependent: binKw['etaBins'] = etaBinIdx
+      for neuronBounds, sortBounds, initBounds in zip( neuronBoundsCol, sortBoundsCol, initBoundsCol ):
+        for sort, neuron in product( sortBounds(), neuronBounds() ):
+          unitKw = dict( kw, neuronBoundsCol = MatlabLoopingBounds( neuron, neuron )
+                           , sortBoundsCol   = MatlabLoopingBounds( sort, sort )
+                           , initBoundsCol   = initBounds
+                           , **binKw )
+          units.append( { 'cost'  : nEvents * neuron * len( initBounds ) * len( architectures )
+                        , 'name'  : 'et%04d.eta%04d.hn%04d.s%04d' % ( etBinIdx, etaBinIdx, neuron, sort )
+                        , 'jobKw' : unitKw } )
+    units.sort( key = lambda unit: unit['cost'], reverse = True )
+    return units
+
+  def __call__(self, dataLocation, **kw):
+    """
+      Run the TuningJob on dataLocation with the kw arguments (see TuningJob
+      for their description) on the worker processes.
+    """
+    self.level = retrieve_kw( kw, 'level', masterLevel() )
+    kw['level'] = self.level
+    if kw.get( 'sharedData', None ) not in (None, NotSet):
+      from TuningTools.SharedData import SharedTuningData
+      self.sharedData = SharedTuningData( dataLocation, kw['sharedData'], level = self.level )
+    try:
+      self._run( dataLocation, self.workUnits( dataLocation, **kw ) )
+    finally:
+      if self.sharedData is not None:
+        self.sharedData.release()
+        self.sharedData = None
+
+  def _run(self, dataLocation, pending):
+    """
+      Runs the pending work units on the workers.
+    """
+    nUnits = len( pending )
+    totalCost = float( sum( unit['cost'] for unit in pending ) ) or 1.
+    self._info( "Running %d work units on %d workers (%d cpus each).",
+                nUnits, len( self.slots ), len( self.slots[0] ) )
+    running = {} # slot -> ( process, unit, start time )
+    failed = []
+    doneCost = 0
+    start = time.time()
+    try:
+      while pending or running:
+        # Dispatch the pending units (the most expensive first) to the free slots:
+        for slot in range( len( self.slots ) ):
+          if slot in running or not pending: continue
+          unit = pending.pop( 0 )
+          proc = Process( target = _runUnit, args = ( dataLocation, self.slots[slot], unit['jobKw'] ) )
+          proc.start()
+          running[slot] = ( proc, unit, time.time() )
+          self._debug( "Started work unit %s on cpus %r (pid %d).", unit['name'], self.slots[slot], proc.pid )
+        time.sleep( self.pollInterval )
+        for slot, ( proc, unit, unitStart ) in list( running.items() ):
+          if proc.is_alive(): continue
+          proc.join()
+          del running[slot]
+          if proc.exitcode == 0:
+            doneCost += unit['cost']
+            self._info( "Work unit %s finished in %.1f s (%.1f%% of the job done).",
+                        unit['name'], time.time() - unitStart, 100. * doneCost / totalCost )
+          else:
+            unit['retries'] = unit.get( 'retries', 0 ) + 1
+            if unit['retries'] <= self.maxRetries:
+              self._warning( "Work unit %s failed (exit code %d). Running it again (retry %d of %d).",
+                             unit['name'], proc.exitcode, unit['retries'], self.maxRetries )
+              pending.insert( 0, unit )
+            else:
+              self._logger.error( "Work unit %s failed (exit code %d).", unit['name'], proc.exitcode )
+              failed.append( unit )
+    except BaseException:
+      for proc, _, _ in running.values():
+        proc.terminate()
+      raise
+    self._info( "Finished %d work units in %.1f s.", nUnits - len( failed ), time.time() - start )
+    if failed:
+      self._fatal( "%d work unit(s) failed: %s" % ( len( failed ), ', '.join( unit['name'] for unit in failed ) ),
+                   RuntimeError )
@@ -14,6 +14,111 @@ def _checkData(data,target=None):
   if target is not None and not npCurrent.check_order(target):
     raise TypeError('order of numpy target is not fortran!')
 
+def _toStorage(data, storage, logger, directory = None, chunkSize = 16384):
+  """
+    Returns the patterns in data held on the storage type: 'float32' keeps
+    them as they are, 'float16' converts them to numpy.float16 and
+    'bfloat16' to numpy.uint16 arrays holding the bfloat16 values (rounded
+    to the nearest even). The patterns memory layout is kept.
+
+    The float16 range is limited to 65504, so its patterns must be
+    normalized: the logger raises if any finite value is out of it, instead
+    of letting it overflow to infinity. The bfloat16 range is the float32
+    one.
+
+    The patterns are converted by chunks of chunkSize events, so that only
+    the converted arrays and the temporaries of a chunk are allocated. When
+    directory is set, the memory-mapped patterns are converted to arrays
+    mapped from temporary files written on it (see StreamData.newMemmap).
+  """
+  if storage == 'float32':
+    return data
+  import os
+  maxFloat16 = np.finfo( np.float16 ).max
+  ret = []
+  dtype = np.float16 if storage == 'float16' else np.uint16
+  for pat in data:
+    path = None
+    if directory is not None and isinstance( pat, np.memmap ):
+      from TuningTools.StreamData import newMemmap
+      out, path = newMemmap( directory, pat.shape, dtype, np.isfortran( pat ) )
+    else:
+      out = np.empty_like( pat, dtype = dtype, subok = False )
+    try:
+      nEvents = pat.shape[npCurrent.odim]
+      for start in range( 0, nEvents, chunkSize ):
+        sl = npCurrent.access( oidx = slice( start, min( start + chunkSize, nEvents ) ) )
+        chunk = pat[sl]
+        if storage == 'float16':
+          absChunk = np.abs( chunk )
+          absChunk[ ~np.isfinite( absChunk ) ] = 0.
+          maxValue = absChunk.max() if absChunk.size else 0.
+          del absChunk
+          if maxValue > maxFloat16:
+            logger._fatal( ("The patterns hold values up to %g, which overflow the float16 storage "
+                            "(up to %g). Normalize them or use the bfloat16 storage."), 
+                           maxValue, maxFloat16, ValueError )
+          out[sl] = chunk
+        else:
+          bits = np.array( chunk, dtype = np.float32, order = 'K' ).view( np.uint32 )
+          # Keep NaNs as (quiet) NaNs, since rounding could turn them into infinities:
+          nan = np.isnan( chunk )
+          nanBits = ( bits[nan] >> 16 ) | 0x40
+          # Round to the nearest even (only NaNs could overflow the uint32 sum):
+          roundBits = ( bits >> 16 ) & 1
+          roundBits += 0x7FFF
+          bits += roundBits
+          del roundBits
+          bits >>= 16
+          outChunk = out[sl]
+          outChunk[...] = bits
+          outChunk[nan] = nanBits
+          del bits, nan, nanBits
+    except:
+      if path is not None: os.remove( path )
+      raise
+    if path is not None:
+      from TuningTools.StreamData import mapReadOnly
+      out.flush(); del out
+      out = mapReadOnly( path )
+    ret.append( out )
+  return ret
+
+def _toMemmap(data, directory, chunkSize = 16384):
+  """
+    Returns the patterns in data as read-only numpy.memmap arrays backed by
+    temporary .npy files written on directory (see StreamData.mapReadOnly).
+    The patterns which already are memory-mapped are kept.
+  """
+  import os
+  from TuningTools.StreamData import newMemmap, mapReadOnly
+  ret = []
+  for pat in data:
+    if isinstance( pat, np.memmap ):
+      ret.append( pat )
+      continue
+    out, path = newMemmap( directory, pat.shape, pat.dtype, np.isfortran( pat ) )
+    try:
+      nEvents = pat.shape[npCurrent.odim]
+      for start in range( 0, nEvents, chunkSize ):
+        sl = npCurrent.access( oidx = slice( start, min( start + chunkSize, nEvents ) ) )
+        out[sl] = pat[sl]
+      out.flush(); del out
+    except:
+      os.remove( path )
+      raise
+    ret.append( mapReadOnly( path ) )
+  return ret
+
+def _mergeEvolution(previous, evolution):
+  """
+    Returns the training evolution of a resumed training: the evolution held
+    by the training state it was resumed from (previous), followed by the
+    evolution of the epochs trained after it.
+  """
+  return dict( ( key, np.concatenate( [ previous[key], evolution[key] ] ) ) 
+               for key in evolution.keys() )
+
 class TuningWrapper(Logger):
   """
     TuningTool is the higher level representation of the TuningToolPyWrapper class.
@@ -35,12 +140,39 @@ class TuningWrapper(Logger):
     maxFail                    = retrieve_kw( kw, 'maxFail',               50                     )
     self.useTstEfficiencyAsRef = retrieve_kw( kw, 'useTstEfficiencyAsRef', False                  )
     self.sortIdx = None
+    # Storage of the datasets held by the core (only FastNet supports others):
+    self.dataStorage = 'float32'
+    # Directory where the datasets are written to be memory-mapped by the core:
+    self.streamDir   = None
     if coreConf() is TuningToolCores.FastNet:
       seed = retrieve_kw( kw, 'seed', None )
       self._core = coreframe( level = LoggingLevel.toC(self.level), seed = seed )
       self._core.trainFcn    = retrieve_kw( kw, 'algorithmName', 'trainrp' )
       self._core.showEvo     = retrieve_kw( kw, 'showEvo',       50        )
       self._core.multiStop   = retrieve_kw( kw, 'doMultiStop',   True      )
+      if retrieve_kw( kw, 'exactRoc', False ):
+        # Use every distinct output as a ROC cut:
+        self._core.rocResolution      = 0.
+        self._core.validRocResolution = 0.
+      self._core.validEvery    = retrieve_kw( kw, 'validEvery',    1         )
+      self._core.testOnBest    = retrieve_kw( kw, 'testOnBest',    False     )
+      self._core.validFraction = retrieve_kw( kw, 'validFraction', 1.        )
+      self._core.fastTanh      = retrieve_kw( kw, 'fastTanh',      False     )
+      self._core.pipelineThreads = retrieve_kw( kw, 'pipelineThreads', 0     )
+      self._core.sampling      = retrieve_kw( kw, 'sampling',      'pattern' )
+      self._core.samplingWeights = retrieve_kw( kw, 'samplingWeights', []    )
+      self._core.hardFraction  = retrieve_kw( kw, 'hardFraction',  .5        )
+      self.dataStorage         = retrieve_kw( kw, 'dataStorage',   'float32' )
+      if not self.dataStorage in ('float32', 'float16', 'bfloat16'):
+        self._fatal("Unknown data storage: %s", self.dataStorage)
+      self.streamDir           = retrieve_kw( kw, 'streamDir',     None      )
+      self._core.streamBlock   = retrieve_kw( kw, 'streamBlock',   1024 if self.streamDir else 0 )
+      self._core.deterministic = retrieve_kw( kw, 'deterministic', False     )
+      self._core.parallelInits = retrieve_kw( kw, 'parallelInits', 1         )
+      # Optimiser hyper-parameters (the core defaults are kept if not set):
+      for prop in ('learningRate', 'momentum', 'beta1', 'beta2', 'epsilon'):
+        val = retrieve_kw( kw, prop, NotSet )
+        if val is not NotSet: setattr( self._core, prop, val )
       self._core.epochs      = epochs
       self._core.maxFail     = maxFail
       # TODO Add properties
@@ -103,6 +235,25 @@ class TuningWrapper(Logger):
     self._trnHandler = self._emptyHandler
     self._trnTarget = self._emptyTarget
 
+  def releaseData(self):
+    """
+    Release the training, validation and test datasets, including the core
+    references to them, so that their memory may be freed before the next
+    datasets are set.
+    """
+    self.release()
+    self._valData = self._tstData = self._emptyData
+    self._valHandler = self._tstHandler = self._emptyHandler
+    self._valTarget = self._tstTarget = self._emptyTarget
+    if coreConf() is TuningToolCores.keras:
+      self._historyCallback.trnData = None
+      self._historyCallback.valData = None
+      self._historyCallback.tstData = None
+    elif coreConf() is TuningToolCores.FastNet:
+      self._core.setTrainData( [] )
+      self._core.setValData( [] )
+      self._core.setTestData( [] )
+
   @property
   def batchSize(self):
     """
@@ -264,6 +415,8 @@ class TuningWrapper(Logger):
       self._trnTarget = target
       self._historyCallback.trnData = (data, target)
     elif coreConf() is TuningToolCores.FastNet:
+      data = _toStorage( data, self.dataStorage, self, self.streamDir )
+      if self.streamDir: data = _toMemmap( data, self.streamDir )
       self._trnData = data
       self._core.setTrainData( data )
 
@@ -288,6 +441,8 @@ class TuningWrapper(Logger):
       self._valTarget = target
       self._historyCallback.valData = (data, target)
     elif coreConf() is TuningToolCores.FastNet:
+      data = _toStorage( data, self.dataStorage, self, self.streamDir )
+      if self.streamDir: data = _toMemmap( data, self.streamDir )
       self._valData = data
       self._core.setValData( data )
 
@@ -312,22 +467,30 @@ class TuningWrapper(Logger):
       self._tstTarget = target
       self._historyCallback.tstData = (data, target)
     elif coreConf() is TuningToolCores.FastNet:
+      data = _toStorage( data, self.dataStorage, self, self.streamDir )
+      if self.streamDir: data = _toMemmap( data, self.streamDir )
       self._tstData = data
-      self._core.setValData( data )
+      self._core.setTestData( data )
 
   def newff(self, nodes, funcTrans = NotSet):
     """
       Creates new feedforward neural network
+
+      The FastNet core accepts any number of hidden layers, and either one
+      output or one output for each pattern. The default transfer function
+      is the hyperbolic tangent on all layers.
     """
     self._debug('Initalizing newff...')
     if coreConf() is TuningToolCores.ExMachina:
-      if funcTrans is NotSet: funcTrans = ['tanh', 'tanh']
+      if funcTrans is NotSet: funcTrans = ['tanh'] * ( len(nodes) - 1 )
       self._model = self._core.FeedForward(nodes, funcTrans, 'nw')
     elif coreConf() is TuningToolCores.FastNet:
-      if funcTrans is NotSet: funcTrans = ['tansig', 'tansig']
+      if funcTrans is NotSet: funcTrans = ['tansig'] * ( len(nodes) - 1 )
       if not self._core.newff(nodes, funcTrans, self._core.trainFcn):
         self._fatal("Couldn't allocate new feed-forward!")
     elif coreConf() is TuningToolCores.keras:
+      if len(nodes) != 3:
+        self._fatal("The keras core only supports networks with one hidden layer.", NotImplementedError)
       from keras.models import Sequential
       from keras.layers.core import Dense, Dropout, Activation
       model = Sequential()
@@ -360,14 +523,9 @@ class TuningWrapper(Logger):
     # Holder of the discriminators:
     tunedDiscrList = []
     tuningInfo = {}
+    discriminatorPyWrapperList = None
 
-    # Set batch size:
-    if self.batchMethod is BatchSizeMethod.MinClassSize:
-      self.__batchSize( self._bkgSize if self._sgnSize > self._bkgSize else self._sgnSize )
-    elif self.batchMethod is BatchSizeMethod.HalfSizeSignalClass:
-      self.__batchSize( self._sgnSize // 2 )
-    elif self.batchMethod is BatchSizeMethod.OneSample:
-      self.__batchSize( 1 )
+    self.__setBatchSizeFromMethod()
 
     rawDictTempl = { 'discriminator' : None,
                      'benchmark' : None }
@@ -397,27 +555,135 @@ class TuningWrapper(Logger):
 
     elif coreConf() is TuningToolCores.FastNet:
       self._debug('executing train_c')
-      [discriminatorPyWrapperList, trainDataPyWrapperList] = self._core.train_c()
+      [discriminatorPyWrapperList, trainEvolution] = self._core.train_c()
       self._debug('finished train_c')
       # Transform model tolist of  dict
-
-      if self.doMultiStop:
-        for idx, discr in enumerate( discriminatorPyWrapperList ):
-          rawDictTempl['discriminator'] = self.__discr_to_dict( discr ) 
-          rawDictTempl['benchmark'] = self.references[idx]
-          # FIXME This will need to be improved if set to tune for multiple
-          # Pd and Pf values.
-          tunedDiscrList.append( deepcopy( rawDictTempl ) )
-      else:
-        rawDictTempl['discriminator'] = self.__discr_to_dict( discriminatorPyWrapperList[0] ) 
-        rawDictTempl['benchmark'] = self.references[0]
-        if self.useTstEfficiencyAsRef and self.sortIdx is not None:
-          rawDictTempl['sortIdx'] = self.sortIdx
-        tunedDiscrList.append( deepcopy( rawDictTempl ) )
-      tuningInfo = DataTrainEvolution( trainDataPyWrapperList ).toRawObj()
+      tunedDiscrList, tuningInfo = self.__fastnet_tuned_discr( discriminatorPyWrapperList, 
+                                                               trainEvolution )
       # TODO
     # cores
 
+    self.__retrieve_performance( tunedDiscrList, discriminatorPyWrapperList )
+
+    self._debug("Finished train_c on python side.")
+
+    return tunedDiscrList, tuningInfo
+  # end of train_c
+
+  def train_many_c(self, nInits, checkpoint = None, interval = 0., resumeState = None):
+    """
+      Train nInits initializations of the feedforward neural network created
+      by newff, returning a list with the train_c output (tunedDiscrList,
+      tuningInfo) of each initialization.
+
+      FastNet trains all initializations in a single core call sharing the
+      same training datasets, where each initialization after the first one
+      starts from new random weights. When the parallelInits property is
+      above one, that number of initializations is trained at once. Other
+      cores are only able to train the current model once.
+
+      When checkpoint is set (FastNet only), it is called while training as:
+        - checkpoint( init, state, None ): with the training state of the
+          initialization, at most every interval seconds;
+        - checkpoint( init, None, (tunedDiscrList, tuningInfo) ): with the
+          output of each initialization, once it and the previous ones are
+          finished.
+      Only the first unfinished initialization has its state checkpointed.
+      A state may be given as resumeState to a later call in order to resume
+      the training of its initialization (as the first one of the call).
+    """
+    if coreConf() is not TuningToolCores.FastNet:
+      if nInits != 1:
+        self._fatal("Training many initializations at once is only available for the FastNet core.")
+      if checkpoint is not None or resumeState is not None:
+        self._fatal("Training checkpoints are only available for the FastNet core.", NotImplementedError)
+      return [self.train_c()]
+
+    self.__setBatchSizeFromMethod()
+
+    output = []
+    def treatOutput( coreOutput ):
+      discriminatorPyWrapperList, trainEvolution = coreOutput
+      if resumeState is not None and not output:
+        trainEvolution = _mergeEvolution( resumeState['evolution'], trainEvolution )
+      tunedDiscrList, tuningInfo = self.__fastnet_tuned_discr( discriminatorPyWrapperList, 
+                                                               trainEvolution )
+      self.__retrieve_performance( tunedDiscrList, discriminatorPyWrapperList )
+      output.append( (tunedDiscrList, tuningInfo) )
+      return output[-1]
+
+    if checkpoint is not None:
+      def coreCheckpoint( init, state, coreOutput ):
+        if coreOutput is not None:
+          checkpoint( init, None, treatOutput( coreOutput ) )
+        else:
+          # The state must hold the full evolution to be resumed again:
+          if resumeState is not None and not init:
+            state['evolution'] = _mergeEvolution( resumeState['evolution'], state['evolution'] )
+          checkpoint( init, state, None )
+      self._core.setCheckpoint( coreCheckpoint, interval )
+    if resumeState is not None:
+      self._core.setResumeState( resumeState )
+    self._debug('executing train_many_c')
+    try:
+      coreOutput = self._core.train_many_c( nInits )
+    finally:
+      self._core.setCheckpoint( None, 0. )
+      self._core.setResumeState( None )
+    self._debug('finished train_many_c')
+
+    if checkpoint is None:
+      for initOutput in coreOutput:
+        treatOutput( initOutput )
+
+    self._debug("Finished train_many_c on python side.")
+    return output
+  # end of train_many_c
+
+  def __setBatchSizeFromMethod(self):
+    """
+    Set batch size according to the batch method
+    """
+    if self.batchMethod is BatchSizeMethod.MinClassSize:
+      self.__batchSize( self._bkgSize if self._sgnSize > self._bkgSize else self._sgnSize )
+    elif self.batchMethod is BatchSizeMethod.HalfSizeSignalClass:
+      self.__batchSize( self._sgnSize // 2 )
+    elif self.batchMethod is BatchSizeMethod.OneSample:
+      self.__batchSize( 1 )
+
+  def __fastnet_tuned_discr(self, discriminatorPyWrapperList, trainEvolution):
+    """
+    Transform FastNet core training output into the tuned discriminators list
+    and tuning information
+    """
+    from copy import deepcopy
+    tunedDiscrList = []
+    rawDictTempl = { 'discriminator' : None,
+                     'benchmark' : None }
+    if self.doMultiStop:
+      for idx, discr in enumerate( discriminatorPyWrapperList ):
+        rawDictTempl['discriminator'] = self.__discr_to_dict( discr ) 
+        rawDictTempl['benchmark'] = self.references[idx]
+        # FIXME This will need to be improved if set to tune for multiple
+        # Pd and Pf values.
+        tunedDiscrList.append( deepcopy( rawDictTempl ) )
+    else:
+      rawDictTempl['discriminator'] = self.__discr_to_dict( discriminatorPyWrapperList[0] ) 
+      rawDictTempl['benchmark'] = self.references[0]
+      if self.useTstEfficiencyAsRef and self.sortIdx is not None:
+        rawDictTempl['sortIdx'] = self.sortIdx
+      tunedDiscrList.append( deepcopy( rawDictTempl ) )
+    tuningInfo = DataTrainEvolution( trainEvolution ).toRawObj()
+    if len( tuningInfo['trn_events_per_sec'] ):
+      self._debug('Training throughput: %.1f events/s (threads utilisation: %.1f%%).',
+          np.mean( tuningInfo['trn_events_per_sec'] ),
+          100. * np.mean( tuningInfo['trn_thread_util'] ) )
+    return tunedDiscrList, tuningInfo
+
+  def __retrieve_performance(self, tunedDiscrList, discriminatorPyWrapperList = None):
+    """
+    Add the operation and test ROCs to the tuned discriminators
+    """
     # Retrieve performance:
     opRoc, tstRoc = Roc(), Roc() 
     for idx, tunedDiscrDict in enumerate(tunedDiscrList):
@@ -472,11 +738,6 @@ class TuningWrapper(Logger):
           if coreConf() is TuningToolCores.FastNet:
             break
 
-    self._debug("Finished train_c on python side.")
-
-    return tunedDiscrList, tuningInfo
-  # end of train_c
-
   def __discr_to_dict(self, model):
     """
     Transform discriminators to dictionary
@@ -490,18 +751,12 @@ class TuningWrapper(Logger):
                     'bias':    np.concatenate( [hb.reshape(-1,order='F'), ob.reshape(-1,order='F')] ),
                   }
     elif coreConf() is TuningToolCores.FastNet:
-      n = []; w = []; b = [];
-      for l in range( model.getNumLayers() ):
-        n.append( model.getNumNodes(l) )
-      for l in range( len(n) - 1 ):
-        for j in range( n[l+1] ):
-          for k in range( n[l] ):
-            w.append( model.getWeight(l,j,k) )
-          b.append( model.getBias(l,j) )
+      n = [ model.getNumNodes(l) for l in range( model.getNumLayers() ) ]
+      # The core returns the parameters as numpy arrays on the loadff order:
       discrDict = {
                     'nodes':   npCurrent.int_array(n),
-                    'weights': npCurrent.fp_array(w),
-                    'bias':    npCurrent.fp_array(b)
+                    'weights': npCurrent.fp_array( model.weights() ),
+                    'bias':    npCurrent.fp_array( model.bias() )
                   }
     self._debug('Extracted discriminator to raw dictionary.')
     return discrDict
@@ -22,6 +22,21 @@ from .TuningJob import *
 from . import TuningWrapper
 __all__.extend( TuningWrapper.__all__        )
 from .TuningWrapper import *
+from . import TuningJobPool
+__all__.extend( TuningJobPool.__all__        )
+from .TuningJobPool import *
+from . import SharedData
+__all__.extend( SharedData.__all__           )
+from .SharedData import *
+from . import DataCache
+__all__.extend( DataCache.__all__            )
+from .DataCache import *
+from . import StreamData
+__all__.extend( StreamData.__all__           )
+from .StreamData import *
+from . import Checkpoint
+__all__.extend( Checkpoint.__all__           )
+from .Checkpoint import *
 from . import CrossValid
 __all__.extend( CrossValid.__all__           )
 from .CrossValid import *
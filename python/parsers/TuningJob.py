@@ -29,6 +29,23 @@ tuningOptArgs.add_argument('-op','--operation', default = None, type=RingerOpera
                      level or what is the offline operation point reference.""" )
 tuningOptArgs.add_argument('-r','--refFile', default = None, 
                      help = """The Ringer references to set the discriminator point.""")
+tuningOptArgs.add_argument('--shared-data', nargs='?', const='/dev/shm', default = NotSet, 
+                     help = """Share the raw patterns of each bin with the other
+                     jobs of the node tuning the same data, holding them on this
+                     directory (/dev/shm when no directory is given).""")
+tuningOptArgs.add_argument('--data-cache', default = NotSet, 
+                     help = """Directory caching the pre-processed datasets of
+                     each cross-validation sort, which are reused by the jobs
+                     tuning the same bin and sort.""")
+tuningOptArgs.add_argument('--checkpoint-interval', type=float, default = NotSet, 
+                     help = """Interval (in seconds) between the writes of the
+                     tuning checkpoint, which holds the finished initializations
+                     and the training state of the running one. No checkpoint is
+                     written when not specified.""")
+tuningOptArgs.add_argument('--resume', type=BooleanStr, default = NotSet, 
+                     help = """Resume an interrupted job, skipping the
+                     configurations already saved on the output directory and
+                     the initializations held on their checkpoints.""")
 tuningCrossVars = tuningJobParser.add_argument_group( "Cross-validation configuration", "")
 # TODO Make these options mutually exclusive
 tuningCrossVars.add_argument('-x', '--crossFile', action='store', default = NotSet, 
@@ -69,6 +86,15 @@ tuningLoopVars.add_argument('--sortBounds', nargs='+', type=int, default = None,
                           start from 0.  I.e. 5 2 9 leads to [5 7] and 50 leads
                           to range(50)
                               """)
+tuningLoopVars.add_argument('--architectures', nargs='+', default = NotSet,
+                       help = """
+                          The hidden layers templates tuned for each neuron,
+                          each one a comma separated list with the number of
+                          neurons of each hidden layer, where n is replaced by
+                          the current neuron. I.e. n n,5 n,n tunes networks
+                          with one hidden layer, with a second hidden layer of
+                          5 neurons and with two hidden layers of n neurons.
+                              """)
 tuningLoopVars.add_argument('--initBounds', nargs='+', type=int, default = None,
                        help = """
                           Input a sequential bounded list using seq format to
@@ -78,6 +104,25 @@ tuningLoopVars.add_argument('--initBounds', nargs='+', type=int, default = None,
                           start from 0.  I.e. 5 2 9 leads to [5 7] and 50 leads
                           to range(50)
                               """)
+tuningPoolVars = tuningJobParser.add_argument_group( "Local worker pool configuration", "")
+tuningPoolVars.add_argument('--workers', type=int, default = NotSet,
+                       help = """
+                          Run the job on this number of local worker
+                          processes, each tuning one (bin, sort, neuron) work
+                          unit at a time on its own cpus. When not specified
+                          (and the cores per worker are neither), the job runs
+                          on this process.
+                              """)
+tuningPoolVars.add_argument('--cores-per-worker', type=int, default = NotSet,
+                       help = """
+                          The number of cpus assigned to each worker. When not
+                          specified, the available cpus are split among the
+                          workers.
+                              """)
+tuningPoolVars.add_argument('--max-retries', type=int, default = NotSet,
+                       help = """
+                          The number of times a failed work unit is run again.
+                              """)
 tuningPPVars = tuningJobParser.add_argument_group( "Pre-processing configuration", "")
 tuningPPVars.add_argument('-pp','--ppFile', default = NotSet,
         help = """ The file containing the pre-processing collection to apply. """)
@@ -145,7 +190,97 @@ if hasFastnet:
   fastNetArgs.add_argument('--do-multi-stop', default = NotSet, 
             help = """Tune classifier using P_D, P_F and
             SP when set to True. Uses only SP when set to False.""")
+  fastNetArgs.add_argument('--exact-roc', type=BooleanStr, default = NotSet, 
+            help = """Use every distinct discriminator output as a ROC cut
+            instead of the fixed resolution threshold grid.""")
+  fastNetArgs.add_argument('--valid-every', type=int, default = NotSet, 
+            help = """Evaluate the validation set only every N epochs.""")
+  fastNetArgs.add_argument('--test-on-best', type=BooleanStr, default = NotSet, 
+            help = """Only evaluate the test set on the epochs where a new
+            best network was found.""")
+  fastNetArgs.add_argument('--valid-fraction', type=float, default = NotSet, 
+            help = """Fraction of each pattern validation set used by the
+            stop criteria.""")
+  fastNetArgs.add_argument('--fast-tanh', type=BooleanStr, default = NotSet, 
+            help = """Use a vectorized approximation of the hyperbolic
+            tangent (absolute error below 1e-6) instead of the exact one.""")
+  fastNetArgs.add_argument('--pipeline-threads', type=int, default = NotSet, 
+            help = """Number of threads evaluating each epoch while the
+            remaining ones train the next epoch (0 disables it).""")
+  fastNetArgs.add_argument('--sampling', default = NotSet, 
+            choices = ['pattern', 'stratified', 'weighted', 'hardnegative'],
+            help = """How the training events of each epoch are selected:
+            batch size events of each pattern (pattern), the same number of
+            events split on the training set class proportions (stratified)
+            or on the sampling weights (weighted), or as pattern but drawing
+            part of the background events among the ones with the largest
+            errors (hardnegative).""")
+  fastNetArgs.add_argument('--sampling-weights', type=float, nargs='+', default = NotSet, 
+            help = """The weight of each pattern used by the weighted
+            sampling.""")
+  fastNetArgs.add_argument('--hard-fraction', type=float, default = NotSet, 
+            help = """Fraction of the background events drawn among the
+            ones with the largest errors by the hardnegative sampling.""")
+  fastNetArgs.add_argument('--data-storage', default = NotSet, 
+            choices = ['float32', 'float16', 'bfloat16'],
+            help = """Storage of the datasets on the core. The float16 and
+            bfloat16 storages halve the datasets memory, the events being
+            widened to float32 when propagated. The float16 storage is limited
+            to values up to 65504, requiring normalized patterns, while
+            bfloat16 keeps the float32 range.""")
+  fastNetArgs.add_argument('--stream-dir', default = NotSet, 
+            help = """Directory where the datasets of each sort are written
+            to be memory-mapped during the tuning, so that only the events
+            being propagated need to be resident while tuning. The sorts of
+            box-based cross-validation methods without subsets are split and
+            pre-processed by chunks of events from the memory-mapped raw
+            patterns, so that bins larger than the memory can be tuned when
+            the pre-processing parameters can be taken by chunks (i.e. no
+            PCA).""")
+  fastNetArgs.add_argument('--stream-block', type=int, default = NotSet, 
+            help = """Number of consecutive training events drawn at once
+            and read ahead from the memory-mapped datasets.""")
+  fastNetArgs.add_argument('--deterministic', type=BooleanStr, default = NotSet, 
+            help = """Make the tuned networks independent of the number of
+            threads, at a small throughput cost.""")
+  fastNetArgs.add_argument('--parallel-inits', type=int, default = NotSet, 
+            help = """Number of initializations trained at once, with the
+            threads split among them (1 trains them one after the
+            other).""")
+  fastNetArgs.add_argument('--learning-rate', type=float, default = NotSet, 
+            help = """The step size of the traingd, traingdm and trainadam
+            algorithms.""")
+  fastNetArgs.add_argument('--momentum', type=float, default = NotSet, 
+            help = """The momentum of the traingdm algorithm.""")
+  fastNetArgs.add_argument('--beta1', type=float, default = NotSet, 
+            help = """The gradients moving average decay rate of the
+            trainadam algorithm.""")
+  fastNetArgs.add_argument('--beta2', type=float, default = NotSet, 
+            help = """The squared gradients moving average decay rate of the
+            trainadam algorithm.""")
+  fastNetArgs.add_argument('--epsilon', type=float, default = NotSet, 
+            help = """The denominator stability term of the trainadam
+            algorithm.""")
 else:
-  tuningJobParser.set_defaults( seed          = NotSet
-                              , do_multi_stop = NotSet )
+  tuningJobParser.set_defaults( seed           = NotSet
+                              , do_multi_stop  = NotSet
+                              , exact_roc      = NotSet
+                              , valid_every    = NotSet
+                              , test_on_best   = NotSet
+                              , valid_fraction = NotSet
+                              , fast_tanh      = NotSet
+                              , pipeline_threads = NotSet
+                              , sampling         = NotSet
+                              , sampling_weights = NotSet
+                              , hard_fraction    = NotSet
+                              , data_storage     = NotSet
+                              , stream_dir       = NotSet
+                              , stream_block     = NotSet
+                              , deterministic    = NotSet
+                              , parallel_inits   = NotSet
+                              , learning_rate    = NotSet
+                              , momentum         = NotSet
+                              , beta1            = NotSet
+                              , beta2            = NotSet
+                              , epsilon          = NotSet )
 
@@ -28,8 +28,14 @@ logger = Logger.getModuleLogger( __name__, args.output_level )
 printArgs( args, logger.debug )
 
 # Submit job:
-from TuningTools import TuningJob
-tuningJob = TuningJob()
+if args.workers is NotSet and args.cores_per_worker is NotSet:
+  from TuningTools import TuningJob
+  tuningJob = TuningJob()
+else:
+  from TuningTools import TuningJobPool
+  tuningJob = TuningJobPool( nWorkers       = args.workers,
+                             coresPerWorker = args.cores_per_worker,
+                             maxRetries     = 1 if args.max_retries is NotSet else args.max_retries )
 tuningJob( 
            args.data, 
            level             = args.output_level,
@@ -39,6 +45,10 @@ tuningJob(
            operationPoint    = args.operation,
            refFile           = args.refFile,
            clusterFile       = args.clusterFile,
+           sharedData        = args.shared_data,
+           dataCache         = args.data_cache,
+           checkpointInterval = args.checkpoint_interval,
+           resume            = args.resume,
            # Cross validation args
 					 crossValidFile    = args.crossFile,
 					 crossValidMethod  = args.crossValidMethod,
@@ -57,11 +67,31 @@ tuningJob(
            batchMethod       = args.batch_method,
            seed              = args.seed,
            doMultiStop       = args.do_multi_stop,
+           exactRoc          = args.exact_roc,
+           validEvery        = args.valid_every,
+           testOnBest        = args.test_on_best,
+           validFraction     = args.valid_fraction,
+           fastTanh          = args.fast_tanh,
+           pipelineThreads   = args.pipeline_threads,
+           sampling          = args.sampling,
+           samplingWeights   = args.sampling_weights,
+           hardFraction      = args.hard_fraction,
+           dataStorage       = args.data_storage,
+           streamDir         = args.stream_dir,
+           streamBlock       = args.stream_block,
+           deterministic     = args.deterministic,
+           parallelInits     = args.parallel_inits,
+           learningRate      = args.learning_rate,
+           momentum          = args.momentum,
+           beta1             = args.beta1,
+           beta2             = args.beta2,
+           epsilon           = args.epsilon,
            # ExMachina CORE args
            algorithmName     = args.algorithm_name,
            networkArch       = args.network_arch,
            costFunction      = args.cost_function,
            shuffle           = args.shuffle,
 					 # Looping configuration args
+           architectures     = args.architectures,
            **conf_kw
 				 )
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""
+Check that the pre-processed data cache keys tell apart the pre-processing
+chains which differ only on their settings.
+"""
+
+import sys, os, shutil, tempfile
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+from TuningTools.CrossValid import CrossValid
+from TuningTools.PreProc import PreProcChain, RingerEtaMu, Norm1
+from TuningTools.DataCache import TuningDataCache
+
+tmpDir = tempfile.mkdtemp()
+try:
+  dataLocation = os.path.join( tmpDir, 'data.npz' )
+  open( dataLocation, 'w' ).close()
+  cache = TuningDataCache( dataLocation, os.path.join( tmpDir, 'cache' ) )
+  crossValid = CrossValid( nSorts = 2, nBoxes = 10, nTrain = 6, nValid = 4, seed = 0 )
+
+  def key( ppChain, sort = 0 ):
+    return cache.key( 0, 0, ppChain, crossValid, sort )
+
+  failed = False
+  for desc, lhs, rhs, same in \
+      [ ( 'same chain settings',
+          PreProcChain( RingerEtaMu( etamax = 2.5 ) ), PreProcChain( RingerEtaMu( etamax = 2.5 ) ), True )
+      , ( 'RingerEtaMu etamax',
+          PreProcChain( RingerEtaMu( etamax = 2.5 ) ), PreProcChain( RingerEtaMu( etamax = 2.47 ) ), False )
+      , ( 'RingerEtaMu pileupThreshold',
+          PreProcChain( RingerEtaMu( pileupThreshold = 60 ) ), PreProcChain( RingerEtaMu( pileupThreshold = 40 ) ), False )
+      , ( 'pre-processing type',
+          PreProcChain( RingerEtaMu() ), PreProcChain( Norm1() ), False )
+      ]:
+    if ( key( lhs ) == key( rhs ) ) != same:
+      mainLogger.error( "Cache keys %s on the %s.", 'differ' if same else 'match', desc )
+      failed = True
+    else:
+      mainLogger.info( "Cache keys %s on the %s.", 'match' if same else 'differ', desc )
+  if key( PreProcChain( Norm1() ), 0 ) == key( PreProcChain( Norm1() ), 1 ):
+    mainLogger.error( "Cache keys match on different sorts." )
+    failed = True
+finally:
+  shutil.rmtree( tmpDir, ignore_errors = True )
+
+sys.exit(1 if failed else 0)
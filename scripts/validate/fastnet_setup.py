@@ -0,0 +1,62 @@
+"""
+Synthetic dataset and FastNet core setup shared by the validation scripts.
+
+The dataset has two gaussian patterns (the signal shifted by +0.3 and the
+background by -0.3 on every input) for the training and validation sets. The
+cores tune a [inputs, hidden, 1] tansig network without early stop.
+"""
+
+import numpy as np
+
+from RingerCore import Logger, LoggingLevel
+mainLogger = Logger.getModuleLogger(__name__)
+
+def addArguments( parser, events = 20000, inputs = 100, hidden = 10, epochs = 100 ):
+  """
+    Add the dataset and network options (with these defaults) to parser.
+  """
+  parser.add_argument('--events', type=int, default=events,
+      help = "Number of events for each pattern.")
+  parser.add_argument('--inputs', type=int, default=inputs,
+      help = "Number of input features.")
+  parser.add_argument('--hidden', type=int, default=hidden,
+      help = "Number of hidden neurons.")
+  parser.add_argument('--epochs', type=int, default=epochs,
+      help = "Number of tuning epochs (no early stop is used).")
+  parser.add_argument('--seed', type=int, default=0,
+      help = "Seed for the dataset and the network initialization.")
+
+def syntheticData( args ):
+  """
+    Returns the (trnData, valData) synthetic datasets drawn from args.seed.
+  """
+  rng = np.random.RandomState( args.seed )
+  def pattern( shift ):
+    return np.ascontiguousarray( rng.randn( args.events, args.inputs ) + shift,
+                                 dtype = np.float32 )
+  trnData = [ pattern( .3 ), pattern( -.3 ) ]
+  valData = [ pattern( .3 ), pattern( -.3 ) ]
+  return trnData, valData
+
+def newCore( args, trnData, valData, trainFcn = 'trainrp', seed = None, **props ):
+  """
+    Returns a FastNet core with a new network to be tuned on the datasets by
+    trainFcn for args.epochs. The network is initialized from seed (or
+    args.seed), and the remaining core properties are set from props.
+  """
+  from TuningTools.coreDef import coreConf, TuningToolCores
+  coreConf.core = TuningToolCores.FastNet
+  core = coreConf.core_framework()( level = LoggingLevel.toC( LoggingLevel.WARNING ),
+                                    seed = args.seed if seed is None else seed )
+  core.trainFcn  = trainFcn
+  core.showEvo   = 0
+  core.epochs    = args.epochs
+  core.maxFail   = args.epochs
+  core.multiStop = True
+  for prop, value in props.items():
+    setattr( core, prop, value )
+  if not core.newff( [args.inputs, args.hidden, 1], ['tansig', 'tansig'], core.trainFcn ):
+    mainLogger.fatal("Couldn't allocate new feed-forward!")
+  core.setTrainData( trnData )
+  core.setValData( valData )
+  return core
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the FastNet initializations tuned in lockstep.
+
+The same initializations are tuned on the same synthetic dataset without
+early stop, first one after the other (parallelInits = 1) and then in lockstep
+(one epoch of each initialization on the same parallel region, with the
+threads split across them). Both runs are deterministic, so they must give
+the same tuned networks. The throughput (initializations per second) of each
+run is reported, together with the lockstep gain. Small networks, which do
+not scale over all threads, are the ones which benefit the most.
+"""
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+
+from fastnet_setup import addArguments, syntheticData, newCore
+
+parser = argparse.ArgumentParser(description = __doc__)
+parser.add_argument('--algorithm', default='trainrp',
+    help = "Training algorithm.")
+addArguments( parser, events = 5000, inputs = 20, hidden = 5, epochs = 50 )
+parser.add_argument('--inits', type=int, default=8,
+    help = "Number of initializations to be tuned.")
+parser.add_argument('--parallel-inits', type=int, default=4,
+    help = "Number of initializations tuned in lockstep.")
+parser.add_argument('--batch-size', type=int, default=500,
+    help = "Batch size.")
+args = parser.parse_args()
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+if args.inits < 1 or args.parallel_inits < 2:
+  mainLogger.fatal("Tune at least one initialization with at least two of them in lockstep.")
+
+trnData, valData = syntheticData( args )
+
+def tune( parallelInits ):
+  # The tuned networks must not depend on the threads scheduling:
+  core = newCore( args, trnData, valData, args.algorithm,
+                  batchSize = args.batch_size, deterministic = True,
+                  parallelInits = parallelInits )
+  start = timer()
+  coreOutput = core.train_many_c( args.inits )
+  trainTime = timer() - start
+  params = [ [ ( np.array( discr.weights() ), np.array( discr.bias() ) ) for discr in discrList ]
+             for discrList, _ in coreOutput ]
+  return params, trainTime
+
+serial, serialTime = tune( 1 )
+lockstep, lockstepTime = tune( args.parallel_inits )
+
+mainLogger.info( "Serial: %d initializations took %.3f s (%.2f inits/s).",
+                 args.inits, serialTime, args.inits / serialTime )
+mainLogger.info( "Lockstep (%d at once): %d initializations took %.3f s (%.2f inits/s).",
+                 args.parallel_inits, args.inits, lockstepTime, args.inits / lockstepTime )
+mainLogger.info( "Lockstep gain: x%.2f", serialTime / lockstepTime )
+
+differ = [ init for init, ( serParams, lockParams ) in enumerate( zip( serial, lockstep ) )
+           if len( serParams ) != len( lockParams ) or
+              not all( np.array_equal( serW, lockW ) and np.array_equal( serB, lockB )
+                       for ( serW, serB ), ( lockW, lockB ) in zip( serParams, lockParams ) ) ]
+if len( serial ) != len( lockstep ) or differ:
+  mainLogger.fatal( "Lockstep tuning differs from the serial one on initializations %r.", differ )
+mainLogger.info( "Lockstep tuning gives the same networks as the serial one." )
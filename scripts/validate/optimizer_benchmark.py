@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the FastNet training algorithms.
+
+The same network initialization is tuned on the same synthetic dataset with
+each training algorithm, without early stop. The target SP is a fraction of
+the best validation SP reached by the resilient back-propagation (trainrp),
+unless set explicitly. For each algorithm, the first epoch whose validation SP
+reaches the target is reported, together with the tuning time (training and
+validation phases) spent until it.
+"""
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+
+from fastnet_setup import addArguments, syntheticData, newCore
+
+parser = argparse.ArgumentParser(description = __doc__)
+parser.add_argument('--algorithms', nargs='+',
+    default=['trainrp', 'traingd', 'traingdm', 'trainadam'],
+    help = "Training algorithms to benchmark.")
+addArguments( parser, epochs = 200 )
+parser.add_argument('--batch-size', type=int, default=None,
+    help = "Batch size (defaults to all events of each pattern).")
+parser.add_argument('--learning-rate', type=float, default=None,
+    help = "Step size of the traingd, traingdm and trainadam algorithms.")
+parser.add_argument('--target-sp', type=float, default=None,
+    help = "Validation SP to be reached.")
+parser.add_argument('--target-fraction', type=float, default=.995,
+    help = "Fraction of the best trainrp validation SP to be reached, when "
+           "no target SP is set.")
+args = parser.parse_args()
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+trnData, valData = syntheticData( args )
+
+def tune( algorithm ):
+  props = dict( batchSize = args.batch_size or args.events )
+  if args.learning_rate is not None:
+    props['learningRate'] = args.learning_rate
+  core = newCore( args, trnData, valData, algorithm, **props )
+  start = timer()
+  _, evolution = core.train_c()
+  trainTime = timer() - start
+  sp = np.asarray( evolution['bestsp_point_sp_val'], dtype = np.float64 )
+  # Time spent on each epoch training and validation phases:
+  epochTimes = sum( np.asarray( evolution[key], dtype = np.float64 ) for key in
+                    ( 'time_trn_prop', 'time_trn_reduce', 'time_trn_update'
+                    , 'time_val_prop', 'time_val_roc' ) )
+  return sp, np.cumsum( epochTimes ), trainTime
+
+results = dict()
+for algorithm in args.algorithms:
+  results[algorithm] = tune( algorithm )
+  sp, cumTimes, trainTime = results[algorithm]
+  mainLogger.info( "%s: best validation SP %.4f (epoch %d) on %d epochs, tuning took %.3f s.",
+                   algorithm, sp.max(), int( sp.argmax() ), len( sp ), trainTime )
+
+targetSP = args.target_sp
+if targetSP is None:
+  if not 'trainrp' in results:
+    mainLogger.fatal("Set the target SP or include trainrp on the benchmarked algorithms.")
+  targetSP = args.target_fraction * results['trainrp'][0].max()
+mainLogger.info( "Target validation SP: %.4f", targetSP )
+
+for algorithm in args.algorithms:
+  sp, cumTimes, _ = results[algorithm]
+  reached = np.flatnonzero( sp >= targetSP )
+  if reached.size:
+    epoch = reached[0]
+    mainLogger.info( "%s reached the target SP on epoch %d after %.3f s.",
+                     algorithm, epoch, cumTimes[epoch] )
+  else:
+    mainLogger.info( "%s did NOT reach the target SP in %d epochs.",
+                     algorithm, len( sp ) )
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the FastNet deterministic gradient reduction.
+
+The same network initialization is tuned on the same synthetic dataset with
+the default and the deterministic reductions, for each number of threads. The
+tuning throughput (training events per second) is reported, as well as
+whether the tuned networks are the same (bit by bit) for all numbers of
+threads, which is expected for the deterministic reduction.
+
+Since the number of threads is fixed when the core is loaded, each tuning
+runs on its own process, with OMP_NUM_THREADS set accordingly.
+"""
+
+import argparse, hashlib, os, subprocess, sys
+from timeit import default_timer as timer
+import numpy as np
+
+from fastnet_setup import addArguments, syntheticData, newCore
+
+parser = argparse.ArgumentParser(description = __doc__)
+parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4],
+    help = "Numbers of threads to benchmark.")
+addArguments( parser )
+parser.add_argument('--tune', type=int, choices=[0, 1], default=None,
+    help = argparse.SUPPRESS) # Internal: tune once (with the deterministic
+                              # reduction if 1) and print the results
+args = parser.parse_args()
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+if args.tune is not None:
+  trnData, valData = syntheticData( args )
+  # All events of each pattern are presented on every epoch:
+  core = newCore( args, trnData, valData, batchSize = args.events,
+                  deterministic = bool( args.tune ) )
+  start = timer()
+  nets, evolution = core.train_c()
+  trainTime = timer() - start
+  digest = hashlib.md5()
+  for net in nets:
+    digest.update( np.asarray( net.weights(), dtype = np.float32 ).tobytes() )
+    digest.update( np.asarray( net.bias(), dtype = np.float32 ).tobytes() )
+  # Time spent on the training phases (propagation, reduction and update):
+  trnTime = sum( float( np.sum( evolution[key] ) ) for key in
+                 ( 'time_trn_prop', 'time_trn_reduce', 'time_trn_update' ) )
+  print( "%r %r %s" % ( trainTime, trnTime, digest.hexdigest() ) )
+  sys.exit(0)
+
+# Number of training events presented on the tuning:
+nEvents = 2 * args.events * args.epochs
+results = dict()
+for deterministic in (0, 1):
+  for nThreads in args.threads:
+    env = dict( os.environ, OMP_NUM_THREADS = str( nThreads ) )
+    cmd = [ sys.executable, os.path.abspath( __file__ ), '--tune', str( deterministic )
+          , '--events', str( args.events ), '--inputs', str( args.inputs )
+          , '--hidden', str( args.hidden ), '--epochs', str( args.epochs )
+          , '--seed', str( args.seed ) ]
+    out = subprocess.check_output( cmd, env = env ).decode().split('\n')
+    trainTime, trnTime, digest = [ l for l in out if l.strip() ][-1].split()
+    results[deterministic, nThreads] = ( float( trainTime ), float( trnTime ), digest )
+    mainLogger.info( "%s reduction with %d thread(s): tuning took %.3f s "
+                     "(training %.0f events/s).",
+                     'deterministic' if deterministic else 'default', nThreads,
+                     float( trainTime ), nEvents / float( trnTime ) )
+
+for nThreads in args.threads:
+  mainLogger.info( "Deterministic reduction training throughput cost with %d "
+                   "thread(s): %.1f%%", nThreads,
+                   100. * ( results[1, nThreads][1] / results[0, nThreads][1] - 1. ) )
+for deterministic in (0, 1):
+  digests = set( results[deterministic, nThreads][2] for nThreads in args.threads )
+  mainLogger.info( "The %s reduction tuned networks are %s for all numbers of threads.",
+                   'deterministic' if deterministic else 'default',
+                   'the same' if len( digests ) == 1 else 'NOT the same' )
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""
+Validate the resume of interrupted FastNet trainings.
+
+The same network initialization is trained on the same synthetic dataset
+without early stop, first uninterrupted and then resumed from the training
+state checkpointed after the interruption epoch. The resumed training must
+give the same weights and bias as the uninterrupted one.
+"""
+
+import argparse
+from copy import deepcopy
+import numpy as np
+
+from fastnet_setup import addArguments, syntheticData, newCore
+
+parser = argparse.ArgumentParser(description = __doc__)
+parser.add_argument('--algorithm', default='trainrp',
+    help = "Training algorithm.")
+parser.add_argument('--sampling', default='pattern',
+    choices = ['pattern', 'stratified', 'weighted', 'hardnegative'],
+    help = "Training events sampling.")
+addArguments( parser, events = 5000, inputs = 20, hidden = 5 )
+parser.add_argument('--interrupt-epoch', type=int, default=40,
+    help = "Epoch after which the training is interrupted.")
+parser.add_argument('--batch-size', type=int, default=500,
+    help = "Batch size.")
+args = parser.parse_args()
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+if not 0 < args.interrupt_epoch < args.epochs:
+  mainLogger.fatal("The interruption epoch must be within the tuning epochs.")
+
+trnData, valData = syntheticData( args )
+
+def resumeCore( seed ):
+  # The results must not depend on the threads scheduling:
+  return newCore( args, trnData, valData, args.algorithm, seed = seed,
+                  sampling = args.sampling, batchSize = args.batch_size,
+                  deterministic = True )
+
+def discrParams( coreOutput ):
+  discrList, _ = coreOutput[0]
+  return [ ( np.array( discr.weights() ), np.array( discr.bias() ) ) for discr in discrList ]
+
+# Uninterrupted training, checkpointing every epoch:
+states = {}
+def checkpoint( init, state, output ):
+  if state is not None and state['epoch'] == args.interrupt_epoch:
+    states[init] = deepcopy( state )
+core = resumeCore( args.seed )
+core.setCheckpoint( checkpoint, 0. )
+reference = discrParams( core.train_many_c( 1 ) )
+if not 0 in states:
+  mainLogger.fatal("No training state was checkpointed after epoch %d.", args.interrupt_epoch)
+
+# Training resumed from the interruption on a new core (with another seed,
+# which must be restored from the state):
+core = resumeCore( args.seed + 1 )
+core.setResumeState( states[0] )
+resumed = discrParams( core.train_many_c( 1 ) )
+
+identical = len( reference ) == len( resumed ) and \
+            all( np.array_equal( refW, resW ) and np.array_equal( refB, resB )
+                 for ( refW, refB ), ( resW, resB ) in zip( reference, resumed ) )
+maxDiff = max( max( np.abs( refW - resW ).max(), np.abs( refB - resB ).max() )
+               for ( refW, refB ), ( resW, resB ) in zip( reference, resumed ) )
+if identical:
+  mainLogger.info( "Resumed training after epoch %d gives the same weights as the uninterrupted one.",
+                   args.interrupt_epoch )
+else:
+  mainLogger.fatal( "Resumed training after epoch %d differs from the uninterrupted one (max. difference %g).",
+                    args.interrupt_epoch, maxDiff )
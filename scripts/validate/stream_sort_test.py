@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""
+Check that the sorts extracted and pre-processed by chunks of events (see
+SortStreamer) match the ones split by the CrossValid and pre-processed in
+memory.
+"""
+
+import sys, shutil, tempfile
+import numpy as np
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+from TuningTools.coreDef import npCurrent
+from TuningTools.CrossValid import CrossValid
+from TuningTools.PreProc import PreProcChain, RemoveMean, UnitaryRMS, MapStd, Norm1
+from TuningTools.StreamData import SortStreamer
+
+rng = np.random.RandomState( 0 )
+def pattern( nEvents, nInputs = 20 ):
+  return npCurrent.fp_array( np.abs( rng.randn( *npCurrent.shape( npat = nInputs, nobs = nEvents ) ) ) + 1. )
+patterns = [ pattern( 1003 ), pattern( 857 ) ]
+
+tmpDir = tempfile.mkdtemp()
+try:
+  failed = False
+  for crossValid in ( CrossValid( nSorts = 2, nBoxes = 10, nTrain = 6, nValid = 3, seed = 0 ),
+                      CrossValid( method = 'JackKnife', nBoxes = 10 ) ):
+    for newChain in ( lambda: PreProcChain( RemoveMean() ), lambda: PreProcChain( UnitaryRMS() ),
+                      lambda: PreProcChain( MapStd() ), lambda: PreProcChain( Norm1(), MapStd() ) ):
+      for sort in range( 2 ):
+        ppChain = newChain()
+        trnData, valData, tstData = crossValid( patterns, sort )
+        ppChain.takeParams( trnData )
+        reference = [ ppChain( trnData ), ppChain( valData ), ppChain( tstData ) ]
+        ppChain = newChain()
+        streamed = SortStreamer( tmpDir, chunkSize = 97 )( patterns, sort, crossValid, ppChain )
+        for name, refData, data in zip( ( 'train', 'validation', 'test' ), reference, streamed ):
+          if len( refData ) != len( data ) or \
+              not all( ref.shape == cData.shape and np.allclose( ref, cData, rtol = 1e-5, atol = 1e-5 )
+                       for ref, cData in zip( refData, data ) ):
+            mainLogger.error( "The %s dataset of sort %d pre-processed by %s differs.", name, sort, ppChain )
+            failed = True
+        mainLogger.info( "Checked sort %d pre-processed by %s.", sort, ppChain )
+finally:
+  shutil.rmtree( tmpDir, ignore_errors = True )
+
+sys.exit(1 if failed else 0)
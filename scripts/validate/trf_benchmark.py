@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the FastNet exact and fast (util::fast_tanh) transfer functions.
+
+The same network initialization is tuned on the same synthetic dataset using
+both modes. The tuning and propagation times are reported, as well as the
+differences between the tuned discriminators outputs and validation curves,
+which validate the fast mode against the exact one.
+"""
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+
+from fastnet_setup import addArguments, syntheticData, newCore
+
+parser = argparse.ArgumentParser(description = __doc__)
+addArguments( parser )
+parser.add_argument('--sim-repeat', type=int, default=20,
+    help = "Number of times the dataset is propagated to time sim_c.")
+args = parser.parse_args()
+
+from RingerCore import Logger
+mainLogger = Logger.getModuleLogger(__name__)
+
+trnData, valData = syntheticData( args )
+simData = np.concatenate( valData )
+
+results = dict()
+for fastTanh in (False, True):
+  core = newCore( args, trnData, valData, fastTanh = fastTanh )
+  start = timer()
+  nets, evolution = core.train_c()
+  trainTime = timer() - start
+  net = nets[0]
+  start = timer()
+  for _ in range( args.sim_repeat ):
+    output = core.sim_c( net, simData )
+  simTime = ( timer() - start ) / args.sim_repeat
+  results[fastTanh] = { 'train' : trainTime, 'sim' : simTime,
+                        'output' : np.array( output ),
+                        'mse_val' : np.asarray( evolution['mse_val'] ), }
+  mainLogger.info( "%s tanh: tuning took %.3f s and sim_c %.4f s",
+                   'fast' if fastTanh else 'exact', trainTime, simTime )
+
+exact, fast = results[False], results[True]
+mainLogger.info( "Tuning speedup: %.2f, sim_c speedup: %.2f",
+                 exact['train'] / fast['train'], exact['sim'] / fast['sim'] )
+mainLogger.info( "Maximum absolute difference on the tuned discriminator outputs: %g",
+                 np.max( np.abs( exact['output'] - fast['output'] ) ) )
+mainLogger.info( "Maximum absolute difference on the validation mse evolution: %g",
+                 np.max( np.abs( exact['mse_val'] - fast['mse_val'] ) ) )